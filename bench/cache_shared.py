@@ -0,0 +1,142 @@
+"""Per-worker vs. shared response cache — hit rate and memory per worker.
+
+Forks N workers the way ``MultiWorkerServer`` does.  The ``Cache`` is built
+in the parent first, so the shared backend's mmap is inherited.  Each worker
+then drives the middleware directly with a Zipf-distributed URL stream, so a
+few hot URLs take most of the traffic over a long tail.  No sockets are
+involved: the numbers isolate the cache.
+
+Reports, for ``MemoryBackend`` (one cache per worker) and
+``SharedMemoryBackend`` (one cache for all of them):
+
+* **renders**: how many times the handler ran, summed over workers.  A
+  per-worker cache renders each hot URL once per worker.
+* **hit rate**: requests served without running the handler.
+* **PSS/worker**: growth in proportional set size over the run, averaged
+  over workers.  PSS charges each shared page 1/N to each of the N processes
+  that map it, so it is the fair per-worker memory figure.  Linux only.
+
+Run from the repo root::
+
+    python bench/cache_shared.py [--workers 8] [--requests 20000] [--urls 2000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from blackbull.connection import Connection
+from blackbull.middleware import Cache, SharedMemoryBackend
+
+_BODY = 8 * 1024
+
+
+def _pss_kib() -> int | None:
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except OSError:
+        return None
+    return None
+
+
+def _zipf_paths(n_urls: int, count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    weights = [1.0 / (rank + 1) for rank in range(n_urls)]
+    return [f'/item/{i}' for i in rng.choices(range(n_urls), weights, k=count)]
+
+
+async def _drive(cache, paths: list[str]) -> int:
+    renders = 0
+
+    async def handler(conn, receive, send):
+        nonlocal renders
+        renders += 1
+        body = conn.path.encode().ljust(_BODY, b'.')
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/html')]})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(event):
+        pass
+
+    for path in paths:
+        conn = Connection.from_scope({'type': 'http', 'method': 'GET',
+                                      'path': path, 'query_string': b'',
+                                      'headers': []})
+        await cache(conn, receive, send, handler)
+    return renders
+
+
+def _worker(cache, paths, barrier, results, worker_id) -> None:
+    barrier.wait()
+    before = _pss_kib()
+    renders = asyncio.run(_drive(cache, paths))
+    barrier.wait()                     # every worker has touched its pages
+    after = _pss_kib()
+    growth = after - before if before is not None and after is not None else None
+    results.put((worker_id, renders, growth))
+    barrier.wait()                     # keep mappings alive until all measured
+
+
+def _run(label: str, cache, workers: int, requests: int, urls: int) -> None:
+    ctx = multiprocessing.get_context('fork')
+    barrier = ctx.Barrier(workers)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=_worker,
+                         args=(cache, _zipf_paths(urls, requests, seed=i),
+                               barrier, results, i))
+             for i in range(workers)]
+    for p in procs:
+        p.start()
+    rows = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    renders = sum(r[1] for r in rows)
+    total = workers * requests
+    growths = [r[2] for r in rows if r[2] is not None]
+    pss = (f'{sum(growths) / len(growths) / 1024:>11.1f}'
+           if len(growths) == len(rows) else f'{"-":>11}')
+    print(f'{label:<8} | {renders:>8} | {100 * (total - renders) / total:>7.1f}% | {pss}')
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--workers', type=int, default=8)
+    ap.add_argument('--requests', type=int, default=20_000,
+                    help='requests per worker')
+    ap.add_argument('--urls', type=int, default=2_000,
+                    help='distinct URLs in the Zipf population')
+    args = ap.parse_args()
+
+    print(f'# {args.workers} workers x {args.requests} requests, '
+          f'{args.urls} URLs (Zipf), {_BODY // 1024} KiB bodies')
+    header = f'{"backend":<8} | {"renders":>8} | {"hit rate":>8} | {"PSS/worker":>11}'
+    print(header)
+    print('-' * len(header))
+    _run('memory', Cache(max_entries=args.urls), args.workers,
+         args.requests, args.urls)
+    shared = SharedMemoryBackend(max_bytes=args.urls * 2 * _BODY * 2,
+                                 max_entries=args.urls)
+    _run('shared', Cache(backend=shared), args.workers, args.requests, args.urls)
+    stats = shared.stats()
+    print(f'(shared store: {stats["entries"]} entries, '
+          f'{stats["bytes_used"] / 2**20:.1f} MiB in slabs, '
+          f'{stats["evictions"]} evictions)')
+    print('PSS/worker in MiB; the shared store is charged 1/N to each worker.')
+
+
+if __name__ == '__main__':
+    main()
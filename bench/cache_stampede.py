@@ -0,0 +1,115 @@
+"""Response latency across a cache TTL boundary — the thundering herd.
+
+A steady stream of requests for one hot URL runs through ``Cache`` with a
+short ``max_age``.  The handler stands in for a database query: it takes
+``--render-ms`` and shares a pool of ``--db-slots`` connections, so requests
+that render at the same time queue behind each other.  Every time the entry
+expires, the requests that arrive before it is stored again all miss.
+
+Three configurations:
+
+* **no coalescing** — each of those misses runs the handler (the old
+  behaviour).
+* **coalesce** — one handler call per expiry; the other misses wait for it.
+* **coalesce + swr** — ``stale-while-revalidate``: the stale entry is
+  served while one background call refreshes it, so nobody waits.
+
+Reports handler calls and p50 / p99 / max request latency.  No sockets are
+involved: the numbers isolate the cache.
+
+Run from the repo root::
+
+    python bench/cache_stampede.py [--rps 2000] [--seconds 3] [--ttl 1]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from blackbull.connection import Connection
+from blackbull.middleware import Cache
+
+
+async def _run(cache: Cache, rps: int, seconds: float, render_ms: float,
+               db_slots: int) -> tuple[int, list[float]]:
+    db = asyncio.Semaphore(db_slots)
+    renders = 0
+
+    async def handler(conn, receive, send):
+        nonlocal renders
+        renders += 1
+        async with db:
+            await asyncio.sleep(render_ms / 1000)
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/html')]})
+        await send({'type': 'http.response.body', 'body': b'x' * 4096})
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(event):
+        pass
+
+    latencies: list[float] = []
+
+    async def one() -> None:
+        start = time.perf_counter()
+        conn = Connection.from_scope({'type': 'http', 'method': 'GET',
+                                      'path': '/hot', 'query_string': b'',
+                                      'headers': []})
+        await cache(conn, receive, send, handler)
+        latencies.append(time.perf_counter() - start)
+
+    tasks = []
+    interval = 1 / rps
+    start = time.perf_counter()
+    sent = 0
+    while (elapsed := time.perf_counter() - start) < seconds:
+        due = int(elapsed / interval)
+        for _ in range(due - sent):
+            tasks.append(asyncio.create_task(one()))
+        sent = max(sent, due)
+        await asyncio.sleep(0.001)
+    await asyncio.gather(*tasks)
+    return renders, latencies
+
+
+def _pct(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--rps', type=int, default=2000)
+    ap.add_argument('--seconds', type=float, default=3.0)
+    ap.add_argument('--ttl', type=int, default=1, help='max_age in seconds')
+    ap.add_argument('--render-ms', type=float, default=20.0)
+    ap.add_argument('--db-slots', type=int, default=4)
+    args = ap.parse_args()
+
+    print(f'# {args.rps} req/s for {args.seconds:g} s, max_age={args.ttl} s, '
+          f'{args.render_ms:g} ms render, {args.db_slots} DB slots')
+    header = (f'{"config":<16} | {"renders":>7} | {"p50 ms":>7} | '
+              f'{"p99 ms":>7} | {"max ms":>7}')
+    print(header)
+    print('-' * len(header))
+    for label, cache in (
+            ('no coalescing', Cache(max_age=args.ttl, coalesce=False)),
+            ('coalesce', Cache(max_age=args.ttl)),
+            ('coalesce + swr', Cache(max_age=args.ttl,
+                                     stale_while_revalidate=args.ttl))):
+        renders, lat = asyncio.run(_run(cache, args.rps, args.seconds,
+                                        args.render_ms, args.db_slots))
+        print(f'{label:<16} | {renders:>7} | {_pct(lat, 0.50):>7.2f} | '
+              f'{_pct(lat, 0.99):>7.2f} | {max(lat) * 1000:>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""Unary gRPC calls/sec — raw-bytes handlers vs object-typed methods.
+
+Drives ``serve_grpc`` in-process (no sockets, no HTTP/2 framing) with one
+unary request per call, three ways:
+
+* ``raw`` — the handler takes and returns ``bytes``: the baseline;
+* ``by hand`` — the handler decodes and encodes the message itself, which is
+  what every servicer did before methods could carry codecs;
+* ``codecs`` — the same codec registered with ``request_deserializer`` /
+  ``response_serializer``, the handler exchanging objects.
+
+The codec is protobuf's ``Struct`` when ``protobuf`` is installed, JSON
+otherwise.  For each message size the script prints calls/sec and the longest
+event-loop stall a 1 ms ticker saw while the calls ran — the number
+``BB_GRPC_CODEC_OFFLOAD_BYTES`` exists to cut once messages are large.
+
+Run:  python bench/grpc_codec.py [--seconds 1.0] [--offload 1048576]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blackbull.grpc import GrpcServiceRegistry, encode_message
+from blackbull.grpc import asgi as grpc_asgi
+from blackbull.grpc.asgi import serve_grpc
+
+try:
+    from google.protobuf.struct_pb2 import Struct
+except ImportError:
+    Struct = None
+
+SCOPE = {'type': 'http', 'path': '/bench.Bench/Call',
+         'headers': [(b'content-type', b'application/grpc')]}
+
+
+def _codec():
+    if Struct is None:
+        return 'json', json.loads, lambda obj: json.dumps(obj).encode()
+
+    def dumps(obj):
+        message = Struct()
+        message.update(obj)
+        return message.SerializeToString()
+    return 'protobuf Struct', Struct.FromString, dumps
+
+
+def _registries(loads, dumps):
+    raw, by_hand, codecs = (GrpcServiceRegistry() for _ in range(3))
+
+    async def echo(request, context):
+        return request
+
+    async def echo_by_hand(request, context):
+        return dumps(loads(request))
+
+    raw.add_method(SCOPE['path'], echo)
+    by_hand.add_method(SCOPE['path'], echo_by_hand)
+    codecs.add_method(SCOPE['path'], echo, request_deserializer=loads,
+                      response_serializer=dumps)
+    return {'raw': raw, 'by hand': by_hand, 'codecs': codecs}
+
+
+async def _send(event):
+    pass
+
+
+async def _rate(reg, framed: bytes, seconds: float) -> tuple[float, float]:
+    event = {'type': 'http.request', 'body': framed, 'more_body': False}
+
+    async def receive():
+        return event
+
+    stall = 0.0
+    running = True
+
+    async def ticker():
+        nonlocal stall
+        last = time.perf_counter()
+        while running:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, now - last - 0.001)
+            last = now
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.01)
+    calls, start = 0, time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < seconds:
+        await serve_grpc(reg, SCOPE, receive, _send)
+        calls += 1
+        await asyncio.sleep(0)
+    running = False
+    await tick
+    return calls / elapsed, stall * 1000
+
+
+async def _main(seconds: float, offload: int) -> None:
+    grpc_asgi._CODEC_OFFLOAD_BYTES = offload
+    name, loads, dumps = _codec()
+    print(f'# codec: {name}, BB_GRPC_CODEC_OFFLOAD_BYTES={offload}')
+    print(f'{"message":>8} | {"handler":<8} | {"calls/s":>9} | {"max stall ms":>12}')
+    for fields, label in ((4, 'small'), (100_000, 'large')):
+        payload = dumps({f'field{i}': f'value {i}' for i in range(fields)})
+        framed = encode_message(payload)
+        for handler, reg in _registries(loads, dumps).items():
+            rate, stall = await _rate(reg, framed, seconds)
+            print(f'{label:>8} | {handler:<8} | {rate:>9,.0f} | {stall:>12.2f}')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--seconds', type=float, default=1.0,
+                    help='wall time per measurement')
+    ap.add_argument('--offload', type=int, default=1024 * 1024,
+                    help='BB_GRPC_CODEC_OFFLOAD_BYTES for the run (0 = inline)')
+    args = ap.parse_args()
+    asyncio.run(_main(args.seconds, args.offload))
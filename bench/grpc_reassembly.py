@@ -0,0 +1,97 @@
+"""gRPC request-stream reassembly — messages/sec by message size.
+
+Drives ``_iter_request_messages`` (the client-/bidi-streaming request path)
+with a stub ``receive`` that hands over the framed stream in DATA-frame-sized
+chunks, the way the HTTP/2 layer does.  Two shapes:
+
+* **64 B messages** — thousands per chunk; the per-message overhead.
+* **1 MiB messages** — each straddles dozens of chunks; the copy cost.
+
+``legacy`` is the previous algorithm, inlined for comparison: every chunk
+``extend``-ed into a growing ``bytearray``, then each message copied out
+again with ``bytes(buf[...])`` — two copies per payload byte, plus the
+reallocations as the buffer grows to hold a large message.
+
+Run::
+
+    python bench/grpc_reassembly.py [--chunk 16384] [--seconds 1.0]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import struct
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from blackbull.grpc import encode_message
+from blackbull.grpc.asgi import _iter_request_messages
+
+_PREFIX = struct.Struct('>BI')
+
+
+async def _legacy(receive, encoding):
+    buf = bytearray()
+    more = True
+    while more:
+        event = await receive()
+        chunk = event.get('body', b'')
+        if chunk:
+            buf.extend(chunk)
+        more = event.get('more_body', False)
+        while len(buf) >= 5:
+            flag, length = _PREFIX.unpack_from(buf, 0)
+            if len(buf) - 5 < length:
+                break
+            message = bytes(buf[5:5 + length])
+            del buf[:5 + length]
+            yield message
+
+
+def _receiver(stream: bytes, chunk: int):
+    events = [{'type': 'http.request', 'body': stream[i:i + chunk],
+               'more_body': i + chunk < len(stream)}
+              for i in range(0, len(stream), chunk)]
+    it = iter(events)
+
+    async def receive():
+        return next(it)
+    return receive
+
+
+async def _rate(impl, stream: bytes, n: int, chunk: int, seconds: float) -> float:
+    done = 0
+    start = time.perf_counter()
+    while True:
+        async for _ in impl(_receiver(stream, chunk), b'identity'):
+            pass
+        done += n
+        elapsed = time.perf_counter() - start
+        if elapsed >= seconds:
+            return done / elapsed
+
+
+async def _main(chunk: int, seconds: float) -> None:
+    print(f'# gRPC LPM reassembly, {chunk}-byte DATA chunks')
+    header = f'{"message":>8} | {"per stream":>10} | {"legacy msg/s":>13} | {"new msg/s":>13} | {"x":>5}'
+    print(header)
+    print('-' * len(header))
+    for size, count, label in ((64, 20_000, '64 B'), (1 << 20, 32, '1 MiB')):
+        stream = encode_message(os.urandom(size)) * count
+        old = await _rate(_legacy, stream, count, chunk, seconds)
+        new = await _rate(_iter_request_messages, stream, count, chunk, seconds)
+        print(f'{label:>8} | {count:>10} | {old:>13,.0f} | {new:>13,.0f} | {new / old:>5.2f}')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--chunk', type=int, default=16384,
+                    help='DATA chunk size handed to receive()')
+    ap.add_argument('--seconds', type=float, default=1.0,
+                    help='minimum wall time per measurement')
+    args = ap.parse_args()
+    asyncio.run(_main(args.chunk, args.seconds))
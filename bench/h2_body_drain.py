@@ -0,0 +1,87 @@
+"""HTTP/2 request-body read — one DATA frame per await vs ``next_chunks``.
+
+Feeds a *size* MiB upload into an ``HTTP2Recipient`` (consume-time crediting,
+as ``HTTP2Actor`` builds it) in 16 KiB DATA frames, *burst* frames per event
+loop turn — the shape a socket read that carried several frames leaves in the
+stream queue — while a reader drains it two ways:
+
+* ``next_chunk`` — the one-chunk channel: one queue await and one credit
+  callback (a WINDOW_UPDATE pair on the wire) per frame;
+* ``next_chunks`` — the bulk drain ``read_body`` now takes: one await per
+  burst, the whole burst credited in one callback.
+
+For each it prints MiB/s, reader awaits and credit callbacks per upload.
+
+Run:  python bench/h2_body_drain.py [--size 50] [--burst 8] [--repeat 3]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blackbull.protocol.frame_types import Data, DataFrameFlags, FrameTypes
+from blackbull.server.recipient import HTTP2Recipient
+
+FRAME = 16384
+
+
+async def _run(size: int, burst: int, bulk: bool) -> tuple[float, int, int]:
+    credits = 0
+
+    async def credit(n: int) -> None:
+        nonlocal credits
+        credits += 1
+
+    r = HTTP2Recipient(credit_callback=credit, credit_budget=2 ** 31 - 1,
+                       max_body=0, min_rate=0, min_rate_grace=0)
+    payload = os.urandom(FRAME)
+    frames = size // FRAME
+
+    async def produce():
+        for i in range(frames):
+            flags = DataFrameFlags.END_STREAM if i == frames - 1 else 0
+            r.put_DATAFrame(Data(FRAME, FrameTypes.DATA, flags, 1, data=payload))
+            if i % burst == burst - 1:
+                await asyncio.sleep(0)
+
+    awaits = 0
+    start = time.perf_counter()
+    producer = asyncio.ensure_future(produce())
+    chunks: list[bytes] = []
+    if bulk:
+        while (batch := await r.next_chunks()) is not None:
+            awaits += 1
+            chunks += batch
+    else:
+        while (chunk := await r.next_chunk()) is not None:
+            awaits += 1
+            chunks.append(chunk)
+    body = b''.join(chunks)
+    elapsed = time.perf_counter() - start
+    await producer
+    assert len(body) == frames * FRAME
+    return len(body) / elapsed / 2 ** 20, awaits, credits
+
+
+def main(size: int, burst: int, repeat: int) -> None:
+    print(f'{"reader":<12} | {"MiB/s":>8} | {"awaits":>7} | {"credit calls":>12}')
+    for name, bulk in (('next_chunk', False), ('next_chunks', True)):
+        runs = [asyncio.run(_run(size * 2 ** 20, burst, bulk))
+                for _ in range(repeat)]
+        rate = max(run[0] for run in runs)
+        _, awaits, credits = runs[-1]
+        print(f'{name:<12} | {rate:>8.0f} | {awaits:>7} | {credits:>12}')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--size', type=int, default=50, help='upload size in MiB')
+    ap.add_argument('--burst', type=int, default=8,
+                    help='DATA frames enqueued per event-loop turn')
+    ap.add_argument('--repeat', type=int, default=3)
+    args = ap.parse_args()
+    main(args.size, args.burst, args.repeat)
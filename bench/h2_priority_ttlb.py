@@ -0,0 +1,117 @@
+"""HTTP/2 egress-priority benchmark — time-to-last-byte of urgent streams.
+
+Drives real ``HTTP2Sender`` objects for one connection over a simulated link
+(a writer that takes ``len(frame) / bandwidth`` seconds per write, the way a
+drained socket does), with a page-load-shaped mix:
+
+- a few large low-urgency images (``u=5``), started first and streamed in
+  64 KiB body chunks;
+- incremental medium responses (``u=4, i``);
+- render-blocking stylesheets/scripts (``u=0``) that arrive while the images
+  are already on the wire.
+
+Reports time-to-last-byte of the urgent streams with the connection's
+``PriorityScheduler`` and without one (the unrefereed order every stream got
+before the scheduler).  The link is simulated so the numbers measure the
+*order* of frames, not the speed of the local loopback.
+
+Run:  python bench/h2_priority_ttlb.py [--bandwidth-mbps 50] [--urgent 10]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from blackbull.server.h2_scheduler import PriorityScheduler
+from blackbull.server.sender import AbstractWriter, ConnectionWindow, HTTP2Sender
+
+_CHUNK = 64 * 1024
+
+
+class _Link(AbstractWriter):
+    """A serial link: one write at a time, each costing its transfer time."""
+
+    def __init__(self, bytes_per_s: float) -> None:
+        self._rate = bytes_per_s
+        self._lock = asyncio.Lock()
+
+    async def write(self, data: bytes) -> None:
+        async with self._lock:
+            await asyncio.sleep(len(data) / self._rate)
+
+    async def close(self) -> None:
+        pass
+
+
+async def _stream(sender: HTTP2Sender, size: int, done: dict, sid: int,
+                  t0: float) -> None:
+    sent = 0
+    while sent < size:
+        n = min(_CHUNK, size - sent)
+        sent += n
+        await sender._write_data(b'x' * n, end_stream=sent >= size)
+    done[sid] = time.perf_counter() - t0
+
+
+async def _run(bandwidth: float, urgent: int, *, scheduled: bool) -> list[float]:
+    link = _Link(bandwidth)
+    window = ConnectionWindow(1 << 40)
+    scheduler = PriorityScheduler() if scheduled else None
+    done: dict[int, float] = {}
+    tasks = []
+    sid = 1
+
+    def _sender(urgency: int, incremental: bool) -> HTTP2Sender:
+        nonlocal sid
+        if scheduler is not None:
+            scheduler.set_priority(sid, {'urgency': urgency,
+                                         'incremental': incremental})
+        s = HTTP2Sender(link, None, sid, conn_window=window,
+                        initial_window=1 << 40, flow_control_timeout=0,
+                        scheduler=scheduler)
+        sid += 2
+        return s
+
+    t0 = time.perf_counter()
+    for _ in range(3):                       # hero images
+        s = _sender(5, False)
+        tasks.append(asyncio.ensure_future(
+            _stream(s, 2 * 1024 * 1024, done, s._stream_id, t0)))
+    for _ in range(6):                       # incremental medium responses
+        s = _sender(4, True)
+        tasks.append(asyncio.ensure_future(
+            _stream(s, 256 * 1024, done, s._stream_id, t0)))
+    await asyncio.sleep(0.02)                # images are already flowing
+    urgent_ids = []
+    for _ in range(urgent):                  # render-blocking CSS / JS
+        s = _sender(0, False)
+        urgent_ids.append(s._stream_id)
+        tasks.append(asyncio.ensure_future(
+            _stream(s, 24 * 1024, done, s._stream_id, t0)))
+    await asyncio.gather(*tasks)
+    return sorted(done[i] * 1000 for i in urgent_ids)
+
+
+def _report(label: str, ttlb: list[float]) -> None:
+    p50 = statistics.median(ttlb)
+    p95 = ttlb[min(len(ttlb) - 1, int(len(ttlb) * 0.95))]
+    print(f'{label:<14} {p50:>9.1f} {p95:>9.1f} {ttlb[-1]:>9.1f}')
+
+
+async def _main(bandwidth_mbps: float, urgent: int) -> None:
+    rate = bandwidth_mbps * 1_000_000 / 8
+    print(f'# urgent-stream TTLB (ms), {bandwidth_mbps:g} Mbit/s link, '
+          f'{urgent} u=0 streams behind 3x2 MiB u=5 + 6x256 KiB u=4,i')
+    print(f'{"mode":<14} {"p50":>9} {"p95":>9} {"max":>9}')
+    _report('unscheduled', await _run(rate, urgent, scheduled=False))
+    _report('rfc9218', await _run(rate, urgent, scheduled=True))
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser()
+    ap.add_argument('--bandwidth-mbps', type=float, default=50.0)
+    ap.add_argument('--urgent', type=int, default=10)
+    args = ap.parse_args()
+    asyncio.run(_main(args.bandwidth_mbps, args.urgent))
@@ -0,0 +1,125 @@
+"""HPACK codec microbenchmark — ``blackbull.protocol.hpack_codec`` vs ``hpack``.
+
+Times each codec on the header blocks an HTTP/2 server handles:
+
+* ``decode first``   — a browser-style request on a fresh connection
+  (literals with incremental indexing, Huffman-coded);
+* ``decode repeat``  — the same request again, now mostly dynamic-table
+  references (timed together with the first, which fills the table);
+* ``decode static``  — a block of static references and never-indexed
+  literals, as sent by clients that run with a zero-size dynamic table;
+  BlackBull serves repeats of it from the shared decoded-block cache;
+* ``encode response`` — a typical response header list, twice on one
+  connection (first literal, then indexed);
+* ``encode steady``  — the same list again and again on one long-lived
+  connection, which BlackBull's encoder replays from its memo;
+* ``encode static-only`` — the list on one long-lived connection with a
+  ``date`` that changes every time.  BlackBull runs in static-only mode
+  (``BB_H2_HPACK_STATIC_ONLY``) and reuses its cached field encodings;
+  ``hpack`` has no such mode and indexes as usual.
+
+The ``decode`` rows and ``encode response`` build a fresh ``Decoder`` /
+``Encoder`` per iteration, as a new connection would, so their numbers
+include table set-up.
+
+Run:  python bench/hpack_codec.py [--number 20000] [--repeat 5]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import hpack
+
+from blackbull.protocol import hpack_codec
+
+REQUEST = [
+    (b':method', b'GET'),
+    (b':scheme', b'https'),
+    (b':path', b'/api/resource/12345?page=2&sort=desc'),
+    (b':authority', b'example.com'),
+    (b'user-agent', b'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36'),
+    (b'accept', b'text/html,application/xhtml+xml,application/xml;q=0.9'),
+    (b'accept-encoding', b'gzip, deflate, br'),
+    (b'accept-language', b'en-US,en;q=0.9'),
+    (b'cookie', b'session=abc123def456; theme=dark'),
+]
+
+RESPONSE = [
+    (b':status', b'200'),
+    (b'content-type', b'application/json'),
+    (b'content-length', b'1234'),
+    (b'date', b'Sun, 18 Oct 2026 12:00:00 GMT'),
+    (b'server', b'blackbull'),
+    (b'cache-control', b'no-store'),
+]
+
+
+def _blocks():
+    encoder = hpack.Encoder()
+    first, repeat = encoder.encode(REQUEST), encoder.encode(REQUEST)
+    static = hpack.Encoder().encode([(n, v, True) for n, v in REQUEST])
+    return first, repeat, static
+
+
+def _cases(module):
+    first, repeat, static = _blocks()
+    decoder, encoder = module.Decoder, module.Encoder
+
+    def decode_first():
+        decoder().decode(first, raw=True)
+
+    def decode_repeat():
+        d = decoder()
+        d.decode(first, raw=True)
+        d.decode(repeat, raw=True)
+
+    def decode_static():
+        decoder().decode(static, raw=True)
+
+    def encode_response():
+        e = encoder()
+        e.encode(RESPONSE)
+        e.encode(RESPONSE)
+
+    steady = encoder()
+
+    def encode_steady():
+        steady.encode(RESPONSE)
+
+    static_only = (encoder(static_only=True) if module is hpack_codec
+                   else encoder())
+    # One ``date`` per second of a minute: a new value on every call.
+    dates = [(b'date', b'Sun, 18 Oct 2026 12:00:%02d GMT' % second)
+             for second in range(60)]
+    tick = iter(range(10 ** 9))
+
+    def encode_static_only():
+        static_only.encode([*RESPONSE[:3], dates[next(tick) % 60],
+                            *RESPONSE[4:]])
+
+    return {'decode first': decode_first, 'decode repeat': decode_repeat,
+            'decode static': decode_static, 'encode response': encode_response,
+            'encode steady': encode_steady,
+            'encode static-only': encode_static_only}
+
+
+def main(number: int, repeat: int) -> None:
+    ours, theirs = _cases(hpack_codec), _cases(hpack)
+    print(f'{"case":<18} | {"hpack µs":>9} | {"blackbull µs":>12} | {"speed-up":>8}')
+    for name in ours:
+        t_theirs = min(timeit.repeat(theirs[name], number=number, repeat=repeat))
+        t_ours = min(timeit.repeat(ours[name], number=number, repeat=repeat))
+        print(f'{name:<18} | {t_theirs / number * 1e6:>9.2f} | '
+              f'{t_ours / number * 1e6:>12.2f} | {t_theirs / t_ours:>7.2f}x')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--number', type=int, default=20000)
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+    main(args.number, args.repeat)
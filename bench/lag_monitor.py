@@ -1,5 +1,10 @@
 """Event loop lag monitor for BlackBull benchmarking.
 
+Production servers have this built in: set ``BB_LOOP_LAG_MS`` and each
+worker samples lag on its deadline tick and logs the stack of whatever held
+the loop (:mod:`blackbull.server.lag`).  This one samples on its own, denser,
+timer and is kept for benchmark runs.
+
 Usage in a BlackBull app::
 
     from bench.lag_monitor import LoopLagMonitor
@@ -0,0 +1,157 @@
+"""What the request metrics cost per request — ``BB_METRICS`` on vs off.
+
+Drives ``HTTP1Actor`` in-process (no sockets) with *requests* pipelined GETs
+to a one-route BlackBull app, once with the app's request metrics fed and
+once without, and prints microseconds per request for each.  The access log
+is silenced, so no ``AccessLogRecord`` is built in either run and the
+difference is the whole price of collection: two clock reads, the route
+label, and one histogram and one counter update.
+
+A third run attaches the app's registry to a one-slot ``MetricsArena``, the
+shared memory a multi-worker server gives each worker, so the cells live in
+the mapping instead of process-local arrays.
+
+It then times ``RequestMetrics.finished`` alone, ``MetricsRegistry.render``
+over *series* label sets — the scrape cost — and the merged render a worker
+does under ``BB_WORKERS``, over *workers* slots holding that many series each.
+
+``bench/loop_touches.py`` is the other half of the check: collection adds no
+event-loop interaction, so its per-request counts are the same either way.
+
+Run:  python bench/metrics_overhead.py [--requests 20000] [--series 500] [--workers 8]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blackbull import BlackBull
+from blackbull.event_aggregator import EventAggregator
+from blackbull.metrics import MetricsArena, MetricsRegistry, RequestMetrics
+from blackbull.server.http1_actor import HTTP1Actor
+from blackbull.server.recipient import AbstractReader, IncompleteReadError
+from blackbull.server.sender import AbstractWriter
+
+REQUEST = b'GET /items/7 HTTP/1.1\r\nHost: bench\r\n\r\n'
+
+
+class _NullWriter(AbstractWriter):
+    async def write(self, data: bytes) -> None:
+        pass
+
+
+class _BufferReader(AbstractReader):
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+        self._pos = 0
+
+    async def read(self, n: int = -1) -> bytes:
+        end = len(self._data) if n < 0 else self._pos + n
+        chunk = self._data[self._pos:end]
+        self._pos += len(chunk)
+        return chunk
+
+    async def readexactly(self, n: int) -> bytes:
+        chunk = await self.read(n)
+        if len(chunk) < n:
+            raise IncompleteReadError(chunk, n)
+        return chunk
+
+    async def readuntil(self, sep: bytes = b'\n') -> bytes:
+        i = self._data.find(sep, self._pos)
+        if i < 0:
+            raise IncompleteReadError(self._data[self._pos:], 1)
+        return await self.read(i + len(sep) - self._pos)
+
+
+def _app() -> BlackBull:
+    app = BlackBull()
+
+    @app.route(path='/items/{id}')
+    async def item(conn, receive, send):
+        await send(b'ok', headers=[(b'content-type', b'text/plain')])
+    return app
+
+
+async def _per_request_us(app: BlackBull, metrics: bool, requests: int) -> float:
+    aggregator = EventAggregator(app._dispatcher,
+                                 app._request_metrics if metrics else None)
+    actor = HTTP1Actor(_BufferReader(REQUEST * (requests - 1)), _NullWriter(),
+                       app, aggregator, request=REQUEST,
+                       peername=('127.0.0.1', 50000), sockname=('127.0.0.1', 80))
+    start = time.perf_counter()
+    await actor.run()
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def _finished_ns(number: int) -> float:
+    metrics = RequestMetrics(MetricsRegistry())
+    finished = metrics.finished
+    finished('/items/{id}', 200, '1.1', 0.0001, 2)   # the series exists from here on
+    start = time.perf_counter()
+    for _ in range(number):
+        finished('/items/{id}', 200, '1.1', 0.0001, 2)
+    return (time.perf_counter() - start) / number * 1e9
+
+
+def _fill(registry: MetricsRegistry, series: int) -> None:
+    metrics = RequestMetrics(registry)
+    for i in range(series):
+        metrics.finished(f'/route/{i}', 200, '1.1', 0.0001, 2)
+
+
+def _render_ms(series: int) -> float:
+    _fill(registry := MetricsRegistry(), series)
+    start = time.perf_counter()
+    registry.render()
+    return (time.perf_counter() - start) * 1000
+
+
+def _merged_render_ms(series: int, workers: int) -> float:
+    arena = MetricsArena(workers)
+    registry = MetricsRegistry()
+    registry.attach(arena, 0)
+    _fill(registry, series)
+    # Stand-ins for the other workers: copies of slot 0.
+    slot = arena.slot_bytes
+    for worker_id in range(1, workers):
+        arena._mm[worker_id * slot:(worker_id + 1) * slot] = arena._mm[:slot]
+    arena.render()                            # parse the directories once
+    start = time.perf_counter()
+    registry.render()
+    return (time.perf_counter() - start) * 1000
+
+
+def main(requests: int, series: int, workers: int, repeat: int) -> None:
+    logging.getLogger('blackbull.access').setLevel(logging.WARNING)
+    app = _app()
+    shared = _app()
+    shared.metrics.attach(MetricsArena(1), 0)
+    print(f'{"metrics":<8} | {"us/request":>10}')
+    for label, target, on in (('off', app, False), ('on', app, True),
+                              ('shared', shared, True)):
+        best = min(asyncio.run(_per_request_us(target, on, requests))
+                   for _ in range(repeat))
+        print(f'{label:<8} | {best:>10.2f}')
+    print(f'RequestMetrics.finished: {_finished_ns(200_000):.0f} ns')
+    print(f'render, {series} series: {_render_ms(series):.1f} ms')
+    print(f'merged render, {workers} workers x {series} series: '
+          f'{_merged_render_ms(series, workers):.1f} ms')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--requests', type=int, default=20000,
+                    help='pipelined requests per run')
+    ap.add_argument('--series', type=int, default=500,
+                    help='label sets rendered in the scrape timing')
+    ap.add_argument('--workers', type=int, default=8,
+                    help='slots summed in the merged-render timing')
+    ap.add_argument('--repeat', type=int, default=5)
+    args = ap.parse_args()
+    main(args.requests, args.series, args.workers, args.repeat)
@@ -0,0 +1,155 @@
+"""Clustered MQTT broker — delivered messages per second against worker count.
+
+For each ``--workers`` count, starts ``app.run(workers=n)`` with
+``MQTTExtension(cluster=True)`` in a subprocess, then runs ``--clients``
+client processes for ``--seconds``.  Each client opens a subscriber on
+``bench/{k}/#`` and a publisher that sends QoS 0 PUBLISHes to
+``bench/{k + 1}/x`` — the next client's topic, so most messages are
+published on one worker and delivered on another, and cross the bus.  The
+table reports deliveries per second and the speed-up over one worker.
+
+The broker, not the client, has to be the bottleneck for the speed-up to
+mean anything: give the machine at least ``workers + clients`` cores.  On
+fewer, the workers share the cores and the column measures only the cost
+of the extra hop.
+
+Run::
+
+    python bench/mqtt/cluster_scaling.py [--workers 1,2,4] [--clients 4] [--seconds 5]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, ROOT)
+
+from blackbull.mqtt.connection import PacketFramer
+from blackbull.mqtt.messages import (
+    MQTTConnect, MQTTPublish, MQTTSubscribe, encode_packet,
+)
+
+_SERVER = '''
+import sys
+from blackbull import BlackBull
+from blackbull.mqtt import MQTTExtension
+app = BlackBull()
+app.add_extension(MQTTExtension(port=int(sys.argv[2]), cluster=True))
+app.run(port=int(sys.argv[1]), workers=int(sys.argv[3]))
+'''
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _wait_for(port: int, timeout: float = 15.0) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), 0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'broker did not listen on {port}')
+
+
+async def _client(port: int, k: int, clients: int, seconds: float,
+                  size: int) -> int:
+    async def connect(client_id):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(encode_packet(MQTTConnect(
+            client_id=client_id, clean_start=True, keep_alive=0)))
+        framer = PacketFramer()
+        while not list(framer):              # CONNACK
+            framer.feed(await reader.read(4096))
+        return reader, writer
+
+    sub_reader, sub_writer = await connect(f'bench-sub-{k}')
+    sub_writer.write(encode_packet(MQTTSubscribe(
+        packet_id=1, subscriptions=[(f'bench/{k}/#', 0)])))
+    pub_reader, pub_writer = await connect(f'bench-pub-{k}')
+    await asyncio.sleep(0.5)                 # let the summaries spread
+    packet = encode_packet(MQTTPublish(
+        topic=f'bench/{(k + 1) % clients}/x', payload=b'x' * size, qos=0))
+    received = 0
+    deadline = asyncio.get_running_loop().time() + seconds
+
+    async def consume():
+        nonlocal received
+        framer = PacketFramer()
+        while True:
+            framer.feed(await sub_reader.read(65536))
+            received += sum(isinstance(m, MQTTPublish) for m in framer)
+
+    consumer = asyncio.create_task(consume())
+    burst = packet * 64
+    while asyncio.get_running_loop().time() < deadline:
+        pub_writer.write(burst)
+        await pub_writer.drain()
+    consumer.cancel()
+    for writer in (sub_writer, pub_writer):
+        writer.close()
+    return received
+
+
+def _run_client(port, k, clients, seconds, size, results) -> None:
+    results.put(asyncio.run(_client(port, k, clients, seconds, size)))
+
+
+def _measure(workers: int, clients: int, seconds: float, size: int) -> float:
+    http_port, mqtt_port = _free_port(), _free_port()
+    env = dict(os.environ, PYTHONPATH=ROOT)
+    server = subprocess.Popen(
+        [sys.executable, '-c', _SERVER, str(http_port), str(mqtt_port),
+         str(workers)], env=env, stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL)
+    try:
+        _wait_for(mqtt_port)
+        time.sleep(0.5)                      # every worker attached
+        ctx = multiprocessing.get_context('fork')
+        results = ctx.Queue()
+        procs = [ctx.Process(target=_run_client,
+                             args=(mqtt_port, k, clients, seconds, size, results))
+                 for k in range(clients)]
+        for p in procs:
+            p.start()
+        delivered = sum(results.get(timeout=seconds + 30) for _ in procs)
+        for p in procs:
+            p.join()
+        return delivered / seconds
+    finally:
+        server.terminate()
+        server.wait(10)
+
+
+def main(worker_counts: list[int], clients: int, seconds: float, size: int) -> None:
+    print(f'# {os.cpu_count()} CPU(s), {clients} client process(es), '
+          f'{size} B QoS 0 payloads, {seconds:g} s each')
+    print(f'{"workers":>7} | {"delivered/s":>12} | {"speed-up":>8}')
+    base = None
+    for workers in worker_counts:
+        rate = _measure(workers, clients, seconds, size)
+        base = base or rate
+        print(f'{workers:>7} | {rate:>12,.0f} | {rate / base:>7.2f}x')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--workers', default='1,2,4')
+    ap.add_argument('--clients', type=int, default=4)
+    ap.add_argument('--seconds', type=float, default=5.0)
+    ap.add_argument('--size', type=int, default=64)
+    args = ap.parse_args()
+    main([int(w) for w in args.workers.split(',')], args.clients,
+         args.seconds, args.size)
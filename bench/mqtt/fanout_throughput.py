@@ -0,0 +1,123 @@
+r"""MQTT PUBLISH fan-out — ms to route one message to N subscribers.
+
+Drives the real ``BrokerActor`` with N subscribers on ``sensors/#``.  Each
+subscriber stands in for a connection actor: it writes whatever the broker
+``Send``\ s into a null writer, the way ``MQTT5Actor._write`` does, so what is
+timed is routing, packet construction, encoding and the write calls.  Two
+ways to turn a ``Send`` into bytes:
+
+* **encode** — ``encode_packet(msg.packet)`` per recipient, what the
+  connection actor did before ``EncodedPublish``: a full encode and payload
+  copy per subscriber.
+* **shared** — the ``msg.wire`` segments the broker pre-encoded once for the
+  whole fan-out.
+
+Run::
+
+    python bench/mqtt/fanout_throughput.py [--subscribers 5000] [--size 4096]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from blackbull.actor import Actor
+from blackbull.mqtt import BrokerActor
+from blackbull.mqtt.broker import Attach, ClientPublish, ClientSubscribe, Send
+from blackbull.mqtt.messages import (
+    MQTTConnect, MQTTPublish, MQTTSubscribe, encode_packet,
+)
+from blackbull.server.sender import _VECTORED_JOIN_THRESHOLD
+
+
+class _NullSocket:
+    def write(self, data) -> None:
+        pass
+
+    def writelines(self, parts) -> None:
+        pass
+
+
+class _Subscriber(Actor):
+    """Writes each ``Send`` straight away instead of queueing it."""
+
+    def __init__(self, shared: bool) -> None:
+        super().__init__()
+        self._shared = shared
+        self._sock = _NullSocket()
+
+    async def send(self, msg) -> None:
+        if not isinstance(msg, Send):
+            return
+        wire = msg.wire if self._shared else None
+        if wire is None:
+            self._sock.write(encode_packet(msg.packet))
+        elif len(wire) == 1:
+            self._sock.write(wire[0])
+        elif sum(map(len, wire)) <= _VECTORED_JOIN_THRESHOLD:
+            self._sock.write(b''.join(wire))
+        else:
+            self._sock.writelines(wire)
+
+
+async def _broker(n: int, qos: int, shared: bool) -> tuple[BrokerActor, Actor]:
+    broker = BrokerActor()
+    for i in range(n):
+        conn = _Subscriber(shared)
+        await broker._handle(Attach(connect=MQTTConnect(
+            client_id=f'dash-{i}', clean_start=True, keep_alive=0), sender=conn))
+        await broker._handle(ClientSubscribe(subscribe=MQTTSubscribe(
+            packet_id=1, subscriptions=[('sensors/#', qos)]), sender=conn))
+    publisher = _Subscriber(shared)
+    await broker._handle(Attach(connect=MQTTConnect(
+        client_id='sensor', clean_start=True, keep_alive=0), sender=publisher))
+    return broker, publisher
+
+
+def _ack_all(broker: BrokerActor) -> None:
+    # Keep every session's in-flight window empty between rounds, so each
+    # round measures a send rather than a Receive Maximum enqueue.
+    for session in broker._sessions.values():
+        session['pending_qos1_out'].clear()
+
+
+async def _time(broker, publisher, publish, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        _ack_all(broker)
+        start = time.perf_counter()
+        await broker._handle(ClientPublish(publish=publish, sender=publisher))
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+async def main(n: int, size: int, rounds: int) -> None:
+    print(f'# {n} subscribers, {size} B payload; ms per PUBLISH '
+          f'(best of {rounds})')
+    print(f'{"QoS":>3} | {"encode":>9} | {"shared":>9} | speed-up')
+    for qos in (0, 1):
+        publish = MQTTPublish(topic='sensors/hall/temp', payload=os.urandom(size),
+                              qos=qos, packet_id=1 if qos else None,
+                              properties={'content_type': 'application/octet-stream'})
+        results = []
+        for shared in (False, True):
+            broker, publisher = await _broker(n, qos, shared)
+            results.append(await _time(broker, publisher, publish, rounds))
+        encode_ms, shared_ms = results
+        print(f'{qos:>3} | {encode_ms:>9.1f} | {shared_ms:>9.1f} | '
+              f'{encode_ms / shared_ms:>7.1f}x')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--subscribers', type=int, default=5000)
+    ap.add_argument('--size', type=int, default=4096)
+    ap.add_argument('--rounds', type=int, default=5)
+    args = ap.parse_args()
+    asyncio.run(main(args.subscribers, args.size, args.rounds))
@@ -0,0 +1,84 @@
+"""MQTT retained replay — how long one SUBSCRIBE holds the broker.
+
+Retains one message on each of ``--sites`` × ``--points`` topics shaped
+``site/{n}/{sensors|actuators}/{k}``, then times a SUBSCRIBE through
+``BrokerActor`` for three filters:
+
+* **scan** — every retained topic tested with ``topic_matches_filter``, what
+  the broker did before the retained trie.
+* **match** — ``RetainedIndex.match``: only the subtree the filter can reach.
+* **first turn** — the SUBSCRIBE's own inbox turn, the longest the broker
+  stalls every other client.  The rest of the replay follows in batches of
+  ``_REPLAY_BATCH`` on later turns.
+
+Run::
+
+    python bench/mqtt/retained_replay.py [--sites 1000] [--points 500]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from blackbull.actor import Actor
+from blackbull.mqtt import BrokerActor
+from blackbull.mqtt.broker import Attach, ClientSubscribe
+from blackbull.mqtt.messages import (
+    MQTTConnect, MQTTPublish, MQTTSubscribe, topic_matches_filter,
+)
+
+_FILTERS = ('site/+/sensors/#', 'site/42/#', 'site/42/sensors/7')
+
+
+class _Null(Actor):
+    async def send(self, msg) -> None:
+        pass
+
+
+async def main(sites: int, points: int) -> None:
+    broker = BrokerActor(max_retained=0)
+    sensors = points // 10
+    for site in range(sites):
+        for k in range(points):
+            kind = 'sensors' if k < sensors else 'actuators'
+            broker._store_retained(MQTTPublish(
+                topic=f'site/{site}/{kind}/{k}', payload=b'21.5', retain=True))
+    topics = list(broker._retained)
+    print(f'# {len(topics):,} retained topics')
+    print(f'{"filter":>20} | {"matches":>8} | {"scan ms":>8} | '
+          f'{"match ms":>8} | {"first turn ms":>13}')
+    for n, topic_filter in enumerate(_FILTERS):
+        start = time.perf_counter()
+        expected = [t for t in topics if topic_matches_filter(t, topic_filter)]
+        scan = time.perf_counter() - start
+        start = time.perf_counter()
+        matched = broker._retained.match(topic_filter)
+        match = time.perf_counter() - start
+        assert len(matched) == len(expected)
+
+        conn = _Null()
+        await broker._handle(Attach(connect=MQTTConnect(
+            client_id=f'sub{n}', clean_start=True, keep_alive=0), sender=conn))
+        start = time.perf_counter()
+        await broker._handle(ClientSubscribe(subscribe=MQTTSubscribe(
+            packet_id=1, subscriptions=[(topic_filter, 0)]), sender=conn))
+        turn = time.perf_counter() - start
+        while not broker._inbox.empty():       # the rest of the replay
+            await broker._handle(broker._inbox.get_nowait())
+        print(f'{topic_filter:>20} | {len(matched):>8,} | {scan * 1e3:>8.1f} | '
+              f'{match * 1e3:>8.1f} | {turn * 1e3:>13.1f}')
+    broker.close()
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--sites', type=int, default=1000)
+    ap.add_argument('--points', type=int, default=500)
+    args = ap.parse_args()
+    asyncio.run(main(args.sites, args.points))
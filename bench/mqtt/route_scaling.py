@@ -0,0 +1,92 @@
+r"""MQTT routing-cost benchmark — per-PUBLISH cost vs. subscriber count.
+
+Drives ``BrokerActor._handle`` directly (no sockets, no framing) with N
+connected clients, each holding a handful of *non-matching* subscriptions —
+the telemetry shape, where every device subscribes to its own command topic —
+plus a fixed set of matching subscribers.  Each publish therefore has the same
+fan-out at every N; what changes is how much routing state the broker has to
+look past to find it.
+
+With the topic-level subscription index the per-publish cost should stay
+~flat as N grows (it costs the topic depth plus the matches).  The old
+linear scan grew with sessions × subscriptions.
+
+  python bench/mqtt/route_scaling.py [--publishes 2000] [--matching 10]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import platform
+import sys
+import time
+
+from blackbull.actor import Actor
+from blackbull.mqtt import BrokerActor
+from blackbull.mqtt.broker import Attach, ClientPublish, ClientSubscribe
+from blackbull.mqtt.messages import MQTTConnect, MQTTPublish, MQTTSubscribe
+
+SUBSCRIBER_COUNTS = (100, 1_000, 5_000, 20_000)
+_SUBS_PER_CLIENT = 4
+
+
+class _NullConn(Actor):
+    """Connection actor stand-in: counts what the broker sends, keeps nothing."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.received = 0
+
+    async def send(self, msg) -> None:
+        self.received += 1
+
+
+async def _attach(broker, conn, client_id, subscriptions) -> None:
+    await broker._handle(Attach(connect=MQTTConnect(
+        client_id=client_id, clean_start=True, keep_alive=60), sender=conn))
+    await broker._handle(ClientSubscribe(subscribe=MQTTSubscribe(
+        packet_id=1, subscriptions=subscriptions), sender=conn))
+
+
+async def _run_once(n: int, publishes: int, matching: int) -> float:
+    broker = BrokerActor(max_subscriptions=0, max_sessions=0)
+    for i in range(n):
+        await _attach(broker, _NullConn(), f'dev-{i}', [
+            (f'devices/{i}/cmd', 1), (f'devices/{i}/config/+', 1),
+            (f'fleet/{i % 64}/ota/#', 0), (f'$share/g{i % 8}/jobs/{i}', 0),
+        ][:_SUBS_PER_CLIENT])
+    for i in range(matching):
+        await _attach(broker, _NullConn(), f'dash-{i}',
+                      [('telemetry/+/temperature', 0)])
+    pub = _NullConn()
+    await _attach(broker, pub, 'publisher', [])
+    msg = ClientPublish(publish=MQTTPublish(
+        topic='telemetry/room-1/temperature', payload=b'21.5', qos=0),
+        sender=pub)
+    start = time.perf_counter()
+    for _ in range(publishes):
+        await broker._handle(msg)
+    return (time.perf_counter() - start) / publishes * 1e6
+
+
+async def _main(publishes: int, matching: int) -> None:
+    print(f'# MQTT route scaling — {platform.python_implementation()} '
+          f'{sys.version.split()[0]}, {matching} matching subscribers, '
+          f'{_SUBS_PER_CLIENT} non-matching subscriptions per client')
+    header = f"{'clients':>8} | {'subscriptions':>13} | {'us/publish':>10}"
+    print(header)
+    print('-' * len(header))
+    for n in SUBSCRIBER_COUNTS:
+        us = await _run_once(n, publishes, matching)
+        print(f'{n:>8} | {n * _SUBS_PER_CLIENT:>13} | {us:>10.1f}')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--publishes', type=int, default=2000,
+                    help='PUBLISH packets routed per subscriber count')
+    ap.add_argument('--matching', type=int, default=10,
+                    help='subscribers whose filter matches every publish')
+    args = ap.parse_args()
+    asyncio.run(_main(args.publishes, args.matching))
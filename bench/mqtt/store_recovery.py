@@ -0,0 +1,115 @@
+"""MQTT durable store — publish cost, write amplification, and recovery time.
+
+Three measurements against one ``BrokerStore`` directory:
+
+* **publish** — retained PUBLISHes per second through ``BrokerActor``,
+  in memory and with the store (group commit, ``fsync`` on).  Each publish
+  overwrites one of ``--hot`` topics, so the log is mostly garbage and
+  compaction has to keep up.
+* **amplification** — bytes the store wrote (segments plus snapshots) per
+  byte of records logged.  Compaction bounds it by ``1 + 1/compact_ratio``.
+* **recovery** — after retaining a message on each of ``--topics``
+  topics, ``BrokerStore.load`` plus ``BrokerActor.restore`` for the
+  resulting state: the time a respawned worker 0 spends before serving.
+
+Run::
+
+    python bench/mqtt/store_recovery.py [--topics 1000000] [--hot 1000] [--publishes 1000000]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+
+from blackbull.actor import Actor
+from blackbull.mqtt import BrokerActor, BrokerStore
+from blackbull.mqtt.broker import Attach, ClientPublish
+from blackbull.mqtt.messages import MQTTConnect, MQTTPublish
+
+
+class _Null(Actor):
+    async def send(self, msg) -> None:
+        pass
+
+
+async def _publish_rate(store: BrokerStore | None, topics: int, publishes: int,
+                        payload: bytes) -> float:
+    broker = BrokerActor(max_retained=0, store=store)
+    if store is not None:
+        broker.restore(store.load())
+    conn = _Null()
+    await broker._handle(Attach(connect=MQTTConnect(
+        client_id='sensor', clean_start=True, keep_alive=0), sender=conn))
+    handle = broker._handle
+    start = time.perf_counter()
+    for i in range(publishes):
+        await handle(ClientPublish(publish=MQTTPublish(
+            topic=f'sensors/{i % topics}', payload=payload, retain=True),
+            sender=conn))
+        if i % 1000 == 999:
+            await asyncio.sleep(0)      # let the group commit run
+    elapsed = time.perf_counter() - start
+    broker.close()
+    return publishes / elapsed
+
+
+async def _recover(directory: str) -> tuple[float, float, int]:
+    store = BrokerStore(directory)
+    start = time.perf_counter()
+    state = await asyncio.get_running_loop().run_in_executor(None, store.load)
+    loaded = time.perf_counter()
+    broker = BrokerActor(max_retained=0, store=store)
+    broker.restore(state)
+    restored = time.perf_counter()
+    count = len(broker._retained)
+    broker.close()
+    store.close()
+    return loaded - start, restored - loaded, count
+
+
+async def main(topics: int, hot: int, publishes: int, size: int) -> None:
+    payload = os.urandom(size)
+    directory = tempfile.mkdtemp(prefix='bb-mqtt-store-')
+    try:
+        memory = await _publish_rate(None, hot, publishes, payload)
+        store = BrokerStore(directory)
+        durable = await _publish_rate(store, hot, publishes, payload)
+        store.close()
+        print(f'# retained PUBLISH, {size} B payload, {hot} topics')
+        print(f'{"in memory":>12} | {memory:>10,.0f} msg/s')
+        print(f'{"with store":>12} | {durable:>10,.0f} msg/s '
+              f'({durable / memory:.0%})')
+        print(f'write amplification: '
+              f'{store.bytes_written / max(1, store.bytes_logged):.2f}x, '
+              f'{store.bytes_written / 2**20:.0f} MiB written')
+
+        # Fill every topic once, then time a cold start over the result.
+        filler = BrokerStore(directory)
+        await _publish_rate(filler, topics, topics, payload)
+        filler.close()
+        disk = sum(os.path.getsize(os.path.join(directory, n))
+                   for n in os.listdir(directory))
+        load_s, restore_s, count = await _recover(directory)
+        print(f'# recovery: {count:,} retained topics, {disk / 2**20:.0f} MiB on disk')
+        print(f'load {load_s:.2f} s + restore {restore_s:.2f} s '
+              f'= {load_s + restore_s:.2f} s')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--topics', type=int, default=1_000_000)
+    ap.add_argument('--hot', type=int, default=1000)
+    ap.add_argument('--publishes', type=int, default=1_000_000)
+    ap.add_argument('--size', type=int, default=64)
+    args = ap.parse_args()
+    asyncio.run(main(args.topics, args.hot, args.publishes, args.size))
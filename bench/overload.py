@@ -0,0 +1,156 @@
+"""Latency of admitted requests under overload — ``BB_SHED_TARGET_MS`` off vs on.
+
+Starts a one-worker BlackBull server in a child process whose only route
+burns *work* milliseconds of CPU, so it serves about ``1000 / work``
+requests per second.  An open-loop client then offers *load* times that
+rate for *seconds*: requests are sent on schedule whether or not earlier
+ones have been answered, over a pool of keep-alive connections that grows
+when every connection is busy.  Latency is measured from the scheduled
+send time, so a server that falls behind is charged for the wait.
+
+With shedding off the server queues everything: latency grows for as long
+as the overload lasts.  With it on, requests that queued past the target are
+answered ``503`` up front, and the ones admitted stay near the target plus
+their own work.  For each run the script prints the ``200`` and ``503``
+counts, the goodput (``200`` answers per second until the last answer), and
+the p50/p99/max latency of the ``200`` answers.  Client and server share the
+host, so on a small machine the client's own CPU comes out of the server's.
+
+Run:  python bench/overload.py [--work 2] [--load 1.5] [--seconds 5] [--target 10]
+"""
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import sys
+import time
+from multiprocessing import Process
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blackbull import BlackBull
+
+REQUEST = b'GET /work HTTP/1.1\r\nHost: bench\r\n\r\n'
+
+
+def _serve(port: int, work: float, target_ms: int) -> None:
+    os.environ['BB_SHED_TARGET_MS'] = str(target_ms)
+    os.environ['BB_ACCESS_LOG'] = '0'
+    logging.disable(logging.WARNING)
+    app = BlackBull()
+
+    @app.route(path='/work')
+    async def burn(conn, receive, send):
+        end = time.perf_counter() + work
+        while time.perf_counter() < end:
+            pass
+        await send(b'done', headers=[(b'content-type', b'text/plain')])
+
+    app.run(port=port)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+async def _wait_ready(port: int) -> None:
+    for _ in range(100):
+        try:
+            _, writer = await asyncio.open_connection('127.0.0.1', port)
+        except OSError:
+            await asyncio.sleep(0.1)
+            continue
+        writer.close()
+        return
+    raise RuntimeError('server did not start')
+
+
+async def _one(pool: list, port: int, scheduled: float,
+               results: list) -> None:
+    if pool:
+        reader, writer = pool.pop()
+    else:
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(REQUEST)
+        head = await reader.readuntil(b'\r\n\r\n')
+        length = 0
+        for line in head.split(b'\r\n'):
+            if line[:15].lower() == b'content-length:':
+                length = int(line[15:])
+        await reader.readexactly(length)
+    except (OSError, asyncio.IncompleteReadError):
+        writer.close()
+        return
+    results.append((int(head[9:12]), time.monotonic() - scheduled))
+    if b'connection: close' in head.lower():
+        writer.close()
+    else:
+        pool.append((reader, writer))
+
+
+async def _drive(port: int, rate: float, seconds: float) -> tuple[list, float]:
+    await _wait_ready(port)
+    pool: list = []
+    results: list = []
+    tasks = []
+    start = time.monotonic()
+    for i in range(int(rate * seconds)):
+        scheduled = start + i / rate
+        delay = scheduled - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(_one(pool, port, scheduled, results)))
+    await asyncio.wait(tasks, timeout=60)
+    elapsed = time.monotonic() - start
+    for _, writer in pool:
+        writer.close()
+    return results, elapsed
+
+
+def _quantile(values: list, q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+def run(target_ms: int, work_ms: float, load: float, seconds: float) -> None:
+    port = _free_port()
+    server = Process(target=_serve, args=(port, work_ms / 1000, target_ms),
+                     daemon=True)
+    server.start()
+    try:
+        rate = load * 1000 / work_ms
+        results, elapsed = asyncio.run(_drive(port, rate, seconds))
+    finally:
+        server.terminate()
+        server.join()
+    ok = sorted(latency for status, latency in results if status == 200)
+    shed = sum(1 for status, _ in results if status == 503)
+    label = f'on ({target_ms} ms)' if target_ms else 'off'
+    print(f'{label:<12} | {len(ok):>6} | {shed:>6} | {len(ok) / elapsed:>8.0f} | '
+          f'{_quantile(ok, 0.5) * 1000:>8.1f} | {_quantile(ok, 0.99) * 1000:>8.1f} | '
+          f'{(ok[-1] if ok else 0) * 1000:>8.1f}')
+
+
+def main(work_ms: float, load: float, seconds: float, target_ms: int) -> None:
+    print(f'{1000 / work_ms:.0f} req/s capacity, offered {load:.1f}x for {seconds:.0f} s')
+    print(f'{"shedding":<12} | {"200":>6} | {"503":>6} | {"goodput":>8} | '
+          f'{"p50 ms":>8} | {"p99 ms":>8} | {"max ms":>8}')
+    for target in (0, target_ms):
+        run(target, work_ms, load, seconds)
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--work', type=float, default=2.0,
+                    help='CPU milliseconds each request burns')
+    ap.add_argument('--load', type=float, default=1.5,
+                    help='offered load as a multiple of capacity')
+    ap.add_argument('--seconds', type=float, default=5.0)
+    ap.add_argument('--target', type=int, default=10,
+                    help='BB_SHED_TARGET_MS for the shedding run')
+    args = ap.parse_args()
+    main(args.work, args.load, args.seconds, args.target)
@@ -0,0 +1,95 @@
+"""Pipelined HTTP/1.1 throughput with and without ``BB_PIPELINE_BATCH``.
+
+One loopback connection, the production receive path (``ConnectionProtocol``
+→ ``HTTP1Actor``), and a client that writes *depth* GETs per round in one
+segment and waits for all *depth* responses before the next round — the
+shape of ``bench/wrk/pipeline.lua``.  For each batch setting the script
+prints requests per second and how many transport writes the server made
+per round (one per response when batching is off, ideally one per round when
+it is on).
+
+Run:  python bench/pipeline_batch.py [--depth 16] [--rounds 2000]
+
+For the whole-server number, start ``bench/app.py`` with and without
+``BB_PIPELINE_BATCH=16`` and drive it with
+``wrk -t1 -c64 -d30s -s bench/wrk/pipeline.lua http://host:port/ping -- 16``.
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from blackbull.env import reset_settings_cache
+from blackbull.server.connection_protocol import ConnectionProtocol
+from blackbull.server.http1_actor import HTTP1Actor
+from blackbull.server.sender import AsyncioWriter
+
+
+class _CountingWriter(AsyncioWriter):
+    writes = 0
+
+    async def write(self, data):
+        type(self).writes += 1
+        await super().write(data)
+
+    async def writelines(self, parts):
+        type(self).writes += 1
+        await super().writelines(parts)
+
+
+async def _ping(conn, receive, send):
+    await send(b'pong', headers=[(b'content-type', b'text/plain')])
+
+
+class _Served(ConnectionProtocol):
+    def connection_made(self, transport):
+        super().connection_made(transport)
+        asyncio.get_running_loop().create_task(self._serve())
+
+    async def _serve(self):
+        try:
+            await HTTP1Actor(self.reader, _CountingWriter(self), _ping,
+                             None).run()
+        finally:
+            self.close()
+
+
+async def _run(batch: int, depth: int, rounds: int) -> tuple[float, float]:
+    os.environ['BB_PIPELINE_BATCH'] = str(batch)
+    reset_settings_cache()
+    _CountingWriter.writes = 0
+    loop = asyncio.get_running_loop()
+    server = await loop.create_server(_Served, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    burst = b'GET /ping HTTP/1.1\r\nHost: bench\r\n\r\n' * depth
+    start = time.perf_counter()
+    for _ in range(rounds):
+        writer.write(burst)
+        for _ in range(depth):
+            await reader.readuntil(b'\r\n\r\n')
+            await reader.readexactly(4)
+    elapsed = time.perf_counter() - start
+    writer.close()
+    server.close()
+    await server.wait_closed()
+    return depth * rounds / elapsed, _CountingWriter.writes / rounds
+
+
+def main(depth: int, rounds: int) -> None:
+    print(f'{"BB_PIPELINE_BATCH":<18} | {"req/s":>9} | {"writes/round":>12}')
+    for batch in (0, depth):
+        rps, per_round = asyncio.run(_run(batch, depth, rounds))
+        print(f'{batch:<18} | {rps:>9.0f} | {per_round:>12.2f}')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--depth', type=int, default=16)
+    ap.add_argument('--rounds', type=int, default=2000)
+    args = ap.parse_args()
+    main(args.depth, args.rounds)
@@ -9,12 +9,18 @@ Measures the per-call cost of ``Router._resolve`` (cache bypassed) and
 - miss → PathNotRegistered (trie miss + regex-fallback scan)
 - miss → MethodNotApplicable
 
+and then, for 10 / 100 / 1000 raw ``re.Pattern`` routes (legacy URL shapes
+behind a trie miss), a hit on the last-registered pattern and a 404: the
+whole ``_resolve``, its pattern-matching stage alone, and the
+one-``match``-per-route scan that stage replaced.
+
 Run:  python bench/router_microbench.py [--repeat 7] [--number 20000]
 
 Numbers print as ns/call (min of repeats — standard timeit discipline).
 Results for sprint records go under bench/results/router-microbench/.
 """
 import argparse
+import re
 import timeit
 from http import HTTPMethod
 
@@ -49,6 +55,22 @@ CASES = {
 }
 
 
+def build_regex_router(n: int) -> Router:
+    """*n* raw-pattern routes, each a distinct legacy URL shape."""
+    r = Router()
+    for i in range(n):
+        r[(re.compile(rf'^/legacy/v{i % 7}/item{i}/(?P<id>\d+)$'),
+           HTTPMethod.GET)] = _h
+    return r
+
+
+def _linear(r: Router, path: str) -> None:
+    """The scan the combined matcher replaced: one ``match`` per route."""
+    for (pattern, _ms, _ss), _fn in r._raw_regex.items():
+        if pattern.match(path):
+            return
+
+
 def bench(fn, number: int, repeat: int) -> float:
     best = min(timeit.repeat(fn, number=number, repeat=repeat))
     return best / number * 1e9
@@ -94,6 +116,31 @@ def main() -> None:
         getitem_ns = bench(getitem_call, args.number, args.repeat)
         print(f'{name:<18} {resolve_ns:>12.0f} {getitem_ns:>15.0f}')
 
+    print()
+    print(f'{"regex routes":<13} {"case":<9} {"_resolve ns":>12} '
+          f'{"matcher ns":>11} {"linear ns":>10}')
+    for n in (10, 100, 1000):
+        r = build_regex_router(n)
+        r.validate()
+        for name, path in (('last_hit', f'/legacy/v{(n - 1) % 7}/item{n - 1}/5'),
+                           ('miss_404', '/legacy/v1/gone/5')):
+            key = (path, HTTPMethod.GET, scheme)
+
+            def resolve_call(key=key):
+                try:
+                    r._resolve(key)
+                except PathNotRegistered:
+                    pass
+
+            number = max(args.number // n, 200)
+            resolve_ns = bench(resolve_call, number, args.repeat)
+            matcher_ns = bench(lambda path=path: r._raw_matcher.first(path),
+                               args.number, args.repeat)
+            linear_ns = bench(lambda path=path: _linear(r, path), number,
+                              args.repeat)
+            print(f'{n:<13} {name:<9} {resolve_ns:>12.0f} {matcher_ns:>11.0f} '
+                  f'{linear_ns:>10.0f}')
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,103 @@
+"""Cross-worker bus — publishes per second from one worker to another.
+
+Two processes share a :class:`~blackbull.server.bus.WorkerBus` exactly as a
+``MultiWorkerServer`` sets it up: built before the fork, attached in each
+child's event loop.  The sender publishes ``--messages`` payloads in bursts
+of ``--burst`` per loop turn, and the receiver times the arrival of the whole
+run.  The datagram count shows the per-turn batching: one ``send`` per
+32 KiB of records, not one per message.
+
+Run::
+
+    python bench/worker_bus.py [--messages 100000] [--size 64] [--burst 100]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from blackbull.server import bus
+from blackbull.server.bus import WorkerBus
+
+_FORK = multiprocessing.get_context('fork')
+
+
+def _sender(wb: WorkerBus, ready, messages: int, size: int, burst: int) -> None:
+    async def main():
+        wb.attach(1)
+        ready.wait(10)
+        payload = b'x' * size
+        for start in range(0, messages, burst):
+            for _ in range(min(burst, messages - start)):
+                bus.publish('bench', payload, local=False)
+            await asyncio.sleep(0)
+        await asyncio.sleep(0.1)
+        wb.detach()
+    asyncio.run(main())
+
+
+async def _receive(wb: WorkerBus, ready, messages: int) -> tuple[float, int]:
+    loop = asyncio.get_running_loop()
+    done = loop.create_future()
+    count = 0
+    datagrams = 0
+    started = 0.0
+
+    def on_message(_channel, _payload):
+        nonlocal count, started
+        if count == 0:
+            started = time.perf_counter()
+        count += 1
+        if count == messages:
+            done.set_result(time.perf_counter())
+
+    dispatch = WorkerBus._dispatch
+
+    def counting(datagram):
+        nonlocal datagrams
+        datagrams += 1
+        dispatch(datagram)
+
+    wb._dispatch = counting
+    unsubscribe = bus.subscribe('bench', on_message)
+    wb.attach(0)
+    try:
+        ready.set()
+        finished = await asyncio.wait_for(done, 60)
+    finally:
+        unsubscribe()
+        wb.detach()
+    return finished - started, datagrams
+
+
+def main(messages: int, size: int, burst: int) -> None:
+    wb = WorkerBus(2)
+    ready = _FORK.Event()
+    child = _FORK.Process(target=_sender,
+                          args=(wb, ready, messages, size, burst))
+    child.start()
+    try:
+        elapsed, datagrams = asyncio.run(_receive(wb, ready, messages))
+    finally:
+        child.join(10)
+        wb.close()
+    print(f'# {messages} x {size} B publishes, {burst} per loop turn')
+    print(f'{"elapsed ms":>10} | {"msgs/s":>10} | {"datagrams":>9} | msgs/datagram')
+    print(f'{elapsed * 1e3:>10.1f} | {messages / elapsed:>10,.0f} | '
+          f'{datagrams:>9} | {messages / datagrams:>8.1f}')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--messages', type=int, default=100_000)
+    ap.add_argument('--size', type=int, default=64)
+    ap.add_argument('--burst', type=int, default=100)
+    args = ap.parse_args()
+    main(args.messages, args.size, args.burst)
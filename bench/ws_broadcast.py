@@ -0,0 +1,112 @@
+"""WebSocket fan-out — ms to deliver one message to N subscribers.
+
+Each subscriber is a real ``WebSocketSender`` writing into a null writer, so
+what is timed is the encode, framing, compression and write-call path —
+everything a fan-out costs before the kernel.  Two ways to send:
+
+* **loop** — ``await ws.send_json(msg)`` per subscriber, what an app without
+  a broadcast primitive does (``examples/ChatServer`` does the equivalent).
+* **Broadcast** — one ``hub.publish_json``, then one loop turn for the
+  subscribers' flush tasks.
+
+Each at two deflate settings: off, and permessage-deflate with context
+takeover (the browser default), where the loop compresses N times.
+
+Run::
+
+    python bench/ws_broadcast.py [--subscribers 10000] [--size 1024]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from blackbull import Broadcast, Connection, Headers, WebSocket
+from blackbull.server.permessage_deflate import OutboundCompressor
+from blackbull.server.sender import AbstractWriter, WebSocketSender
+from blackbull.websocket import mark_handshake_accepted
+
+
+class _NullWriter(AbstractWriter):
+    async def write(self, data: bytes) -> None:
+        pass
+
+    async def writelines(self, parts) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+
+async def _no_receive():
+    raise AssertionError('not used')
+
+
+def _subscribers(n: int, deflate: bool) -> list[WebSocket]:
+    out = []
+    for _ in range(n):
+        conn = Connection(method='GET', path='/ws', raw_path=b'/ws',
+                          headers=Headers([]), type='websocket')
+        mark_handshake_accepted(conn)
+        compressor = OutboundCompressor(15, False) if deflate else None
+        sender = WebSocketSender(_NullWriter(), compressor=compressor)
+        out.append(WebSocket(conn, _no_receive, sender))
+    return out
+
+
+def _message(size: int) -> dict:
+    # Chat-shaped: a few fields and a body of mildly compressible text.
+    words = ['alpha', 'bravo', 'charlie', 'delta', 'echo', 'foxtrot']
+    body = ' '.join(words[i % 6] + str(i) for i in range(size // 8))[:size]
+    return {'user': 'dashboard', 'channel': 'lobby', 'body': body}
+
+
+async def _loop(sockets, msg) -> None:
+    for ws in sockets:
+        await ws.send_json(msg)
+
+
+async def _broadcast(hub, msg) -> None:
+    hub.publish_json('lobby', msg)
+    await asyncio.sleep(0)
+
+
+async def _time(fn, rounds: int) -> float:
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1e3
+
+
+async def main(n: int, size: int, rounds: int) -> None:
+    msg = _message(size)
+    print(f'# {n} subscribers, ~{size} B JSON message; ms per message '
+          f'(best of {rounds})')
+    print(f'{"deflate":>8} | {"loop":>9} | {"Broadcast":>9} | speed-up')
+    for deflate in (False, True):
+        sockets = _subscribers(n, deflate)
+        hub = Broadcast()
+        for ws in sockets:
+            hub.subscribe(ws, 'lobby')
+        loop_ms = await _time(lambda: _loop(sockets, msg), rounds)
+        hub_ms = await _time(lambda: _broadcast(hub, msg), rounds)
+        print(f'{"on" if deflate else "off":>8} | {loop_ms:>9.1f} | '
+              f'{hub_ms:>9.1f} | {loop_ms / hub_ms:>7.1f}x')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--subscribers', type=int, default=10_000)
+    ap.add_argument('--size', type=int, default=1024,
+                    help='approximate JSON body size in bytes')
+    ap.add_argument('--rounds', type=int, default=5)
+    args = ap.parse_args()
+    asyncio.run(main(args.subscribers, args.size, args.rounds))
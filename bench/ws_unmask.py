@@ -0,0 +1,125 @@
+"""WebSocket payload unmasking — µs per frame by payload size.
+
+Every client → server frame is masked (RFC 6455 §5.3), so the unmask runs
+once per inbound frame over its whole payload.  Compared:
+
+* **bignum** — the previous algorithm: widen payload and repeated mask to two
+  ``int`` s, XOR, convert back.
+* **words** — a Python loop over ``memoryview.cast('Q')`` 8-byte words, XOR-ed
+  with the mask widened to 64 bits, in place.  Included because it is the
+  obvious "machine-word" approach; the interpreter's per-word cost sinks it.
+* **translate** — four stride-4 ``bytes.translate`` calls through 256-byte XOR
+  tables, in place on a ``bytearray`` (``ws_codec``'s pure-Python path).
+* **numpy** — ``uint32`` XOR over the buffer, in place; skipped when NumPy is
+  not importable.
+* **unmask()** — what ``ws_codec.unmask`` does at that size, ``bytes`` in and
+  out.  Above the small-frame cutoff that is two payload copies more than the
+  in-place columns' one, which the server's own reader avoids by unmasking in
+  its receive buffer (``read_payload`` → ``readexactly_in_place``).
+
+The in-place columns include copying the frame into a fresh ``bytearray``,
+which stands in for the receive buffer the server unmasks in.
+
+Run::
+
+    python bench/ws_unmask.py [--seconds 0.3]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from blackbull.server import ws_codec
+from blackbull.server.ws_codec import unmask
+
+_SIZES = [(16, '16 B'), (125, '125 B'), (1024, '1 KiB'), (16384, '16 KiB'),
+          (262144, '256 KiB'), (4 << 20, '4 MiB')]
+
+
+def _bignum(data: bytes, mask: bytes) -> bytes:
+    n = len(data)
+    ext = (mask * ((n + 3) // 4))[:n]
+    return (int.from_bytes(data, 'big') ^ int.from_bytes(ext, 'big')).to_bytes(n, 'big')
+
+
+def _words(data: bytes, mask: bytes) -> bytearray:
+    buf = bytearray(data)
+    n8 = len(buf) & ~7
+    key = int.from_bytes(mask * 2, sys.byteorder)
+    view = memoryview(buf)[:n8].cast('Q')
+    for i in range(len(view)):
+        view[i] ^= key
+    view.release()
+    for i in range(n8, len(buf)):
+        buf[i] ^= mask[i & 3]
+    return buf
+
+
+def _translate(data: bytes, mask: bytes) -> bytearray:
+    buf = bytearray(data)
+    n = len(buf)
+    for i in range(4):
+        buf[i:n:4] = buf[i:n:4].translate(ws_codec._xor_table(mask[i]))
+    return buf
+
+
+def _numpy(data: bytes, mask: bytes) -> bytearray:
+    np = ws_codec._numpy()
+    buf = bytearray(data)
+    n4 = len(buf) & ~3
+    arr = np.frombuffer(buf, dtype=np.uint32, count=n4 >> 2)
+    arr ^= np.uint32(int.from_bytes(mask, sys.byteorder))
+    del arr
+    for i in range(n4, len(buf)):
+        buf[i] ^= mask[i & 3]
+    return buf
+
+
+def _time(fn, data: bytes, mask: bytes, seconds: float) -> float:
+    best = float('inf')
+    deadline = time.perf_counter() + seconds
+    reps = max(1, 200_000 // max(len(data), 1))
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        for _ in range(reps):
+            fn(data, mask)
+        best = min(best, (time.perf_counter() - start) / reps)
+    return best * 1e6
+
+
+def main(seconds: float) -> None:
+    np = ws_codec._numpy()
+    mask = os.urandom(4)
+    cols = ['bignum', 'words', 'translate', 'numpy', 'unmask()']
+    header = f'{"payload":>8} | ' + ' | '.join(f'{c:>10}' for c in cols)
+    print('# µs per unmask (best of runs); lower is better')
+    print(header)
+    print('-' * len(header))
+    for size, label in _SIZES:
+        data = os.urandom(size)
+        expect = _bignum(data, mask)
+        row = []
+        for name, fn in (('bignum', _bignum), ('words', _words),
+                         ('translate', _translate), ('numpy', _numpy),
+                         ('unmask()', unmask)):
+            if name == 'numpy' and not np:
+                row.append(f'{"-":>10}')
+                continue
+            assert bytes(fn(data, mask)) == expect, name
+            row.append(f'{_time(fn, data, mask, seconds):>10.1f}')
+        print(f'{label:>8} | ' + ' | '.join(row))
+    if not np:
+        print('(NumPy not importable: the numpy column is skipped and unmask() '
+              'uses translate above its small-frame cutoff)')
+
+
+if __name__ == '__main__':
+    ap = argparse.ArgumentParser(description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument('--seconds', type=float, default=0.3,
+                    help='minimum wall time per measurement')
+    main(ap.parse_args().seconds)
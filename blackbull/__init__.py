@@ -17,6 +17,7 @@ and authoritative list; the notes below cover the ones worth a sentence:
 - `Connection`: the typed internal request representation; the handler context object exposing ``method``/``path``/``headers``/``cookies``/``body()``/``json()``/``text()``. The ASGI ``scope`` is a derived view (``Connection.as_scope()``).
 - `Request`: **deprecated** alias of ``Connection``. Accessing ``blackbull.Request`` emits a ``DeprecationWarning``; replace ``request: Request`` handler params with ``conn: Connection`` (identical API). Removal no earlier than 2027-08-01.
 - `WebSocket`: the high-level WebSocket handler object — ``await ws.accept()``, ``async for message in ws``, ``ws.send_text()``/``send_bytes()``/``send_json()``, ``await ws.close()``. Declare ``async def handler(ws: WebSocket)`` on a ``Scheme.websocket`` route to receive it; the raw ``(conn, receive, send)`` form keeps working unchanged.
+- `Broadcast`: named channels of WebSocket connections — ``hub.subscribe(ws, 'room')``, ``hub.publish_text('room', text)``.  Each message is framed (and deflated) once for every subscriber, and a bounded per-connection queue keeps a slow reader from holding up the rest.
 - `WebSocketDisconnect`: raised by ``ws.receive()`` when the peer closes; carries ``code`` and ``reason``. ``async for`` ends the loop instead of raising.
 - `Depends`: per-request provider injection for simplified handlers (async-generator providers get teardown after the response is sent).
 - `cookie_header`: builds a ``Set-Cookie`` header tuple.
@@ -24,6 +25,9 @@ and authoritative list; the notes below cover the ones worth a sentence:
 - `read_json`: reads the body and parses it as JSON (``None`` on empty/invalid).
 - `read_text`: reads the body and decodes it as text.
 - `parse_cookies`: parses the ``Cookie`` header into a plain ``dict``.
+- `read_form`: parses a ``multipart/form-data`` or urlencoded body into a ``FormData``; file parts become ``UploadFile`` objects spooled to disk past ``BB_FORM_SPOOL_SIZE``.  ``conn.form()`` is the cached form of it, and simplified handlers can declare ``FormData`` / ``UploadFile`` parameters.
+- `iter_multipart`: yields the parts of a multipart body as they arrive, each an async stream of its own body chunks.
+- `FormError`: a malformed form, or one over a form limit; ``status`` is the response status (400, or 415 for a body that is not a form).
 - `CORS`: adds ``Access-Control-*`` headers; handles preflight OPTIONS requests.
 - `as_middleware`: decorator that marks an async function or class as middleware; normalises ``send`` so inner wrappers see only ASGI event dicts.
 - `TrustedProxy`: rewrites ``scope['client']`` / ``scope['scheme']`` from proxy headers.
@@ -65,8 +69,9 @@ from .headers import Headers
 from .request import (
     read_body, read_json, read_text, parse_cookies, cookies_from_headers,
     ClientDisconnected)
+from .forms import FormData, FormError, UploadFile, iter_multipart, read_form
 from .connection import Connection
-from .websocket import WebSocket, WebSocketDisconnect
+from .websocket import WebSocket, WebSocketDisconnect, Broadcast
 from .response import (
     Response, JSONResponse, RedirectResponse, StreamingResponse,
     EventSourceResponse, WebSocketResponse, cookie_header,
@@ -95,11 +100,12 @@ __all__ = [
     # request side
     'Connection', 'Headers', 'read_body', 'read_json', 'read_text',
     'parse_cookies', 'cookies_from_headers', 'ClientDisconnected',
+    'read_form', 'iter_multipart', 'FormData', 'UploadFile', 'FormError',
     # response side
     'Response', 'JSONResponse', 'RedirectResponse', 'StreamingResponse',
     'EventSourceResponse', 'WebSocketResponse', 'cookie_header',
     # websocket
-    'WebSocket', 'WebSocketDisconnect',
+    'WebSocket', 'WebSocketDisconnect', 'Broadcast',
     # dependency injection
     'Depends',
     # events
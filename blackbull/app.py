@@ -37,6 +37,7 @@ from .response import wrap_native_send
 from .asgi import ASGIReceiveCallable, ASGISendCallable
 from .config import AppConfig
 from .logger import debug_gate  # noqa: E402
+from .metrics import CONTENT_TYPE as _METRICS_CONTENT_TYPE, MetricsRegistry, RequestMetrics
 logger = logging.getLogger(__name__)
 #: Read once at import: a disabled ``logger.debug`` on a per-request path
 #: costs 24 executed instructions to emit nothing.  Same bargain as
@@ -297,6 +298,15 @@ class BlackBull:
         # multiplexed onto the same port and dispatched in ``_dispatch``.
         self._grpc_registry = None
 
+        # Metrics: the registry is always there for the app's own families;
+        # the request series are fed by BlackBull's server (through the
+        # aggregator it builds from this app) unless ``BB_METRICS=0``.
+        # ``enable_metrics`` serves the registry.
+        from .env import get_settings  # noqa: PLC0415
+        self.metrics = MetricsRegistry()
+        self._request_metrics = (RequestMetrics(self.metrics)
+                                 if get_settings().metrics else None)
+
         if trusted_proxies is not None:
             from .middleware.proxy import TrustedProxy  # noqa: PLC0415
             self.use(TrustedProxy(trusted_proxies))
@@ -691,6 +701,11 @@ class BlackBull:
             content_type = conn.headers.get(b'content-type', b'')
             if content_type.strip().startswith(b'application/grpc'):
                 from .grpc import serve_grpc  # noqa: PLC0415 — optional subpackage
+                if (self._request_metrics is not None
+                        and self._grpc_registry.lookup_method(conn.path) is not None):
+                    # A registered method path is a bounded label; an unknown
+                    # one stays unmatched rather than minting a series.
+                    conn._route = conn.path
                 await serve_grpc(self._grpc_registry, conn, receive, send)
                 return
 
@@ -745,6 +760,13 @@ class BlackBull:
                 await handler(conn, receive, send)
             return
 
+        # The request metrics label a request by the template it matched,
+        # never the raw path.  Only BlackBull's own server reads the tag; an
+        # external host's requests are not counted.
+        if self._request_metrics is not None:
+            conn._route = (getattr(function, '_bb_route', None)
+                           or getattr(function, '__name__', None))
+
         # Per-route hooks (method-agnostic): a route may declare response
         # headers to add to every response, and a request guard that rejects
         # the request before dispatch.  The dispatcher applies both uniformly —
@@ -1100,7 +1122,7 @@ class BlackBull:
 
     def static(self, url_prefix: str, root_dir: str | Path, *,
                cache: bool = False, index: str | None = None,
-               conditional: bool = True) -> None:
+               conditional: bool = True, precompress: bool = False) -> None:
         """Serve static files from *root_dir* under *url_prefix* as a route.
 
         ``cache`` (default ``False``): when ``True``, file bodies are
@@ -1119,6 +1141,12 @@ class BlackBull:
         validators and answer ``If-None-Match`` / ``If-Modified-Since`` with
         a 304.  Set ``False`` to disable conditional responses.
 
+        ``precompress`` (default ``False``; requires ``cache=True``): keep
+        br / zstd / gzip variants of text assets in the cache, encoded once
+        at build-time quality.  Every eligible file is encoded in an
+        :meth:`on_warmup` hook, before the workers fork; anything added
+        later is encoded in the background on first request.
+
         Registered as a **route**, not global middleware, so a request that
         is not for a static path never enters this code: it resolves in the
         router's exact-match dict and never reaches the parametrised scan.
@@ -1129,7 +1157,12 @@ class BlackBull:
         root = Path(root_dir).resolve()
         self._static_roots.append((url_prefix, root))
         mw = StaticFiles(url_prefix=url_prefix, root_dir=root, cache=cache,
-                         index=index, conditional=conditional)
+                         index=index, conditional=conditional,
+                         precompress=precompress)
+        if precompress:
+            async def _precompress(app) -> None:
+                await mw.precompress_all()
+            self.on_warmup(_precompress)
         prefix = url_prefix.rstrip('/')
         methods = [HTTPMethod.GET, HTTPMethod.HEAD]
         chain = [mw, self._static_miss()]
@@ -1214,6 +1247,29 @@ class BlackBull:
         """
         self._grpc_registry = registry
 
+    def enable_metrics(self, path: str = '/metrics') -> None:
+        """Serve ``app.metrics`` as Prometheus text on a ``GET`` route at *path*.
+
+        Collection does not depend on this call.  Unless ``BB_METRICS=0``,
+        every request BlackBull's own server handles is already recorded in
+        ``blackbull_http_request_duration_seconds`` (a histogram labelled by
+        route template, status and protocol),
+        ``blackbull_http_response_bytes_total`` and
+        ``blackbull_http_requests_in_flight``.  Families the app declares
+        with ``app.metrics.counter(...)`` / ``.gauge(...)`` /
+        ``.histogram(...)`` are rendered alongside.
+
+        The route is public.  Mount it on a path your proxy does not expose,
+        or guard it with middleware, when the numbers are not for everyone.
+        """
+        registry = self.metrics
+
+        async def _metrics(conn, receive, send):  # noqa: ARG001
+            await send(registry.render().encode(), HTTPStatus.OK,
+                       [(b'content-type', _METRICS_CONTENT_TYPE)])
+        _metrics.__blackbull_openapi_internal__ = True
+        self.route(methods=HTTPMethod.GET, path=path)(_metrics)
+
     def enable_openapi(self, *,
                        title: str = 'BlackBull API',
                        version: str = '0.1.0',
@@ -1262,6 +1318,7 @@ class BlackBull:
         detector: object | None = None,
         port: int | None = None,
         tls: bool = False,
+        all_workers: bool = False,
     ) -> None:
         """Register a handler for a non-ASGI (raw) protocol.
 
@@ -1279,15 +1336,20 @@ class BlackBull:
             tls: Serve this port through the server's TLS machinery (e.g.
                 ``mqtts://``).  Requires the server to be configured with a
                 certificate; startup fails fast otherwise.
+            all_workers: Accept on *port* in every worker of a multi-worker
+                server instead of worker 0 alone.  The handler must then
+                coordinate across workers itself (``blackbull.server.bus``).
         """
         if self._protocol_registry is None:
             from .server.protocol_registry import ProtocolRegistry  # noqa: PLC0415
             self._protocol_registry = ProtocolRegistry()
         self._protocol_registry.register(name, handler,
-                                         detector=detector, port=port, tls=tls)
+                                         detector=detector, port=port, tls=tls,
+                                         all_workers=all_workers)
 
     def raw_handler(self, name: str, *, port: int | None = None,
-                    detector: object | None = None, tls: bool = False):
+                    detector: object | None = None, tls: bool = False,
+                    all_workers: bool = False):
         """Decorator form of :meth:`register_protocol_handler`.
 
         ::
@@ -1300,7 +1362,7 @@ class BlackBull:
         def decorator(handler):
             self.register_protocol_handler(name, handler,
                                            detector=detector, port=port,
-                                           tls=tls)
+                                           tls=tls, all_workers=all_workers)
             return handler
         return decorator
 
@@ -1526,7 +1588,8 @@ def serve(app, *,
         reload=reload,
         reload_paths=reload_paths,
         # Bound by master_server.open_socket(); handed to worker 0 only so the
-        # broker has a single owner while HTTP scales across all workers.
+        # broker has a single owner while HTTP scales across all workers —
+        # except bindings registered with ``all_workers=True``.
         protocol_sockets=master_server._protocol_sockets,
     ).run()
 
@@ -20,6 +20,7 @@ from __future__ import annotations
 from dataclasses import dataclass, field
 from typing import Any, AsyncIterator, Callable, NamedTuple
 
+from .forms import FormData, _read_form
 from .headers import Headers
 from .request import (read_body, stream_body, cookies_from_headers,
                       ClientDisconnected, _json_or_none)
@@ -28,6 +29,10 @@ __all__ = ['Connection', 'ClientDisconnected', 'CONNECTION_STASH_KEY',
            'disconnected', 'mark_disconnected']
 
 
+async def _single_chunk(body: bytes) -> AsyncIterator[bytes]:
+    yield body
+
+
 def disconnected(target) -> bool:
     """True if the client disconnected mid-request. Accepts either a native
     :class:`Connection` (the ``app(conn, …)`` path) or an ASGI ``scope`` dict
@@ -124,9 +129,11 @@ _CONNECTION_FIELDS: list[_FieldSpec] = [
     _FieldSpec('_body',          None, None, None),   # body cache
     _FieldSpec('_body_read',     None, None, None),   # body-drained flag
     _FieldSpec('_cookies',       None, None, None),   # parsed-cookies cache
+    _FieldSpec('_form',          None, None, None),   # parsed-form cache
     _FieldSpec('_receive',       None, None, None),   # ASGI receive channel
     _FieldSpec('_disconnected',  None, None, None),   # client-disconnect flag (actor→app)
     _FieldSpec('_ws',            None, None, None),   # WebSocket handshake internals bag
+    _FieldSpec('_route',         None, None, None),   # matched route tag (request metrics)
 ]
 
 
@@ -253,6 +260,7 @@ class Connection:
     _body: bytes | None = field(default=None, compare=False, repr=False)
     _body_read: bool = field(default=False, compare=False, repr=False)
     _cookies: dict[str, str] | None = field(default=None, compare=False, repr=False)
+    _form: FormData | None = field(default=None, compare=False, repr=False)
     # The **raw** ``receive`` channel (recipient), bound by the actor via
     # ``bind_receive_channel`` / by ``from_scope`` on the external path; only
     # ever a receive callable or ``None`` (before body access is wired). Must
@@ -272,6 +280,10 @@ class Connection:
     # allocation), so the HTTP hot path pays nothing. Not an ASGI scope key —
     # these are private plumbing, never surfaced to a handler.
     _ws: dict[str, Any] | None = field(default=None, compare=False, repr=False)
+    # The matched route's template (or the gRPC method path), set by the
+    # dispatcher and read by the actor when it feeds request metrics.
+    # ``None`` until a route matches — metrics label that ``unmatched``.
+    _route: str | None = field(default=None, compare=False, repr=False)
 
     # ---- path params (lazy — allocated on first access) ------------------
 
@@ -456,10 +468,11 @@ class Connection:
             self._body = await read_body(self._receive)
             self._body_read = True
         elif self._body is None:
-            # _body_read set with no cached bytes ⇒ stream() drained the channel.
+            # _body_read set with no cached bytes ⇒ stream()/form() drained
+            # the channel.
             raise RuntimeError(
-                'Connection.body() unavailable: stream() has already consumed '
-                'the request body incrementally.')
+                'Connection.body() unavailable: stream() or form() has already '
+                'consumed the request body incrementally.')
         return self._body
 
     async def stream(self) -> AsyncIterator[bytes]:
@@ -482,14 +495,45 @@ class Connection:
         """
         if self._body_read:
             raise RuntimeError(
-                'Connection.stream() cannot run after body()/json()/text() '
-                'has already drained (and buffered) the request body.')
+                'Connection.stream() cannot run after body()/json()/text()/form() '
+                'has already drained the request body.')
         # Mark drained up front so a later body() call fails fast rather than
         # re-reading an exhausted channel and returning b''.
         self._body_read = True
         async for chunk in stream_body(self._receive):
             yield chunk
 
+    async def form(self) -> FormData:
+        """Parse the body as a form — ``multipart/form-data`` or urlencoded —
+        draining ``receive`` at most once.
+
+        The body is parsed as it streams in: file parts become
+        :class:`~blackbull.forms.UploadFile` objects that roll over to a
+        temporary file past ``BB_FORM_SPOOL_SIZE``, so an upload never has to
+        fit in memory.  Repeated calls return the same
+        :class:`~blackbull.forms.FormData`.  After :meth:`body` the cached bytes
+        are parsed; after :meth:`stream` there is nothing left and
+        :class:`RuntimeError` is raised.  A malformed body raises
+        :class:`~blackbull.forms.FormError`.
+
+        Close the form to delete its temporary files promptly
+        (``async with await conn.form() as form:``).  Simplified handlers that
+        take a ``FormData`` / ``UploadFile`` parameter have it closed for them
+        once the response is sent.
+        """
+        if self._form is None:
+            if not self._body_read:
+                self._body_read = True
+                chunks = stream_body(self._receive)
+            elif self._body is not None:
+                chunks = _single_chunk(self._body)
+            else:
+                raise RuntimeError(
+                    'Connection.form() unavailable: stream() has already consumed '
+                    'the request body incrementally.')
+            self._form = await _read_form(chunks, self.headers.get(b'content-type'))
+        return self._form
+
     async def json(self) -> Any:
         """Parse the cached body as JSON (``None`` on empty/invalid input)."""
         return _json_or_none(await self.body())
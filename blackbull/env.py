@@ -35,6 +35,20 @@ BB_MAX_CONNECTIONS
     number that depends on the workload — set it explicitly; 1024 is a
     typical single-loop value.  Multi-worker deployments multiply (so
     ``workers=8`` × ``BB_MAX_CONNECTIONS=1024`` → 8K per process).
+BB_SHED_TARGET_MS
+    Queueing-delay target for adaptive load shedding, in milliseconds;
+    ``0`` (the default) leaves shedding off.  A request's queueing delay is
+    the time from the arrival of its bytes to its dispatch.  When no request
+    has come in under the target for ``BB_SHED_INTERVAL_MS``, the worker is
+    overloaded, and each request that waited longer than the target is
+    refused before any middleware runs: HTTP/1.1 gets ``503`` with
+    ``Retry-After``, HTTP/2 gets ``RST_STREAM(REFUSED_STREAM)``.
+BB_SHED_INTERVAL_MS
+    How long the queueing delay must stay above ``BB_SHED_TARGET_MS``
+    before shedding starts.  Bursts shorter than this are queued, not
+    refused.  Default: ``100``.
+BB_SHED_RETRY_AFTER
+    ``Retry-After`` seconds on a shed HTTP/1.1 request.  Default: ``1``.
 BB_STREAM_QUEUE_DEPTH
     ``asyncio.Queue`` depth for HTTP/2 per-stream request-body events.
     Limits memory growth when an ASGI handler is slower than the client.
@@ -54,6 +68,18 @@ BB_ACCESS_LOG
     production where a separate log aggregator consumes structured logs and the
     per-request overhead of the access logger is undesirable.
     Default: ``true``.
+BB_METRICS
+    ``1`` | ``true`` | ``yes`` to enable; ``0`` | ``false`` | ``no`` to disable.
+    When enabled, every request served by BlackBull's own server is recorded
+    in the app's latency histograms and counters (``app.metrics``); serve them
+    with ``app.enable_metrics()``.
+    Default: ``true``.
+BB_METRICS_SHM_BYTES
+    Bytes of shared memory per worker for ``app.metrics`` under a multi-worker
+    server (``BB_WORKERS`` > 1), where every worker's series are merged into
+    the one ``/metrics`` view.  A histogram series takes about 1.6 KiB.  Pages
+    are only backed once touched.
+    Default: ``4194304`` (4 MiB).
 BB_LOG_FORMAT
     Async-logging sink format.  ``json`` emits one structured JSON object per
     line; anything else (default) keeps plain text.
@@ -145,11 +171,29 @@ BB_HEADER_MAX_TOTAL
     Maximum total bytes in the entire HTTP/1.1 request header block
     (request-line + all headers + CRLFCRLF).  Default: ``65536``
     (matches typical reverse-proxy defaults).
+BB_PIPELINE_BATCH
+    Maximum number of pipelined HTTP/1.1 responses written to the transport
+    in one batch.  When the next request head is already buffered, the
+    response to a bodiless request is held and the batch is flushed in a
+    single write once no further head is buffered or this many responses are
+    held.  ``0`` disables batching: every response is written on its own.
+    Default: ``0``.
 BB_BODY_CHUNK_SIZE
     Slice size (bytes) for streaming an HTTP/1.1 ``Content-Length`` request
     body to the ASGI app as successive ``http.request`` events instead of one
     giant allocation.  Default: ``65536`` (asyncio's ``StreamReader`` buffer).
     Must be ``> 0``.
+BB_FORM_SPOOL_SIZE
+    Bytes of one uploaded file part held in memory by ``read_form`` /
+    ``Connection.form()`` before the part is rolled over to a temporary file.
+    Default: ``1048576`` (1 MiB).
+BB_FORM_MAX_FIELD_SIZE
+    Maximum bytes of one non-file form field.  Such fields are returned as
+    ``str`` and so are held in memory; a larger one is refused with ``400``.
+    Default: ``1048576`` (1 MiB).
+BB_FORM_MAX_PARTS
+    Maximum number of fields (multipart parts or urlencoded pairs) in one
+    form.  Default: ``1000``.
 BB_H2_INITIAL_WINDOW_SIZE
     Per-stream flow-control window size (bytes) advertised to HTTP/2 peers in the
     server's initial SETTINGS frame.  Larger values allow peers to send more data
@@ -164,6 +208,12 @@ BB_H2_CONNECTION_WINDOW_SIZE
     Default: ``65535`` (RFC 9113 §6.9.2 minimum).  ``4194304`` (4 MiB) is a
     common tuned value to allow concurrent streams to share the connection
     budget without head-of-line stalls — see docs/reference/env-vars.md.
+BB_H2_HPACK_STATIC_ONLY
+    Encode HTTP/2 response headers without the HPACK dynamic table: fields
+    that are not an exact static-table entry go out as literals without
+    indexing (RFC 7541 §6.2.2), and each connection caches every field's
+    encoding.  Costs header bytes on the wire to save encoder CPU.
+    Default: ``false``.
 BB_H2_MAX_CONCURRENT_STREAMS
     Maximum number of HTTP/2 streams the server accepts at the same time per
     connection, advertised to peers in the initial SETTINGS frame
@@ -419,6 +469,12 @@ BB_DEADLINE_TICK_MS
     ``BB_BODY_TIMEOUT``, ``BB_WRITE_TIMEOUT``, ``BB_KEEP_ALIVE_TIMEOUT``).
     Smaller = tighter timeout granularity at a small CPU cost; larger =
     more slack but cheaper.  Default: ``300``.
+BB_LOOP_LAG_MS
+    Event-loop stall threshold in milliseconds; ``0`` disables the monitor.
+    When set, each worker samples loop lag on the deadline scanner tick into
+    ``blackbull_event_loop_lag_seconds``.  A tick later than this logs one
+    ``WARNING`` on ``blackbull.lag``, naming the stack, task, route and
+    connection that held the loop.  Default: ``0``.
 BB_CPU_PINNING
     Per-worker CPU pinning, applied after fork in each worker process.
     ``auto`` (default) gives worker *i* the *i*-th CPU of the mask the
@@ -595,6 +651,17 @@ class Settings:
     #: than silently capped by whatever host the test happens to run on.
     max_connections: int = 0
 
+    #: Queueing-delay target (ms) for adaptive load shedding
+    #: (:mod:`blackbull.server.admission`); 0 leaves shedding off.
+    shed_target_ms: int = 0
+
+    #: How long (ms) the queueing delay must stay above the target before
+    #: requests are shed.
+    shed_interval_ms: int = 100
+
+    #: ``Retry-After`` seconds on a shed HTTP/1.1 request.
+    shed_retry_after: int = 1
+
     #: asyncio.Queue depth for HTTP/2 per-stream request-body events.
     stream_queue_depth: int = 64
 
@@ -610,6 +677,19 @@ class Settings:
     #: Emit one access log record per completed request on blackbull.access.
     access_log: bool = True
 
+    #: Record every request in the app's metrics (``app.metrics``): latency
+    #: histograms by route, status and protocol, response bytes, and requests
+    #: in flight.
+    metrics: bool = True
+
+    #: Shared-memory slot size per worker for merging ``app.metrics`` across a
+    #: multi-worker server (see :class:`~blackbull.metrics.MetricsArena`).
+    metrics_shm_bytes: int = 4 * 1024 * 1024
+
+    #: Event-loop stall threshold (ms) for the lag monitor
+    #: (:mod:`blackbull.server.lag`); 0 leaves it off.
+    loop_lag_ms: int = 0
+
     #: Async-logging sink format: '' → plain text (default), 'json' → one
     #: structured JSON object per line (approach 3).
     log_format: str = ''
@@ -728,6 +808,10 @@ class Settings:
     #: typical reverse-proxy defaults.
     header_max_total: int = 65536
 
+    #: Pipelined HTTP/1.1 responses flushed per batched write; 0 writes each
+    #: response on its own.  Only requests without a body join a batch.
+    pipeline_batch: int = 0
+
     #: Dual-path conformance lane.  When true, every request
     #: round-trips the native :class:`~blackbull.connection.Connection` through
     #: ``as_scope()`` + ``from_scope()`` before dispatch, so the ASGI compat
@@ -806,6 +890,20 @@ class Settings:
     #: for one.
     min_body_rate_grace: float = 5.0
 
+    #: Bytes of one uploaded file part kept in memory before the part rolls
+    #: over to a temporary file (``blackbull.forms.UploadFile``).  A 500 MB
+    #: upload therefore costs this much RSS, not 500 MB.
+    form_spool_size: int = 1048576
+
+    #: Maximum bytes of one *non-file* form field.  Those are decoded to
+    #: ``str`` and held whole, so this is the memory bound for them; a larger
+    #: field is refused with ``400``.
+    form_max_field_size: int = 1048576
+
+    #: Maximum number of fields in one form — multipart parts or urlencoded
+    #: pairs.  Bounds the per-part bookkeeping a peer can make us allocate.
+    form_max_parts: int = 1000
+
     #: Per-stream HTTP/2 flow-control window advertised in the server's SETTINGS.
     #: 65535 is the RFC 9113 §6.9.2 default.  Production deployments serving
     #: large responses should raise this — see
@@ -820,6 +918,11 @@ class Settings:
     #: Maximum concurrent HTTP/2 streams per connection (SETTINGS_MAX_CONCURRENT_STREAMS).
     h2_max_concurrent_streams: int = 100
 
+    #: Encode response headers in the HPACK encoder's static-only mode —
+    #: no dynamic-table entries, every field's encoding cached per
+    #: connection.  Larger header blocks, less encoder CPU.
+    h2_hpack_static_only: bool = False
+
     #: Advertise SETTINGS_ENABLE_CONNECT_PROTOCOL=1 (RFC 8441 §3) so peers may
     #: bootstrap WebSocket over HTTP/2 via Extended CONNECT.  Off by default —
     #: this path has fewer conformance tests than the HTTP/1.1 upgrade path,
@@ -985,10 +1088,16 @@ def get_settings() -> Settings:
         workers=_int_env('BB_WORKERS', 1),
         max_connections=resolve_max_connections(
             os.environ.get('BB_MAX_CONNECTIONS')),
+        shed_target_ms=_int_env('BB_SHED_TARGET_MS', 0),
+        shed_interval_ms=_int_env('BB_SHED_INTERVAL_MS', 100),
+        shed_retry_after=_int_env('BB_SHED_RETRY_AFTER', 1),
         stream_queue_depth=_int_env('BB_STREAM_QUEUE_DEPTH', 64),
         ws_queue_depth=_int_env('BB_WS_QUEUE_DEPTH', 0),
         async_logging=_bool_env('BB_ASYNC_LOGGING', True),
         access_log=_bool_env('BB_ACCESS_LOG', True),
+        metrics=_bool_env('BB_METRICS', True),
+        metrics_shm_bytes=_int_env('BB_METRICS_SHM_BYTES', 4 * 1024 * 1024),
+        loop_lag_ms=_int_env('BB_LOOP_LAG_MS', 0),
         log_format=_str_env('BB_LOG_FORMAT', ''),
         log_syslog_addr=_str_env('BB_SYSLOG_ADDR', ''),
         log_batch_size=_int_env('BB_LOG_BATCH_SIZE', 64),
@@ -1009,18 +1118,23 @@ def get_settings() -> Settings:
         write_timeout=_float_env_nonneg('BB_WRITE_TIMEOUT', 30.0),
         header_max_line=_int_env_nonneg('BB_HEADER_MAX_LINE', 8192),
         header_max_total=_int_env_nonneg('BB_HEADER_MAX_TOTAL', 65536),
+        pipeline_batch=_int_env_nonneg('BB_PIPELINE_BATCH', 0),
         force_asgi_scope=_bool_env('BB_FORCE_ASGI_SCOPE', False),
         body_chunk_size=_int_env('BB_BODY_CHUNK_SIZE', 65536),
         body_chunk_max=_int_env('BB_BODY_CHUNK_MAX', 524288),
         max_body_size=_int_env_nonneg('BB_MAX_BODY_SIZE', 31457280),
         min_body_rate=_float_env_nonneg('BB_MIN_BODY_RATE', 240.0),
         min_body_rate_grace=_float_env_nonneg('BB_MIN_BODY_RATE_GRACE', 5.0),
+        form_spool_size=_int_env_nonneg('BB_FORM_SPOOL_SIZE', 1048576),
+        form_max_field_size=_int_env_nonneg('BB_FORM_MAX_FIELD_SIZE', 1048576),
+        form_max_parts=_int_env_nonneg('BB_FORM_MAX_PARTS', 1000),
         # RFC 9113 §6.9.2 default initial window size.  See
         # docs/reference/env-vars.md "Performance recommendations" for the
         # values commonly used on tuned production deployments.
         h2_initial_window_size=_int_env('BB_H2_INITIAL_WINDOW_SIZE', 65535),
         h2_connection_window_size=_int_env('BB_H2_CONNECTION_WINDOW_SIZE', 65535),
         h2_max_concurrent_streams=_int_env('BB_H2_MAX_CONCURRENT_STREAMS', 100),
+        h2_hpack_static_only=_bool_env('BB_H2_HPACK_STATIC_ONLY', False),
         h2_enable_websocket=_bool_env('BB_H2_ENABLE_WEBSOCKET', False),
         h2_ws_max_streams_per_connection=_int_env_nonneg(
             'BB_H2_WS_MAX_STREAMS_PER_CONNECTION', 5),
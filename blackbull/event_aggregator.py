@@ -1,5 +1,6 @@
 from blackbull.asgi import WebSocketReceiveEvent
 from blackbull.event import Event, EventDispatcher
+from blackbull.metrics import RequestMetrics
 
 
 def _request_fields(conn):
@@ -40,8 +41,15 @@ class EventAggregator:
         It is a framework-internal component.
     """
 
-    def __init__(self, dispatcher: EventDispatcher) -> None:
+    #: The app's request series (``BlackBull._request_metrics``), fed by the
+    #: protocol actors at dispatch entry and exit; ``None`` with
+    #: ``BB_METRICS=0``.
+    request_metrics: RequestMetrics | None = None
+
+    def __init__(self, dispatcher: EventDispatcher,
+                 request_metrics: RequestMetrics | None = None) -> None:
         self._dispatcher = dispatcher
+        self.request_metrics = request_metrics
         # Generation-keyed caches for the per-message / per-request listener
         # guards.  Each event's verdict is a plain bool, refreshed only when
         # the dispatcher's registration generation changes (listeners are
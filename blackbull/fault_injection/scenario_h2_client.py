@@ -361,16 +361,16 @@ def scenario_from_json(src: str) -> ScenarioH2Client:
 def encode_headers(step: SendHeaders) -> bytes:
     """Assemble one HEADERS frame from *step*.
 
-    HPACK encoding goes through the ``hpack`` package the server also uses,
-    because a *correct* block is the baseline every header fault is a
-    deviation from — hand-rolling it would make even the well-formed case a
-    guess.  ``raw_block`` is the escape hatch for blocks HPACK will not
+    HPACK encoding goes through the codec the server also uses
+    (:mod:`blackbull.protocol.hpack_codec`), because a *correct* block is the
+    baseline every header fault is a deviation from — hand-rolling it would
+    make even the well-formed case a guess.  ``raw_block`` is the escape hatch for blocks HPACK will not
     produce.
     """
     if step.raw_block is not None:
         block = step.raw_block
     else:
-        from hpack import Encoder  # noqa: PLC0415
+        from ..protocol.hpack_codec import Encoder  # noqa: PLC0415
         block = Encoder().encode(list(step.pseudo) + list(step.headers))
     flags = 0
     if step.end_stream:
@@ -18,15 +18,19 @@ takes an async iterator of request messages (``request_iter``).
 
 Protobuf is **not** a dependency: handlers receive and return raw message
 bytes, so the application chooses its own serialisation (``grpc_tools.protoc``
-output, ``protobuf``, or hand-rolled).
+output, ``protobuf``, or hand-rolled).  A method registered with
+``request_deserializer`` / ``response_serializer`` codecs exchanges objects
+instead, the framework applying the codecs at the boundary.
 """
-from .codec import encode_message, decode_messages, GrpcDecodeError
+from .codec import (
+    encode_message, decode_messages, GrpcDecodeError, MessageReassembler,
+)
 from .registry import GrpcServiceRegistry
 from .status import GrpcStatus, GrpcError
 from .asgi import serve_grpc, GrpcContext
 
 __all__ = [
-    'encode_message', 'decode_messages', 'GrpcDecodeError',
+    'encode_message', 'decode_messages', 'GrpcDecodeError', 'MessageReassembler',
     'GrpcServiceRegistry', 'GrpcStatus', 'GrpcError',
     'serve_grpc', 'GrpcContext',
 ]
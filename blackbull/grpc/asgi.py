@@ -19,12 +19,14 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
-import struct
 
 from ..native import NativeResponse
 from ..request import read_body, ClientDisconnected
 from . import compression
-from .codec import decode_messages, encode_message, GrpcDecodeError, MAX_MESSAGE_LENGTH
+from .codec import (
+    decode_messages, encode_message, GrpcDecodeError, MAX_MESSAGE_LENGTH,
+    MessageReassembler, MessageTooLarge,
+)
 from .registry import GrpcServiceRegistry
 from .status import GrpcError, GrpcStatus
 
@@ -72,6 +74,19 @@ try:
 except ValueError:
     _COMPRESS_MIN_BYTES = 1024
 
+# Request messages larger than this are handed to a method's
+# ``request_deserializer`` in a worker thread rather than decoded on the event
+# loop.  Decoding is CPU work proportional to the message — a multi-megabyte
+# protobuf parse stalls every other stream on the loop for milliseconds — but
+# a thread hop costs tens of microseconds, which only pays off for large
+# messages.  0 decodes everything inline.  Read at import; tests may
+# monkeypatch this module attribute.
+try:
+    _CODEC_OFFLOAD_BYTES = int(os.environ.get('BB_GRPC_CODEC_OFFLOAD_BYTES',
+                                              1024 * 1024))
+except ValueError:
+    _CODEC_OFFLOAD_BYTES = 1024 * 1024
+
 # grpc-timeout unit → seconds (gRPC HTTP/2 protocol §"Timeout").
 _TIMEOUT_UNITS: dict[bytes, float] = {
     b'H': 3600.0, b'M': 60.0, b'S': 1.0,
@@ -153,11 +168,27 @@ def _frame_response(payload: bytes, compress: bool) -> bytes:
     small message uncompressed with Flag = 0) is valid even when the response's
     ``grpc-encoding`` header advertises gzip — the flag, not the header, decides
     each message."""
+    compressed, payload = _maybe_compress(payload, compress)
+    return encode_message(payload, compressed=compressed)
+
+
+def _frame_response_into(buf: bytearray, payload: bytes, compress: bool) -> None:
+    """:func:`_frame_response`, appended to *buf* rather than returned.
+
+    The server-streaming batch buffer is the output buffer: framing straight
+    into it skips the intermediate framed ``bytes`` per message."""
+    compressed, payload = _maybe_compress(payload, compress)
+    buf.append(1 if compressed else 0)
+    buf += len(payload).to_bytes(4, 'big')
+    buf += payload
+
+
+def _maybe_compress(payload: bytes, compress: bool) -> tuple[bool, bytes]:
     if compress and len(payload) > _COMPRESS_MIN_BYTES:
         packed = compression.compress_gzip(payload)
         if len(packed) < len(payload):
-            return encode_message(packed, compressed=True)
-    return encode_message(payload)
+            return True, packed
+    return False, payload
 
 
 def _req_field(conn, name, default=None):
@@ -374,6 +405,11 @@ async def _read_unary_request(receive, encoding: bytes) -> bytes:
             'client disconnected before sending the request') from exc
     try:
         messages = decode_messages(body)
+    except MessageTooLarge as exc:
+        raise GrpcError(
+            GrpcStatus.RESOURCE_EXHAUSTED,
+            f'request message ({exc.length} bytes) larger than the '
+            f'{exc.limit}-byte limit')
     except GrpcDecodeError as exc:
         raise GrpcError(GrpcStatus.INTERNAL, f'malformed request: {exc}')
     if len(messages) != 1:
@@ -391,57 +427,101 @@ async def _read_unary_request(receive, encoding: bytes) -> bytes:
     return request
 
 
-# 1-byte compressed flag + 4-byte big-endian length (gRPC LPM prefix).
-_LPM_PREFIX = struct.Struct('>BI')
-_PREFIX_LEN = _LPM_PREFIX.size
+async def _deserialize(deserialize, message: bytes):
+    """Decode one request *message* with a method's ``request_deserializer``.
 
+    Messages over ``_CODEC_OFFLOAD_BYTES`` are decoded in a worker thread.
+    A decoder failure is the client's malformed message, answered INTERNAL
+    as grpcio does."""
+    try:
+        if 0 < _CODEC_OFFLOAD_BYTES < len(message):
+            return await asyncio.to_thread(deserialize, message)
+        return deserialize(message)
+    except Exception as exc:  # noqa: BLE001 — any decoder failure
+        raise GrpcError(GrpcStatus.INTERNAL,
+                        f'could not deserialize request: {exc}') from exc
 
-async def _iter_request_messages(receive, encoding: bytes):
+
+def _serialize(serialize, response):
+    """Encode one response object with a method's ``response_serializer``.
+
+    A failure here is a server bug (a handler returned the wrong type), so it
+    is logged before it becomes INTERNAL."""
+    try:
+        return serialize(response)
+    except Exception as exc:  # noqa: BLE001 — any encoder failure
+        logger.exception('gRPC response_serializer raised')
+        raise GrpcError(GrpcStatus.INTERNAL,
+                        f'could not serialize response: {exc}') from exc
+
+
+async def _iter_request_messages(receive, encoding: bytes, deserialize=None):
     """Yield de-framed request messages as they arrive (client-/bidi-streaming).
 
     Reassembles Length-Prefixed-Messages across ``http.request`` events — gRPC
     messages don't align to DATA-frame boundaries, so a message may straddle
-    several events or several messages may share one.  A residual buffer holds
-    the partial tail between events.  A compressed message (Compressed-Flag = 1)
-    is decompressed with the request's *encoding*.  Raises :class:`GrpcError` on
-    an oversized / unsupported-encoding / truncated message, matching
-    ``_read_unary_request`` (RESOURCE_EXHAUSTED / UNIMPLEMENTED / INTERNAL)."""
-    buf = bytearray()
+    several events or several messages may share one.  A
+    :class:`~blackbull.grpc.codec.MessageReassembler` holds the received chunks
+    by reference and slices messages out of them, so each payload is copied
+    once — into the ``bytes`` the handler receives — however the peer splits
+    it.  A compressed message (Compressed-Flag = 1) is decompressed with the
+    request's *encoding*.  Raises :class:`GrpcError` on an oversized /
+    unsupported-encoding / truncated message, matching
+    ``_read_unary_request`` (RESOURCE_EXHAUSTED / UNIMPLEMENTED / INTERNAL).
+    With a method's *deserialize* codec each message is yielded decoded."""
+    # For an uncompressed frame the prefixed length *is* the message size, so
+    # the per-message limit applies directly.  A compressed frame's length is
+    # the *compressed* transfer size (which may inflate); it is bounded only by
+    # the codec safety floor here, and the real per-message limit is enforced
+    # on the decompressed output by _decompress_message.
+    reassembler = MessageReassembler(max_length=MAX_MESSAGE_SIZE,
+                                     max_compressed_length=MAX_MESSAGE_LENGTH)
+    # BlackBull's own recipients hand over every DATA frame already queued
+    # per await; an external host's receive gets the event loop below.
+    next_chunks = getattr(receive, 'next_chunks', None)
     more = True
     while more:
-        event = await receive()
-        if event.get('type') == 'http.disconnect':
-            raise GrpcError(GrpcStatus.CANCELLED, 'client disconnected mid-stream')
-        chunk = event.get('body', b'')
-        if chunk:
-            buf.extend(chunk)
-        more = event.get('more_body', False)
-        # Drain every complete message currently buffered.
-        while len(buf) >= _PREFIX_LEN:
-            flag, length = _LPM_PREFIX.unpack_from(buf, 0)
-            # For an uncompressed frame the prefixed length *is* the message
-            # size, so the per-message limit applies directly.  A compressed
-            # frame's length is the *compressed* transfer size (which may
-            # inflate); it is bounded only by the codec safety floor here, and
-            # the real per-message limit is enforced on the decompressed output
-            # by _decompress_message.
-            limit = MAX_MESSAGE_LENGTH if flag else MAX_MESSAGE_SIZE
-            if length > limit:
+        if next_chunks is not None:
+            try:
+                batch = await next_chunks()
+            except ClientDisconnected:
+                raise GrpcError(GrpcStatus.CANCELLED,
+                                'client disconnected mid-stream') from None
+            if batch is None:
+                break
+            for chunk in batch:
+                reassembler.feed(chunk)
+        else:
+            event = await receive()
+            if event.get('type') == 'http.disconnect':
+                raise GrpcError(GrpcStatus.CANCELLED,
+                                'client disconnected mid-stream')
+            reassembler.feed(event.get('body', b''))
+            more = event.get('more_body', False)
+        # Drain every complete message currently buffered.  ``drain`` hands
+        # back the messages ahead of an oversized prefix first and raises on
+        # the call after, so loop until it comes back empty.
+        while True:
+            try:
+                messages = reassembler.drain(copy=True)
+            except MessageTooLarge as exc:
                 raise GrpcError(
                     GrpcStatus.RESOURCE_EXHAUSTED,
-                    f'request message ({length} bytes) larger than the '
-                    f'{limit}-byte limit')
-            if len(buf) - _PREFIX_LEN < length:
-                break  # body not fully arrived yet
-            message = bytes(buf[_PREFIX_LEN:_PREFIX_LEN + length])
-            del buf[:_PREFIX_LEN + length]
-            if flag:
-                message = _decompress_message(message, encoding)
-            yield message
-    if buf:
+                    f'request message ({exc.length} bytes) larger than the '
+                    f'{exc.limit}-byte limit')
+            if not messages:
+                break
+            for flag, payload in messages:
+                if flag:
+                    payload = _decompress_message(payload, encoding)
+                if deserialize is not None:
+                    payload = await _deserialize(deserialize, payload)
+                yield payload
+    if reassembler.buffered:
         raise GrpcError(
             GrpcStatus.INTERNAL,
-            f'malformed request: {len(buf)} trailing byte(s) after last message')
+            f'malformed request: {reassembler.buffered} trailing byte(s) '
+            f'after last message')
 
 
 def _validate_response_message(response) -> bytes:
@@ -495,7 +575,8 @@ def _response_start(content_type: bytes,
 
 async def _serve_unary(handler, request, context, send, content_type,
                        deadline: float | None,
-                       response_encoding: bytes | None = None) -> None:
+                       response_encoding: bytes | None = None,
+                       serialize=None) -> None:
     """Run a unary handler and emit HEADERS → one DATA → status trailers.
 
     Normally nothing is written until the response is computed, so a failure is
@@ -509,6 +590,8 @@ async def _serve_unary(handler, request, context, send, content_type,
                 handler(request, context), timeout=deadline)
         else:
             response = await handler(request, context)
+        if serialize is not None:
+            response = _serialize(serialize, response)
         response = _validate_response_message(response)
     except GrpcError as exc:
         await _finish_stream_error(
@@ -561,7 +644,8 @@ async def _serve_unary(handler, request, context, send, content_type,
 
 async def _serve_server_streaming(handler, request, context, send, content_type,
                                   deadline: float | None,
-                                  response_encoding: bytes | None = None) -> None:
+                                  response_encoding: bytes | None = None,
+                                  serialize=None) -> None:
     """Drive a server-streaming (async-generator) handler.
 
     Response-Headers are sent lazily, just before the first message, so a
@@ -641,13 +725,15 @@ async def _serve_server_streaming(handler, request, context, send, content_type,
         # the idle flusher above covers producers that suspend.  The tail is
         # flushed at stream end / before any trailing status.
         it = agen.__aiter__()
+        compress = response_encoding is not None
         while True:
             try:
                 msg = await it.__anext__()
             except StopAsyncIteration:
                 return
-            buf.extend(_frame_response(_validate_response_message(msg),
-                                       response_encoding is not None))
+            if serialize is not None:
+                msg = _serialize(serialize, msg)
+            _frame_response_into(buf, _validate_response_message(msg), compress)
             if len(buf) >= _STREAM_BATCH_BYTES:
                 await _flush()
             elif buf:
@@ -761,10 +847,14 @@ async def serve_grpc(registry: GrpcServiceRegistry, conn, receive, send) -> None
     # errors surface while the handler runs and are reported by the serve
     # helpers (in trailers if a message already went out, else Trailers-Only).
     if method.client_streaming:
-        request = _iter_request_messages(receive, request_encoding)
+        request = _iter_request_messages(receive, request_encoding,
+                                         method.request_deserializer)
     else:
         try:
             request = await _read_unary_request(receive, request_encoding)
+            if method.request_deserializer is not None:
+                request = await _deserialize(method.request_deserializer,
+                                             request)
         except GrpcError as exc:
             await _send_trailers_only(send, exc.status, exc.details, content_type)
             return
@@ -777,11 +867,11 @@ async def serve_grpc(registry: GrpcServiceRegistry, conn, receive, send) -> None
         if method.streaming:
             await _serve_server_streaming(
                 method.handler, request, context, send, content_type, deadline,
-                response_encoding)
+                response_encoding, method.response_serializer)
         else:
             await _serve_unary(
                 method.handler, request, context, send, content_type, deadline,
-                response_encoding)
+                response_encoding, method.response_serializer)
     finally:
         # Finalise the request generator so its cleanup runs even when the
         # handler returned without draining it (client-/bidi-streaming only).
@@ -16,10 +16,15 @@ sets/reads the flag around it.
 This module is pure binary framing — no protobuf dependency.  Protobuf
 serialisation is the application's concern; handlers receive and return the
 raw message bytes.
+
+:class:`MessageReassembler` is the one de-framer.  :func:`decode_messages`
+feeds it a whole unary body, and the streaming request path feeds it DATA
+chunks as they arrive.
 """
 from __future__ import annotations
 
 import struct
+from collections import deque
 
 # 1-byte compressed flag + 4-byte big-endian length.
 _PREFIX = struct.Struct('>BI')
@@ -39,6 +44,19 @@ class GrpcDecodeError(ValueError):
     Length-Prefixed-Messages (truncated prefix or short body)."""
 
 
+class MessageTooLarge(GrpcDecodeError):
+    """A message prefix declares more bytes than the reassembler accepts.
+
+    Raised as soon as the prefix is seen, before the body is buffered.
+    """
+
+    def __init__(self, length: int, limit: int):
+        super().__init__(
+            f'message length {length} exceeds safety limit {limit}')
+        self.length = length
+        self.limit = limit
+
+
 def encode_message(payload: bytes, *, compressed: bool = False) -> bytes:
     """Frame *payload* as a single gRPC Length-Prefixed-Message."""
     return _PREFIX.pack(1 if compressed else 0, len(payload)) + payload
@@ -50,25 +68,190 @@ def decode_messages(data: bytes) -> list[tuple[bool, bytes]]:
     A single DATA buffer may contain zero, one, or many framed messages
     (gRPC permits multiple messages per stream and does not align them to
     DATA-frame boundaries).  Raises :class:`GrpcDecodeError` on a truncated
-    prefix or a message body shorter than its declared length.
+    prefix or a message body shorter than its declared length, and
+    :class:`MessageTooLarge` on a prefix over :data:`MAX_MESSAGE_LENGTH`.
     """
-    messages: list[tuple[bool, bytes]] = []
-    offset = 0
-    n = len(data)
-    while offset < n:
-        if n - offset < _PREFIX_LEN:
-            raise GrpcDecodeError(
-                f'truncated message prefix: {n - offset} byte(s) before EOF')
-        flag, length = _PREFIX.unpack_from(data, offset)
-        offset += _PREFIX_LEN
-        if length > MAX_MESSAGE_LENGTH:
-            raise GrpcDecodeError(
-                f'message length {length} exceeds safety limit '
-                f'{MAX_MESSAGE_LENGTH}')
-        end = offset + length
-        if end > n:
-            raise GrpcDecodeError(
-                f'message body truncated: need {length} bytes, have {n - offset}')
-        messages.append((bool(flag), data[offset:end]))
-        offset = end
+    reassembler = MessageReassembler()
+    reassembler.feed(data)
+    messages = reassembler.drain(copy=True)
+    reassembler.finish()
     return messages
+
+
+class MessageReassembler:
+    """Incremental Length-Prefixed-Message de-framer over a list of chunks.
+
+    :meth:`feed` keeps each received chunk by reference.  Nothing is appended
+    to a growing buffer, and nothing is shifted when a message is consumed.
+    Messages are sliced out of the chunk that holds them.  A message that
+    straddles chunks is joined, and that join is its one copy.
+
+    Payloads come back as ``memoryview`` slices by default, for a caller
+    that can parse in place (``zlib`` or protobuf's ``ParseFromString``, for
+    example).  A view pins its chunk, so copy it before keeping it.  With
+    ``drain(copy=True)`` the payloads are ``bytes`` sliced straight off the
+    chunk, which is the one copy a caller that needs ``bytes`` would have
+    made anyway.
+
+    *max_length* bounds an uncompressed message and *max_compressed_length*
+    a compressed one (its transfer size).  It defaults to *max_length*.  An
+    oversized prefix raises :class:`MessageTooLarge` as soon as it is seen.
+    """
+
+    __slots__ = ('_chunks', '_offset', '_buffered', '_max_length',
+                 '_max_compressed_length')
+
+    def __init__(self, *, max_length: int = MAX_MESSAGE_LENGTH,
+                 max_compressed_length: int | None = None):
+        self._chunks: deque[bytes] = deque()
+        self._offset = 0          # consumed bytes of ``_chunks[0]``
+        self._buffered = 0        # unconsumed bytes across all chunks
+        self._max_length = max_length
+        self._max_compressed_length = (
+            max_length if max_compressed_length is None else max_compressed_length)
+
+    @property
+    def buffered(self) -> int:
+        """Bytes received but not yet returned as part of a message."""
+        return self._buffered
+
+    def feed(self, chunk: bytes) -> None:
+        if not chunk:
+            return
+        if not isinstance(chunk, bytes):
+            # Holding a mutable buffer by reference would let its producer
+            # rewrite messages not yet handed out (and a view on it would
+            # block the producer from resizing it); freeze it once.
+            chunk = bytes(chunk)
+        self._chunks.append(chunk)
+        self._buffered += len(chunk)
+
+    def next_message(self) -> tuple[bool, memoryview | bytes] | None:
+        """The next complete ``(compressed, payload)``, or ``None`` for now."""
+        if self._buffered < _PREFIX_LEN:
+            return None
+        flag, length = self._peek_prefix()
+        limit = self._max_compressed_length if flag else self._max_length
+        if length > limit:
+            raise MessageTooLarge(length, limit)
+        if self._buffered - _PREFIX_LEN < length:
+            return None
+        self._take(_PREFIX_LEN)
+        return bool(flag), self._take(length)
+
+    def drain(self, *, copy: bool = False) -> list[tuple[bool, memoryview | bytes]]:
+        """Every complete message buffered now, in order.
+
+        Equivalent to calling :meth:`next_message` until it returns ``None``,
+        except that an oversized prefix behind complete messages is reported
+        by the *next* call: the messages before it are returned first, as
+        they would have been one at a time.  The loop over messages inside
+        the first chunk, which is the common case for small messages, runs
+        on locals with no method call per message.
+        """
+        out: list[tuple[bool, memoryview | bytes]] = []
+        chunks = self._chunks
+        unpack = _PREFIX.unpack_from
+        max_plain, max_compressed = self._max_length, self._max_compressed_length
+        while self._buffered >= _PREFIX_LEN:
+            first = chunks[0]
+            source = first if copy else memoryview(first)
+            size = len(first)
+            start = off = self._offset
+            while size - off >= _PREFIX_LEN:
+                flag, length = unpack(first, off)
+                limit = max_compressed if flag else max_plain
+                if length > limit:
+                    self._buffered -= off - start
+                    self._offset = off
+                    if out:
+                        return out
+                    raise MessageTooLarge(length, limit)
+                end = off + _PREFIX_LEN + length
+                if end > size:
+                    break
+                out.append((bool(flag), source[off + _PREFIX_LEN:end]))
+                off = end
+            self._buffered -= off - start
+            if off == size:
+                chunks.popleft()
+                self._offset = 0
+                continue
+            self._offset = off
+            # The next message straddles chunks, or is still arriving.
+            try:
+                message = self.next_message()
+            except MessageTooLarge:
+                if out:
+                    return out
+                raise
+            if message is None:
+                break
+            flag, payload = message
+            out.append((flag, bytes(payload) if copy else payload))
+        return out
+
+    def finish(self) -> None:
+        """Assert end of input: raise :class:`GrpcDecodeError` on a partial
+        message left in the buffer.
+
+        A complete prefix over the limit is :class:`MessageTooLarge`, not a
+        truncation: the body was never going to be accepted, however much of
+        it arrived.
+        """
+        if not self._buffered:
+            return
+        if self._buffered < _PREFIX_LEN:
+            raise GrpcDecodeError(
+                f'truncated message prefix: {self._buffered} byte(s) before EOF')
+        flag, length = self._peek_prefix()
+        limit = self._max_compressed_length if flag else self._max_length
+        if length > limit:
+            raise MessageTooLarge(length, limit)
+        raise GrpcDecodeError(
+            f'message body truncated: need {length} bytes, '
+            f'have {self._buffered - _PREFIX_LEN}')
+
+    def _peek_prefix(self) -> tuple[int, int]:
+        first = self._chunks[0]
+        if len(first) - self._offset >= _PREFIX_LEN:
+            return _PREFIX.unpack_from(first, self._offset)
+        head = bytearray()
+        offset = self._offset
+        for chunk in self._chunks:
+            head += chunk[offset:offset + _PREFIX_LEN - len(head)]
+            offset = 0
+            if len(head) == _PREFIX_LEN:
+                break
+        return _PREFIX.unpack(head)
+
+    def _take(self, n: int) -> memoryview | bytes:
+        """Consume *n* buffered bytes: a view if they sit in one chunk."""
+        if n == 0:
+            return b''
+        self._buffered -= n
+        first = self._chunks[0]
+        start = self._offset
+        end = start + n
+        if end <= len(first):
+            if end == len(first):
+                self._chunks.popleft()
+                self._offset = 0
+            else:
+                self._offset = end
+            return memoryview(first)[start:end]
+        parts = []
+        while n:
+            view = memoryview(self._chunks[0])
+            avail = len(view) - start
+            if avail <= n:
+                parts.append(view[start:])
+                self._chunks.popleft()
+                n -= avail
+                start = 0
+            else:
+                parts.append(view[start:start + n])
+                start += n
+                n = 0
+        self._offset = start
+        return b''.join(parts)
@@ -36,6 +36,16 @@ Response-streaming is detected automatically at registration via
 parameter name (``request_iter`` / ``requests`` / ``request_iterator`` /
 ``request_stream``).  Pass ``streaming=`` / ``client_streaming=`` explicitly to
 override when a decorator hides the handler's nature.
+
+A method registered with codecs exchanges objects instead of bytes::
+
+    registry.add_method('/helloworld.Greeter/SayHello', say_hello,
+                        request_deserializer=HelloRequest.FromString,
+                        response_serializer=HelloReply.SerializeToString)
+
+The codecs are held on the :class:`GrpcMethod` and applied by the serving
+path — each request message is decoded before the handler sees it, each
+response message encoded before it is framed.
 """
 from __future__ import annotations
 
@@ -85,6 +95,12 @@ class GrpcMethod(NamedTuple):
     handler: Callable[..., object]
     streaming: bool
     client_streaming: bool = False
+    #: ``bytes -> message`` applied to every request message, or ``None`` to
+    #: hand the handler raw bytes.
+    request_deserializer: Callable[..., object] | None = None
+    #: ``message -> bytes`` applied to every response message, or ``None``
+    #: when the handler already returns bytes.
+    response_serializer: Callable[..., object] | None = None
 
 
 def _normalise(path: str) -> str:
@@ -100,7 +116,10 @@ class GrpcServiceRegistry:
 
     def add_method(self, path: str, handler: GrpcHandler, *,
                    streaming: bool | None = None,
-                   client_streaming: bool | None = None) -> None:
+                   client_streaming: bool | None = None,
+                   request_deserializer: Callable[[bytes], object] | None = None,
+                   response_serializer: Callable[[object], bytes] | None = None
+                   ) -> None:
         """Register *handler* for the fully-qualified method *path*
         (``/package.Service/Method`` or ``package.Service/Method``).
 
@@ -117,6 +136,14 @@ class GrpcServiceRegistry:
         ``requests`` / ``request_iterator`` / ``request_stream``) instead of a
         single ``request: bytes``.  When ``None`` it is auto-detected from that
         first parameter name; pass an explicit bool to override.
+
+        *request_deserializer* / *response_serializer* make the method
+        object-typed: the first turns each request message's bytes into the
+        object the handler receives (protobuf's ``FromString``, a msgpack
+        ``unpackb``), the second turns each returned or yielded object back
+        into bytes (``SerializeToString``, ``packb``).  Either may be omitted
+        to keep that direction raw.  A request that fails to decode is
+        answered ``INTERNAL``, as grpcio does.
         """
         key = _normalise(path)
         if key in self._methods:
@@ -130,15 +157,26 @@ class GrpcServiceRegistry:
                 f'streaming=False was requested')
         if client_streaming is None:
             client_streaming = _first_param_name(handler) in _REQUEST_STREAM_PARAMS
-        self._methods[key] = GrpcMethod(handler, streaming, client_streaming)
+        for name, codec in (('request_deserializer', request_deserializer),
+                            ('response_serializer', response_serializer)):
+            if codec is not None and not callable(codec):
+                raise TypeError(f'{key!r}: {name} must be callable, '
+                                f'got {type(codec).__name__}')
+        self._methods[key] = GrpcMethod(handler, streaming, client_streaming,
+                                        request_deserializer,
+                                        response_serializer)
 
     def method(self, path: str, *, streaming: bool | None = None,
-               client_streaming: bool | None = None
+               client_streaming: bool | None = None,
+               request_deserializer: Callable[[bytes], object] | None = None,
+               response_serializer: Callable[[object], bytes] | None = None
                ) -> Callable[[GrpcHandler], GrpcHandler]:
         """Decorator form of :meth:`add_method`."""
         def decorator(handler: GrpcHandler) -> GrpcHandler:
             self.add_method(path, handler, streaming=streaming,
-                            client_streaming=client_streaming)
+                            client_streaming=client_streaming,
+                            request_deserializer=request_deserializer,
+                            response_serializer=response_serializer)
             return handler
         return decorator
 
@@ -113,7 +113,9 @@ class JsonFormatter(logging.Formatter):
     fields from :meth:`AccessLogRecord.as_extra` via ``extra=`` — those are
     lifted to first-class JSON keys (``client_ip``, ``method``, ``path``,
     ``http_version``, ``status``, ``response_bytes``, ``duration_ms``, and
-    ``close_code`` for WebSocket disconnects).  ``exc_info`` is rendered as a
+    ``close_code`` for WebSocket disconnects).  Loop-stall records
+    (``blackbull.lag``) likewise lift ``lag_ms``, ``task``, ``coroutine``,
+    ``connection_id``, ``route`` and ``stack``.  ``exc_info`` is rendered as a
     formatted traceback string when present.
 
     Runs on the ``QueueListener`` thread (it is the sink handler's formatter),
@@ -125,6 +127,9 @@ class JsonFormatter(logging.Formatter):
     # top-level JSON keys when present; absent for normal framework logs.
     _ACCESS_KEYS = ('client_ip', 'method', 'path', 'http_version',
                     'status', 'response_bytes', 'duration_ms', 'close_code')
+    # Keys a blackbull.server.lag stall record attaches.
+    _LAG_KEYS = ('lag_ms', 'task', 'coroutine', 'connection_id', 'route',
+                 'stack')
 
     def format(self, record: logging.LogRecord) -> str:
         payload: dict = {
@@ -133,7 +138,7 @@ class JsonFormatter(logging.Formatter):
             'logger':    record.name,
             'message':   record.getMessage(),
         }
-        for key in self._ACCESS_KEYS:
+        for key in self._ACCESS_KEYS + self._LAG_KEYS:
             value = getattr(record, key, None)
             if value is not None:
                 payload[key] = value
@@ -0,0 +1,666 @@
+"""In-process metrics — counters, gauges and log-linear latency histograms.
+
+Provides:
+
+- `MetricsRegistry`: the named metric families of one application, rendered
+  as Prometheus text by :meth:`~MetricsRegistry.render`.  Every
+  :class:`~blackbull.BlackBull` carries one as ``app.metrics``;
+  ``app.enable_metrics()`` serves it on a route.
+- `Counter`, `Gauge`, `Histogram`: the families.  A family declared with
+  label names hands out one cell per label-value tuple from
+  :meth:`~_Family.labels`; a family without labels is its own single cell.
+- `RequestMetrics`: the per-request series the server feeds from the
+  access-log record — request latency by route, status and protocol, response
+  bytes, and requests in flight.
+- `MetricsArena`: shared memory with one slot per pre-fork worker, so that
+  any worker can render the whole server's numbers.
+
+Every cell stores its numbers in an ``array`` allocated when the cell is
+created, so recording a value writes into memory that already exists:
+no label tuple, dict or string is built per request.  Attached to a
+:class:`MetricsArena`, the ``array`` is replaced by a view of shared memory
+with the same indexing.
+
+Histograms are HDR-style log-linear.  A value is scaled to an integer number
+of units (microseconds for the default ``scale=1e6`` on seconds) and counted
+in one of :data:`BUCKETS` fixed buckets: exact below ``2 ** (SUB_BUCKET_BITS
++ 1)`` units, then ``2 ** SUB_BUCKET_BITS`` linear sub-buckets per power of
+two.  The relative error of a recorded value, and of a quantile read back,
+is below ``2 ** -SUB_BUCKET_BITS`` (12.5 %) across the whole range, from
+one microsecond to :data:`MAX_EXPONENT` (about 134 s).  The Prometheus
+exposition cumulates the buckets at each power of two, so one series costs
+about 25 lines per scrape, not 200.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import mmap
+import operator
+import re
+import struct
+from array import array
+from collections.abc import Iterator
+from typing import ClassVar
+
+__all__ = ['BUCKETS', 'CONTENT_TYPE', 'Counter', 'Gauge', 'Histogram',
+           'MAX_EXPONENT', 'MetricsArena', 'MetricsRegistry', 'RequestMetrics',
+           'SUB_BUCKET_BITS', 'UNMATCHED_ROUTE', 'bucket_index',
+           'bucket_upper']
+
+#: Prometheus text exposition format, version 0.0.4.
+CONTENT_TYPE = b'text/plain; version=0.0.4; charset=utf-8'
+
+#: Linear sub-buckets per power of two, as a bit count.
+SUB_BUCKET_BITS = 3
+_SUB = 1 << SUB_BUCKET_BITS
+
+#: Values of ``2 ** MAX_EXPONENT`` units and above land in the overflow bucket.
+MAX_EXPONENT = 27
+
+#: Buckets below the overflow bucket; the overflow bucket is index ``BUCKETS``.
+BUCKETS = (MAX_EXPONENT - SUB_BUCKET_BITS + 1) << SUB_BUCKET_BITS
+
+#: Smallest power of two the Prometheus exposition reports as a ``le`` bound.
+_LADDER_FROM = SUB_BUCKET_BITS + 1
+
+#: Route label of a request that matched no route (404, 405, ``OPTIONS *``).
+UNMATCHED_ROUTE = '<unmatched>'
+
+logger = logging.getLogger(__name__)
+
+_NAME = re.compile(r'[a-zA-Z_:][a-zA-Z0-9_:]*\Z')
+_LABEL = re.compile(r'[a-zA-Z_][a-zA-Z0-9_]*\Z')
+
+
+def bucket_index(units: int) -> int:
+    """Bucket that counts a value of *units* (negative counts as 0)."""
+    if units < 2 * _SUB:
+        return units if units > 0 else 0
+    shift = units.bit_length() - SUB_BUCKET_BITS - 1
+    index = (shift << SUB_BUCKET_BITS) + (units >> shift)
+    return index if index < BUCKETS else BUCKETS
+
+
+def bucket_upper(index: int) -> int:
+    """Exclusive upper bound, in units, of the values bucket *index* counts."""
+    if index < 2 * _SUB:
+        return index + 1
+    shift = (index >> SUB_BUCKET_BITS) - 1
+    return ((index & (_SUB - 1)) + _SUB + 1) << shift
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return '+Inf'
+    if isinstance(value, int) or value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _label_text(names: tuple[str, ...], values: tuple) -> str:
+    return ','.join(f'{n}="{_escape(str(v))}"' for n, v in zip(names, values))
+
+
+class _CounterCell:
+    __slots__ = ('_value',)
+
+    def __init__(self) -> None:
+        self._value = array('d', [0.0])
+
+    def inc(self, amount: float = 1.0) -> None:
+        if amount < 0:
+            raise ValueError('a counter only goes up; use a Gauge')
+        self._value[0] += amount
+
+    @property
+    def value(self) -> float:
+        return self._value[0]
+
+
+class _GaugeCell:
+    __slots__ = ('_value',)
+
+    def __init__(self) -> None:
+        self._value = array('d', [0.0])
+
+    def set(self, value: float) -> None:
+        self._value[0] = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._value[0] += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._value[0] -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value[0]
+
+
+class _HistogramCell:
+    """One histogram series: ``BUCKETS + 1`` counts, then the sum in units."""
+    __slots__ = ('_counts', '_scale')
+
+    def __init__(self, scale: float) -> None:
+        self._counts = array('q', bytes(8 * (BUCKETS + 2)))
+        self._scale = scale
+
+    def observe(self, value: float) -> None:
+        units = int(value * self._scale)
+        counts = self._counts
+        counts[bucket_index(units)] += 1
+        counts[BUCKETS + 1] += units
+
+    @property
+    def count(self) -> int:
+        return sum(self._counts[:BUCKETS + 1])
+
+    @property
+    def sum(self) -> float:
+        return self._counts[BUCKETS + 1] / self._scale
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the *q*-quantile (0 when empty).
+
+        A quantile in the overflow bucket reads as ``inf``.
+        """
+        if not 0.0 <= q <= 1.0:
+            raise ValueError(f'quantile must be within [0, 1], got {q!r}')
+        counts = self._counts
+        total = sum(counts[:BUCKETS + 1])
+        if not total:
+            return 0.0
+        rank = max(1, math.ceil(q * total))
+        seen = 0
+        for index in range(BUCKETS):
+            seen += counts[index]
+            if seen >= rank:
+                return bucket_upper(index) / self._scale
+        return math.inf
+
+    def _cumulative(self) -> Iterator[tuple[float, int]]:
+        """``(le, count of values below le)`` at each power of two, then +Inf."""
+        counts = self._counts
+        seen = start = 0
+        for exponent in range(_LADDER_FROM, MAX_EXPONENT + 1):
+            end = bucket_index(1 << exponent)
+            seen += sum(counts[start:end])
+            start = end
+            yield (1 << exponent) / self._scale, seen
+        yield math.inf, seen + counts[BUCKETS]
+
+
+class _Family:
+    """A named metric and its cells, one per label-value tuple."""
+    kind: ClassVar[str]
+    __slots__ = ('name', 'help', 'labelnames', '_cells', '_arena')
+
+    def __init__(self, name: str, help: str = '',
+                 labelnames: tuple[str, ...] = ()) -> None:
+        if not _NAME.match(name):
+            raise ValueError(f'invalid metric name {name!r}')
+        for label in labelnames:
+            if not _LABEL.match(label) or label.startswith('__') or label == 'le':
+                raise ValueError(f'invalid label name {label!r} for {name!r}')
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._cells: dict[tuple, object] = {}
+        self._arena: MetricsArena | None = None
+        if not self.labelnames:
+            self._cells[()] = self._new_cell()
+
+    def _new_cell(self):
+        raise NotImplementedError
+
+    def labels(self, *values):
+        """The cell for *values*, one per label name, created on first use."""
+        if len(values) != len(self.labelnames):
+            raise ValueError(f'{self.name} takes {len(self.labelnames)} label '
+                             f'value(s) {self.labelnames!r}, got {values!r}')
+        cell = self._cells.get(values)
+        if cell is None:
+            cell = self._cells[values] = self._new_cell()
+            if self._arena is not None:
+                self._arena._bind(self, values, cell)
+        return cell
+
+    def _only(self):
+        if self.labelnames:
+            raise ValueError(f'{self.name} has labels {self.labelnames!r}; '
+                             f'record through .labels(...)')
+        return self._cells[()]
+
+    def _render(self) -> Iterator[str]:
+        yield f'# HELP {self.name} {self.help}'.replace('\n', r'\n')
+        yield f'# TYPE {self.name} {self.kind}'
+        for values, cell in list(self._cells.items()):
+            labels = _label_text(self.labelnames, values)
+            yield from self._render_cell(labels, cell)
+
+    def _render_cell(self, labels: str, cell) -> Iterator[str]:
+        braces = f'{{{labels}}}' if labels else ''
+        yield f'{self.name}{braces} {_format_value(cell.value)}'
+
+
+class Counter(_Family):
+    """A monotonically increasing total — requests served, bytes sent."""
+    kind = 'counter'
+    __slots__ = ()
+
+    def _new_cell(self) -> _CounterCell:
+        return _CounterCell()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._only().inc(amount)
+
+    @property
+    def value(self) -> float:
+        return self._only().value
+
+
+class Gauge(_Family):
+    """A value that goes up and down — connections open, requests in flight."""
+    kind = 'gauge'
+    __slots__ = ()
+
+    def _new_cell(self) -> _GaugeCell:
+        return _GaugeCell()
+
+    def set(self, value: float) -> None:
+        self._only().set(value)
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._only().inc(amount)
+
+    def dec(self, amount: float = 1.0) -> None:
+        self._only().dec(amount)
+
+    @property
+    def value(self) -> float:
+        return self._only().value
+
+
+class Histogram(_Family):
+    """A distribution in fixed log-linear buckets.
+
+    *scale* converts an observed value into the integer units the buckets
+    count: the default ``1e6`` records seconds at microsecond resolution.
+    """
+    kind = 'histogram'
+    __slots__ = ('scale',)
+
+    def __init__(self, name: str, help: str = '',
+                 labelnames: tuple[str, ...] = (), scale: float = 1e6) -> None:
+        self.scale = scale
+        super().__init__(name, help, labelnames)
+
+    def _new_cell(self) -> _HistogramCell:
+        return _HistogramCell(self.scale)
+
+    def observe(self, value: float) -> None:
+        self._only().observe(value)
+
+    def quantile(self, q: float) -> float:
+        return self._only().quantile(q)
+
+    @property
+    def count(self) -> int:
+        return self._only().count
+
+    @property
+    def sum(self) -> float:
+        return self._only().sum
+
+    def _render_cell(self, labels: str, cell: _HistogramCell) -> Iterator[str]:
+        sep = ',' if labels else ''
+        for le, seen in cell._cumulative():
+            yield (f'{self.name}_bucket{{{labels}{sep}le="{_format_value(le)}"}} '
+                   f'{seen}')
+        braces = f'{{{labels}}}' if labels else ''
+        yield f'{self.name}_sum{braces} {_format_value(cell.sum)}'
+        yield f'{self.name}_count{braces} {cell.count}'
+
+
+class MetricsRegistry:
+    """The metric families of one application, by name.
+
+    Declaring a family that already exists returns it when the kind and the
+    label names agree, so a module can declare its metrics at import time
+    without coordinating with whoever declared them first; any mismatch
+    raises ``ValueError``.
+
+    Under a pre-fork server each worker's registry is attached to its slot
+    of a :class:`MetricsArena`; :meth:`render` then reports every worker.
+    """
+
+    def __init__(self) -> None:
+        self._families: dict[str, _Family] = {}
+        self._arena: MetricsArena | None = None
+
+    def counter(self, name: str, help: str = '',
+                labels: tuple[str, ...] = ()) -> Counter:
+        return self._declare(Counter, name, help, labels)
+
+    def gauge(self, name: str, help: str = '',
+              labels: tuple[str, ...] = ()) -> Gauge:
+        return self._declare(Gauge, name, help, labels)
+
+    def histogram(self, name: str, help: str = '',
+                  labels: tuple[str, ...] = (), scale: float = 1e6) -> Histogram:
+        family = self._declare(Histogram, name, help, labels, scale=scale)
+        if family.scale != scale:
+            raise ValueError(f'{name} is already declared with scale '
+                             f'{family.scale!r}')
+        return family
+
+    def _declare(self, cls, name, help, labels, **kwargs):
+        family = self._families.get(name)
+        if family is None:
+            family = self._families[name] = cls(name, help, tuple(labels),
+                                                **kwargs)
+            if self._arena is not None:
+                self._arena._adopt(family)
+        elif type(family) is not cls or family.labelnames != tuple(labels):
+            raise ValueError(f'{name} is already declared as a {family.kind} '
+                             f'with labels {family.labelnames!r}')
+        return family
+
+    def __getitem__(self, name: str) -> _Family:
+        return self._families[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._families
+
+    def __iter__(self) -> Iterator[_Family]:
+        return iter(list(self._families.values()))
+
+    def attach(self, arena: MetricsArena, worker_id: int) -> None:
+        """Move every cell, now and later, into *arena*'s slot *worker_id*.
+
+        Called once per worker process, before it serves.  Values already
+        recorded carry over.
+        """
+        arena._attach(worker_id)
+        self._arena = arena
+        for family in self:
+            arena._adopt(family)
+
+    def render(self) -> str:
+        """Every family in the Prometheus text exposition format.
+
+        Attached to a :class:`MetricsArena`, this is the sum over every
+        worker's slot rather than this process's numbers alone.
+        """
+        if self._arena is not None:
+            return self._arena.render()
+        lines = [line for family in self for line in family._render()]
+        return '\n'.join(lines) + '\n' if lines else ''
+
+
+class RequestMetrics:
+    """The HTTP request series, fed by the server's protocol actors.
+
+    ``started`` runs when an actor dispatches a request and ``finished`` when
+    the dispatch returns, with the values the actor and its sender already
+    hold.  The cells of each ``(route, status, protocol)`` are looked up
+    through nested dicts keyed by those values, so a request on a series
+    that already exists allocates nothing here.
+    """
+    __slots__ = ('duration', 'response_bytes', 'in_flight', '_in_flight',
+                 '_cells')
+
+    def __init__(self, registry: MetricsRegistry) -> None:
+        self.duration = registry.histogram(
+            'blackbull_http_request_duration_seconds',
+            'Time from the request being dispatched to its handler returning.',
+            labels=('route', 'status', 'protocol'))
+        self.response_bytes = registry.counter(
+            'blackbull_http_response_bytes_total',
+            'Response body bytes sent.',
+            labels=('route', 'status', 'protocol'))
+        self.in_flight = registry.gauge(
+            'blackbull_http_requests_in_flight',
+            'Requests parsed whose response has not completed.')
+        self._in_flight = self.in_flight.labels()
+        # route -> status -> http_version -> (duration cell, bytes cell)
+        self._cells: dict = {}
+
+    def started(self) -> None:
+        self._in_flight._value[0] += 1
+
+    def finished(self, route: str | None, status: int | str,
+                 http_version: str, seconds: float, response_bytes: int) -> None:
+        """Record one completed request.
+
+        *route* is the matched template (``None`` when nothing matched),
+        *seconds* the dispatch's duration on the monotonic clock.  The
+        histogram and counter updates are written out inline: this runs once
+        per request, and the method calls they replace cost more than the
+        arithmetic.
+        """
+        self._in_flight._value[0] -= 1
+        by_status = self._cells.get(route)
+        if by_status is None:
+            by_status = self._cells[route] = {}
+        by_version = by_status.get(status)
+        if by_version is None:
+            by_version = by_status[status] = {}
+        cells = by_version.get(http_version)
+        if cells is None:
+            values = (UNMATCHED_ROUTE if route is None else route,
+                      str(status), f'HTTP/{http_version}')
+            cells = by_version[http_version] = (
+                self.duration.labels(*values),
+                self.response_bytes.labels(*values))
+        # Read the storage through the cell, not cached beside it: attaching
+        # the registry to a MetricsArena swaps it for shared memory.
+        counts = cells[0]._counts
+        units = int(seconds * cells[0]._scale)
+        if units < 2 * _SUB:
+            index = units if units > 0 else 0
+        else:
+            shift = units.bit_length() - SUB_BUCKET_BITS - 1
+            index = (shift << SUB_BUCKET_BITS) + (units >> shift)
+            if index > BUCKETS:
+                index = BUCKETS
+        counts[index] += 1
+        counts[BUCKETS + 1] += units
+        cells[1]._value[0] += response_bytes
+
+
+class MetricsArena:
+    """Shared memory holding every pre-fork worker's metric cells.
+
+    The master builds one before forking: an anonymous ``MAP_SHARED``
+    mapping split into *workers* slots of *slot_bytes*, which every worker,
+    respawns included, inherits.  A worker attaches its registry to its own
+    slot with :meth:`MetricsRegistry.attach`, after which each cell's
+    storage is a view of that slot.  A worker only writes its own slot, so
+    recording a value takes no lock and makes no system call, exactly as it
+    does in a single process.
+
+    A slot is a directory growing up from its header and cell storage
+    growing down from its end.  Each directory record is a length-prefixed
+    JSON object naming either a family (kind, help, label names, histogram
+    scale) or a cell (family, label values, storage offset).  A record is
+    published by advancing the directory end only after it is written, so
+    a reader in another process never sees a half-written record.
+
+    :meth:`render` reads every slot and adds the values up.  Counters and
+    histograms therefore give fleet totals, and gauges report the sum over
+    workers.  A respawned worker adopts the cells its predecessor left in
+    the slot: counters carry on from where they stopped, and gauges start
+    again from zero.  A slot that runs out of room keeps further cells in
+    process memory, logs one warning, and leaves them out of the merged
+    view.
+    """
+
+    _HEADER = struct.Struct('=QQ')      # directory end, storage start
+
+    def __init__(self, workers: int, slot_bytes: int = 4 * 1024 * 1024) -> None:
+        if workers < 1:
+            raise ValueError(f'workers must be >= 1, got {workers}')
+        page = mmap.PAGESIZE
+        self.workers = workers
+        self.slot_bytes = max(page, -(-slot_bytes // page) * page)
+        self._mm = mmap.mmap(-1, workers * self.slot_bytes)
+        for worker_id in range(workers):
+            self._HEADER.pack_into(self._mm, worker_id * self.slot_bytes,
+                                   self._HEADER.size, self.slot_bytes)
+        self._worker_id: int | None = None
+        self._base = 0
+        # The attached worker's directory: family names, and cell offsets
+        # by (family name, label values as strings).
+        self._families: set[str] = set()
+        self._offsets: dict[tuple[str, tuple[str, ...]], int] = {}
+        self._full_warned = False
+        # Per slot: directory bytes parsed so far, and the records they held.
+        self._parsed: list[tuple[int, list[dict]]] = [(self._HEADER.size, [])
+                                                      for _ in range(workers)]
+
+    # ---- writing: the attached worker's own slot ---------------------------
+
+    def _attach(self, worker_id: int) -> None:
+        if not 0 <= worker_id < self.workers:
+            raise ValueError(f'worker_id {worker_id} outside 0..{self.workers - 1}')
+        self._worker_id = worker_id
+        self._base = worker_id * self.slot_bytes
+        kinds = {}
+        for record in self._records(worker_id):
+            if 'family' in record:
+                self._families.add(record['family'])
+                kinds[record['family']] = record['kind']
+            else:
+                offset = record['offset']
+                self._offsets[record['cell'], tuple(record['values'])] = offset
+                if kinds.get(record['cell']) == 'gauge':
+                    # What the previous holder of the slot had in flight
+                    # died with it.
+                    struct.pack_into('=d', self._mm, self._base + offset, 0.0)
+
+    def _adopt(self, family: _Family) -> None:
+        family._arena = self
+        for values, cell in list(family._cells.items()):
+            self._bind(family, values, cell)
+
+    def _bind(self, family: _Family, values: tuple, cell) -> None:
+        histogram = isinstance(cell, _HistogramCell)
+        attr, typecode = ('_counts', 'q') if histogram else ('_value', 'd')
+        local = getattr(cell, attr)
+        key = (family.name, tuple(str(v) for v in values))
+        offset = self._offsets.get(key)
+        try:
+            if family.name not in self._families:
+                self._append({'family': family.name, 'kind': family.kind,
+                              'help': family.help,
+                              'labels': list(family.labelnames),
+                              'scale': getattr(family, 'scale', None)})
+                self._families.add(family.name)
+            if offset is None:
+                offset = self._allocate(8 * len(local))
+                self._append({'cell': family.name, 'values': list(key[1]),
+                              'offset': offset})
+                self._offsets[key] = offset
+        except MemoryError:
+            if not self._full_warned:
+                self._full_warned = True
+                logger.warning('metrics arena slot %d is full (%d bytes); '
+                               'new series stay out of the merged view — '
+                               'raise BB_METRICS_SHM_BYTES',
+                               self._worker_id, self.slot_bytes)
+            return
+        start = self._base + offset
+        shared = memoryview(self._mm)[start:start + 8 * len(local)].cast(typecode)
+        for i, value in enumerate(local):
+            if value:
+                shared[i] += value
+        setattr(cell, attr, shared)
+
+    def _allocate(self, size: int) -> int:
+        end, start = self._HEADER.unpack_from(self._mm, self._base)
+        if start - size < end:
+            raise MemoryError
+        # Storage never moves and is never freed, so what lies below the
+        # old start is still the mapping's zero fill.
+        struct.pack_into('=Q', self._mm, self._base + 8, start - size)
+        return start - size
+
+    def _append(self, record: dict) -> None:
+        payload = json.dumps(record, separators=(',', ':')).encode()
+        end, start = self._HEADER.unpack_from(self._mm, self._base)
+        if end + 4 + len(payload) > start:
+            raise MemoryError
+        at = self._base + end
+        struct.pack_into('=I', self._mm, at, len(payload))
+        self._mm[at + 4:at + 4 + len(payload)] = payload
+        struct.pack_into('=Q', self._mm, self._base, end + 4 + len(payload))
+
+    # ---- reading: any slot, from any process ---------------------------
+
+    def _records(self, worker_id: int) -> list[dict]:
+        """Slot *worker_id*'s directory records, parsed incrementally."""
+        base = worker_id * self.slot_bytes
+        pos, records = self._parsed[worker_id]
+        end = self._HEADER.unpack_from(self._mm, base)[0]
+        while pos < end:
+            (size,) = struct.unpack_from('=I', self._mm, base + pos)
+            records.append(json.loads(self._mm[base + pos + 4:base + pos + 4 + size]))
+            pos += 4 + size
+        self._parsed[worker_id] = (pos, records)
+        return records
+
+    def merged(self) -> MetricsRegistry:
+        """A detached registry holding the sum of every worker's cells."""
+        kinds = {'counter': Counter, 'gauge': Gauge, 'histogram': Histogram}
+        registry = MetricsRegistry()
+        for worker_id in range(self.workers):
+            base = worker_id * self.slot_bytes
+            rejected = set()
+            for record in self._records(worker_id):
+                if 'family' in record:
+                    kwargs = ({'scale': record['scale']}
+                              if record['kind'] == 'histogram' else {})
+                    try:
+                        family = registry._declare(
+                            kinds[record['kind']], record['family'],
+                            record['help'], record['labels'], **kwargs)
+                        if kwargs and family.scale != record['scale']:
+                            raise ValueError
+                    except ValueError:
+                        logger.warning('metrics arena: worker %d declares %r '
+                                       'differently; not merged', worker_id,
+                                       record['family'])
+                        rejected.add(record['family'])
+                    continue
+                if record['cell'] in rejected:
+                    continue
+                cell = registry[record['cell']].labels(*record['values'])
+                start = base + record['offset']
+                if isinstance(cell, _HistogramCell):
+                    theirs = array('q', self._mm[start:start + 8 * len(cell._counts)])
+                    cell._counts = array('q', map(operator.add, cell._counts, theirs))
+                else:
+                    cell._value[0] += struct.unpack_from('=d', self._mm, start)[0]
+        return registry
+
+    def render(self) -> str:
+        """Every worker's metrics, summed, as Prometheus text."""
+        return self.merged().render()
+
+    def close(self) -> None:
+        """Unmap the arena.  The master calls this once its workers are gone.
+
+        A registry attached in this process keeps views of the mapping; it is
+        then left mapped, and goes when the process does.
+        """
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
@@ -11,6 +11,7 @@ Deprecated aliases for the previous ``*Middleware``-suffixed names and the
 ``DeprecationWarning``.  They will be removed in a future release.
 """
 from .cache import Cache
+from .cache_backend import CacheBackend, MemoryBackend, SharedMemoryBackend
 from .compression import Compression, _make_default_compress
 from .cors import CORS
 from .proxy import TrustedProxy
@@ -20,8 +21,11 @@ from .websocket import websocket
 
 __all__ = [
     'Cache',
+    'CacheBackend',
     'CORS',
     'Compression',
+    'MemoryBackend',
+    'SharedMemoryBackend',
     'StaticFiles',
     'TrustedProxy',
     'as_middleware',
@@ -1,7 +1,8 @@
 """Response caching middleware (RFC 9111 — HTTP Caching).
 
-Caches successful GET/HEAD responses in a per-worker, in-memory LRU.
-Subsequent matching requests are served directly from the cache without
+Caches successful GET/HEAD responses — by default in a per-worker,
+in-memory LRU; pass ``backend=SharedMemoryBackend(...)`` to share one store
+across the workers of a pre-fork server.  Subsequent matching requests are served directly from the cache without
 running the handler.  Supports:
 
 * **TTL** — server-side ``max_age`` (default 300 s), overridable by the
@@ -25,12 +26,40 @@ the varied request-header values are folded into the cache key so a
 brotli variant is never replayed to an ``identity`` client.  A response
 with ``Vary: *`` is passed through and not stored.
 
+Server-side invalidation, so long TTLs can be purged on write:
+
+* :meth:`Cache.invalidate` drops every entry at or below a path prefix
+  (``invalidate(path_prefix='/api/users')`` covers ``/api/users`` and
+  ``/api/users/7?x=1``, for every method).
+* :meth:`Cache.purge_tag` drops every entry whose response carried the tag
+  in its ``Surrogate-Key`` header — a space-separated list of keys, parsed
+  and indexed when the response is stored.
+
+Both cost time in proportion to the entries they remove, not to the size of
+the store.  See :mod:`.cache_backend` for how each backend does that.
+
+Expiry without a stampede:
+
+* **Coalescing** — concurrent misses for one URL wait on a single handler
+  call and are answered from what it stores (``coalesce=True``).  Waiters
+  are released as soon as the response is decided, so a streamed or
+  uncacheable response does not hold them for its whole lifetime.
+* **stale-while-revalidate** (RFC 5861 §3) — inside the window after
+  expiry the stale entry is served at hit latency while one background
+  task re-renders it.
+* **stale-if-error** (RFC 5861 §4) — inside the window, a handler that
+  raises or answers 500/502/503/504 is covered by the stale entry.
+
+Both windows come from the response's ``Cache-Control`` directives, or from
+the ``stale_while_revalidate`` / ``stale_if_error`` constructor defaults when
+the response sets none.  Coalescing is per worker; workers sharing a
+:class:`~.cache_backend.SharedMemoryBackend` can each render a URL once.
+
 What it doesn't do (yet):
 
-* No server-side invalidation API.  Restart the worker (or wait for
-  TTL) to clear.
-* No cross-worker sharing.  The cache is per-process — each worker has
-  its own.  Documented limitation.
+* No cross-worker sharing by default.  The default
+  :class:`~.cache_backend.MemoryBackend` is per-process; see
+  :mod:`.cache_backend` for the shared-memory store.
 
 The store is keyed by ``(method, path, query_string)`` → a per-URL bucket
 that holds the response's ``Vary`` field names alongside its variant entries
@@ -51,13 +80,16 @@ Usage::
 """
 from __future__ import annotations
 
+import asyncio
 import hashlib
 import logging
 import time
-from collections import OrderedDict
 
 from ..connection import Connection
 from ..native import NativeResponse
+from .cache_backend import (  # noqa: F401  (bucket internals re-exported for tests)
+    CacheBackend, MemoryBackend, _Bucket, _Entry, _MAX_VARIANTS_PER_KEY, _vary_key,
+)
 from .utils import as_middleware
 
 logger = logging.getLogger(__name__)
@@ -70,64 +102,21 @@ _DEFAULT_CACHEABLE_STATUSES = frozenset({200, 203, 300, 301, 308, 404, 410, 414,
 
 _DEFAULT_CACHEABLE_METHODS = frozenset({'GET', 'HEAD'})
 
+# RFC 5861 §4 — the responses ``stale-if-error`` may stand in for.
+_ERROR_STATUSES = frozenset({500, 502, 503, 504})
 
-class _Entry:
-    """One stored cache hit — the response as *data*, not as a message.
-
-    Held as ``(status, header, body)`` rather than a ready-made
-    :class:`~blackbull.native.NativeResponse` so every replay can build a
-    fresh object over a fresh header list.  Middleware below the cache — CORS,
-    the route header injector — append to ``_header`` **in place**; handing
-    out one shared object would grow the stored entry on every hit.
-    """
-    __slots__ = ('status', 'header', 'body', 'etag', 'expires_at')
 
-    def __init__(self, status: int, header: list[tuple[bytes, bytes]],
-                 body: bytes, etag: bytes, expires_at: float):
-        self.status = status
-        self.header = header
-        self.body = body
-        self.etag = etag
-        self.expires_at = expires_at
-
-    def replay(self) -> 'NativeResponse':
-        """A private copy of the stored response, safe to mutate downstream."""
-        return NativeResponse(status=self.status, header=list(self.header),
-                              body=self.body)
-
-    def expired(self, now: float | None = None) -> bool:
-        return (now if now is not None else time.monotonic()) >= self.expires_at
-
-
-# Safety cap on the number of stored variants for a single base key, so a
-# hostile peer varying an Accept-* header cannot grow one bucket without bound.
-# Far above any real Accept-Encoding × Accept-Language cross-product.
-_MAX_VARIANTS_PER_KEY = 16
-
-
-class _Bucket:
-    """All cached variants for one base key ``(method, path, query_string)``.
+@as_middleware
+class Cache:
+    """Response cache over a pluggable :class:`CacheBackend`.
 
-    The response ``Vary`` field names live *inside* the bucket, beside the
-    per-variant entries — not in a separate LRU.  That is the fix for 1.21g:
-    with two independent LRUs (the old ``_store`` + ``_vary_registry``) the vary
-    record could be evicted before its entries, orphaning them (future lookups
-    rebuilt the variant key with empty vary fields and never matched). Here the
-    vary fields cannot outlive their entries, so no orphan is possible.
+    *backend* defaults to a per-worker :class:`MemoryBackend` bounded by
+    *max_entries*; a supplied backend carries its own bounds.
 
-    ``entries`` is a per-variant LRU keyed by the variant tuple from
-    :func:`_vary_key` (``()`` for a non-varying response).
+    *stale_while_revalidate* and *stale_if_error* are the RFC 5861 windows,
+    in seconds, for responses that do not set their own.  *coalesce*
+    collapses concurrent misses for one URL onto a single handler call.
     """
-    __slots__ = ('vary_fields', 'entries')
-
-    def __init__(self, vary_fields: tuple[bytes, ...] = ()):
-        self.vary_fields = vary_fields
-        self.entries: OrderedDict[tuple, _Entry] = OrderedDict()
-
-
-@as_middleware
-class Cache:
-    """Per-worker in-memory response cache."""
 
     def __init__(
         self,
@@ -138,22 +127,33 @@ class Cache:
         cacheable_statuses: frozenset[int] | set[int] | tuple[int, ...] = _DEFAULT_CACHEABLE_STATUSES,
         cache_authenticated: bool = False,
         generate_etag: bool = True,
+        backend: CacheBackend | None = None,
+        stale_while_revalidate: int = 0,
+        stale_if_error: int = 0,
+        coalesce: bool = True,
     ):
         if max_age <= 0:
             raise ValueError(f'max_age must be > 0; got {max_age}')
         if max_entries <= 0:
             raise ValueError(f'max_entries must be > 0; got {max_entries}')
+        if stale_while_revalidate < 0 or stale_if_error < 0:
+            raise ValueError(
+                'stale_while_revalidate and stale_if_error must be >= 0; got '
+                f'{stale_while_revalidate} and {stale_if_error}')
         self._max_age = max_age
-        self._max_entries = max_entries
         self._cacheable_methods = frozenset(cacheable_methods)
         self._cacheable_statuses = frozenset(cacheable_statuses)
         self._cache_authenticated = cache_authenticated
         self._generate_etag = generate_etag
-        # base_key → _Bucket.  OrderedDict gives O(1) move-to-end on access +
-        # popitem(last=False) for LRU eviction — same pattern as
-        # :func:`functools.lru_cache`.  ``_max_entries`` bounds the number of
-        # distinct URLs (base keys); each bucket LRU-bounds its own variants.
-        self._store: OrderedDict[tuple, _Bucket] = OrderedDict()
+        self._store: CacheBackend = (
+            backend if backend is not None else MemoryBackend(max_entries))
+        self._stale_while_revalidate = stale_while_revalidate
+        self._stale_if_error = stale_if_error
+        self._coalesce = coalesce
+        # base_key → future of the fill rendering it; resolves to whether the
+        # render failed.  Per worker, like the event loop it lives on.
+        self._fills: dict[tuple, asyncio.Future] = {}
+        self._refreshes: set[asyncio.Task] = set()
 
     # ---- ASGI surface ----------------------------------------------------
 
@@ -181,29 +181,128 @@ class Cache:
             return
 
         base_key = (method, conn.path, conn.query_string)
-        # Look up the bucket for this URL, then the specific variant inside it
-        # using the Vary fields recorded on the bucket (empty tuple ⇒ the single
-        # non-varying entry keyed by ``()``).
-        bucket = self._store.get(base_key)
-        variant_key = _vary_key(bucket.vary_fields, req_headers) if bucket else ()
-        entry = bucket.entries.get(variant_key) if bucket else None
-
-        # --- cache hit? ---
-        if entry is not None and not entry.expired():
-            self._store.move_to_end(base_key)      # URL touched → MRU
-            bucket.entries.move_to_end(variant_key)  # variant touched → MRU
-            inm = req_headers.get(b'if-none-match')
-            if inm is not None and _etag_matches(inm, entry.etag):
-                await send(NativeResponse(status=304,
-                                          header=[(b'etag', entry.etag)],
-                                          body=b''))
+        # The backend finds the bucket for this URL, then the variant inside
+        # it using the Vary fields recorded on the bucket.
+        entry = self._store.get(base_key, req_headers)
+        now = time.monotonic()
+
+        if entry is not None:
+            if not entry.expired(now):
+                await self._serve(entry, req_headers, send)
+                return
+            if now < entry.expires_at + entry.stale_while_revalidate:
+                # RFC 5861 §3 — answer from the stale entry now and let one
+                # background render replace it.
+                if base_key not in self._fills:
+                    self._refresh(conn, base_key, req_headers, call_next)
+                await self._serve(entry, req_headers, send)
                 return
-            # Replay a private copy — downstream middleware append headers in
-            # place, and the stored entry must not accumulate them.
-            await send(entry.replay())
+
+        fill = self._fills.get(base_key) if self._coalesce else None
+        if fill is not None:
+            # Another request is rendering this URL.  Wait for its response
+            # to be decided, then look again: it has usually been stored.
+            # ``shield`` so a waiter that is cancelled cannot cancel the
+            # fill's future under the others.
+            errored = await asyncio.shield(fill)
+            now = time.monotonic()
+            entry = self._store.get(base_key, req_headers)
+            if entry is not None and (
+                    not entry.expired(now)
+                    or errored and now < entry.expires_at + entry.stale_if_error):
+                await self._serve(entry, req_headers, send)
+                return
+            # Not stored (uncacheable, another variant, or failed): render
+            # this one ourselves.  Waiters woken together do not queue up
+            # behind each other; the first one claims the key for newcomers.
+
+        fallback = (entry if entry is not None
+                    and now < entry.expires_at + entry.stale_if_error else None)
+        await self._fill(conn, receive, send, call_next, base_key,
+                         req_headers, fallback,
+                         self._claim(base_key) if self._coalesce else None)
+
+    async def _serve(self, entry: _Entry, req_headers: dict[bytes, bytes],
+                     send) -> None:
+        inm = req_headers.get(b'if-none-match')
+        if inm is not None and _etag_matches(inm, entry.etag):
+            await send(NativeResponse(status=304,
+                                      header=[(b'etag', entry.etag)],
+                                      body=b''))
             return
+        # Replay a private copy — downstream middleware append headers in
+        # place, and the stored entry must not accumulate them.
+        await send(entry.replay())
+
+    def _refresh(self, conn, base_key: tuple, req_headers: dict[bytes, bytes],
+                 call_next) -> None:
+        """Re-render *base_key* in a background task, discarding the output.
+
+        The handler gets a fresh copy of *conn* and a ``receive`` with an
+        empty body: the request it came from is answered and gone by the
+        time the task runs.  As in :meth:`BlackBull.warm_request`, only the
+        request identity is copied; the per-request caches start empty.
+        """
+        flight = self._claim(base_key)
+        shadow = Connection(
+            method=conn.method, path=conn.path, raw_path=conn.raw_path,
+            headers=conn.headers, query_string=conn.query_string,
+            http_version=conn.http_version, scheme=conn.scheme, type=conn.type,
+            client=conn.client, server=conn.server, root_path=conn.root_path,
+        )
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def discard(event):
+            pass
+
+        async def run():
+            try:
+                await self._fill(shadow, receive, discard, call_next,
+                                 base_key, req_headers, None, flight)
+            except Exception:
+                logger.exception('Cache: background refresh of %s failed; '
+                                 'the stale entry stays', base_key[1])
+
+        task = asyncio.create_task(run())
+        self._refreshes.add(task)
+        task.add_done_callback(self._refreshes.discard)
+
+    def _claim(self, base_key: tuple) -> asyncio.Future | None:
+        """Register a fill for *base_key*, so concurrent misses wait for it
+        instead of rendering too.  ``None`` if one is already registered.
+
+        A background refresh always claims, whatever *coalesce* says: it is
+        what keeps a stale hit from starting a second one."""
+        if base_key in self._fills:
+            return None
+        flight = self._fills[base_key] = asyncio.get_running_loop().create_future()
+        return flight
+
+    async def _fill(self, conn, receive, send, call_next, base_key: tuple,
+                    req_headers: dict[bytes, bytes], fallback: _Entry | None,
+                    flight: asyncio.Future | None) -> None:
+        """Run the handler, send its response on, and store it if cacheable.
+
+        *flight* is this fill's claim from :meth:`_claim`, resolved as soon
+        as the response is decided.  *fallback* is a stale entry inside its
+        ``stale-if-error`` window: if the handler raises, or answers 500,
+        502, 503 or 504, before anything has been sent, the client gets the
+        fallback instead (RFC 5861 §4).
+        """
+        errored = False
+
+        def settle() -> None:
+            # Release the waiters as soon as the response is decided — not
+            # when the handler returns, which for a stream may be never.
+            nonlocal flight
+            if flight is not None:
+                if self._fills.get(base_key) is flight:
+                    del self._fills[base_key]
+                flight.set_result(errored)
+                flight = None
 
-        # --- cache miss → call inner, buffer, then send + maybe store ---
         # We buffer the response (rather than passing each event straight
         # through) so we can inject an ETag into the *start* event before
         # any bytes hit the client.  For streaming responses (more_body
@@ -214,8 +313,23 @@ class Cache:
         body_chunks: list[bytes] = []
         status: int | None = None
         response_headers: list[tuple[bytes, bytes]] = []
-        streaming = False
         flushed = False
+        replaced = False                # the fallback went out instead
+
+        async def release():
+            """Send what is held — or the fallback, for an error response."""
+            nonlocal errored, flushed, replaced
+            if status in _ERROR_STATUSES:
+                errored = True
+            if errored and fallback is not None:
+                replaced = True
+                await self._serve(fallback, req_headers, send)
+            else:
+                for buf in held:
+                    await send(buf)
+            held.clear()
+            flushed = True
+            settle()
 
         async def cap_send(event):
             """Buffer the response so an ETag can be injected before any byte
@@ -224,34 +338,35 @@ class Cache:
 
             A ``NativeResponse`` may carry the header and terminal body
             together (the complete shape), the header alone, or a body chunk
-            alone; all three are handled here.
+            alone; all three are handled here.  Once the response has been
+            released, later events pass straight through.
             """
-            nonlocal status, response_headers, streaming, flushed
+            nonlocal status, response_headers
+
+            if flushed:
+                if not replaced:
+                    await send(event)
+                return
 
             if not isinstance(event, NativeResponse):
                 # A non-response event (pathsend / push) cannot be cached and
                 # cannot be held — release anything buffered, then pass it on.
-                if not flushed:
-                    streaming = True
-                    for buf in held:
-                        await send(buf)
-                    flushed = True
-                await send(event)
+                await release()
+                if not replaced:
+                    await send(event)
                 return
 
             if event._header is not None:
                 status = event.status
                 response_headers = list(event._header)
 
-            if event.file_path is not None:
-                # Sendfile: the bytes never pass through us, so there is
-                # nothing to hash and nothing to store.
-                streaming = True
+            if event.file_path is not None or (
+                    event._body is not None and event.more_body):
+                # Sendfile (the bytes never pass through us) or the first
+                # chunk of a stream: nothing to hash and nothing to store.
+                # Release and switch to pass-through.
                 held.append(event)
-                if not flushed:
-                    for buf in held:
-                        await send(buf)
-                    flushed = True
+                await release()
                 return
 
             if event._body is None:
@@ -259,19 +374,8 @@ class Cache:
                 held.append(event)
                 return
 
-            body_chunks.append(event._body)
-            if event.more_body:
-                # Streaming starts here.  Flush what we have and switch to
-                # pass-through: a streamed body's size is unknown and hashing
-                # it post-hoc would defeat the streaming.
-                streaming = True
-                held.append(event)
-                if not flushed:
-                    for buf in held:
-                        await send(buf)
-                    flushed = True
-                return
             # Final body chunk arrived; decide cacheability + ETag now.
+            body_chunks.append(event._body)
             held.append(event)
             body = b''.join(body_chunks)
             if self._should_cache(status, response_headers):
@@ -291,47 +395,67 @@ class Cache:
                 # ``vary_fields is None`` ⇒ ``Vary: *`` ⇒ uncacheable.
                 if etag is not None and vary_fields is not None:
                     ttl = _response_max_age(response_headers) or self._max_age
-                    bucket = self._store.get(base_key)
-                    if bucket is None:
-                        bucket = _Bucket(vary_fields)
-                        self._store[base_key] = bucket
-                    elif bucket.vary_fields != vary_fields:
-                        # The response's Vary changed; the old variant keys
-                        # were built from the old fields and can no longer be
-                        # reached — adopt the new fields and drop them.
-                        bucket.vary_fields = vary_fields
-                        bucket.entries.clear()
-                    variant_key = _vary_key(vary_fields, req_headers)
+                    swr, sie = _stale_windows(response_headers)
                     # Stored as data, with its own header list: replays build a
                     # fresh object so downstream in-place appends cannot reach
                     # the entry.
-                    bucket.entries[variant_key] = _Entry(
+                    now = time.monotonic()
+                    self._store.put(base_key, vary_fields, req_headers, _Entry(
                         status=status if status is not None else 200,
                         header=list(response_headers),
                         body=body,
                         etag=etag,
-                        expires_at=time.monotonic() + ttl,
-                    )
-                    bucket.entries.move_to_end(variant_key)
-                    self._store.move_to_end(base_key)
-                    # Per-bucket variant bound, then per-URL bound.
-                    while len(bucket.entries) > _MAX_VARIANTS_PER_KEY:
-                        bucket.entries.popitem(last=False)
-                    while len(self._store) > self._max_entries:
-                        self._store.popitem(last=False)
-            # Flush to client.
-            for buf in held:
-                await send(buf)
-            flushed = True
-
-        await call_next(conn, receive, cap_send)
+                        expires_at=now + ttl,
+                        tags=_surrogate_keys(response_headers),
+                        stored_at=now,
+                        stale_while_revalidate=(
+                            self._stale_while_revalidate if swr is None else swr),
+                        stale_if_error=(
+                            self._stale_if_error if sie is None else sie),
+                    ))
+            await release()
+
+        try:
+            await call_next(conn, receive, cap_send)
+        except Exception:
+            errored = True
+            if flushed or fallback is None:
+                raise
+            logger.warning('Cache: handler for %s raised; serving the stale '
+                           'entry (stale-if-error)', base_key[1], exc_info=True)
+            await release()
+            return
+        finally:
+            settle()
 
         # If the handler never emitted a terminal body the response was never
         # flushed — forward whatever we have so the client at least sees
         # something.  Pathological case; not cached.
         if not flushed:
-            for buf in held:
-                await send(buf)
+            await release()
+
+    # ---- invalidation -----------------------------------------------------
+
+    def invalidate(self, path_prefix: str = '/') -> int | None:
+        """Drop every cached response for *path_prefix* and the paths below it.
+
+        Matching is by whole path segment and ignores the query string and
+        method: ``'/api/users'`` covers ``/api/users`` and ``/api/users/7``
+        but not ``/api/users-old``.  The default ``'/'`` clears the cache.
+
+        Returns the number of entries dropped, or ``None`` for a backend that
+        invalidates lazily (:class:`SharedMemoryBackend`).  With the default
+        per-worker backend only the calling worker's cache is affected.
+        """
+        return self._store.invalidate(path_prefix)
+
+    def purge_tag(self, tag: str) -> int | None:
+        """Drop every cached response stored with surrogate key *tag*.
+
+        Tags come from the response's ``Surrogate-Key`` header.  Returns as
+        :meth:`invalidate` does.
+        """
+        return self._store.purge_tag(tag)
 
     # ---- helpers --------------------------------------------------------
 
@@ -418,6 +542,30 @@ def _response_max_age(headers: list[tuple[bytes, bytes]]) -> int | None:
     return s_max if s_max is not None else max_age
 
 
+def _stale_windows(headers: list[tuple[bytes, bytes]]
+                   ) -> tuple[int | None, int | None]:
+    """Pull RFC 5861 ``stale-while-revalidate`` / ``stale-if-error`` out of
+    Cache-Control.  ``None`` for a directive that is absent or malformed."""
+    swr: int | None = None
+    sie: int | None = None
+    for name, value in headers:
+        if name.lower() != b'cache-control':
+            continue
+        for piece in value.split(b','):
+            t = piece.strip().lower()
+            if t.startswith(b'stale-while-revalidate='):
+                try:
+                    swr = int(t[23:])
+                except ValueError:
+                    pass  # malformed → fall back to the server default.
+            elif t.startswith(b'stale-if-error='):
+                try:
+                    sie = int(t[15:])
+                except ValueError:
+                    pass
+    return swr, sie
+
+
 def _response_vary(headers: list[tuple[bytes, bytes]]) -> tuple[bytes, ...] | None:
     """Return the response's ``Vary`` field names, lowercased and sorted.
 
@@ -438,11 +586,19 @@ def _response_vary(headers: list[tuple[bytes, bytes]]) -> tuple[bytes, ...] | No
     return tuple(sorted(fields))
 
 
-def _vary_key(vary_fields: tuple[bytes, ...],
-              req_headers: dict[bytes, bytes]) -> tuple:
-    """Build the variant portion of the cache key from the request headers
-    named by *vary_fields*.  A missing request header contributes ``b''``."""
-    return tuple((f, req_headers.get(f, b'')) for f in vary_fields)
+def _surrogate_keys(headers: list[tuple[bytes, bytes]]) -> tuple[str, ...]:
+    """The tags of the response's ``Surrogate-Key`` header(s).
+
+    The de-facto format (Fastly, Varnish xkey) is a space-separated list.
+    Tags are kept as ``str`` (Latin-1, so any byte round-trips), in first-seen
+    order, without duplicates.
+    """
+    tags: dict[str, None] = {}
+    for name, value in headers:
+        if name.lower() == b'surrogate-key':
+            for tag in value.split():
+                tags[tag.decode('latin-1')] = None
+    return tuple(tags)
 
 
 def _read_etag(headers: list[tuple[bytes, bytes]]) -> bytes | None:
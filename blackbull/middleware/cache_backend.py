@@ -0,0 +1,818 @@
+"""Storage backends for the :class:`~blackbull.middleware.cache.Cache` middleware.
+
+The middleware decides *what* to cache (methods, statuses, ``Cache-Control``,
+ETags); a backend decides *where* it lives.  Two ship here:
+
+* :class:`MemoryBackend` — the default.  A per-worker ``OrderedDict`` LRU of
+  per-URL buckets, exactly what ``Cache`` has always used.
+* :class:`SharedMemoryBackend` — one store for every worker of a pre-fork
+  :class:`~blackbull.server.multiworker.MultiWorkerServer`.  An anonymous
+  ``MAP_SHARED`` mmap carved into slabs, allocated when the middleware is
+  constructed.  The app is built in the master before the workers fork, so
+  they all inherit the same mapping.  A hot URL is then rendered once per
+  deployment, not once per worker, and stored once instead of ``workers``
+  times.
+
+Both backends store the same unit: a :class:`_Bucket` per base key
+``(method, path, query_string)``, holding the response's ``Vary`` field names
+beside the variant entries they key.  Both evict a bucket as a whole, so the
+vary fields can never be orphaned from their entries.
+
+Both support server-side invalidation by path prefix and by surrogate key
+(the tags of a response's ``Surrogate-Key`` header).  How it works differs:
+
+* :class:`MemoryBackend` keeps a path-segment trie of base keys and a
+  tag → entries map, both updated on every store and eviction.  A purge
+  removes exactly the affected entries.  It does not scan the store.
+* :class:`SharedMemoryBackend` records the purge instead: the time of the
+  purge goes into a small direct-mapped table, keyed by the tag or prefix.
+  An entry stored before a matching purge reads as a miss.  Its chunk is
+  reclaimed by the next store to that URL or by CLOCK.  A purge is O(1).
+  Two tags that collide in the table only cause an extra miss, never a
+  stale hit.
+
+Shared-memory layout
+--------------------
+
+::
+
+    header | class table | page table | index | purge table | arena
+
+The arena is split into ``page_size`` pages.  A page is assigned to one
+*size class* on first use and cut into equal chunks.  Class sizes start at
+512 B and grow by a factor of 1.25 up to one chunk per page.  This is the
+memcached slab design.  The small growth factor keeps the rounding waste per
+stored bucket near 10 %, where power-of-two classes would lose up to half.  A bucket is
+serialised (``marshal``) into one chunk of the smallest class that fits.  A
+bucket larger than a page is not stored.
+
+The index is an open-addressing hash table with linear probing.  It maps a
+64-bit BLAKE2b digest of the base key to the chunk's offset.  The record
+repeats the base key, so a digest collision reads as a miss, not a wrong
+answer.
+
+Eviction is CLOCK per size class.  A hit sets the chunk's reference bit.  When
+a class has no free chunk and no unassigned page is left, its hand sweeps:
+referenced chunks get a second chance, and the first unreferenced one is
+evicted.  A class that owns no page at all takes one from another class,
+round-robin, evicting everything on it.
+
+One cross-process lock guards the structure.  It is held only for the
+byte-level reads and writes; ``marshal`` decoding of a hit happens outside
+it.  A worker killed while holding the lock would wedge the others.  The
+acquire therefore times out, and a timed-out operation degrades to a miss or
+a skipped store.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import marshal
+import mmap
+import multiprocessing
+import struct
+import time
+from collections import OrderedDict
+
+from ..native import NativeResponse
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """One stored cache hit — the response as *data*, not as a message.
+
+    Held as ``(status, header, body)`` rather than a ready-made
+    :class:`~blackbull.native.NativeResponse` so every replay can build a
+    fresh object over a fresh header list.  Middleware below the cache — CORS,
+    the route header injector — append to ``_header`` **in place**; handing
+    out one shared object would grow the stored entry on every hit.
+    """
+    __slots__ = ('status', 'header', 'body', 'etag', 'expires_at', 'tags',
+                 'stored_at', 'stale_while_revalidate', 'stale_if_error')
+
+    def __init__(self, status: int, header: list[tuple[bytes, bytes]],
+                 body: bytes, etag: bytes, expires_at: float,
+                 tags: tuple[str, ...] = (), stored_at: float = 0.0,
+                 stale_while_revalidate: float = 0.0,
+                 stale_if_error: float = 0.0):
+        self.status = status
+        self.header = header
+        self.body = body
+        self.etag = etag
+        self.expires_at = expires_at
+        self.tags = tags              # surrogate keys, for purge_tag()
+        self.stored_at = stored_at
+        # RFC 5861 windows, in seconds past ``expires_at``.
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stale_if_error = stale_if_error
+
+    def replay(self) -> 'NativeResponse':
+        """A private copy of the stored response, safe to mutate downstream."""
+        return NativeResponse(status=self.status, header=list(self.header),
+                              body=self.body)
+
+    def expired(self, now: float | None = None) -> bool:
+        return (now if now is not None else time.monotonic()) >= self.expires_at
+
+    @property
+    def retain_until(self) -> float:
+        """When the entry stops being servable even as a stale fallback."""
+        return self.expires_at + max(self.stale_while_revalidate,
+                                     self.stale_if_error)
+
+
+# Safety cap on the number of stored variants for a single base key, so a
+# hostile peer varying an Accept-* header cannot grow one bucket without bound.
+# Far above any real Accept-Encoding × Accept-Language cross-product.
+_MAX_VARIANTS_PER_KEY = 16
+
+
+class _Bucket:
+    """All cached variants for one base key ``(method, path, query_string)``.
+
+    The response ``Vary`` field names live *inside* the bucket, beside the
+    per-variant entries — not in a separate LRU.  That is the fix for 1.21g:
+    with two independent LRUs (the old ``_store`` + ``_vary_registry``) the vary
+    record could be evicted before its entries, orphaning them (future lookups
+    rebuilt the variant key with empty vary fields and never matched). Here the
+    vary fields cannot outlive their entries, so no orphan is possible.
+
+    ``entries`` is a per-variant LRU keyed by the variant tuple from
+    :func:`_vary_key` (``()`` for a non-varying response).
+    """
+    __slots__ = ('vary_fields', 'entries')
+
+    def __init__(self, vary_fields: tuple[bytes, ...] = ()):
+        self.vary_fields = vary_fields
+        self.entries: OrderedDict[tuple, _Entry] = OrderedDict()
+
+    def add(self, vary_fields: tuple[bytes, ...], variant_key: tuple,
+            entry: _Entry) -> list[tuple[tuple, _Entry]]:
+        """Store *entry* under *variant_key*, adopting *vary_fields*.
+
+        Returns the ``(variant_key, entry)`` pairs this displaced, so a
+        backend that indexes entries can drop them from its indexes.
+        """
+        dropped: list[tuple[tuple, _Entry]] = []
+        if self.vary_fields != vary_fields:
+            # The response's Vary changed; the old variant keys were built
+            # from the old fields and can no longer be reached — adopt the
+            # new fields and drop them.
+            self.vary_fields = vary_fields
+            dropped.extend(self.entries.items())
+            self.entries.clear()
+        old = self.entries.pop(variant_key, None)
+        if old is not None:
+            dropped.append((variant_key, old))
+        self.entries[variant_key] = entry
+        while len(self.entries) > _MAX_VARIANTS_PER_KEY:
+            dropped.append(self.entries.popitem(last=False))
+        return dropped
+
+
+def _vary_key(vary_fields: tuple[bytes, ...],
+              req_headers: dict[bytes, bytes]) -> tuple:
+    """Build the variant portion of the cache key from the request headers
+    named by *vary_fields*.  A missing request header contributes ``b''``."""
+    return tuple((f, req_headers.get(f, b'')) for f in vary_fields)
+
+
+class CacheBackend:
+    """Where :class:`~blackbull.middleware.cache.Cache` keeps its buckets.
+
+    Subclasses implement :meth:`get` and :meth:`put`, and may implement the
+    two purges.  Expiry stays with the middleware: ``get`` may return an entry
+    whose TTL has passed, and the caller decides whether it may still be
+    served stale.
+    """
+
+    def get(self, base_key: tuple,
+            req_headers: dict[bytes, bytes]) -> _Entry | None:
+        """The entry for this request's variant of *base_key*, if stored."""
+        raise NotImplementedError
+
+    def put(self, base_key: tuple, vary_fields: tuple[bytes, ...],
+            req_headers: dict[bytes, bytes], entry: _Entry) -> None:
+        """Store *entry* as this request's variant of *base_key*."""
+        raise NotImplementedError
+
+    def invalidate(self, path_prefix: str) -> int | None:
+        """Drop every entry whose path is *path_prefix* or lies below it.
+
+        Returns the number of entries dropped, or ``None`` when the backend
+        invalidates lazily and cannot count them.
+        """
+        raise NotImplementedError
+
+    def purge_tag(self, tag: str) -> int | None:
+        """Drop every entry stored with surrogate key *tag*.  Returns as
+        :meth:`invalidate` does."""
+        raise NotImplementedError
+
+
+def _segments(path: str) -> list[str]:
+    """Path segments for prefix matching.  A trailing slash is ignored, so
+    ``/api/users/`` and ``/api/users`` name the same prefix; ``/`` is root."""
+    return path.rstrip('/').split('/')[1:]
+
+
+class _PathNode:
+    """One path segment in :class:`MemoryBackend`'s prefix index."""
+    __slots__ = ('children', 'keys')
+
+    def __init__(self) -> None:
+        self.children: dict[str, _PathNode] = {}
+        self.keys: set[tuple] = set()
+
+
+class MemoryBackend(CacheBackend):
+    """Per-worker in-memory LRU of buckets — the ``Cache`` default.
+
+    ``max_entries`` bounds the number of distinct URLs (base keys); each
+    bucket LRU-bounds its own variants.
+    """
+
+    def __init__(self, max_entries: int = 1024):
+        if max_entries <= 0:
+            raise ValueError(f'max_entries must be > 0; got {max_entries}')
+        self._max_entries = max_entries
+        # base_key → _Bucket.  OrderedDict gives O(1) move-to-end on access +
+        # popitem(last=False) for LRU eviction — same pattern as
+        # :func:`functools.lru_cache`.
+        self._buckets: OrderedDict[tuple, _Bucket] = OrderedDict()
+        # Invalidation indexes, kept in step with ``_buckets`` on every store
+        # and eviction so a purge touches only the entries it removes.
+        self._paths = _PathNode()
+        self._tags: dict[str, set[tuple[tuple, tuple]]] = {}
+
+    def get(self, base_key, req_headers):
+        bucket = self._buckets.get(base_key)
+        if bucket is None:
+            return None
+        variant_key = _vary_key(bucket.vary_fields, req_headers)
+        entry = bucket.entries.get(variant_key)
+        if entry is not None:
+            self._buckets.move_to_end(base_key)        # URL touched → MRU
+            bucket.entries.move_to_end(variant_key)    # variant touched → MRU
+        return entry
+
+    def put(self, base_key, vary_fields, req_headers, entry):
+        bucket = self._buckets.get(base_key)
+        if bucket is None:
+            bucket = _Bucket(vary_fields)
+            self._buckets[base_key] = bucket
+            self._index_path(base_key)
+        variant_key = _vary_key(vary_fields, req_headers)
+        for key, old in bucket.add(vary_fields, variant_key, entry):
+            self._unindex_tags(base_key, key, old)
+        for tag in entry.tags:
+            self._tags.setdefault(tag, set()).add((base_key, variant_key))
+        self._buckets.move_to_end(base_key)
+        while len(self._buckets) > self._max_entries:
+            self._drop_bucket(*self._buckets.popitem(last=False))
+
+    def invalidate(self, path_prefix):
+        node = self._paths
+        for segment in _segments(path_prefix):
+            node = node.children.get(segment)
+            if node is None:
+                return 0
+        doomed: list[tuple] = []
+        stack = [node]
+        while stack:
+            n = stack.pop()
+            doomed.extend(n.keys)
+            stack.extend(n.children.values())
+        dropped = 0
+        for base_key in doomed:
+            bucket = self._buckets.pop(base_key)
+            dropped += len(bucket.entries)
+            self._drop_bucket(base_key, bucket)
+        return dropped
+
+    def purge_tag(self, tag):
+        dropped = 0
+        for base_key, variant_key in self._tags.pop(tag, ()):
+            bucket = self._buckets.get(base_key)
+            entry = bucket.entries.pop(variant_key) if bucket else None
+            if entry is None:
+                continue
+            dropped += 1
+            self._unindex_tags(base_key, variant_key, entry)
+            if not bucket.entries:
+                del self._buckets[base_key]
+                self._unindex_path(base_key)
+        return dropped
+
+    # ---- index upkeep ----------------------------------------------------
+
+    def _drop_bucket(self, base_key: tuple, bucket: _Bucket) -> None:
+        """Unindex a bucket already removed from ``_buckets``."""
+        for key, entry in bucket.entries.items():
+            self._unindex_tags(base_key, key, entry)
+        self._unindex_path(base_key)
+
+    def _unindex_tags(self, base_key: tuple, variant_key: tuple,
+                      entry: _Entry) -> None:
+        for tag in entry.tags:
+            members = self._tags.get(tag)
+            if members is not None:
+                members.discard((base_key, variant_key))
+                if not members:
+                    del self._tags[tag]
+
+    def _index_path(self, base_key: tuple) -> None:
+        node = self._paths
+        for segment in _segments(base_key[1]):
+            node = node.children.setdefault(segment, _PathNode())
+        node.keys.add(base_key)
+
+    def _unindex_path(self, base_key: tuple) -> None:
+        trail = [self._paths]
+        segments = _segments(base_key[1])
+        for segment in segments:
+            node = trail[-1].children.get(segment)
+            if node is None:
+                return
+            trail.append(node)
+        trail[-1].keys.discard(base_key)
+        # Prune now-empty nodes bottom-up so the trie stays the size of the
+        # store, and a prefix walk never visits dead branches.
+        for depth in range(len(segments), 0, -1):
+            node = trail[depth]
+            if node.keys or node.children:
+                break
+            del trail[depth - 1].children[segments[depth - 1]]
+
+    def __contains__(self, base_key) -> bool:
+        return base_key in self._buckets
+
+    def __getitem__(self, base_key) -> _Bucket:
+        return self._buckets[base_key]
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+# ---------------------------------------------------------------------------
+# Shared memory
+# ---------------------------------------------------------------------------
+
+_MAGIC = 0x42424331          # 'BBC1'
+_MIN_CHUNK = 512
+_CLASS_GROWTH = 1.25
+_UNASSIGNED = 0xFF
+# How long a worker waits for the cross-process lock before giving up on one
+# operation.  Far above any real critical section (microseconds); short enough
+# that a lock orphaned by a killed worker costs a miss, not a stall.
+_LOCK_TIMEOUT = 0.05
+
+# magic, page_size, n_pages, n_slots, n_classes, live, page_hand, purges,
+# then counters: hits, misses, stores, evictions, oversize.  ``purges`` only
+# gates the purge-table check: zero means no entry can have been purged.
+_HEADER = struct.Struct('<8I5Q')
+# Per size class: hand page (-1 = none yet), hand chunk, pages owned, used.
+_CLASS = struct.Struct('<iiII')
+# Index slot: key digest (0 = empty), chunk offset.
+_SLOT = struct.Struct('<QQ')
+# Chunk header: in use, reference bit, payload length, key digest.
+_CHUNK = struct.Struct('<BBxxIQ')
+
+# Direct-mapped purge table: tag or prefix digest → monotonic time of the
+# latest purge that hashed there.
+_PURGE_SLOTS = 4096
+_PURGE = struct.Struct('<d')
+
+_HITS, _MISSES, _STORES, _EVICTIONS, _OVERSIZE = range(5)
+_COUNTER_OFFSET = struct.calcsize('<8I')
+
+
+def _digest(base_key: tuple) -> int:
+    # ``repr``, not ``marshal``: marshal's output depends on reference counts
+    # (FLAG_REF), so equal keys built differently would hash apart.
+    raw = hashlib.blake2b(repr(base_key).encode(), digest_size=8).digest()
+    return int.from_bytes(raw, 'little') or 1     # 0 marks an empty slot
+
+
+class SharedMemoryBackend(CacheBackend):
+    """Cross-worker cache store in an anonymous shared mmap.
+
+    Construct it — and the ``Cache`` that uses it — where the app is built,
+    before ``MultiWorkerServer`` forks.  A backend constructed inside a worker
+    (e.g. in a lifespan handler) is private to that worker.
+
+    Parameters
+    ----------
+    max_bytes:
+        Arena budget.  Index and bookkeeping are allocated on top of it.
+    max_entries:
+        Most buckets (URLs) stored at once; sizes the index.
+    page_size:
+        Slab page size, which is also the largest storable bucket.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, *,
+                 max_entries: int = 65536, page_size: int = 1024 * 1024):
+        if page_size < _MIN_CHUNK:
+            raise ValueError(
+                f'page_size must be >= {_MIN_CHUNK}; got {page_size}')
+        if max_bytes < page_size:
+            raise ValueError(
+                f'max_bytes must be >= page_size ({page_size}); got {max_bytes}')
+        if max_entries <= 0:
+            raise ValueError(f'max_entries must be > 0; got {max_entries}')
+        self._page_size = page_size
+        self._n_pages = max_bytes // page_size
+        self._max_entries = max_entries
+        self._chunk_sizes: list[int] = []
+        size = _MIN_CHUNK
+        while size < page_size:
+            self._chunk_sizes.append(size)
+            size = (int(size * _CLASS_GROWTH) + 63) & ~63    # 64-byte aligned
+        self._chunk_sizes.append(page_size)
+        # Power of two, at most half full: linear probes stay short.
+        self._n_slots = 1 << (2 * max_entries - 1).bit_length()
+        self._mask = self._n_slots - 1
+
+        n_classes = len(self._chunk_sizes)
+        self._class_off = _HEADER.size
+        self._pages_off = self._class_off + n_classes * _CLASS.size
+        self._index_off = (self._pages_off + self._n_pages + 7) & ~7
+        self._purge_off = self._index_off + self._n_slots * _SLOT.size
+        self._arena_off = self._purge_off + _PURGE_SLOTS * _PURGE.size
+        total = self._arena_off + self._n_pages * page_size
+
+        # fileno -1: anonymous, MAP_SHARED — shared with every child forked
+        # after this point, private to this process tree.
+        self._mm = mmap.mmap(-1, total)
+        _HEADER.pack_into(self._mm, 0, _MAGIC, page_size, self._n_pages,
+                          self._n_slots, n_classes, 0, 0, 0, 0, 0, 0, 0, 0)
+        for cls in range(n_classes):
+            _CLASS.pack_into(self._mm, self._class_off + cls * _CLASS.size,
+                             -1, 0, 0, 0)
+        self._mm[self._pages_off:self._pages_off + self._n_pages] = (
+            bytes([_UNASSIGNED]) * self._n_pages)
+        # A fork-context lock is a process-shared semaphore: children forked
+        # from this process contend on the same one.
+        self._lock = multiprocessing.get_context('fork').Lock()
+        self._lock_warned = False
+
+    # ---- CacheBackend --------------------------------------------------
+
+    def get(self, base_key, req_headers):
+        digest = _digest(base_key)
+        if not self._acquire():
+            return None
+        try:
+            slot = self._find(digest)
+            if slot < 0:
+                self._count(_MISSES)
+                return None
+            offset = _SLOT.unpack_from(self._mm, slot)[1]
+            length = _CHUNK.unpack_from(self._mm, offset)[2]
+            self._mm[offset + 1] = 1                  # CLOCK reference bit
+            start = offset + _CHUNK.size
+            record = self._mm[start:start + length]
+        finally:
+            self._lock.release()
+
+        stored_key, vary_fields, variants = marshal.loads(record)
+        if stored_key == base_key:
+            variant_key = _vary_key(vary_fields, req_headers)
+            for key, *fields in variants:
+                if key == variant_key:
+                    entry = _Entry(*fields)
+                    if self._purged(base_key, entry):
+                        break
+                    self._bump(_HITS)
+                    return entry
+        self._bump(_MISSES)
+        return None
+
+    def put(self, base_key, vary_fields, req_headers, entry):
+        digest = _digest(base_key)
+        if not self._acquire():
+            return
+        try:
+            bucket = self._load(digest, base_key)
+            bucket.add(vary_fields, _vary_key(vary_fields, req_headers), entry)
+            now = time.monotonic()
+            record = marshal.dumps((base_key, bucket.vary_fields, [
+                (key, e.status, e.header, e.body, e.etag, e.expires_at,
+                 e.tags, e.stored_at or now, e.stale_while_revalidate,
+                 e.stale_if_error)
+                for key, e in bucket.entries.items() if now < e.retain_until]))
+            self._remove(digest)
+            cls = self._class_for(len(record) + _CHUNK.size)
+            if cls < 0:
+                self._count(_OVERSIZE)
+                return
+            while self._live() >= self._max_entries:
+                if not self._evict_one(cls):
+                    return
+            offset = self._alloc(cls)
+            if offset is None:
+                return
+            _CHUNK.pack_into(self._mm, offset, 1, 0, len(record), digest)
+            start = offset + _CHUNK.size
+            self._mm[start:start + len(record)] = record
+            self._insert(digest, offset)
+            self._count(_STORES)
+        finally:
+            self._lock.release()
+
+    def invalidate(self, path_prefix):
+        self._record_purge(('p', '/'.join([''] + _segments(path_prefix))))
+        return None
+
+    def purge_tag(self, tag):
+        self._record_purge(('t', tag))
+        return None
+
+    def _record_purge(self, what: tuple) -> None:
+        slot = self._purge_off + _digest(what) % _PURGE_SLOTS * _PURGE.size
+        if not self._acquire():
+            # Unlike a skipped store, a skipped purge would leave stale
+            # entries served: fail loudly rather than silently.
+            raise TimeoutError('SharedMemoryBackend: purge could not take the lock')
+        try:
+            _PURGE.pack_into(self._mm, slot, time.monotonic())
+            purges = _HEADER.unpack_from(self._mm, 0)[7]
+            struct.pack_into('<I', self._mm, 7 * 4, (purges + 1) & 0xFFFFFFFF or 1)
+        finally:
+            self._lock.release()
+
+    def _purged(self, base_key: tuple, entry: _Entry) -> bool:
+        """Was *entry* stored before a purge of one of its tags or prefixes?"""
+        if not _HEADER.unpack_from(self._mm, 0)[7]:
+            return False
+        segments = _segments(base_key[1])
+        marks = [('t', tag) for tag in entry.tags]
+        marks += [('p', '/'.join([''] + segments[:depth]))
+                  for depth in range(len(segments) + 1)]
+        for what in marks:
+            slot = self._purge_off + _digest(what) % _PURGE_SLOTS * _PURGE.size
+            if _PURGE.unpack_from(self._mm, slot)[0] > entry.stored_at:
+                return True
+        return False
+
+    # ---- introspection ---------------------------------------------------
+
+    def stats(self) -> dict[str, int]:
+        """Shared counters and occupancy, the same in every worker."""
+        bytes_used = 0
+        for cls, size in enumerate(self._chunk_sizes):
+            bytes_used += self._class(cls)[3] * size
+        hits, misses, stores, evictions, oversize = struct.unpack_from(
+            '<5Q', self._mm, _COUNTER_OFFSET)
+        return {
+            'hits': hits, 'misses': misses, 'stores': stores,
+            'evictions': evictions, 'oversize': oversize,
+            'entries': self._live(), 'bytes_used': bytes_used,
+            'capacity_bytes': self._n_pages * self._page_size,
+        }
+
+    def __len__(self) -> int:
+        return self._live()
+
+    # ---- locking / counters ------------------------------------------------
+
+    def _acquire(self) -> bool:
+        if self._lock.acquire(timeout=_LOCK_TIMEOUT):
+            return True
+        if not self._lock_warned:
+            self._lock_warned = True
+            logger.warning('SharedMemoryBackend: lock not acquired in %.0f ms; '
+                           'serving misses (was a worker killed mid-update?)',
+                           _LOCK_TIMEOUT * 1000)
+        return False
+
+    def _count(self, which: int) -> None:
+        """Increment a counter.  Caller holds the lock."""
+        off = _COUNTER_OFFSET + which * 8
+        self._mm[off:off + 8] = (
+            int.from_bytes(self._mm[off:off + 8], 'little') + 1).to_bytes(8, 'little')
+
+    def _bump(self, which: int) -> None:
+        """Increment a counter from outside the lock."""
+        if self._acquire():
+            try:
+                self._count(which)
+            finally:
+                self._lock.release()
+
+    def _live(self) -> int:
+        return _HEADER.unpack_from(self._mm, 0)[5]
+
+    def _set_live(self, value: int) -> None:
+        struct.pack_into('<I', self._mm, 5 * 4, value)
+
+    # ---- index -------------------------------------------------------------
+
+    def _find(self, digest: int) -> int:
+        """Byte offset of *digest*'s index slot, or -1."""
+        i = digest & self._mask
+        while True:
+            slot = self._index_off + i * _SLOT.size
+            d = _SLOT.unpack_from(self._mm, slot)[0]
+            if d == digest:
+                return slot
+            if d == 0:
+                return -1
+            i = (i + 1) & self._mask
+
+    def _insert(self, digest: int, offset: int) -> None:
+        i = digest & self._mask
+        while _SLOT.unpack_from(self._mm, self._index_off + i * _SLOT.size)[0]:
+            i = (i + 1) & self._mask
+        _SLOT.pack_into(self._mm, self._index_off + i * _SLOT.size, digest, offset)
+        self._set_live(self._live() + 1)
+
+    def _delete_slot(self, i: int) -> None:
+        """Empty slot *i*, shifting later probes back (no tombstones)."""
+        j = i
+        while True:
+            j = (j + 1) & self._mask
+            d, off = _SLOT.unpack_from(self._mm, self._index_off + j * _SLOT.size)
+            if d == 0:
+                break
+            home = d & self._mask
+            # Leave the entry where it is if its home lies cyclically in
+            # (i, j]; otherwise it probed past i and must move back.
+            if (i < j and i < home <= j) or (i > j and (home > i or home <= j)):
+                continue
+            _SLOT.pack_into(self._mm, self._index_off + i * _SLOT.size, d, off)
+            i = j
+        _SLOT.pack_into(self._mm, self._index_off + i * _SLOT.size, 0, 0)
+        self._set_live(self._live() - 1)
+
+    def _load(self, digest: int, base_key: tuple) -> _Bucket:
+        """The stored bucket for *base_key*, or an empty one.  Lock held."""
+        bucket = _Bucket()
+        slot = self._find(digest)
+        if slot < 0:
+            return bucket
+        offset = _SLOT.unpack_from(self._mm, slot)[1]
+        length = _CHUNK.unpack_from(self._mm, offset)[2]
+        start = offset + _CHUNK.size
+        stored_key, vary_fields, variants = marshal.loads(
+            self._mm[start:start + length])
+        if stored_key != base_key:
+            return bucket
+        bucket.vary_fields = vary_fields
+        for key, *fields in variants:
+            entry = _Entry(*fields)
+            if not self._purged(base_key, entry):
+                bucket.entries[key] = entry
+        return bucket
+
+    def _remove(self, digest: int) -> None:
+        """Drop *digest*'s record and free its chunk, if present."""
+        slot = self._find(digest)
+        if slot < 0:
+            return
+        offset = _SLOT.unpack_from(self._mm, slot)[1]
+        self._delete_slot((slot - self._index_off) // _SLOT.size)
+        self._free_chunk(offset)
+
+    # ---- slabs ---------------------------------------------------------------
+
+    def _class_for(self, size: int) -> int:
+        for cls, chunk in enumerate(self._chunk_sizes):
+            if size <= chunk:
+                return cls
+        return -1
+
+    def _class(self, cls: int) -> tuple[int, int, int, int]:
+        return _CLASS.unpack_from(self._mm, self._class_off + cls * _CLASS.size)
+
+    def _set_class(self, cls: int, hand_page: int, hand_chunk: int,
+                   pages: int, used: int) -> None:
+        _CLASS.pack_into(self._mm, self._class_off + cls * _CLASS.size,
+                         hand_page, hand_chunk, pages, used)
+
+    def _page_class(self, page: int) -> int:
+        return self._mm[self._pages_off + page]
+
+    def _chunk_offset(self, cls: int, page: int, chunk: int) -> int:
+        return (self._arena_off + page * self._page_size
+                + chunk * self._chunk_sizes[cls])
+
+    def _chunk_class(self, offset: int) -> int:
+        return self._page_class((offset - self._arena_off) // self._page_size)
+
+    def _next_page(self, cls: int, after: int) -> int:
+        """The next page owned by *cls*, cyclically after *after*; -1 if none."""
+        marker = bytes([cls])
+        lo, hi = self._pages_off, self._pages_off + self._n_pages
+        pos = self._mm.find(marker, lo + after + 1, hi)
+        if pos < 0:
+            pos = self._mm.find(marker, lo, lo + after + 1)
+        return pos - lo if pos >= 0 else -1
+
+    def _free_chunk(self, offset: int) -> None:
+        self._mm[offset] = 0
+        cls = self._chunk_class(offset)
+        hand_page, hand_chunk, pages, used = self._class(cls)
+        self._set_class(cls, hand_page, hand_chunk, pages, used - 1)
+
+    def _evict_chunk(self, offset: int) -> None:
+        digest = _CHUNK.unpack_from(self._mm, offset)[3]
+        slot = self._find(digest)
+        if slot >= 0 and _SLOT.unpack_from(self._mm, slot)[1] == offset:
+            self._delete_slot((slot - self._index_off) // _SLOT.size)
+        self._free_chunk(offset)
+        self._count(_EVICTIONS)
+
+    def _assign_page(self, cls: int, page: int) -> None:
+        self._mm[self._pages_off + page] = cls
+        hand_page, hand_chunk, pages, used = self._class(cls)
+        if hand_page < 0:
+            hand_page, hand_chunk = page, 0
+        self._set_class(cls, hand_page, hand_chunk, pages + 1, used)
+
+    def _steal_page(self, cls: int) -> bool:
+        """Give *cls* a page taken round-robin from another class."""
+        hand = _HEADER.unpack_from(self._mm, 0)[6]
+        for step in range(self._n_pages):
+            page = (hand + step) % self._n_pages
+            victim = self._page_class(page)
+            if victim == cls or victim == _UNASSIGNED:
+                continue
+            size = self._chunk_sizes[victim]
+            for chunk in range(self._page_size // size):
+                offset = self._chunk_offset(victim, page, chunk)
+                if self._mm[offset]:
+                    self._evict_chunk(offset)
+            hand_page, hand_chunk, pages, used = self._class(victim)
+            if hand_page == page:
+                hand_page, hand_chunk = self._next_page(victim, page), 0
+                if hand_page == page:
+                    hand_page = -1
+            self._mm[self._pages_off + page] = _UNASSIGNED
+            self._set_class(victim, hand_page, hand_chunk, pages - 1, used)
+            struct.pack_into('<I', self._mm, 6 * 4, (page + 1) % self._n_pages)
+            self._assign_page(cls, page)
+            return True
+        return False
+
+    def _advance(self, cls: int) -> int:
+        """Return the chunk under *cls*'s hand and move the hand on."""
+        hand_page, hand_chunk, pages, used = self._class(cls)
+        per_page = self._page_size // self._chunk_sizes[cls]
+        if hand_page < 0 or self._page_class(hand_page) != cls:
+            hand_page, hand_chunk = self._next_page(cls, max(hand_page, 0)), 0
+        offset = self._chunk_offset(cls, hand_page, hand_chunk)
+        hand_chunk += 1
+        if hand_chunk >= per_page:
+            hand_page, hand_chunk = self._next_page(cls, hand_page), 0
+        self._set_class(cls, hand_page, hand_chunk, pages, used)
+        return offset
+
+    def _alloc(self, cls: int) -> int | None:
+        """A free chunk of *cls*, evicting by CLOCK if need be.  Lock held."""
+        _, _, pages, used = self._class(cls)
+        capacity = pages * (self._page_size // self._chunk_sizes[cls])
+        if used >= capacity:
+            free_page = self._mm.find(bytes([_UNASSIGNED]), self._pages_off,
+                                      self._pages_off + self._n_pages)
+            if free_page >= 0:
+                self._assign_page(cls, free_page - self._pages_off)
+            elif pages == 0:
+                if not self._steal_page(cls):
+                    return None
+            else:
+                self._evict_one(cls)
+            _, _, pages, _ = self._class(cls)
+            capacity = pages * (self._page_size // self._chunk_sizes[cls])
+        for _ in range(capacity):
+            offset = self._advance(cls)
+            if not self._mm[offset]:
+                hand_page, hand_chunk, pages, used = self._class(cls)
+                self._set_class(cls, hand_page, hand_chunk, pages, used + 1)
+                return offset
+        return None
+
+    def _evict_one(self, cls: int) -> bool:
+        """CLOCK sweep over *cls*: evict the first unreferenced chunk.
+
+        Falls back to any class with a used chunk when *cls* has none, so
+        the entry cap can always be honoured.
+        """
+        order = [cls] + [c for c in range(len(self._chunk_sizes)) if c != cls]
+        for c in order:
+            _, _, pages, used = self._class(c)
+            if not used:
+                continue
+            capacity = pages * (self._page_size // self._chunk_sizes[c])
+            for _ in range(2 * capacity + 1):
+                offset = self._advance(c)
+                if not self._mm[offset]:
+                    continue
+                if self._mm[offset + 1]:
+                    self._mm[offset + 1] = 0          # second chance
+                    continue
+                self._evict_chunk(offset)
+                return True
+        return False
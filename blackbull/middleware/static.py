@@ -1,4 +1,7 @@
 import asyncio
+import functools
+import gzip
+import logging
 import mimetypes
 import os
 import time
@@ -12,6 +15,10 @@ from blackbull.connection import Connection
 from blackbull.env import get_settings, Environment
 from blackbull.native import NativeResponse
 
+from .compression import _MIN_SIZE, _SKIP_CONTENT_TYPES
+
+logger = logging.getLogger(__name__)
+
 
 # Common web-asset MIME types that may be missing from the host's
 # ``/etc/mime.types`` file.  Without this registration, slim container
@@ -117,12 +124,47 @@ def _not_modified(headers, etag: bytes, mtime_ns: int) -> bool:
     return False
 
 
+def _precompressors() -> dict[bytes, 'functools.partial[bytes]']:
+    """Encoders for ``precompress=True``, in server preference order.
+
+    Build-time settings, not the ``Compression`` middleware's dynamic ones:
+    brotli quality 11, zstd level 19, gzip level 9.  They cost 10-100x the
+    CPU of the defaults, which is affordable because each runs once per file
+    version, off the event loop.  zstd gets a compressor per call: a
+    ``ZstdCompressor`` must not be shared between executor threads.
+    """
+    codecs = {}
+    try:
+        import brotli  # type: ignore[import-untyped]
+        codecs[b'br'] = functools.partial(brotli.compress, quality=11)
+    except ImportError:
+        pass  # brotli not installed → no br variants.
+    try:
+        import zstandard  # type: ignore[import-untyped]
+
+        def _zstd(data: bytes) -> bytes:
+            return zstandard.ZstdCompressor(level=19).compress(data)
+        codecs[b'zstd'] = _zstd
+    except ImportError:
+        pass  # zstandard not installed → no zstd variants.
+    codecs[b'gzip'] = functools.partial(gzip.compress, compresslevel=9)
+    return codecs
+
+
+def _compressible(mime: bytes) -> bool:
+    ct = mime.decode('ascii', errors='ignore').lower()
+    return not ct.startswith(_SKIP_CONTENT_TYPES)
+
+
 class StaticFiles:
     # Files at or below this size are read once and held in memory.
     # Static assets in the wild (CSS/JS/manifest/small images) cluster
     # well under this; larger files fall through to streaming.
     _CACHE_MAX_BYTES_PER_FILE = 4 * 1024 * 1024
     _CACHE_MAX_ENTRIES = 256
+    # Background precompression jobs at once; a request that finds the cap
+    # reached serves identity and leaves the job to a later request.
+    _PRECOMPRESS_MAX_INFLIGHT = max(1, (os.cpu_count() or 1) // 2)
     # 64 KiB streaming chunk for files above the cache threshold.
     _CHUNK = 64 * 1024
     # Per-entry stat throttle.  Once a cached entry is validated by
@@ -141,11 +183,14 @@ class StaticFiles:
         (b'zstd', '.zst'),
         (b'gzip', '.gz'),
     )
+    # Files that already are an encoding; never precompressed again.
+    _ENCODED_SUFFIXES = ('.br', '.zst', '.gz')
 
     def __init__(self, directory: str | None = None, *,
                  url_prefix: str = '', root_dir: str | Path | None = None,
                  cache: bool = False, index: str | None = None,
-                 conditional: bool = True):
+                 conditional: bool = True, precompress: bool = False,
+                 cache_max_bytes: int = 64 * 1024 * 1024):
         """Serve files from ``directory`` (or ``root_dir``).
 
         ``index`` (default ``None`` — off): when set to a filename (e.g.
@@ -172,10 +217,27 @@ class StaticFiles:
         validators and honour ``If-None-Match`` / ``If-Modified-Since`` with a
         304.  Set ``False`` to suppress validators (e.g. the ``blackbull
         serve --no-etag`` path).
+
+        ``precompress`` (default ``False``; requires ``cache=True``): encode
+        cached text assets with no on-disk sibling as br / zstd / gzip, at
+        build-time quality, in the default executor — on first request, or
+        ahead of time with :meth:`precompress_all`.  The variants live in the
+        same LRU as the bodies, keyed by ``(path, encoding)`` and tied to
+        the file's mtime and size.  Until a variant is ready the file is
+        served as it is, and the ``Compression`` middleware (if installed)
+        encodes it as before.
+
+        ``cache_max_bytes`` (default 64 MiB): budget for everything the
+        cache holds — bodies and encoded variants together.  The LRU evicts
+        at this size or at ``_CACHE_MAX_ENTRIES``, whichever comes first.
         """
         resolved = directory or root_dir
         if resolved is None:
             raise ValueError('directory or root_dir is required')
+        if precompress and not cache:
+            raise ValueError('precompress=True requires cache=True')
+        if cache_max_bytes <= 0:
+            raise ValueError(f'cache_max_bytes must be > 0; got {cache_max_bytes}')
         # Internal hot path uses ``str`` + ``os.path`` rather than
         # ``pathlib.Path``: each request previously allocated several
         # PurePath / Path objects for the same traversal-safety check
@@ -193,7 +255,9 @@ class StaticFiles:
         self._conditional: bool = conditional
         # cache key = the actual filesystem path served (original or
         # sibling), held as a ``str`` so the hash is cheap and the
-        # key matches the value returned by ``os.path.realpath``.
+        # key matches the value returned by ``os.path.realpath``.  A
+        # generated variant is keyed ``(path, encoding)`` instead, with the
+        # ORIGINAL file's mtime_ns and size, so it goes stale with it.
         # value = (mtime_ns, size, body, mime, content_encoding, last_stat).
         # content_encoding is b'' for uncompressed; b'br'/b'gzip'/b'zstd'
         # for precompressed siblings.  ``last_stat`` is the monotonic
@@ -203,8 +267,12 @@ class StaticFiles:
         # check membership without a None-guard; the cache simply never
         # gets populated.
         self._cache: OrderedDict[
-            str, tuple[int, int, bytes, bytes, bytes, float]
+            str | tuple[str, bytes], tuple[int, int, bytes, bytes, bytes, float]
         ] = OrderedDict()
+        self._cache_bytes = 0
+        self._cache_max_bytes = cache_max_bytes
+        self._precompressors = _precompressors() if precompress else {}
+        self._precompressing: set[tuple[str, bytes]] = set()
         # Per-path sibling-availability cache: target → {b'br': sibling_path, ...}.
         # _negotiate calls os.path.isfile for each encoding suffix on every
         # request; when caching is enabled we memoise the answer after the
@@ -429,17 +497,36 @@ class StaticFiles:
                 # Above the cache threshold — drop any stale entry and
                 # fall through to the streaming/pathsend branch.
                 if self._cache_enabled:
-                    self._cache.pop(served_path, None)
+                    self._evict(served_path)
                 mime = (mimetypes.guess_type(path)[0]
                         or 'application/octet-stream').encode()
                 body = None
 
+        # A generated variant stands in for the identity body.  ``vary`` is
+        # set whenever the answer depended on Accept-Encoding, including an
+        # identity answer while the variant is still being encoded.
+        variant = b''
+        vary = bool(content_encoding)
+        if self._precompressors and not content_encoding and body is not None:
+            picked = self._precompressed(conn, path, mtime_ns, size, body, mime)
+            if picked is not None:
+                vary = True
+                if picked[0]:
+                    variant = content_encoding = picked[0]
+                    body = picked[1]
+
         range_hdr = None
         for k, v in conn.headers:
             if k.lower() == b'range':
                 range_hdr = v.decode()
                 break
 
+        if variant:
+            # The validator names the representation: same file version,
+            # different bytes per encoding.
+            variant_etag = f'"{mtime_ns:x}-{size:x}-{variant.decode()}"'.encode()
+            size = len(body)
+
         start, end = 0, size - 1
         status = HTTPStatus.OK
         extra_headers: list[tuple[bytes, bytes]] = []
@@ -449,7 +536,8 @@ class StaticFiles:
             # so ``If-None-Match`` / ``If-Modified-Since`` can produce a 304
             # instead of a full re-transfer.  Cheap; emitted on
             # every response, including the streaming path.
-            etag = f'"{mtime_ns:x}-{size:x}"'.encode()
+            etag = (variant_etag if variant
+                    else f'"{mtime_ns:x}-{size:x}"'.encode())
             last_modified = formatdate(mtime_ns / 1_000_000_000, usegmt=True).encode()
 
             # Conditional GET — answer 304 before touching the body (avoids the
@@ -457,7 +545,7 @@ class StaticFiles:
             if _not_modified(conn.headers, etag, mtime_ns):
                 cond_headers: list[tuple[bytes, bytes]] = [
                     (b'etag', etag), (b'last-modified', last_modified)]
-                if content_encoding:
+                if vary:
                     cond_headers.append((b'vary', b'Accept-Encoding'))
                 await self._respond(send, HTTPStatus.NOT_MODIFIED, cond_headers)
                 return
@@ -485,6 +573,7 @@ class StaticFiles:
             # how it's encoded and that the response Varies on
             # Accept-Encoding (so HTTP caches don't mis-cache).
             extra_headers.append((b'content-encoding', content_encoding))
+        if vary:
             extra_headers.append((b'vary', b'Accept-Encoding'))
 
         if body is not None:
@@ -551,14 +640,151 @@ class StaticFiles:
         finally:
             await asyncio.to_thread(fobj.close)
 
-    def _store(self, path: str, mtime_ns: int, size: int,
+    def _store(self, path: str | tuple[str, bytes], mtime_ns: int, size: int,
                body: bytes, mime: bytes, content_encoding: bytes,
                last_stat: float):
+        self._evict(path)
+        if len(body) > self._cache_max_bytes:
+            return
         self._cache[path] = (mtime_ns, size, body, mime, content_encoding,
                              last_stat)
-        self._cache.move_to_end(path)
-        while len(self._cache) > self._CACHE_MAX_ENTRIES:
-            self._cache.popitem(last=False)
+        self._cache_bytes += len(body)
+        while (len(self._cache) > self._CACHE_MAX_ENTRIES
+               or self._cache_bytes > self._cache_max_bytes):
+            self._cache_bytes -= len(self._cache.popitem(last=False)[1][2])
+
+    def _evict(self, key: str | tuple[str, bytes]) -> None:
+        entry = self._cache.pop(key, None)
+        if entry is not None:
+            self._cache_bytes -= len(entry[2])
+
+    # ---- precompression -------------------------------------------------
+
+    def _precompressed(self, conn, path: str, mtime_ns: int, size: int,
+                       body: bytes, mime: bytes) -> tuple[bytes, bytes] | None:
+        """The best ready variant of *path* for this request.
+
+        Returns ``None`` when the response does not depend on
+        Accept-Encoding (ineligible file, Range request, no
+        Accept-Encoding), ``(encoding, variant)`` when a variant is ready,
+        and ``(b'', body)`` when the client accepts one that is not ready
+        yet.  The client's most preferred encoding that is missing is queued
+        for the executor, even while a less preferred one is served.
+        """
+        if (size < _MIN_SIZE or not _compressible(mime)
+                or path.endswith(self._ENCODED_SUFFIXES)):
+            return None
+        accept = b''
+        for k, v in conn.headers:
+            kl = k.lower()
+            if kl == b'range':
+                return None
+            if kl == b'accept-encoding':
+                accept = v.lower()
+        if not accept:
+            return None
+        ready = wanted = None
+        for enc in self._precompressors:
+            if not self._client_accepts(accept, enc):
+                continue
+            entry = self._cache.get((path, enc))
+            if entry is None or entry[0] != mtime_ns or entry[1] != size:
+                if wanted is None:
+                    wanted = enc
+                continue
+            # An empty variant records that the encoding did not shrink the
+            # file; the next accepted encoding may still.
+            if entry[2]:
+                ready = enc, entry[2]
+                self._cache.move_to_end((path, enc))
+                break
+        if (wanted is not None
+                and len(self._precompressing) < self._PRECOMPRESS_MAX_INFLIGHT
+                and (path, wanted) not in self._precompressing):
+            self._precompressing.add((path, wanted))
+            future = asyncio.get_running_loop().run_in_executor(
+                None, self._precompressors[wanted], body)
+            future.add_done_callback(functools.partial(
+                self._precompress_done, (path, wanted), mtime_ns, size, mime))
+        if ready is not None:
+            return ready
+        return (b'', body) if wanted is not None else None
+
+    def _precompress_done(self, key: tuple[str, bytes], mtime_ns: int,
+                          size: int, mime: bytes,
+                          future: 'asyncio.Future[bytes]') -> None:
+        self._precompressing.discard(key)
+        try:
+            encoded = future.result()
+        except Exception:
+            logger.exception('StaticFiles: precompressing %s as %s failed',
+                             key[0], key[1].decode())
+            return
+        self._store(key, mtime_ns, size, encoded if len(encoded) < size else b'',
+                    mime, key[1], time.monotonic())
+
+    async def precompress_all(self) -> int:
+        """Encode every eligible file under the root now, in every encoding.
+
+        For startup: call it from an ``@app.on_warmup`` hook so the variants
+        are built once in the master and shared with the workers it forks.
+        ``app.static(..., precompress=True)`` registers that hook.  Files
+        with an on-disk sibling for an encoding are skipped for it, and the
+        walk stops before a file whose entries would not fit the cache's
+        byte budget or ``_CACHE_MAX_ENTRIES``.  Symlinks resolve as they
+        do for a request, and one that leaves the root is skipped.  Returns
+        the number of variants stored.
+        """
+        if not self._precompressors:
+            return 0
+        loop = asyncio.get_running_loop()
+        stored = 0
+        seen: set[str] = set()
+        for dirpath, _dirs, files in os.walk(self._root_str):
+            for name in sorted(files):
+                # Keyed by the resolved path, as a request is: a symlink's
+                # variants must land where its requests look them up, and
+                # one that escapes the root is not served at all.
+                path = os.path.realpath(os.path.join(dirpath, name))
+                if not path.startswith(self._root_sep) or path in seen:
+                    continue
+                seen.add(path)
+                mime = (mimetypes.guess_type(path)[0]
+                        or 'application/octet-stream').encode()
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if (not _compressible(mime) or st.st_size < _MIN_SIZE
+                        or st.st_size > self._CACHE_MAX_BYTES_PER_FILE
+                        or path.endswith(self._ENCODED_SUFFIXES)):
+                    continue
+                encodings = [enc for enc, suffix in self._ENCODING_SUFFIXES
+                             if enc in self._precompressors
+                             and not os.path.isfile(path + suffix)]
+                if not encodings:
+                    continue
+                # The identity entry and its variants must all fit, or the
+                # LRU would make room by evicting the warmup's own variants.
+                new_entries = sum(
+                    key not in self._cache
+                    for key in (path, *((path, enc) for enc in encodings)))
+                if len(self._cache) + new_entries > self._CACHE_MAX_ENTRIES:
+                    return stored
+                with open(path, 'rb') as f:
+                    body = f.read()
+                self._store(path, st.st_mtime_ns, st.st_size, body, mime, b'',
+                            time.monotonic())
+                for enc in encodings:
+                    codec = self._precompressors[enc]
+                    if self._cache_bytes + st.st_size > self._cache_max_bytes:
+                        return stored
+                    encoded = await loop.run_in_executor(None, codec, body)
+                    self._store((path, enc), st.st_mtime_ns, st.st_size,
+                                encoded if len(encoded) < st.st_size else b'',
+                                mime, enc, time.monotonic())
+                    stored += 1
+        return stored
 
     @staticmethod
     async def _respond(send, status: int, extra_headers=None):
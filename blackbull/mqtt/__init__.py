@@ -24,10 +24,11 @@ from .asyncapi import AsyncAPIExtension
 from .broker import BrokerActor
 from .connection import serve_connection
 from .extension import MQTTExtension, MQTTProtocolDetector, Subscription
+from .store import BrokerStore
 from .tap import Message, TapActor
 
 __all__ = [
     'MQTTExtension', 'MQTTProtocolDetector', 'Message', 'Subscription',
     'AsyncAPIExtension',
-    'BrokerActor', 'TapActor', 'serve_connection',
+    'BrokerActor', 'BrokerStore', 'TapActor', 'serve_connection',
 ]
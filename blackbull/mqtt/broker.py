@@ -16,18 +16,21 @@ import asyncio
 import logging
 from collections import deque
 from dataclasses import dataclass, field, replace
+from collections.abc import Iterator
 from typing import Any
 
 from ..actor import Actor, Message as ActorMessage
 from ..server.cap_log import log_cap_hit
 from .messages import (
     MQTTConnect, MQTTConnack, MQTTDisconnect,
-    MQTTPublish, MQTTPuback, MQTTPubrec, MQTTPubrel, MQTTPubcomp,
+    EncodedPublish, MQTTPublish, MQTTPuback, MQTTPubrec, MQTTPubrel, MQTTPubcomp,
     MQTTSubscribe, MQTTSuback,
     MQTTUnsubscribe, MQTTUnsuback,
     ProtocolLevel, ReasonCode,
-    topic_matches_filter, validate_topic_name, validate_topic_filter,
+    validate_topic_name, validate_topic_filter,
 )
+from .store import BrokerStore, StoredState
+from .topic_index import RetainedIndex, SubscriptionIndex
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +44,11 @@ _EXPIRY_NEVER = 0xFFFFFFFF
 _QOS2_OUT_PUBLISH_SENT = 'PUBLISH_SENT'   # outbound: PUBLISH sent, awaiting PUBREC
 _QOS2_OUT_PUBREL_SENT = 'PUBREL_SENT'     # outbound: PUBREL sent, awaiting PUBCOMP
 
+#: Retained messages one inbox turn replays to a subscriber.  A wildcard
+#: SUBSCRIBE can match hundreds of thousands; the rest are replayed by later
+#: turns, so the other clients' packets are handled in between.
+_REPLAY_BATCH = 256
+
 
 # -- Level A messages: connection actor -> broker ---------------------------
 
@@ -109,12 +117,45 @@ class _SweepExpired(ActorMessage):
     """
 
 
+@dataclass
+class _ReplayRetained(ActorMessage):
+    """Self-message: continue the retained replay for connection *sender*.
+
+    Posted when a replay batch ends with messages left and the client's
+    window still open, so the remainder waits behind whatever is already
+    in the inbox instead of holding the broker for the whole replay.
+    """
+
+
+@dataclass
+class _RemotePublish(ActorMessage):
+    """A PUBLISH another worker's broker forwarded (see ``mqtt.cluster``).
+
+    *shares* names the share groups, as ``(ShareName, filter)``, that the
+    publishing worker chose this one to deliver to.
+    """
+    publish: MQTTPublish | None = field(default=None, compare=False, repr=False)
+    shares: frozenset = field(default=frozenset(), compare=False, repr=False)
+
+
+@dataclass
+class _RemoteRetain(ActorMessage):
+    """Retained messages set or deleted through another worker's broker."""
+    publishes: list = field(default_factory=list, compare=False, repr=False)
+
+
 # -- Level A messages: broker -> connection actor ---------------------------
 
 @dataclass
 class Send(ActorMessage):
-    """Tell the connection actor to encode + write *packet* to its socket."""
+    """Tell the connection actor to encode + write *packet* to its socket.
+
+    *wire*, when set, is *packet* already encoded as byte segments (see
+    :meth:`~blackbull.mqtt.messages.EncodedPublish.wire`).  The actor then
+    writes those segments as they are, and does not encode *packet*.
+    """
     packet: Any = field(default=None, compare=False, repr=False)
+    wire: tuple | None = field(default=None, compare=False, repr=False)
 
 
 @dataclass
@@ -162,6 +203,20 @@ class _Held:
     publish: Any
     qos: int
     retain: bool
+    # The fan-out's shared encoding, so a held message is not encoded again.
+    encoded: EncodedPublish | None = None
+    # Its key in the session's durable queue; None when nothing persists it.
+    seq: int | None = None
+
+
+@dataclass(slots=True)
+class _Replay:
+    """The unsent rest of one SUBSCRIBE's retained-message replay."""
+    matches: Iterator[Any]       # ``RetainedIndex.iter_match`` over the filter
+    qos: int                     # granted QoS of the subscription
+    topic_filter: str
+    # Drawn from *matches* but held back by a full Receive Maximum window.
+    pending: Any = None
 
 
 def _new_broker_session() -> dict[str, Any]:
@@ -197,6 +252,16 @@ def _new_broker_session() -> dict[str, Any]:
         '_expiry': 0,
         '_expires_at': None,
         '_next_pid': 0,
+        # Durable-store bookkeeping (``BrokerActor(store=...)``): whether the
+        # session has a record, the last queue sequence number, and the queue
+        # entry each in-flight Packet Identifier will release once acked.
+        '_persisted': False,
+        '_queue_seq': 0,
+        '_stored': {},
+        # ``_Replay`` per SUBSCRIBE whose retained messages are not all sent
+        # yet.  Replayed a batch per inbox turn, and only as fast as the
+        # Receive Maximum window allows.
+        '_replay': deque(),
     }
 
 
@@ -213,7 +278,8 @@ class BrokerActor(Actor):
                  receive_maximum: int | None = None,
                  max_packet_size: int | None = None,
                  max_subscriptions: int | None = None,
-                 max_sessions: int | None = None) -> None:
+                 max_sessions: int | None = None,
+                 store: BrokerStore | None = None) -> None:
         super().__init__()
         # The broker advertises ``maximum_packet_size`` but does not enforce it
         # — the framer does, one layer down, because that is where the bytes
@@ -242,19 +308,68 @@ class BrokerActor(Actor):
         self._clients = {}          # client_id -> live connection Actor
         self._client_by_conn = {}   # id(conn) -> client_id
         self._sessions = {}         # client_id -> session dict
-        self._retained = {}         # topic -> MQTTPublish
+        # topic -> MQTTPublish, with a topic-level trie so a wildcard
+        # SUBSCRIBE replays the matching subtree without scanning the rest.
+        self._retained = RetainedIndex()
         self._wills = {}            # client_id -> MQTTPublish (Will template)
         self._auto_seq = 0          # for server-assigned client ids
-        # §4.8.2 — round-robin cursor per share group.  Membership itself is
-        # derived from session subscriptions at routing time (correctness
-        # first: no registry to keep in sync across SUBSCRIBE / UNSUBSCRIBE /
-        # session expiry); only the rotation position is stored.
+        # The routing view of every session's ``subscriptions`` list: a
+        # topic-level trie, so a PUBLISH visits only the filters that can
+        # match it instead of every subscription of every session.  It is
+        # written wherever a session's subscriptions change — SUBSCRIBE,
+        # UNSUBSCRIBE, and every path that discards a session
+        # (``_discard_session``) — and read only by ``_route``.
+        self._subscriptions = SubscriptionIndex()
+        # §4.8.2 — round-robin cursor per share group.  Membership lives in
+        # the index above (one member dict per group, in subscription
+        # order); only the rotation position is stored here.
         self._share_rotation: dict[tuple[str, str], int] = {}
         # One-shot handle armed at the earliest pending session deadline, in
         # the spirit of ``ConnectionDeadline``: no periodic tick, and nothing
         # armed at all while no detached session can expire — an app that
         # loads the MQTT extension but sees no traffic pays no wakeup.
         self._expiry_timer: asyncio.TimerHandle | None = None
+        # Write-through persistence, or None to keep state in memory only.
+        # Every write below is guarded by ``if self._store is not None``.
+        self._store = store
+        # Each connection with a ``_ReplayRetained`` in the inbox, so a
+        # replay is never continued by two messages at once.  Keyed by the
+        # connection itself, not ``id(conn)``: an id is reused once its
+        # object is freed, and a new connection must not inherit the mark.
+        # ``_on_detach`` drops it.
+        self._replay_posted: set = set()
+        # The ``ClusterLink`` to the other workers' brokers, or None when this
+        # broker is the only one.  Set by ``ClusterLink.attach``.
+        self._cluster = None
+
+    def restore(self, state: StoredState) -> None:
+        """Install the state a :class:`BrokerStore` recovered.
+
+        Call once, on the event loop, before the broker serves a client.
+        Every recovered session is detached, so its expiry clock starts
+        now: the store does not know how long the broker was down.  The
+        limits are not applied, because the state was admitted under them
+        when it was first written.
+        """
+        for topic, publish in state.retained.items():
+            self._retained.set(topic, publish)
+        now = asyncio.get_running_loop().time()
+        for client_id, stored in state.sessions.items():
+            session = _new_broker_session()
+            session['_expiry'] = stored.expiry
+            session['_persisted'] = True
+            session['subscriptions'] = stored.subscriptions
+            for topic_filter, qos, opts in stored.subscriptions:
+                self._subscriptions.add(client_id, topic_filter, qos, opts)
+            for seq, publish in stored.queue:
+                session['outbound_queue'].append(_Held(
+                    publish=publish, qos=publish.qos, retain=publish.retain,
+                    seq=seq))
+                session['_queue_seq'] = seq
+            if stored.expiry != _EXPIRY_NEVER:
+                session['_expires_at'] = now + stored.expiry
+            self._sessions[client_id] = session
+        self._arm_expiry_timer()
 
     def close(self) -> None:
         """Release loop resources the actor owns outside its inbox.
@@ -294,6 +409,14 @@ class BrokerActor(Actor):
                                   msg.session_expiry_interval)
         elif isinstance(msg, _SweepExpired):
             self._sweep_expired()
+        elif isinstance(msg, _ReplayRetained):
+            self._replay_posted.discard(msg.sender)
+            await self._replay_retained(msg.sender)
+        elif isinstance(msg, _RemotePublish):
+            await self._route(msg.publish, shares=msg.shares)
+        elif isinstance(msg, _RemoteRetain):
+            for publish in msg.publishes:
+                self._store_retained(publish, replicate=False)
         else:  # pragma: no cover - connection actor sends only the above
             logger.debug('BrokerActor ignoring %s', type(msg).__name__)
 
@@ -322,16 +445,21 @@ class BrokerActor(Actor):
         # All 65535 identifiers are in flight — far past any conformant bound.
         raise RuntimeError('No free MQTT packet identifier (65535 in flight)')
 
-    def _store_retained(self, publish) -> bool:
+    def _store_retained(self, publish, *, replicate: bool = True) -> bool:
         """Store, update or delete a retained message.  ``False`` = refused.
 
         The return value is what lets the acknowledgement carry the truth:
         a refusal that only reaches the log leaves the publisher believing
-        its retained message is live.
+        its retained message is live.  In a cluster the change is copied to
+        every other worker's broker, unless it came from one (*replicate*).
         """
         # §3.3.2.3 — a zero-length retained payload deletes the retained message.
         if publish.payload == b'':
-            self._retained.pop(publish.topic, None)
+            if self._retained.pop(publish.topic, None) is not None:
+                if self._store is not None:
+                    self._store.delete_retained(publish.topic)
+                if replicate and self._cluster is not None:
+                    self._cluster.retain(publish)
             return True
         # The cap counts *topics*, so it only binds a topic that is not already
         # retained.  Updating and deleting stay available at the cap on
@@ -347,13 +475,47 @@ class BrokerActor(Actor):
                         scope_path=publish.topic,
                         protocol='mqtt')
             return False
-        self._retained[publish.topic] = publish
+        self._retained.set(publish.topic, publish)
+        if self._store is not None:
+            self._store.put_retained(publish)
+        if replicate and self._cluster is not None:
+            self._cluster.retain(publish)
         return True
 
     def _clear_pending(self, conn, bucket, packet_id) -> None:
         session = self._session_for(conn)
         if session is not None:
             session[bucket].pop(packet_id, None)
+            self._release_stored(conn, session, packet_id)
+
+    def _release_stored(self, conn, session, packet_id) -> None:
+        """Drop a queued message from the store once the client has it.
+
+        PUBACK (QoS 1) or PUBREC (QoS 2) is the point the client owns the
+        message; before it, a restarted broker must still send it.
+        """
+        stored = session.get('_stored')
+        seq = stored.pop(packet_id, None) if stored else None
+        if seq is not None and self._store is not None:
+            self._store.dequeue(self._client_by_conn[id(conn)], seq)
+
+    def _persist_session(self, client_id, session) -> None:
+        """Write *session*'s record, or delete it once it stops persisting.
+
+        Only a session that outlives its connection (Session Expiry
+        Interval > 0) is stored; one that ends with it has nothing for a
+        restart to restore.
+        """
+        store = self._store
+        if store is None:
+            return
+        if session['_expiry'] > 0:
+            store.put_session(client_id, session['_expiry'],
+                              session['subscriptions'])
+            session['_persisted'] = True
+        elif session.get('_persisted'):
+            store.delete_session(client_id)
+            session['_persisted'] = False
 
     # -- handlers -----------------------------------------------------------
 
@@ -429,6 +591,9 @@ class BrokerActor(Actor):
         expiry = connect.properties.get('session_expiry_interval', 0)
         session_present = False
         if connect.clean_start:
+            # §3.1.2.4 — Clean Start discards any existing session, and with
+            # it the routing entries its subscriptions own.
+            self._discard_session(client_id)
             session = _new_broker_session()
             session['_expiry'] = expiry
             self._sessions[client_id] = session
@@ -467,6 +632,10 @@ class BrokerActor(Actor):
             session['receive_maximum'] = declared
         session.setdefault('receive_maximum', 65535)
         session.setdefault('outbound_queue', deque())
+        self._persist_session(client_id, session)
+        # Its share groups have a connected member here again.
+        if self._cluster is not None:
+            self._cluster.shares_changed(s[0] for s in session['subscriptions'])
 
         await conn.send(Send(packet=MQTTConnack(
             session_present=session_present, reason_code=ReasonCode.SUCCESS,
@@ -474,8 +643,11 @@ class BrokerActor(Actor):
 
         # §4.4 — retransmit any unacknowledged outbound messages queued while
         # the client was offline (QoS 1 + QoS 2, with DUP set on PUBLISH frames).
+        # Then send what was published while it was away, as far as its
+        # Receive Maximum allows; acknowledgements release the rest.
         if session_present:
             await self._replay_pending(conn, session)
+            await self._drain_outbound(conn)
 
     async def _replay_pending(self, conn, session) -> None:
         """§4.4 — retransmit unacknowledged outbound messages on a
@@ -540,6 +712,8 @@ class BrokerActor(Actor):
             subs = [s for s in session['subscriptions'] if s[0] != topic_filter]
             subs.append((topic_filter, qos, opts))
             session['subscriptions'] = subs
+            self._subscriptions.add(
+                self._client_by_conn[id(conn)], topic_filter, qos, opts)
             reason_codes.append(qos)  # granted QoS == requested QoS
             # §3.3.1.3 Retain Handling — 0: send retained on every SUBSCRIBE;
             # 1: only when the subscription did not already exist; 2: never.
@@ -547,28 +721,88 @@ class BrokerActor(Actor):
             retain_handling = int(opts.get('retain_handling', 0))
             if share is None and retain_handling != 2 \
                     and not (retain_handling == 1 and existed):
-                await self._deliver_retained(conn, session, topic_filter, qos)
+                # Pinned to the index as it is now: anything retained later
+                # reaches the new subscription as a live publish instead.
+                session['_replay'].append(_Replay(self._retained.iter_match(
+                    topic_filter, upto=self._retained.serial), qos, topic_filter))
+        if self._cluster is not None:
+            self._cluster.shares_changed(f for f, _qos in subscribe.subscriptions)
+        self._persist_session(self._client_by_conn[id(conn)], session)
+        await self._replay_retained(conn)
         await conn.send(Send(packet=MQTTSuback(
             packet_id=subscribe.packet_id, reason_codes=reason_codes)))
 
-    async def _deliver_retained(self, conn, session, topic_filter, qos) -> None:
-        for topic, retained in list(self._retained.items()):
-            if topic_matches_filter(topic, topic_filter):
-                await self._deliver(conn, session, retained, qos, retain=True)
+    async def _replay_retained(self, conn) -> None:
+        """Send the next batch of a SUBSCRIBE's retained replay.
+
+        QoS 1/2 messages go only while the client's Receive Maximum window
+        has room; once it is full the replay waits, and the acknowledgement
+        that frees a slot resumes it from ``_drain_outbound``.  Either way
+        at most ``_REPLAY_BATCH`` go per turn.  A message that was replaced
+        or deleted since the SUBSCRIBE is skipped: its replacement was
+        routed to the new subscription as a live publish already.
+        """
+        session = self._session_for(conn)
+        if session is None:
+            return
+        replay = session['_replay']
+        limit = session.get('receive_maximum', 65535)
+        retained = self._retained
+        budget = _REPLAY_BATCH
+        while replay and budget:
+            entry = replay[0]
+            publish = entry.pending
+            if publish is None:
+                publish = next(entry.matches, None)
+                if publish is None:
+                    replay.popleft()
+                    continue
+            qos = min(publish.qos, entry.qos)
+            if qos and self._in_flight(session) >= limit:
+                entry.pending = publish
+                return
+            entry.pending = None
+            budget -= 1
+            if retained.get(publish.topic) is not publish:
+                continue
+            if qos == 0:
+                encoded = EncodedPublish(publish)
+                await conn.send(Send(packet=encoded.qos0_packet(True),
+                                     wire=encoded.wire(0, True)))
+            else:
+                await self._send_qos(conn, session, publish, qos, True)
+        if replay and conn not in self._replay_posted:
+            self._replay_posted.add(conn)
+            self._inbox.put_nowait(_ReplayRetained(sender=conn))
 
     def _prune_share_rotation(self, removed_filters) -> None:
         """§4.8.2 — drop rotation cursors for share groups that no session
         subscribes to any more, so the cursor dict cannot grow without bound
         as groups come and go."""
-        stale = {share for f in removed_filters
-                 if (share := _parse_share(f)) is not None}
-        if not stale:
-            return
-        for session in self._sessions.values():
-            for topic_filter, _qos, _opts in session['subscriptions']:
-                stale.discard(_parse_share(topic_filter))
-        for share in stale:
-            self._share_rotation.pop(share, None)
+        for topic_filter in removed_filters:
+            share = _parse_share(topic_filter)
+            if share is not None and not self._subscriptions.has_share(*share):
+                self._share_rotation.pop(share, None)
+
+    def _discard_session(self, client_id) -> dict[str, Any] | None:
+        """Drop *client_id*'s session and every routing entry it owns.
+
+        The one exit for session state — Clean Start, expiry, and a
+        zero-interval disconnect all come through here — so the index can
+        never route to a session the table no longer holds.
+        """
+        session = self._sessions.pop(client_id, None)
+        if session is None:
+            return None
+        if session.get('_persisted') and self._store is not None:
+            self._store.delete_session(client_id)
+        filters = [s[0] for s in session['subscriptions']]
+        for topic_filter in filters:
+            self._subscriptions.remove(client_id, topic_filter)
+        self._prune_share_rotation(filters)
+        if self._cluster is not None:
+            self._cluster.shares_changed(filters)
+        return session
 
     # -- session expiry (§3.1.2.11.2) ---------------------------------------
 
@@ -585,9 +819,8 @@ class BrokerActor(Actor):
         expired = [cid for cid, session in self._sessions.items()
                    if (at := session.get('_expires_at')) is not None and at <= now]
         for client_id in expired:
-            session = self._sessions.pop(client_id)
+            self._discard_session(client_id)
             logger.debug('MQTT session %r expired', client_id)
-            self._prune_share_rotation([s[0] for s in session['subscriptions']])
         self._arm_expiry_timer()
 
     def _arm_expiry_timer(self) -> None:
@@ -625,7 +858,19 @@ class BrokerActor(Actor):
         session['subscriptions'] = [
             s for s in session['subscriptions'] if s[0] not in topics
         ]
+        client_id = self._client_by_conn[id(conn)]
+        for topic_filter in topics:
+            self._subscriptions.remove(client_id, topic_filter)
         self._prune_share_rotation(topics)
+        if self._cluster is not None:
+            self._cluster.shares_changed(topics)
+        replay = session['_replay']
+        if replay:
+            # What is still to be replayed belongs to the subscription.
+            kept = [entry for entry in replay if entry.topic_filter not in topics]
+            replay.clear()
+            replay.extend(kept)
+        self._persist_session(client_id, session)
         await conn.send(Send(packet=MQTTUnsuback(
             packet_id=unsubscribe.packet_id,
             reason_codes=[ReasonCode.SUCCESS] * len(unsubscribe.topics))))
@@ -698,51 +943,80 @@ class BrokerActor(Actor):
             await conn.send(Send(packet=MQTTDisconnect(reason_code=reason)))
             await conn.send(Close(reason_code=reason))
 
-    async def _route(self, publish, source_conn=None) -> None:
-        """Deliver *publish* to every live client with a matching subscription.
+    async def _route(self, publish, source_conn=None, *,
+                     shares: frozenset | None = None) -> None:
+        """Deliver *publish* to every client with a matching subscription.
 
         *source_conn* is the connection that published (``None`` for a Will),
         used to honour the No Local subscription option (§3.8.3.1).
 
-        Non-shared subscriptions broadcast (one merged copy per client).
+        In a cluster the message is also forwarded to the workers whose
+        subscription summary matches it, and each share group is delivered
+        by exactly one worker.  *shares* is set for a message forwarded here:
+        only those groups are delivered, and nothing is forwarded again.
+
+        Non-shared subscriptions broadcast (one merged copy per client).  A
+        client whose session outlives its connection and is offline right
+        now gets a QoS 1/2 message queued in its session (§4.1), to be sent
+        when it reconnects; a QoS 0 message is not queued.
         Shared subscriptions (§4.8.2) are grouped by ``(ShareName, filter)``;
         each group receives exactly one copy per message, round-robin across
         its *connected* members — a member with a live session but no
         connection is skipped while any other member is connected (§4.8.2.3).
-        When no member is connected the message is not queued, matching the
-        broker's existing no-offline-queue behaviour for non-shared
-        subscriptions.
+        When no member is connected the message is not queued.
         """
+        # client_id -> [conn, session, granted, rap], in match order.
+        targets: dict[str, list] = {}
         share_groups: dict[tuple[str, str], list] = {}
-        for client_id, conn in list(self._clients.items()):
-            session = self._sessions.get(client_id)
-            if session is None:
-                continue
-            granted = None
-            rap = False
-            for topic_filter, qos, opts in session['subscriptions']:
-                if not topic_matches_filter(publish.topic, topic_filter):
-                    continue
-                share = _parse_share(topic_filter)
-                if share is not None:
-                    # §4.8.2 — an independent delivery channel: collect the
-                    # connected members; exactly-one delivery happens below.
-                    share_groups.setdefault(share, []).append(
-                        (conn, session, qos, opts))
-                    continue
+        clients, sessions = self._clients, self._sessions
+        for node in self._subscriptions.match(publish.topic):
+            for client_id, (qos, opts) in node.plain.items():
+                # None for an offline session: it is queued for, not sent to.
+                conn = clients.get(client_id)
                 # §3.8.3.1 No Local — do not echo a client's own message back to
                 # it on a subscription that set the No Local option.
-                if opts.get('no_local') and conn is source_conn:
+                if opts.get('no_local') and conn is not None and conn is source_conn:
                     continue
-                granted = qos if granted is None else max(granted, qos)
-                rap = rap or bool(opts.get('retain_as_published'))
-            if granted is None:
-                continue
+                target = targets.get(client_id)
+                if target is None:
+                    targets[client_id] = [conn, sessions[client_id], qos,
+                                          bool(opts.get('retain_as_published'))]
+                else:
+                    target[2] = max(target[2], qos)
+                    target[3] = target[3] or bool(opts.get('retain_as_published'))
+            for share_name, group in node.shared.items():
+                # §4.8.2 — an independent delivery channel: collect the
+                # connected members; exactly-one delivery happens below.
+                members = [(conn, sessions[client_id], qos, opts)
+                           for client_id, (qos, opts) in group.items()
+                           if (conn := clients.get(client_id)) is not None]
+                if members:
+                    share_groups[(share_name, node.topic_filter)] = members
+        if shares is not None:
+            share_groups = {share: members
+                            for share, members in share_groups.items()
+                            if share in shares}
+        elif self._cluster is not None:
+            share_groups = self._cluster.forward(publish, share_groups)
+        if not targets and not share_groups:
+            return
+        # Encoded once for the whole fan-out.  Every recipient gets the same
+        # topic, properties and payload bytes; only the fixed-header flags and
+        # the Packet Identifier are per recipient.
+        encoded = EncodedPublish(publish)
+        for client_id, (conn, session, granted, rap) in targets.items():
             # §3.3.1.3 Retain As Published — forward the publisher's RETAIN flag
             # only when a matching subscription requested it; otherwise a routed
             # (non-retained-replay) message always carries RETAIN=0.
+            retain = rap and publish.retain
+            if conn is None:
+                qos = min(publish.qos, granted)
+                if qos:
+                    self._enqueue_outbound(session, publish, qos, retain,
+                                           encoded, client_id=client_id)
+                continue
             await self._deliver(conn, session, publish, granted,
-                                retain=(rap and publish.retain))
+                                retain=retain, encoded=encoded)
         # §4.8.2 — exactly one copy per share group, rotating across the
         # members that are connected right now.  The cursor is normalised
         # against the current member count, so membership churn between
@@ -753,7 +1027,7 @@ class BrokerActor(Actor):
             conn, session, qos, opts = members[cursor]
             rap = bool(opts.get('retain_as_published'))
             await self._deliver(conn, session, publish, qos,
-                                retain=(rap and publish.retain))
+                                retain=(rap and publish.retain), encoded=encoded)
 
     def _connack_properties(self) -> dict[str, Any]:
         """§3.2.2.3 — state the limits, so a conforming client stays inside them.
@@ -791,24 +1065,33 @@ class BrokerActor(Actor):
         return len(session.get('pending_qos1_out') or {}) \
             + len(session.get('pending_qos2_out') or {})
 
-    async def _deliver(self, conn, session, publish, granted_qos, *, retain=False) -> None:
+    async def _deliver(self, conn, session, publish, granted_qos, *, retain=False,
+                       encoded=None) -> None:
+        """Send *publish* to one subscriber at the QoS both sides allow.
+
+        *encoded* is the fan-out's shared :class:`EncodedPublish`; without one
+        (a single retained-message delivery) one is built here.
+        """
         qos = min(publish.qos, granted_qos)
+        if encoded is None:
+            encoded = EncodedPublish(publish)
         if qos == 0:
             # §4.9 bounds QoS 1 and 2 only.  Throttling QoS 0 would invent a
             # rule the client never agreed to, and there is nothing to wait
             # for: an unacknowledged message cannot accumulate.
-            await conn.send(Send(packet=MQTTPublish(
-                topic=publish.topic, payload=publish.payload, qos=0,
-                retain=retain, properties=dict(publish.properties))))
+            await conn.send(Send(packet=encoded.qos0_packet(retain),
+                                 wire=encoded.wire(0, retain)))
             return
 
         if self._in_flight(session) >= session.get('receive_maximum', 65535):
-            self._enqueue_outbound(session, publish, qos, retain)
+            self._enqueue_outbound(session, publish, qos, retain, encoded,
+                                   client_id=self._client_by_conn.get(id(conn)))
             return
-        await self._send_qos(conn, session, publish, qos, retain)
+        await self._send_qos(conn, session, publish, qos, retain, encoded)
 
-    def _enqueue_outbound(self, session, publish, qos, retain) -> None:
-        """Hold a message the client's window has no room for.
+    def _enqueue_outbound(self, session, publish, qos, retain, encoded=None,
+                          *, client_id=None) -> None:
+        """Hold a message the client's window, or its absence, has no room for.
 
         The queue is the total the audit found missing, so it has its own
         bound.  At the bound the **newest** message is refused rather than
@@ -828,19 +1111,31 @@ class BrokerActor(Actor):
         # without a Packet Identifier (§3.3.2-2), and the identifier belongs to
         # the moment of sending — allocating one now would burn an id from a
         # 65535-wide space for a message that may wait indefinitely.
-        queue.append(_Held(publish=publish, qos=qos, retain=retain))
-
-    async def _send_qos(self, conn, session, publish, qos, retain) -> None:
+        seq = None
+        if self._store is not None and session.get('_persisted'):
+            seq = session['_queue_seq'] = session['_queue_seq'] + 1
+            self._store.enqueue(client_id, seq, publish, qos, retain)
+        queue.append(_Held(publish=publish, qos=qos, retain=retain,
+                           encoded=encoded, seq=seq))
+
+    async def _send_qos(self, conn, session, publish, qos, retain,
+                        encoded=None, seq=None) -> None:
         packet_id = self._alloc_pid(session)
+        if seq is not None:
+            session['_stored'][packet_id] = seq
+        # The properties dict is shared, not copied: packets are frozen and
+        # nothing downstream of the broker mutates one.
         out = MQTTPublish(
             topic=publish.topic, payload=publish.payload, qos=qos,
-            packet_id=packet_id, retain=retain, properties=dict(publish.properties))
+            packet_id=packet_id, retain=retain, properties=publish.properties)
         if qos == 1:
             session['pending_qos1_out'][packet_id] = out
         else:
             session['pending_qos2_out'][packet_id] = {
                 'state': _QOS2_OUT_PUBLISH_SENT, 'packet': out}
-        await conn.send(Send(packet=out))
+        if encoded is None:
+            encoded = EncodedPublish(publish)
+        await conn.send(Send(packet=out, wire=encoded.wire(qos, retain, packet_id)))
 
     async def _drain_outbound(self, conn) -> None:
         """Release held messages as acknowledgements free the window.
@@ -856,7 +1151,10 @@ class BrokerActor(Actor):
         limit = session.get('receive_maximum', 65535)
         while queue and self._in_flight(session) < limit:
             held = queue.popleft()
-            await self._send_qos(conn, session, held.publish, held.qos, held.retain)
+            await self._send_qos(conn, session, held.publish, held.qos,
+                                 held.retain, held.encoded, held.seq)
+        if session['_replay']:
+            await self._replay_retained(conn)
 
     async def _on_pubrel(self, conn, packet_id) -> None:
         await conn.send(Send(packet=MQTTPubcomp(
@@ -872,6 +1170,7 @@ class BrokerActor(Actor):
         if session is not None:
             # §4.3.3 — advance the outbound flow to await PUBCOMP; the PUBLISH is
             # now acknowledged so we no longer need to keep it for replay.
+            self._release_stored(conn, session, packet_id)
             entry = session['pending_qos2_out'].get(packet_id)
             if entry is not None:
                 entry['state'] = _QOS2_OUT_PUBREL_SENT
@@ -881,6 +1180,7 @@ class BrokerActor(Actor):
                     'state': _QOS2_OUT_PUBREL_SENT}
 
     async def _on_detach(self, conn, graceful, session_expiry_interval=None) -> None:
+        self._replay_posted.discard(conn)
         client_id = self._client_by_conn.pop(id(conn), None)
         if client_id is None:
             return
@@ -901,6 +1201,9 @@ class BrokerActor(Actor):
         session = self._sessions.get(client_id)
         if session is None:
             return
+        # Offline, its session no longer takes its share groups' messages.
+        if self._cluster is not None:
+            self._cluster.shares_changed(s[0] for s in session['subscriptions'])
         # §3.14.2.2.2 — DISCONNECT may carry its own Session Expiry Interval.
         # It may shorten what CONNECT declared but not lengthen it: raising a
         # zero interval is a Protocol Error there, and honouring it would let
@@ -910,15 +1213,15 @@ class BrokerActor(Actor):
         if session_expiry_interval is not None:
             if declared > 0:
                 declared = session['_expiry'] = session_expiry_interval
+                if declared > 0:
+                    self._persist_session(client_id, session)
             else:
                 logger.debug(
                     'MQTT %r sent a non-zero Session Expiry Interval in '
                     'DISCONNECT for a session that declared 0 — ignored '
                     '(§3.14.2.2.2 Protocol Error)', client_id)
         if declared <= 0:
-            self._sessions.pop(client_id, None)
-            self._prune_share_rotation(
-                [s[0] for s in session['subscriptions']])
+            self._discard_session(client_id)
             self._arm_expiry_timer()
             return
         # The session outlives the connection from here.  0xFFFFFFFF means it
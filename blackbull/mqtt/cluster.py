@@ -0,0 +1,382 @@
+"""Multi-worker MQTT — one broker per worker, sharded by client id.
+
+A :class:`~blackbull.mqtt.broker.BrokerActor` owns all of its state, so a
+pre-fork server used to run the broker in worker 0 only.  Cluster mode
+(``MQTTExtension(cluster=True)``) runs one in every worker instead, and
+links them over the :mod:`blackbull.server.bus` socket pairs:
+
+* **Sessions are sharded.**  Every worker accepts MQTT connections.  The
+  worker that accepted one reads up to the CONNECT, and if the client id
+  hashes to another worker (:func:`owner_of`) hands the socket and the
+  bytes read so far to that worker.  A client id therefore always lands on
+  the same broker, which is all session resumption and takeover need: they
+  happen there exactly as they do with one worker.
+* **Subscriptions are summarised.**  Each worker tells the others which
+  filters its sessions hold — a filter's first subscriber adds it, its last
+  removes it — and keeps the others' summaries in one
+  :class:`~blackbull.mqtt.topic_index.SubscriptionIndex` per peer.  A share
+  group is summarised only while one of its members is connected here: an
+  offline member's session is not delivered shared messages, so a worker
+  holding no one else would drop the group's copy.
+* **PUBLISH goes where it matches.**  After routing a message to its own
+  clients a broker forwards it to each worker whose summary matches the
+  topic, encoded once.  Each share group gets exactly one copy: the
+  publishing worker picks, round-robin, one of the workers that hold
+  members, and only that worker delivers to the group.
+* **Retained messages are copied everywhere**, so a SUBSCRIBE replays them
+  locally.  A worker that restarts asks its neighbour for a copy.
+
+The bus is best-effort, and so is this: a worker that is not reading loses
+what was forwarded to it, and a message whose encoding exceeds
+:data:`~blackbull.server.bus.MAX_PAYLOAD` is delivered on its own worker
+only.  TLS connections cannot be handed over — the TLS session lives in the
+accepting process — so they are served where they landed.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import struct
+import zlib
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from typing import Any
+
+from ..server import bus
+from ..server.conn_id import new_connection_id
+from ..server.protocol_registry import ProtocolContext
+from ..server.recipient import AbstractReader, AsyncioReader, PrefixReader
+from ..server.sender import AbstractWriter, AsyncioWriter
+from .broker import BrokerActor, _RemotePublish, _RemoteRetain
+from .messages import IncompletePacket, MQTTConnect, MQTTDecodeError, decode_packet
+from .store import _decode_message, _encode_message
+from .topic_index import SubscriptionIndex, split_share
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['ClusterLink', 'owner_of']
+
+#: Bus channel for summaries, forwarded PUBLISHes and retained copies.
+CHANNEL = 'blackbull.mqtt.cluster'
+#: Bus channel a connection's socket is handed over on.
+HANDOFF_CHANNEL = 'blackbull.mqtt.handoff'
+
+# Every record starts with an operation and the sending worker's id.
+_RECORD = struct.Struct('>BB')
+_ADD = 0          # body: filters, NUL-separated (U+0000 is illegal in one)
+_REMOVE = 1       # body: as _ADD
+_RESET = 2        # body: empty — forget the sender's summary
+_HELLO = 3        # body: empty — the sender (re)started
+_PUBLISH = 4      # body: share count, shares, then one encoded message
+_RETAIN = 5       # body: length-prefixed encoded messages
+_COUNT = struct.Struct('>H')
+_LENGTH = struct.Struct('>I')
+
+_READ_CHUNK = 4096
+# Summary and retained syncs are split into records of about this size.
+_SYNC_BYTES = 32 * 1024
+_PEER = '.'       # the client id a peer's filters are filed under
+
+
+def owner_of(client_id: str, workers: int) -> int:
+    """The worker whose broker holds *client_id*'s session."""
+    return zlib.crc32(client_id.encode('utf-8')) % workers
+
+
+class ClusterLink:
+    """This worker's end of a clustered broker.
+
+    Created and attached in the worker, once the bus is: ``attach`` points
+    the broker at it, and from then on :meth:`serve` is the MQTT
+    connection handler.  *serve* is what serves a connection this worker
+    keeps — ``(reader, writer, ctx) -> None``, as for any raw protocol.
+    """
+
+    def __init__(self, broker: BrokerActor, worker_bus: bus.WorkerBus,
+                 serve: Callable[[AbstractReader, AbstractWriter,
+                                  ProtocolContext], Awaitable[None]]) -> None:
+        if worker_bus.worker_id is None:
+            raise RuntimeError('the worker bus is not attached')
+        self.worker_id = worker_bus.worker_id
+        self.workers = worker_bus.workers
+        self._broker = broker
+        self._serve = serve
+        # Each peer's summary, with every filter filed under one client id.
+        self._peers = {worker: SubscriptionIndex()
+                       for worker in range(self.workers)
+                       if worker != self.worker_id}
+        # Share group -> round-robin cursor over the workers holding it.
+        self._rotation: dict[tuple[str, str], int] = {}
+        # The ``$share/...`` filters told to the peers: the groups with a
+        # member connected here.
+        self._live_shares: set[str] = set()
+        self._detach: list[Callable[[], None]] = []
+        self._adopting: set[asyncio.Task] = set()
+        #: PUBLISH records sent to other workers, and connections handed over.
+        self.forwarded = 0
+        self.handed_off = 0
+
+    def __repr__(self) -> str:
+        return f'<ClusterLink worker={self.worker_id}/{self.workers}>'
+
+    def attach(self) -> None:
+        """Start exchanging summaries and accepting handed-over connections."""
+        self._broker._cluster = self
+        self._broker._subscriptions.on_change = self._on_summary_change
+        self._detach = [bus.subscribe(CHANNEL, self._on_record),
+                        bus.accept_sockets(HANDOFF_CHANNEL, self._on_socket)]
+        self._live_shares = {
+            topic_filter
+            for topic_filter in self._broker._subscriptions.filters()
+            if self._share_live(topic_filter)}
+        # Sessions restored from a store already hold filters; the peers
+        # learn them now.  HELLO asks them for theirs in return.
+        self._send_summary(None)
+        self._send(_HELLO, b'')
+
+    def detach(self) -> None:
+        self._broker._subscriptions.on_change = None
+        self._broker._cluster = None
+        for undo in self._detach:
+            undo()
+        self._detach = []
+        for task in self._adopting:
+            task.cancel()
+
+    # ---- connections -----------------------------------------------------
+
+    async def serve(self, reader: AbstractReader, writer: AbstractWriter,
+                    ctx: ProtocolContext) -> None:
+        """Serve an accepted connection, or hand it to its owning worker."""
+        consumed = bytearray()
+        connect = None
+        while len(consumed) <= bus.MAX_PAYLOAD:
+            try:
+                connect = decode_packet(bytes(consumed))
+                break
+            except IncompletePacket:
+                pass
+            except (MQTTDecodeError, ValueError):
+                break       # the broker's own read loop answers junk
+            data = await reader.read(_READ_CHUNK)
+            if not data:
+                break
+            consumed += data
+        if isinstance(connect, MQTTConnect) and connect.client_id:
+            owner = owner_of(connect.client_id, self.workers)
+            if owner != self.worker_id and \
+                    await self._hand_off(owner, consumed, reader, writer):
+                return
+        await self._serve(PrefixReader(bytes(consumed), reader), writer, ctx)
+
+    async def _hand_off(self, owner: int, consumed: bytearray,
+                        reader: AbstractReader, writer: AbstractWriter) -> bool:
+        # Everything this process has read must travel with the socket: what
+        # stays behind in a buffer is lost to the new owner.
+        while (buffered := reader.buffered_len()):
+            consumed += await reader.read(buffered)
+        if len(consumed) > bus.MAX_PAYLOAD:
+            return False
+        try:
+            sock = writer.detach_socket()
+        except NotImplementedError:
+            return False
+        try:
+            bus.send_socket(owner, HANDOFF_CHANNEL, bytes(consumed), sock)
+        except OSError as exc:
+            # Reading is already paused, so the connection cannot be served
+            # here either; the client reconnects and lands somewhere anew.
+            logger.warning('mqtt cluster: could not hand a connection to '
+                           'worker %d (%r); closing it', owner, exc)
+        else:
+            self.handed_off += 1
+        finally:
+            sock.close()
+        return True
+
+    def _on_socket(self, channel: str, consumed: bytes, sock) -> None:
+        task = asyncio.get_running_loop().create_task(
+            self._adopt(consumed, sock))
+        self._adopting.add(task)
+        task.add_done_callback(self._adopting.discard)
+
+    async def _adopt(self, consumed: bytes, sock) -> None:
+        try:
+            sock.setblocking(False)
+            stream_reader, stream_writer = await asyncio.open_connection(sock=sock)
+        except OSError:
+            sock.close()
+            return
+        writer = AsyncioWriter(stream_writer)
+        ctx = ProtocolContext(
+            peername=stream_writer.get_extra_info('peername'),
+            sockname=stream_writer.get_extra_info('sockname'),
+            ssl=False, aggregator=None, connection_id=new_connection_id(),
+            protocol='mqtt')
+        try:
+            await self._serve(
+                PrefixReader(consumed, AsyncioReader(stream_reader)), writer, ctx)
+        finally:
+            await writer.close()
+
+    # ---- routing ---------------------------------------------------------
+
+    def forward(self, publish, local_shares: dict[tuple[str, str], Any]
+                ) -> dict[tuple[str, str], Any]:
+        """Forward *publish* to the workers it matches; called by ``_route``.
+
+        *local_shares* are the share groups with members connected here.
+        Returns the ones this worker is to deliver.
+        """
+        plain: set[int] = set()
+        holders: dict[tuple[str, str], list[int]] = {
+            share: [self.worker_id] for share in local_shares}
+        for worker, index in self._peers.items():
+            for node in index.match(publish.topic):
+                if node.plain:
+                    plain.add(worker)
+                for share_name in node.shared:
+                    holders.setdefault((share_name, node.topic_filter),
+                                       []).append(worker)
+        keep = {}
+        assigned: dict[int, list[tuple[str, str]]] = {}
+        for share, workers in holders.items():
+            cursor = self._rotation.get(share, 0)
+            self._rotation[share] = cursor + 1
+            chosen = workers[cursor % len(workers)]
+            if chosen == self.worker_id:
+                keep[share] = local_shares[share]
+            else:
+                assigned.setdefault(chosen, []).append(share)
+        targets = plain | assigned.keys()
+        if not targets:
+            return keep
+        message = _encode_message(publish, publish.qos, bool(publish.retain))
+        for worker in targets:
+            shares = assigned.get(worker, ())
+            parts = [_COUNT.pack(len(shares))]
+            for share_name, topic_filter in shares:
+                key = f'{share_name}/{topic_filter}'.encode('utf-8')
+                parts += (_COUNT.pack(len(key)), key)
+            parts.append(message)
+            if self._send(_PUBLISH, b''.join(parts), (worker,)):
+                self.forwarded += 1
+        return keep
+
+    def shares_changed(self, filters: Iterable[str]) -> None:
+        """Tell the peers about each share group in *filters* that gained its
+        first connected member here or lost its last; called by the broker
+        wherever a member connects, leaves, subscribes or unsubscribes.
+        """
+        for topic_filter in filters:
+            if not topic_filter.startswith('$share/'):
+                continue
+            live = self._share_live(topic_filter)
+            if live == (topic_filter in self._live_shares):
+                continue
+            if live:
+                self._live_shares.add(topic_filter)
+            else:
+                self._live_shares.discard(topic_filter)
+            self._send(_ADD if live else _REMOVE, topic_filter.encode('utf-8'))
+
+    def _share_live(self, topic_filter: str) -> bool:
+        share, filter_ = split_share(topic_filter)
+        if share is None:
+            return False
+        clients = self._broker._clients
+        return any(client_id in clients for client_id
+                   in self._broker._subscriptions.share_members(share, filter_))
+
+    def retain(self, publish) -> None:
+        """Copy a retained message (or its deletion) to every other worker."""
+        message = _encode_message(publish, publish.qos, True)
+        self._send(_RETAIN, _LENGTH.pack(len(message)) + message)
+
+    # ---- the wire --------------------------------------------------------
+
+    def _send(self, op: int, body: bytes, workers=None) -> bool:
+        payload = _RECORD.pack(op, self.worker_id) + body
+        try:
+            bus.publish(CHANNEL, payload, local=False, workers=workers)
+        except ValueError:
+            logger.debug('mqtt cluster: %d-byte record does not fit the bus; '
+                         'not sent', len(payload))
+            return False
+        return True
+
+    def _send_summary(self, workers) -> None:
+        self._send(_RESET, b'', workers)
+        for chunk in _chunks(f.encode('utf-8')
+                             for f in self._broker._subscriptions.filters()
+                             if not f.startswith('$share/')
+                             or f in self._live_shares):
+            self._send(_ADD, b'\0'.join(chunk), workers)
+
+    def _send_retained(self, worker: int) -> None:
+        messages = (_encode_message(p, p.qos, True)
+                    for _topic, p in self._broker._retained.items())
+        for chunk in _chunks(messages):
+            self._send(_RETAIN, b''.join(_LENGTH.pack(len(m)) + m for m in chunk),
+                       (worker,))
+
+    def _on_summary_change(self, added: bool, topic_filter: str) -> None:
+        # Share groups follow their connected members (``shares_changed``).
+        if topic_filter.startswith('$share/'):
+            return
+        self._send(_ADD if added else _REMOVE, topic_filter.encode('utf-8'))
+
+    def _on_record(self, channel: str, payload: bytes) -> None:
+        op, origin = _RECORD.unpack_from(payload)
+        body = payload[_RECORD.size:]
+        index = self._peers.get(origin)
+        if index is None:
+            return
+        if op == _ADD:
+            for topic_filter in body.decode('utf-8').split('\0'):
+                index.add(_PEER, topic_filter, 0, {})
+        elif op == _REMOVE:
+            index.remove(_PEER, body.decode('utf-8'))
+        elif op == _RESET:
+            self._peers[origin] = SubscriptionIndex()
+        elif op == _HELLO:
+            # The sender is new: whatever it had before is gone.
+            self._peers[origin] = SubscriptionIndex()
+            self._send_summary((origin,))
+            if (origin + 1) % self.workers == self.worker_id:
+                self._send_retained(origin)
+        elif op == _PUBLISH:
+            (count,) = _COUNT.unpack_from(body)
+            pos = _COUNT.size
+            shares = set()
+            for _ in range(count):
+                (size,) = _COUNT.unpack_from(body, pos)
+                pos += _COUNT.size
+                share_name, topic_filter = split_share(
+                    '$share/' + body[pos:pos + size].decode('utf-8'))
+                shares.add((share_name, topic_filter))
+                pos += size
+            self._broker._inbox.put_nowait(_RemotePublish(
+                publish=_decode_message(body[pos:]), shares=frozenset(shares)))
+        elif op == _RETAIN:
+            publishes = []
+            pos = 0
+            while pos < len(body):
+                (size,) = _LENGTH.unpack_from(body, pos)
+                pos += _LENGTH.size
+                publishes.append(_decode_message(body[pos:pos + size]))
+                pos += size
+            self._broker._inbox.put_nowait(_RemoteRetain(publishes=publishes))
+
+
+def _chunks(items: Iterable[bytes]) -> Iterator[list[bytes]]:
+    """Group byte strings into lists of about :data:`_SYNC_BYTES` each."""
+    chunk: list[bytes] = []
+    size = 0
+    for item in items:
+        if chunk and size + len(item) > _SYNC_BYTES:
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(item)
+        size += len(item) + 1
+    if chunk:
+        yield chunk
@@ -20,7 +20,7 @@ from collections.abc import Iterator
 from ..actor import Actor, Message as ActorMessage
 from ..server.protocol_registry import ProtocolContext
 from ..server.recipient import AbstractReader
-from ..server.sender import AbstractWriter
+from ..server.sender import _VECTORED_JOIN_THRESHOLD, AbstractWriter
 from .broker import (
     BrokerActor, Attach, ClientSubscribe, ClientUnsubscribe, ClientPublish,
     ClientPuback, ClientPubrec, ClientPubrel, ClientPubcomp, Detach, Send, Close,
@@ -206,13 +206,28 @@ class MQTT5Actor(Actor):
     async def _handle(self, msg: ActorMessage) -> None:
         if isinstance(msg, Send):
             try:
-                await self._writer.write(encode_packet(msg.packet))
+                await self._write(msg)
             except Exception:  # pragma: no cover - peer vanished mid-write
                 logger.debug('MQTT write failed', exc_info=True)
                 self._done = True
         elif isinstance(msg, Close):
             self._done = True
 
+    async def _write(self, msg: Send) -> None:
+        wire = msg.wire
+        if wire is None:
+            await self._writer.write(encode_packet(msg.packet))
+        elif len(wire) == 1:
+            await self._writer.write(wire[0])
+        elif sum(map(len, wire)) <= _VECTORED_JOIN_THRESHOLD:
+            # The join-vs-vectored gate of ``BaseSender._write_many``: below
+            # it one small copy is cheaper than a scatter-gather send.
+            await self._writer.write(b''.join(wire))
+        else:
+            # A fanned-out QoS 1/2 PUBLISH: a per-recipient head and the
+            # payload every recipient shares, sent without joining them.
+            await self._writer.writelines(wire)
+
     # -- reader task --------------------------------------------------------
 
     async def read_loop(self, reader: AbstractReader) -> None:
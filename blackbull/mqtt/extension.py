@@ -4,12 +4,16 @@ from __future__ import annotations
 import asyncio
 import contextlib
 import logging
+import os
 from typing import Any, Callable, Iterator, NamedTuple
 
 from ..extension import Extension
 from ..server.protocol_registry import ProtocolDetector
+from ..server import bus
 from .broker import BrokerActor
+from .cluster import ClusterLink
 from .connection import serve_connection
+from .store import BrokerStore
 from .tap import TapActor, compile_tap
 
 logger = logging.getLogger(__name__)
@@ -73,25 +77,52 @@ class MQTTExtension(Extension):
     and exists mainly so ``bench/mqtt/tap_throughput.py`` can compare the two on
     one build.  ``tap_queue_size`` bounds the actor-mode inbox (drop-newest on
     overflow).
+
+    ``store_dir`` makes the broker's state durable: retained messages,
+    persistent sessions and their queued messages are logged to that
+    directory (see :class:`~blackbull.mqtt.store.BrokerStore`) and recovered
+    on startup, before the broker serves a client.  Without it the state is
+    in memory only.  Under a multi-worker server only the worker that owns
+    the MQTT listener (worker 0) opens the store; the others never serve an
+    MQTT client, and a second writer would corrupt the log.
+
+    ``cluster=True`` runs a broker in every worker of a multi-worker server
+    instead of in worker 0 alone: each worker accepts MQTT connections,
+    sessions are sharded across the workers by client id, and the brokers
+    forward PUBLISHes to each other (see :mod:`blackbull.mqtt.cluster`).  With
+    ``store_dir`` each worker keeps its own store, in ``worker-{n}`` under it.
+    With one worker it changes nothing.  It cannot be combined with ``tls``,
+    because a TLS connection cannot be handed to another worker.
     """
 
     extension_key = 'mqtt'
 
     def __init__(self, *, port: int = 1883, tls: bool = False,
-                 tap_mode: str = 'actor', tap_queue_size: int = 1024) -> None:
+                 tap_mode: str = 'actor', tap_queue_size: int = 1024,
+                 store_dir: str | None = None, cluster: bool = False) -> None:
         if tap_mode not in ('actor', 'inline'):
             raise ValueError(f"tap_mode must be 'actor' or 'inline', got {tap_mode!r}")
+        if cluster and tls:
+            raise ValueError('cluster=True cannot be combined with tls=True: '
+                             'a TLS connection cannot change workers')
         self.port = port
         # Serve the broker port over TLS (mqtts://, conventionally
         # port 8883).  Requires the server to have a certificate configured.
         self.tls = tls
         self.tap_mode = tap_mode
         self.tap_queue_size = tap_queue_size
+        self.cluster = cluster
         self._handlers: list[Any] = []   # compiled Tap objects
-        self._broker = BrokerActor()
+        # Opened in ``startup``, not here: under pre-fork workers the store
+        # belongs to the process that runs the broker, not to the master —
+        # worker 0, or every worker (each in its own directory) in cluster
+        # mode.
+        self._store = BrokerStore(store_dir) if store_dir is not None else None
+        self._broker = BrokerActor(store=self._store)
         self._tap = TapActor(self._handlers, queue_size=tap_queue_size)
         self._broker_task = None
         self._tap_task = None
+        self._link: ClusterLink | None = None
 
     def on_message(self, topic: str = '#'):
         """Decorator: register an async ``(message, **captures) -> None`` tap for
@@ -122,24 +153,55 @@ class MQTTExtension(Extension):
         tap = self._tap if self.tap_mode == 'actor' else None
         inline = None if self.tap_mode == 'actor' else self._handlers
 
-        async def _serve(reader, writer, ctx):
+        async def _serve_here(reader, writer, ctx):
             await serve_connection(reader, writer, ctx, broker,
                                    app_handlers=inline, tap=tap)
 
+        async def _serve(reader, writer, ctx):
+            # Cluster mode once the worker has its link; until then, and
+            # with one worker, every connection is this broker's.
+            if self._link is not None:
+                await self._link.serve(reader, writer, ctx)
+            else:
+                await _serve_here(reader, writer, ctx)
+
+        self._serve_here = _serve_here
         app.register_protocol_handler(
             'mqtt', _serve, detector=MQTTProtocolDetector(), port=self.port,
-            tls=self.tls)
+            tls=self.tls, all_workers=self.cluster)
         self._register(app)
 
     async def startup(self, app: Any) -> None:
         """Start the broker (and, in actor mode, the tap) inbox loops."""
         if self._broker_task is None:
+            attached = bus.attached()
+            worker_bus = attached if self.cluster else None
+            if worker_bus is not None and self._store is not None:
+                # One store per worker: each holds its own shard of sessions.
+                self._store.directory = os.path.join(
+                    self._store.directory, f'worker-{worker_bus.worker_id}')
+            elif attached is not None and attached.worker_id != 0:
+                # The MQTT listener is worker 0's alone, and so is the store:
+                # this broker never sees a client.
+                self._store = self._broker._store = None
+            if self._store is not None:
+                # Recovery reads the whole log; keep it off the event loop.
+                state = await asyncio.get_running_loop().run_in_executor(
+                    None, self._store.load)
+                self._broker.restore(state)
             self._broker_task = asyncio.create_task(self._broker.run())
+            if worker_bus is not None:
+                self._link = ClusterLink(self._broker, worker_bus,
+                                         self._serve_here)
+                self._link.attach()
         if self.tap_mode == 'actor' and self._tap_task is None:
             self._tap_task = asyncio.create_task(self._tap.run())
 
     async def shutdown(self, app: Any) -> None:
         """Stop the broker and tap actors on lifespan shutdown."""
+        if self._link is not None:
+            self._link.detach()
+            self._link = None
         for attr in ('_broker_task', '_tap_task'):
             task = getattr(self, attr)
             if task is not None:
@@ -149,3 +211,5 @@ class MQTTExtension(Extension):
                 setattr(self, attr, None)
         # Cancelling the task does not reach what the actor armed on the loop.
         self._broker.close()
+        if self._store is not None:
+            self._store.close()
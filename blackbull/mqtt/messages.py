@@ -857,6 +857,80 @@ def encode_packet(message: MQTTMessage) -> bytes:
     return encoder(message)
 
 
+class EncodedPublish:
+    """One PUBLISH encoded once for every subscriber it fans out to.
+
+    The broker forwards the same topic, properties and payload to every
+    matching subscriber; only QoS, RETAIN, DUP and the Packet Identifier
+    vary per recipient.  Encoding through :func:`encode_packet` per
+    recipient rebuilds and copies the whole packet each time, payload
+    included.  This class keeps the shared part as a single buffer:
+
+    * **QoS 0** — the packet is identical for every recipient with the same
+      RETAIN flag, so :meth:`wire` returns one immutable ``bytes`` per
+      flag, built on first use.  :meth:`qos0_packet` is the matching
+      ``MQTTPublish``, likewise shared.
+    * **QoS 1 / 2** — the Packet Identifier sits between the topic and the
+      properties, so :meth:`wire` returns ``(head, tail)``.  ``head`` is the
+      fixed header, the topic and the identifier: a few bytes per
+      recipient.  ``tail`` is a ``memoryview`` over the properties and
+      payload, shared by every recipient and meant for vectored I/O.
+
+    ``b''.join(encoded.wire(...))`` is byte-for-byte what
+    :func:`encode_packet` produces for the equivalent ``MQTTPublish``.
+    """
+
+    __slots__ = ('publish', '_topic', '_tail', '_prefixes', '_qos0')
+
+    def __init__(self, publish: MQTTPublish) -> None:
+        self.publish = publish
+        self._topic = _encode_utf8(publish.topic)
+        self._tail = memoryview(
+            encode_properties(publish.properties) + publish.payload)
+        # (qos, retain, dup) -> fixed header + topic, up to the Packet Identifier.
+        self._prefixes: dict[tuple[int, bool, bool], bytes] = {}
+        # retain -> (MQTTPublish, wire bytes) for QoS 0.
+        self._qos0: dict[bool, tuple[MQTTPublish, bytes]] = {}
+
+    def _prefix(self, qos: int, retain: bool, dup: bool) -> bytes:
+        key = (qos, retain, dup)
+        prefix = self._prefixes.get(key)
+        if prefix is None:
+            first = (int(MQTTPacketType.PUBLISH) << 4) \
+                | ((qos & PUBLISH_QOS_MASK) << PUBLISH_QOS_SHIFT)
+            if dup:
+                first |= PublishFlagBits.DUP
+            if retain:
+                first |= PublishFlagBits.RETAIN
+            remaining = len(self._topic) + (2 if qos else 0) + len(self._tail)
+            prefix = self._prefixes[key] = (
+                bytes([first]) + encode_variable_byte_integer(remaining)
+                + self._topic)
+        return prefix
+
+    def qos0_packet(self, retain: bool) -> MQTTPublish:
+        """The ``MQTTPublish`` every QoS 0 recipient with *retain* is sent."""
+        return self._qos0_entry(retain)[0]
+
+    def _qos0_entry(self, retain: bool) -> tuple[MQTTPublish, bytes]:
+        entry = self._qos0.get(retain)
+        if entry is None:
+            p = self.publish
+            packet = MQTTPublish(topic=p.topic, payload=p.payload, qos=0,
+                                 retain=retain, properties=p.properties)
+            entry = self._qos0[retain] = (
+                packet, self._prefix(0, retain, False) + self._tail)
+        return entry
+
+    def wire(self, qos: int, retain: bool, packet_id: int | None = None,
+             dup: bool = False) -> tuple[bytes, ...]:
+        """The packet as byte segments, for ``write`` or ``writelines``."""
+        if qos == 0:
+            return (self._qos0_entry(retain)[1],)
+        head = self._prefix(qos, retain, dup) + int(packet_id).to_bytes(2, 'big')
+        return head, self._tail
+
+
 # ===========================================================================
 # Decoder
 # ===========================================================================
@@ -0,0 +1,480 @@
+"""Durable broker state: an append-only segment log with compacted snapshots.
+
+:class:`BrokerStore` is optional.  Without it the broker keeps everything in
+memory, and a restart, or a worker-0 respawn, starts empty.  With it the
+:class:`~blackbull.mqtt.broker.BrokerActor` writes through every change to
+the state a restart must keep:
+
+* retained messages, one per topic;
+* persistent sessions (Session Expiry Interval > 0) and their
+  subscriptions;
+* each persistent session's queue of QoS 1/2 messages not yet acknowledged
+  by the client, including those published while it was offline.
+
+On disk a store is a directory::
+
+    0000000000000007.log          segments, appended in order
+    0000000000000008.log
+    snapshot-0000000000000006.snap   the live state as of segment 6
+
+Every change is one **record**: a CRC-32, a length, and a body naming an
+operation (put or delete) and a key.  A put carries the key's whole new
+value, so a key's last record in log order is its state.  Records are not
+written one at a time.  They collect for ``commit_interval`` seconds and go
+to the current segment in one ``write``.  An ``fsync`` follows on the
+store's I/O thread, so a burst of publishes costs one ``fsync``, not one
+each: this is a group commit.  A crash loses at most the changes of the last
+commit interval plus one ``fsync``.
+
+**Compaction** keeps the log from growing without bound.  The store keeps
+the latest record of every live key in memory.  Once the segments written
+since the last snapshot reach ``compact_ratio`` times the live state (and at
+least ``compact_min_bytes``), it starts a new segment and writes those
+records, and nothing else, to a new snapshot on a second thread.  Then it
+deletes the segments the snapshot covers.  Each live byte is rewritten at
+most once per ``compact_ratio`` bytes of log, so the write amplification is
+bounded by ``1 + 1 / compact_ratio`` whatever the publish rate.
+
+**Recovery** (:meth:`BrokerStore.load`) maps the newest snapshot and every
+later segment read-only with ``mmap`` and replays the records in one pass.
+A torn record at the end of the last segment, left by a crash mid-write,
+fails its CRC.  The store stops there and truncates the segment.  Writing
+resumes in a fresh segment, so a file is never appended to after a restart.
+
+The in-memory copy of the live records is the price of snapshots that never
+stop the event loop.  It is about the size of the persisted state: retained
+payloads, subscriptions and queued messages.
+"""
+from __future__ import annotations
+
+import asyncio
+import gc
+import json
+import logging
+import mmap
+import os
+import struct
+import zlib
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, NamedTuple
+
+from .messages import MQTTPublish, decode_properties, encode_properties
+
+logger = logging.getLogger(__name__)
+
+# Record header: CRC-32 of the body, then the body's length.
+_RECORD = struct.Struct('>II')
+# Record body: operation, key kind, key length; then the key and the value.
+_BODY = struct.Struct('>BBH')
+_SEQ = struct.Struct('>Q')
+
+_PUT = 1
+_DELETE = 2
+
+_RETAINED = ord('R')
+_SESSION = ord('S')
+_QUEUED = ord('Q')
+
+# A stored message: flags byte and topic length, then the topic, the
+# properties block and the payload.
+_MESSAGE = struct.Struct('>BH')
+_QOS_MASK = 0x03
+_RETAIN_BIT = 0x04
+_NO_PROPERTIES = b'\x00'
+
+_SNAPSHOT_MAGIC = b'BBMQSNAP\x01'
+_SEGMENT_SUFFIX = '.log'
+_SNAPSHOT_PREFIX = 'snapshot-'
+_SNAPSHOT_SUFFIX = '.snap'
+
+
+class StoredSession(NamedTuple):
+    """One persistent session as :meth:`BrokerStore.load` recovered it."""
+    expiry: int
+    #: ``(filter, qos, options)`` — the broker's own subscription tuples.
+    subscriptions: list[tuple[str, int, dict[str, Any]]]
+    #: ``(seq, publish)`` in queue order.  ``publish.qos`` and
+    #: ``publish.retain`` are the delivery's, not the original publisher's.
+    queue: list[tuple[int, MQTTPublish]]
+
+
+class StoredState(NamedTuple):
+    """Everything :meth:`BrokerStore.load` recovered."""
+    retained: dict[str, MQTTPublish]
+    sessions: dict[str, StoredSession]
+
+
+def _encode_message(publish: MQTTPublish, qos: int, retain: bool) -> bytes:
+    flags = (qos & _QOS_MASK) | (_RETAIN_BIT if retain else 0)
+    topic = publish.topic.encode('utf-8')
+    properties = (encode_properties(publish.properties) if publish.properties
+                  else _NO_PROPERTIES)
+    return b''.join((_MESSAGE.pack(flags, len(topic)), topic, properties,
+                     publish.payload))
+
+
+def _decode_message(value: bytes) -> MQTTPublish:
+    flags, topic_len = _MESSAGE.unpack_from(value)
+    pos = _MESSAGE.size + topic_len
+    topic = value[_MESSAGE.size:pos].decode('utf-8')
+    if value[pos] == 0:          # the common case: no properties
+        properties: dict[str, Any] = {}
+        pos += 1
+    else:
+        properties, consumed = decode_properties(value, pos)
+        pos += consumed
+    qos = flags & _QOS_MASK
+    # Built without ``__init__``: the record was a valid ``MQTTPublish`` when
+    # it was written, and at a million retained topics the validation in
+    # ``__post_init__`` and the frozen ``__setattr__`` path are most of the
+    # cost of recovery.  Packet Identifier 1 is a placeholder, as for a Will:
+    # the real one is allocated per recipient when the message is sent.
+    publish = object.__new__(MQTTPublish)
+    publish.__dict__.update(
+        topic=topic, payload=value[pos:], qos=qos,
+        packet_id=1 if qos else None, retain=bool(flags & _RETAIN_BIT),
+        dup=False, properties=properties)
+    return publish
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+class BrokerStore:
+    """Persist broker state in *directory*; see the module docstring.
+
+    Construction touches nothing on disk.  :meth:`load` opens the directory
+    (creating it if needed), recovers the state, and must be called before
+    any write.  Writes are made from the event loop, by the broker.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], *,
+                 commit_interval: float = 0.005,
+                 fsync: bool = True,
+                 segment_bytes: int = 64 * 1024 * 1024,
+                 compact_ratio: float = 2.0,
+                 compact_min_bytes: int = 16 * 1024 * 1024) -> None:
+        if compact_ratio <= 0:
+            raise ValueError(f'compact_ratio must be > 0, got {compact_ratio}')
+        self.directory = os.fspath(directory)
+        self._commit_interval = commit_interval
+        self._fsync = fsync
+        self._segment_limit = segment_bytes
+        self._compact_ratio = compact_ratio
+        self._compact_min = compact_min_bytes
+        # Latest put record per live key, and the keys of each session's queue.
+        self._live: dict[bytes, bytes] = {}
+        self._live_bytes = 0
+        self._queued: dict[str, set[bytes]] = {}
+        self._fd: int | None = None
+        self._seq = 0                # the segment being written
+        self._segment_size = 0
+        self._log_bytes = 0          # segment bytes since the last snapshot
+        self._buffer: list[bytes] = []
+        self._commit_handle: asyncio.Handle | None = None
+        self._sync_queued = False
+        self._io: ThreadPoolExecutor | None = None
+        self._snapshotter: ThreadPoolExecutor | None = None
+        self._snapshot: Future | None = None
+        #: Bytes of records logged, and bytes written to segments and
+        #: snapshots: their ratio is the write amplification.
+        self.bytes_logged = 0
+        self.bytes_written = 0
+
+    def __repr__(self) -> str:
+        return (f'<BrokerStore {self.directory!r} segment={self._seq} '
+                f'live={len(self._live)}>')
+
+    # ---- recovery --------------------------------------------------------
+
+    def load(self) -> StoredState:
+        """Recover the state on disk and open the store for writing.
+
+        Blocking file I/O: call it before serving, or from an executor.
+        """
+        if self._fd is not None:
+            raise RuntimeError('BrokerStore is already loaded')
+        # Recovery allocates an object or more per record and frees none, so
+        # the cyclic collector would rescan a growing heap for nothing: at a
+        # million records that is a third of the load time.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            return self._load()
+        finally:
+            if collecting:
+                gc.enable()
+
+    def _load(self) -> StoredState:
+        self._live, self._live_bytes, self._queued = {}, 0, {}
+        self._log_bytes = 0
+        os.makedirs(self.directory, exist_ok=True)
+        segments, snapshots = [], []
+        for name in os.listdir(self.directory):
+            if name.endswith(_SEGMENT_SUFFIX):
+                segments.append(int(name[:-len(_SEGMENT_SUFFIX)], 16))
+            elif name.startswith(_SNAPSHOT_PREFIX) and name.endswith(_SNAPSHOT_SUFFIX):
+                snapshots.append(int(name[len(_SNAPSHOT_PREFIX):-len(_SNAPSHOT_SUFFIX)], 16))
+            elif name.endswith('.tmp'):
+                # A snapshot that never finished; the segments still hold it.
+                os.unlink(self._path(name))
+        segments.sort()
+        base = max(snapshots, default=0)
+        if base:
+            self._replay(self._snapshot_path(base), len(_SNAPSHOT_MAGIC), False)
+        for seq in segments:
+            if seq > base:
+                self._log_bytes += self._replay(self._segment_path(seq), 0, True)
+        self._remove_covered(base)
+        self._seq = max(segments + [base]) + 1
+        self._open_segment()
+        self._io = ThreadPoolExecutor(1, thread_name_prefix='bb-mqtt-store')
+        self._snapshotter = ThreadPoolExecutor(
+            1, thread_name_prefix='bb-mqtt-snapshot')
+        return self._state()
+
+    def _replay(self, path: str, start: int, truncate: bool) -> int:
+        """Apply every intact record in *path*; return the bytes applied."""
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= start:
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                pos = self._replay_records(mm, start, size)
+        if pos < size:
+            logger.warning('MQTT store: %s has a torn record at byte %d of %d; '
+                           'the rest is discarded', path, pos, size)
+            if truncate:
+                os.truncate(path, pos)
+        return pos - start
+
+    def _replay_records(self, mm: mmap.mmap, pos: int, end: int) -> int:
+        view = memoryview(mm)
+        header = _RECORD.size
+        apply = self._apply
+        crc32 = zlib.crc32
+        try:
+            while pos + header <= end:
+                crc, length = _RECORD.unpack_from(mm, pos)
+                stop = pos + header + length
+                if stop > end or crc32(view[pos + header:stop]) != crc:
+                    break
+                apply(mm[pos:stop])
+                pos = stop
+        finally:
+            view.release()
+        return pos
+
+    def _state(self) -> StoredState:
+        retained: dict[str, MQTTPublish] = {}
+        sessions: dict[str, StoredSession] = {}
+        queues: dict[str, list[tuple[int, MQTTPublish]]] = {}
+        offset = _RECORD.size + _BODY.size
+        for key, record in self._live.items():
+            kind = key[0]
+            value = record[offset + len(key) - 3:]
+            if kind == _RETAINED:
+                publish = _decode_message(value)
+                retained[publish.topic] = publish
+            elif kind == _SESSION:
+                data = json.loads(value)
+                sessions[key[3:].decode('utf-8')] = StoredSession(
+                    data['expiry'],
+                    [(f, q, o) for f, q, o in data['subscriptions']], [])
+            else:
+                (seq,) = _SEQ.unpack_from(key, 3)
+                queues.setdefault(key[3 + _SEQ.size:].decode('utf-8'), []).append(
+                    (seq, _decode_message(value)))
+        for client_id, queue in queues.items():
+            session = sessions.get(client_id)
+            if session is not None:
+                queue.sort(key=lambda entry: entry[0])
+                session.queue.extend(queue)
+        return StoredState(retained, sessions)
+
+    # ---- the write API (event loop) ----------------------------------------
+
+    def put_retained(self, publish: MQTTPublish) -> None:
+        self._write(_PUT, _RETAINED, publish.topic.encode('utf-8'),
+                    _encode_message(publish, publish.qos, True))
+
+    def delete_retained(self, topic: str) -> None:
+        self._write(_DELETE, _RETAINED, topic.encode('utf-8'))
+
+    def put_session(self, client_id: str, expiry: int,
+                    subscriptions: list[tuple[str, int, dict[str, Any]]]) -> None:
+        value = json.dumps({'expiry': expiry, 'subscriptions': subscriptions},
+                           separators=(',', ':')).encode('utf-8')
+        self._write(_PUT, _SESSION, client_id.encode('utf-8'), value)
+
+    def delete_session(self, client_id: str) -> None:
+        """Forget the session, and with it every message queued for it."""
+        self._write(_DELETE, _SESSION, client_id.encode('utf-8'))
+
+    def enqueue(self, client_id: str, seq: int, publish: MQTTPublish,
+                qos: int, retain: bool) -> None:
+        self._write(_PUT, _QUEUED, _SEQ.pack(seq) + client_id.encode('utf-8'),
+                    _encode_message(publish, qos, retain))
+
+    def dequeue(self, client_id: str, seq: int) -> None:
+        self._write(_DELETE, _QUEUED, _SEQ.pack(seq) + client_id.encode('utf-8'))
+
+    def _write(self, op: int, kind: int, key: bytes, value: bytes = b'') -> None:
+        if self._fd is None:
+            raise RuntimeError('BrokerStore.load() must be called before writing')
+        body = _BODY.pack(op, kind, len(key)) + key + value
+        record = _RECORD.pack(zlib.crc32(body), len(body)) + body
+        self._apply(record)
+        self._buffer.append(record)
+        if self._commit_handle is None:
+            loop = asyncio.get_running_loop()
+            self._commit_handle = loop.call_later(self._commit_interval,
+                                                  self._commit)
+
+    def _apply(self, record: bytes) -> None:
+        """Fold one record into the live map; shared by writes and recovery."""
+        header = _RECORD.size
+        op, kind, key_len = _BODY.unpack_from(record, header)
+        # The live key: kind, length and key bytes, straight from the record.
+        key = record[header + 1:header + _BODY.size + key_len]
+        live = self._live
+        old = live.pop(key, None)
+        if old is not None:
+            self._live_bytes -= len(old)
+        if op == _PUT:
+            live[key] = record
+            self._live_bytes += len(record)
+            if kind == _QUEUED:
+                client_id = key[3 + _SEQ.size:].decode('utf-8')
+                self._queued.setdefault(client_id, set()).add(key)
+        elif kind == _QUEUED:
+            keys = self._queued.get(key[3 + _SEQ.size:].decode('utf-8'))
+            if keys is not None:
+                keys.discard(key)
+        elif kind == _SESSION:
+            for queued in self._queued.pop(key[3:].decode('utf-8'), ()):
+                dropped = live.pop(queued, None)
+                if dropped is not None:
+                    self._live_bytes -= len(dropped)
+
+    # ---- commit, rotation, compaction ------------------------------------
+
+    def _commit(self) -> None:
+        self._commit_handle = None
+        if not self._buffer:
+            return
+        data = b''.join(self._buffer)
+        self._buffer.clear()
+        _write_all(self._fd, data)
+        self._segment_size += len(data)
+        self._log_bytes += len(data)
+        self.bytes_logged += len(data)
+        self.bytes_written += len(data)
+        if self._fsync and not self._sync_queued:
+            self._sync_queued = True
+            self._io.submit(self._sync, self._fd)
+        if self._segment_size >= self._segment_limit:
+            self._rotate()
+        if (self._snapshot is None
+                and self._log_bytes >= self._compact_min
+                and self._log_bytes >= self._compact_ratio * self._live_bytes):
+            self._compact()
+
+    def _sync(self, fd: int) -> None:
+        # Cleared first: a commit landing while this fsync runs must queue
+        # another, because this one may not cover its bytes.
+        self._sync_queued = False
+        os.fsync(fd)
+
+    def _rotate(self) -> None:
+        old = self._fd
+        self._seq += 1
+        self._open_segment()
+        # On the I/O thread, after any fsync already queued for *old*.  That
+        # fsync does not cover the new segment, so the next commit queues one.
+        self._io.submit(self._close_segment, old)
+        self._sync_queued = False
+
+    def _close_segment(self, fd: int) -> None:
+        try:
+            if self._fsync:
+                os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _compact(self) -> None:
+        covered = self._seq
+        self._rotate()
+        records = list(self._live.values())
+        self._log_bytes = 0
+        self._snapshot = self._snapshotter.submit(
+            self._write_snapshot, covered, records)
+        self._snapshot.add_done_callback(self._snapshot_done)
+
+    def _snapshot_done(self, future: Future) -> None:
+        self._snapshot = None
+        if future.exception() is not None:
+            logger.error('MQTT store: snapshot failed; the log is kept',
+                         exc_info=future.exception())
+
+    def _write_snapshot(self, covered: int, records: list[bytes]) -> None:
+        final = self._snapshot_path(covered)
+        tmp = final[:-len(_SNAPSHOT_SUFFIX)] + '.tmp'
+        with open(tmp, 'wb', buffering=1024 * 1024) as f:
+            f.write(_SNAPSHOT_MAGIC)
+            f.writelines(records)
+            f.flush()
+            if self._fsync:
+                os.fsync(f.fileno())
+            self.bytes_written += f.tell()
+        os.replace(tmp, final)
+        if self._fsync:
+            dir_fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        self._remove_covered(covered)
+
+    def _remove_covered(self, base: int) -> None:
+        """Delete segments and snapshots a snapshot at *base* makes redundant."""
+        if not base:
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(_SEGMENT_SUFFIX):
+                if int(name[:-len(_SEGMENT_SUFFIX)], 16) <= base:
+                    os.unlink(self._path(name))
+            elif name.startswith(_SNAPSHOT_PREFIX) and name.endswith(_SNAPSHOT_SUFFIX):
+                if int(name[len(_SNAPSHOT_PREFIX):-len(_SNAPSHOT_SUFFIX)], 16) < base:
+                    os.unlink(self._path(name))
+
+    # ---- files ---------------------------------------------------------------
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def _segment_path(self, seq: int) -> str:
+        return self._path(f'{seq:016x}{_SEGMENT_SUFFIX}')
+
+    def _snapshot_path(self, seq: int) -> str:
+        return self._path(f'{_SNAPSHOT_PREFIX}{seq:016x}{_SNAPSHOT_SUFFIX}')
+
+    def _open_segment(self) -> None:
+        self._fd = os.open(self._segment_path(self._seq),
+                           os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        self._segment_size = 0
+
+    def close(self) -> None:
+        """Commit what is buffered, wait for the I/O threads, close the files."""
+        if self._fd is None:
+            return
+        if self._commit_handle is not None:
+            self._commit_handle.cancel()
+        self._commit()
+        fd, self._fd = self._fd, None
+        self._io.submit(self._close_segment, fd)
+        self._io.shutdown(wait=True)
+        self._snapshotter.shutdown(wait=True)
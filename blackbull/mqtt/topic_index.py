@@ -0,0 +1,332 @@
+"""Topic-level indexes for the MQTT broker.
+
+:class:`SubscriptionIndex` answers "which subscriptions match this Topic
+Name?" without visiting the subscriptions that cannot.  Filters are stored
+one level per trie node, so a PUBLISH costs the depth of its topic plus the
+number of matches, not sessions × subscriptions.
+
+:class:`RetainedIndex` answers the converse for SUBSCRIBE: "which retained
+messages match this Topic Filter?"  Topic Names are stored one level per
+node, so a wildcard filter walks only the subtree it can match instead of
+testing every retained topic.
+
+The indexes are pure data structures with no locking: like every other piece of
+routing state they are owned by :class:`~blackbull.mqtt.broker.BrokerActor` and
+mutated only from its inbox loop.  The session's own ``subscriptions`` list
+stays the source of truth for session state; this is the routing view of it,
+kept in step on SUBSCRIBE, UNSUBSCRIBE and session discard.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Iterator
+from typing import Any
+
+
+def split_share(topic_filter: str) -> tuple[str | None, str]:
+    """§4.8.2 — ``$share/{ShareName}/{filter}`` → ``(ShareName, filter)``.
+
+    A non-shared filter comes back as ``(None, topic_filter)``.  The caller
+    has already validated the filter, so the three-part split cannot fail.
+    """
+    if topic_filter.startswith('$share/'):
+        _prefix, share, rest = topic_filter.split('/', 2)
+        return share, rest
+    return None, topic_filter
+
+
+class _Node:
+    """One topic level.  ``'+'`` and ``'#'`` are ordinary child keys."""
+
+    __slots__ = ('topic_filter', 'children', 'plain', 'shared')
+
+    def __init__(self, topic_filter: str = '') -> None:
+        # The filter this node spells, without any ``$share`` prefix — the
+        # second half of a share group's ``(ShareName, filter)`` key.
+        self.topic_filter = topic_filter
+        self.children: dict[str, _Node] = {}
+        # client_id -> (qos, options) for non-shared subscriptions ending here.
+        self.plain: dict[str, tuple[int, dict[str, Any]]] = {}
+        # ShareName -> {client_id -> (qos, options)}.  Insertion order is
+        # subscription order, which is the rotation order of the group.
+        self.shared: dict[str, dict[str, tuple[int, dict[str, Any]]]] = {}
+
+    def empty(self) -> bool:
+        return not (self.children or self.plain or self.shared)
+
+
+class SubscriptionIndex:
+    """Level-segmented subscription trie with ``+``, ``#`` and ``$share``.
+
+    ``match`` returns the nodes whose filter matches a topic; each node holds
+    the plain subscribers and the share groups on that exact filter.  A
+    client holds at most one subscription per filter (§3.8.4), so ``add``
+    for an existing ``(client, filter)`` pair replaces it in place.
+
+    ``on_change``, when set, is called as ``on_change(True, topic_filter)``
+    when a filter gains its first subscriber and ``on_change(False, ...)``
+    when it loses its last — a share group counting as its own filter,
+    ``$share/{ShareName}/{filter}``.  That is the summary a clustered broker
+    tells the other workers (see :mod:`blackbull.mqtt.cluster`).
+    """
+
+    __slots__ = ('_root', '_count', 'on_change')
+
+    def __init__(self) -> None:
+        self._root = _Node()
+        self._count = 0
+        self.on_change: Callable[[bool, str], None] | None = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, client_id: str, topic_filter: str, qos: int,
+            options: dict[str, Any]) -> None:
+        share, filter_ = split_share(topic_filter)
+        node = self._root
+        for level in filter_.split('/'):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _Node(
+                    f'{node.topic_filter}/{level}' if node is not self._root
+                    else level)
+            node = child
+        bucket = node.plain if share is None \
+            else node.shared.setdefault(share, {})
+        first = not bucket
+        if client_id not in bucket:
+            self._count += 1
+        bucket[client_id] = (qos, options)
+        if first and self.on_change is not None:
+            self.on_change(True, topic_filter)
+
+    def remove(self, client_id: str, topic_filter: str) -> bool:
+        """Drop one subscription; prune the nodes it leaves empty.
+
+        Returns ``False`` when the client held no such subscription, so an
+        UNSUBSCRIBE for an unknown filter is a no-op rather than an error.
+        """
+        share, filter_ = split_share(topic_filter)
+        path = [self._root]
+        for level in filter_.split('/'):
+            child = path[-1].children.get(level)
+            if child is None:
+                return False
+            path.append(child)
+        node = path[-1]
+        if share is None:
+            if node.plain.pop(client_id, None) is None:
+                return False
+            last = not node.plain
+        else:
+            group = node.shared.get(share)
+            if group is None or group.pop(client_id, None) is None:
+                return False
+            last = not group
+            if last:
+                del node.shared[share]
+        self._count -= 1
+        if last and self.on_change is not None:
+            self.on_change(False, topic_filter)
+        # Walk back up, unlinking every node the removal emptied — otherwise
+        # a churn of short-lived unique filters (per-device reply topics)
+        # leaves the trie as large as everything ever subscribed.
+        levels = filter_.split('/')
+        for depth in range(len(levels), 0, -1):
+            if not path[depth].empty():
+                break
+            del path[depth - 1].children[levels[depth - 1]]
+        return True
+
+    def filters(self) -> Iterator[str]:
+        """Every filter with a subscriber, share groups as ``$share/...``."""
+        stack = [self._root]
+        while stack:
+            node = stack.pop()
+            if node.plain:
+                yield node.topic_filter
+            for share in node.shared:
+                yield f'$share/{share}/{node.topic_filter}'
+            stack.extend(node.children.values())
+
+    def has_share(self, share: str, topic_filter: str) -> bool:
+        """Whether any client still subscribes to ``$share/{share}/{filter}``."""
+        return bool(self.share_members(share, topic_filter))
+
+    def share_members(self, share: str, topic_filter: str
+                      ) -> dict[str, tuple[int, dict[str, Any]]]:
+        """The members of ``$share/{share}/{filter}``, client id → (qos, options)."""
+        node = self._root
+        for level in topic_filter.split('/'):
+            node = node.children.get(level)
+            if node is None:
+                return {}
+        return node.shared.get(share, {})
+
+    def match(self, topic: str) -> list[_Node]:
+        """Every node whose filter matches *topic* (§4.7).
+
+        Nodes without subscribers are skipped.  The ``$`` rule (§4.7.2) is
+        applied at the first level only: a wildcard there must not match a
+        topic beginning with ``$``.
+        """
+        if not topic:
+            return []
+        levels = topic.split('/')
+        last = len(levels)
+        out: list[_Node] = []
+        # Explicit stack of (node, depth) — recursion would cost a frame per
+        # level per branch, and ``+`` makes the walk branch.
+        stack = [(self._root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if depth == last:
+                if node.plain or node.shared:
+                    out.append(node)
+            children = node.children
+            if not children:
+                continue
+            wild = depth or not levels[0].startswith('$')
+            if wild:
+                # '#' matches this level and everything below it, including
+                # the parent itself ('a/#' matches 'a').
+                hash_node = children.get('#')
+                if hash_node is not None and (hash_node.plain or hash_node.shared):
+                    out.append(hash_node)
+            if depth == last:
+                continue
+            literal = children.get(levels[depth])
+            if literal is not None:
+                stack.append((literal, depth + 1))
+            if wild:
+                plus = children.get('+')
+                if plus is not None:
+                    stack.append((plus, depth + 1))
+        return out
+
+
+class _RetainedNode:
+    """One Topic Name level; ``message`` is the retained PUBLISH ending here."""
+
+    __slots__ = ('children', 'message', 'serial')
+
+    def __init__(self) -> None:
+        self.children: dict[str, _RetainedNode] = {}
+        self.message: Any = None
+        self.serial = 0             # ``RetainedIndex.serial`` when it was set
+
+
+class RetainedIndex:
+    """Retained messages by Topic Name, with a level trie for filters.
+
+    Reads by exact topic go through a flat dict; the trie serves ``match``.
+    Both are written by ``set`` and ``pop`` only, so they cannot drift.
+    Lookup, assignment, ``in``, ``len`` and iteration behave as on a
+    ``topic -> message`` dict, which is what the broker's cap checks need.
+    """
+
+    __slots__ = ('_root', '_messages', 'serial')
+
+    def __init__(self) -> None:
+        self._root = _RetainedNode()
+        self._messages: dict[str, Any] = {}
+        #: Count of ``set`` calls; see ``iter_match(upto=...)``.
+        self.serial = 0
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def __contains__(self, topic: object) -> bool:
+        return topic in self._messages
+
+    def __getitem__(self, topic: str) -> Any:
+        return self._messages[topic]
+
+    def __setitem__(self, topic: str, message: Any) -> None:
+        self.set(topic, message)
+
+    def __iter__(self):
+        return iter(self._messages)
+
+    def get(self, topic: str, default: Any = None) -> Any:
+        return self._messages.get(topic, default)
+
+    def items(self):
+        return self._messages.items()
+
+    def set(self, topic: str, message: Any) -> None:
+        node = self._root
+        for level in topic.split('/'):
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _RetainedNode()
+            node = child
+        self.serial += 1
+        node.message, node.serial = message, self.serial
+        self._messages[topic] = message
+
+    def pop(self, topic: str, default: Any = None) -> Any:
+        """Remove *topic*'s message and prune the nodes it leaves empty."""
+        message = self._messages.pop(topic, None)
+        if message is None:
+            return default
+        levels = topic.split('/')
+        path = [self._root]
+        for level in levels:
+            path.append(path[-1].children[level])
+        path[-1].message = None
+        for depth in range(len(levels), 0, -1):
+            node = path[depth]
+            if node.children or node.message is not None:
+                break
+            del path[depth - 1].children[levels[depth - 1]]
+        return message
+
+    def match(self, topic_filter: str) -> list[Any]:
+        """Every retained message whose topic matches *topic_filter* (§4.7)."""
+        return list(self.iter_match(topic_filter))
+
+    def iter_match(self, topic_filter: str, upto: int | None = None) -> Iterator[Any]:
+        """Yield the retained messages matching *topic_filter*, lazily.
+
+        The filter is validated and non-shared.  Visits the literal path,
+        every child at a ``+``, and the whole subtree under a ``#`` — never
+        a branch the filter cannot match.  §4.7.2: a wildcard first level
+        skips topics beginning with ``$``.
+
+        Children are copied onto the walk's stack before anything is
+        yielded, so the index may change between items: a message added
+        since may be missed, and one removed since may still be yielded.
+        With *upto* (a past ``serial``), a message set after that point is
+        never yielded, so a walk sees the index as it was then or older.
+        """
+        if upto is None:
+            upto = self.serial
+        levels = topic_filter.split('/')
+        last = len(levels)
+        stack = [(self._root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            if depth == last:
+                if node.message is not None and node.serial <= upto:
+                    yield node.message
+                continue
+            level = levels[depth]
+            if level == '#':
+                # The parent level too: 'a/#' matches 'a' (§4.7.1.2).
+                if depth and node.message is not None and node.serial <= upto:
+                    yield node.message
+                subtree = [child for name, child in node.children.items()
+                           if depth or not name.startswith('$')]
+                while subtree:
+                    below = subtree.pop()
+                    subtree.extend(below.children.values())
+                    if below.message is not None and below.serial <= upto:
+                        yield below.message
+            elif level == '+':
+                stack.extend((child, depth + 1)
+                             for name, child in list(node.children.items())
+                             if depth or not name.startswith('$'))
+            else:
+                child = node.children.get(level)
+                if child is not None:
+                    stack.append((child, depth + 1))
@@ -101,6 +101,13 @@ class NativeWSMessage:
     ``data`` rather than ``bytes``: the ASGI key is ``bytes``, but a slot of
     that name shadows the builtin at every use site inside the class.
     :meth:`to_asgi` maps it back for the boundary.
+
+    ``frames`` is set only on a ``SEND`` that is handed to many connections
+    (:class:`~blackbull.websocket.Broadcast`).  It is a cache the sender
+    fills with the framed — and, per deflate window, compressed — payload, so
+    the first connection encodes the message and the rest reuse the bytes.
+    It travels with the message and so is invisible to anything that reads
+    ``text`` / ``data`` or converts with :meth:`to_asgi`.
     """
 
     ACCEPT = 'accept'
@@ -108,7 +115,7 @@ class NativeWSMessage:
     CLOSE = 'close'
 
     __slots__ = ('kind', 'text', 'data', 'code', 'reason', 'subprotocol',
-                 'headers')
+                 'headers', 'frames')
 
     def __init__(self, kind: str, *, text: str | None = None,
                  data: bytes | None = None,
@@ -122,6 +129,7 @@ class NativeWSMessage:
         self.reason = reason
         self.subprotocol = subprotocol
         self.headers = headers
+        self.frames: dict | None = None
 
     # --- constructors, one per kind ---------------------------------------
 
@@ -3,9 +3,9 @@
 ``FrameFactory`` produces frames of the requested type and decodes raw bytes
 from the wire.  Frame-type definitions live in ``frame_types``.
 """
-from hpack import Decoder, Encoder
-
 import logging
+
+from .hpack_codec import Decoder, Encoder
 from .frame_types import (
     FrameBase, FrameTypes, FrameFlags,
     HeaderFrameFlags, SettingFrameFlags, ErrorCodes, PushPromise,
@@ -42,11 +42,16 @@ class _UnknownFrame:
 
 
 class FrameFactory:
-    """docstring for FrameFactory"""
-    def __init__(self):
+    """Build outbound frames and parse inbound ones for one connection.
+
+    Holds the connection's HPACK ``decoder`` and ``encoder``;
+    *hpack_static_only* puts the encoder in static-only mode
+    (``BB_H2_HPACK_STATIC_ONLY``).
+    """
+    def __init__(self, *, hpack_static_only: bool = False):
         super().__init__()
         self.decoder = Decoder()
-        self.encoder = Encoder()
+        self.encoder = Encoder(static_only=hpack_static_only)
 
     def create(self, type_: FrameTypes, flags: FrameFlags | int, stream_id: int, *, data: bytes = b'', **kwds):
         # NB: no per-create trace here — create() runs on every outbound frame
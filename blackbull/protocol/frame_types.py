@@ -1,7 +1,7 @@
 """HTTP/2 frame type definitions (RFC 9113 §6; supersedes RFC 7540 §6).
 
 Frame-type classes, enums, and the FrameBase registry.  HPACK
-compression/decompression is delegated to the ``hpack`` library.
+compression/decompression goes through ``hpack_codec``.
 
 ``FrameFactory`` lives in ``frame.py``; this module is kept free of
 factory / parsing logic so the type hierarchy can be imported without
@@ -10,9 +10,9 @@ pulling in the codec.
 from enum import Enum, IntEnum, StrEnum
 from io import BytesIO
 from itertools import chain
-from hpack import Encoder
 
 from . import hpack_fastpath, structured_fields
+from .hpack_codec import Encoder
 
 import logging
 from ..logger import log, debug_gate
@@ -314,9 +314,9 @@ class Headers(FrameBase):
         # Values stored as str so they can flow directly into the ASGI scope
         # (which requires str for method/path/scheme).
         self.pseudo_headers: dict[PseudoHeaders, str] = {}
-        # Regular headers stored as bytes — ASGI requires bytes pairs and hpack
-        # returns bytes when decoded with raw=True (avoids the ~4% CPU cost of
-        # hpack's _unicode_if_needed bytes→str→bytes round-trip).
+        # Regular headers stored as bytes — ASGI requires bytes pairs and the
+        # decoder returns bytes when called with raw=True (no bytes→str→bytes
+        # round-trip).
         self.headers: list[tuple[bytes, bytes]] = []
 
         # Set by parse_payload when the header block violates RFC 9113 §8.1.2 /
@@ -369,8 +369,8 @@ class Headers(FrameBase):
                 return
             remaining -= 5
 
-        # raw=True keeps hpack output as bytes-bytes tuples and bypasses
-        # hpack's _unicode_if_needed UTF-8 decode (~4% CPU under load).
+        # raw=True keeps the output as bytes-bytes tuples and skips the
+        # UTF-8 decode of every name and value.
         fields = self.decoder.decode(payload.read(remaining), raw=True)
         debug = _DEBUG
 
@@ -0,0 +1,812 @@
+"""HPACK (RFC 7541) header compression for the HTTP/2 frame layer.
+
+BlackBull's own codec, in place of the third-party ``hpack`` package the
+frame layer used to wrap.  The wire behaviour is unchanged — for the same
+input :class:`Encoder` emits byte-for-byte what ``hpack.Encoder`` does,
+and :class:`Decoder` accepts and rejects the same header blocks (pinned
+by ``tests/unit/test_hpack_codec.py``) — but the hot paths are shaped for
+CPython:
+
+* Huffman decoding (RFC 7541 §5.2) walks a byte-wide state table built
+  at import: one list lookup per input octet, no per-bit branching.
+* Huffman encoding joins per-octet bit strings and parses the result
+  with a single ``int(…, 2)``.
+* Static-table hits (Appendix A) are encoded from precomputed bytes — an
+  exact ``(name, value)`` match is one cached octet, a name-only match
+  reuses a cached index prefix.
+* The encoder finds dynamic-table entries through two dicts rather than
+  a scan of the table.
+* A header block that reads only the static table and adds nothing to
+  the dynamic one decodes to the same list whatever the connection's
+  state, so such blocks are memoised in a bounded LRU shared by every
+  connection in the worker (see :data:`BLOCK_CACHE_SIZE`).
+* The encoder remembers the block for a header list that left its
+  dynamic table unchanged and replays it until the table next changes.
+  In static-only mode (``Encoder(static_only=True)``, which ``hpack`` has
+  no counterpart for) the table is never used and every field's
+  encoding is cached.
+
+Only the surface the server uses is provided: ``Decoder.decode`` with
+``raw``, ``Encoder.encode`` with ``huffman``, and ``header_table_size``
+on both.  Decoded headers are plain tuples.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict, deque
+from collections.abc import Iterable
+
+#: RFC 7541 §4.2 — initial SETTINGS_HEADER_TABLE_SIZE.
+DEFAULT_TABLE_SIZE = 4096
+
+#: Default cap on one decoded header list, in RFC 7541 §4.1 entry-size
+#: units — the ``hpack`` package's default, kept for parity.
+DEFAULT_MAX_HEADER_LIST_SIZE = 2 ** 16
+
+#: Header lists an :class:`Encoder` remembers the encoding of, and — in
+#: static-only mode — single fields it remembers.
+ENCODE_MEMO_SIZE = 64
+FIELD_CACHE_SIZE = 256
+
+#: Entries in the shared decoded-block cache.  Blocks are keyed by their
+#: exact bytes; only blocks of at most :data:`BLOCK_CACHE_MAX_BLOCK`
+#: octets are kept, which bounds the cache at a few hundred kilobytes.
+BLOCK_CACHE_SIZE = 512
+BLOCK_CACHE_MAX_BLOCK = 1024
+
+# A prefixed integer (§5.1) may take at most this many continuation
+# octets — enough for any 32-bit value.  Longer runs are an attack, not
+# an encoding.
+_MAX_CONTINUATION = 5
+
+
+class HPACKDecodingError(ValueError):
+    """A header block could not be decoded.  The connection's HPACK state
+    is no longer usable; RFC 9113 §4.3 makes this a COMPRESSION_ERROR."""
+
+
+class InvalidTableIndexError(HPACKDecodingError):
+    """A representation referenced an index outside both tables."""
+
+
+class InvalidTableSizeError(HPACKDecodingError):
+    """A dynamic table size update exceeded the size we allowed, or the
+    peer did not shrink its table after we lowered the limit."""
+
+
+class OversizedHeaderListError(HPACKDecodingError):
+    """The decoded header list exceeded ``max_header_list_size``."""
+
+
+# ---------------------------------------------------------------------------
+# Static table — RFC 7541 Appendix A
+# ---------------------------------------------------------------------------
+
+STATIC_TABLE: tuple[tuple[bytes, bytes], ...] = (
+    (b':authority', b''),                                  # 1
+    (b':method', b'GET'),                                  # 2
+    (b':method', b'POST'),                                 # 3
+    (b':path', b'/'),                                      # 4
+    (b':path', b'/index.html'),                            # 5
+    (b':scheme', b'http'),                                 # 6
+    (b':scheme', b'https'),                                # 7
+    (b':status', b'200'),                                  # 8
+    (b':status', b'204'),                                  # 9
+    (b':status', b'206'),                                  # 10
+    (b':status', b'304'),                                  # 11
+    (b':status', b'400'),                                  # 12
+    (b':status', b'404'),                                  # 13
+    (b':status', b'500'),                                  # 14
+    (b'accept-charset', b''),                              # 15
+    (b'accept-encoding', b'gzip, deflate'),                # 16
+    (b'accept-language', b''),                             # 17
+    (b'accept-ranges', b''),                               # 18
+    (b'accept', b''),                                      # 19
+    (b'access-control-allow-origin', b''),                 # 20
+    (b'age', b''),                                         # 21
+    (b'allow', b''),                                       # 22
+    (b'authorization', b''),                               # 23
+    (b'cache-control', b''),                               # 24
+    (b'content-disposition', b''),                         # 25
+    (b'content-encoding', b''),                            # 26
+    (b'content-language', b''),                            # 27
+    (b'content-length', b''),                              # 28
+    (b'content-location', b''),                            # 29
+    (b'content-range', b''),                               # 30
+    (b'content-type', b''),                                # 31
+    (b'cookie', b''),                                      # 32
+    (b'date', b''),                                        # 33
+    (b'etag', b''),                                        # 34
+    (b'expect', b''),                                      # 35
+    (b'expires', b''),                                     # 36
+    (b'from', b''),                                        # 37
+    (b'host', b''),                                        # 38
+    (b'if-match', b''),                                    # 39
+    (b'if-modified-since', b''),                           # 40
+    (b'if-none-match', b''),                               # 41
+    (b'if-range', b''),                                    # 42
+    (b'if-unmodified-since', b''),                         # 43
+    (b'last-modified', b''),                               # 44
+    (b'link', b''),                                        # 45
+    (b'location', b''),                                    # 46
+    (b'max-forwards', b''),                                # 47
+    (b'proxy-authenticate', b''),                          # 48
+    (b'proxy-authorization', b''),                         # 49
+    (b'range', b''),                                       # 50
+    (b'referer', b''),                                     # 51
+    (b'refresh', b''),                                     # 52
+    (b'retry-after', b''),                                 # 53
+    (b'server', b''),                                      # 54
+    (b'set-cookie', b''),                                  # 55
+    (b'strict-transport-security', b''),                   # 56
+    (b'transfer-encoding', b''),                           # 57
+    (b'user-agent', b''),                                  # 58
+    (b'vary', b''),                                        # 59
+    (b'via', b''),                                         # 60
+    (b'www-authenticate', b''),                            # 61
+)
+_STATIC_LEN = len(STATIC_TABLE)
+
+
+def _prefixed(value: int, bits: int, flags: int) -> bytes:
+    """RFC 7541 §5.1 — *value* as an integer with a *bits*-bit prefix,
+    the remaining high bits of the first octet set to *flags*."""
+    limit = (1 << bits) - 1
+    if value < limit:
+        return bytes((flags | value,))
+    out = bytearray((flags | limit,))
+    value -= limit
+    while value >= 128:
+        out.append((value & 127) | 128)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+#: Exact ``(name, value)`` → the one-octet Indexed Header Field (§6.1).
+_STATIC_EXACT: dict[tuple[bytes, bytes], bytes] = {}
+#: Name → the literal prefixes for the lowest static index carrying that
+#: name: with incremental indexing (§6.2.1), never indexed (§6.2.3) and
+#: without indexing (§6.2.2), in that order.
+_STATIC_NAME: dict[bytes, tuple[bytes, bytes, bytes]] = {}
+for _index, (_name, _value) in enumerate(STATIC_TABLE, 1):
+    _STATIC_EXACT[(_name, _value)] = bytes((0x80 | _index,))
+    if _name not in _STATIC_NAME:
+        _STATIC_NAME[_name] = (_prefixed(_index, 6, 0x40),
+                               _prefixed(_index, 4, 0x10),
+                               _prefixed(_index, 4, 0x00))
+del _index, _name, _value
+
+
+# ---------------------------------------------------------------------------
+# Huffman code — RFC 7541 Appendix B
+# ---------------------------------------------------------------------------
+
+#: ``(code, bit length)`` for octets 0-255 and EOS (256).
+HUFFMAN_CODE: tuple[tuple[int, int], ...] = (
+    (0x1ff8, 13), (0x7fffd8, 23), (0xfffffe2, 28), (0xfffffe3, 28),  #   0
+    (0xfffffe4, 28), (0xfffffe5, 28), (0xfffffe6, 28), (0xfffffe7, 28),  #   4
+    (0xfffffe8, 28), (0xffffea, 24), (0x3ffffffc, 30), (0xfffffe9, 28),  #   8
+    (0xfffffea, 28), (0x3ffffffd, 30), (0xfffffeb, 28), (0xfffffec, 28),  #  12
+    (0xfffffed, 28), (0xfffffee, 28), (0xfffffef, 28), (0xffffff0, 28),  #  16
+    (0xffffff1, 28), (0xffffff2, 28), (0x3ffffffe, 30), (0xffffff3, 28),  #  20
+    (0xffffff4, 28), (0xffffff5, 28), (0xffffff6, 28), (0xffffff7, 28),  #  24
+    (0xffffff8, 28), (0xffffff9, 28), (0xffffffa, 28), (0xffffffb, 28),  #  28
+    (0x14, 6), (0x3f8, 10), (0x3f9, 10), (0xffa, 12),  #  32
+    (0x1ff9, 13), (0x15, 6), (0xf8, 8), (0x7fa, 11),  #  36
+    (0x3fa, 10), (0x3fb, 10), (0xf9, 8), (0x7fb, 11),  #  40
+    (0xfa, 8), (0x16, 6), (0x17, 6), (0x18, 6),  #  44
+    (0x0, 5), (0x1, 5), (0x2, 5), (0x19, 6),  #  48
+    (0x1a, 6), (0x1b, 6), (0x1c, 6), (0x1d, 6),  #  52
+    (0x1e, 6), (0x1f, 6), (0x5c, 7), (0xfb, 8),  #  56
+    (0x7ffc, 15), (0x20, 6), (0xffb, 12), (0x3fc, 10),  #  60
+    (0x1ffa, 13), (0x21, 6), (0x5d, 7), (0x5e, 7),  #  64
+    (0x5f, 7), (0x60, 7), (0x61, 7), (0x62, 7),  #  68
+    (0x63, 7), (0x64, 7), (0x65, 7), (0x66, 7),  #  72
+    (0x67, 7), (0x68, 7), (0x69, 7), (0x6a, 7),  #  76
+    (0x6b, 7), (0x6c, 7), (0x6d, 7), (0x6e, 7),  #  80
+    (0x6f, 7), (0x70, 7), (0x71, 7), (0x72, 7),  #  84
+    (0xfc, 8), (0x73, 7), (0xfd, 8), (0x1ffb, 13),  #  88
+    (0x7fff0, 19), (0x1ffc, 13), (0x3ffc, 14), (0x22, 6),  #  92
+    (0x7ffd, 15), (0x3, 5), (0x23, 6), (0x4, 5),  #  96
+    (0x24, 6), (0x5, 5), (0x25, 6), (0x26, 6),  # 100
+    (0x27, 6), (0x6, 5), (0x74, 7), (0x75, 7),  # 104
+    (0x28, 6), (0x29, 6), (0x2a, 6), (0x7, 5),  # 108
+    (0x2b, 6), (0x76, 7), (0x2c, 6), (0x8, 5),  # 112
+    (0x9, 5), (0x2d, 6), (0x77, 7), (0x78, 7),  # 116
+    (0x79, 7), (0x7a, 7), (0x7b, 7), (0x7ffe, 15),  # 120
+    (0x7fc, 11), (0x3ffd, 14), (0x1ffd, 13), (0xffffffc, 28),  # 124
+    (0xfffe6, 20), (0x3fffd2, 22), (0xfffe7, 20), (0xfffe8, 20),  # 128
+    (0x3fffd3, 22), (0x3fffd4, 22), (0x3fffd5, 22), (0x7fffd9, 23),  # 132
+    (0x3fffd6, 22), (0x7fffda, 23), (0x7fffdb, 23), (0x7fffdc, 23),  # 136
+    (0x7fffdd, 23), (0x7fffde, 23), (0xffffeb, 24), (0x7fffdf, 23),  # 140
+    (0xffffec, 24), (0xffffed, 24), (0x3fffd7, 22), (0x7fffe0, 23),  # 144
+    (0xffffee, 24), (0x7fffe1, 23), (0x7fffe2, 23), (0x7fffe3, 23),  # 148
+    (0x7fffe4, 23), (0x1fffdc, 21), (0x3fffd8, 22), (0x7fffe5, 23),  # 152
+    (0x3fffd9, 22), (0x7fffe6, 23), (0x7fffe7, 23), (0xffffef, 24),  # 156
+    (0x3fffda, 22), (0x1fffdd, 21), (0xfffe9, 20), (0x3fffdb, 22),  # 160
+    (0x3fffdc, 22), (0x7fffe8, 23), (0x7fffe9, 23), (0x1fffde, 21),  # 164
+    (0x7fffea, 23), (0x3fffdd, 22), (0x3fffde, 22), (0xfffff0, 24),  # 168
+    (0x1fffdf, 21), (0x3fffdf, 22), (0x7fffeb, 23), (0x7fffec, 23),  # 172
+    (0x1fffe0, 21), (0x1fffe1, 21), (0x3fffe0, 22), (0x1fffe2, 21),  # 176
+    (0x7fffed, 23), (0x3fffe1, 22), (0x7fffee, 23), (0x7fffef, 23),  # 180
+    (0xfffea, 20), (0x3fffe2, 22), (0x3fffe3, 22), (0x3fffe4, 22),  # 184
+    (0x7ffff0, 23), (0x3fffe5, 22), (0x3fffe6, 22), (0x7ffff1, 23),  # 188
+    (0x3ffffe0, 26), (0x3ffffe1, 26), (0xfffeb, 20), (0x7fff1, 19),  # 192
+    (0x3fffe7, 22), (0x7ffff2, 23), (0x3fffe8, 22), (0x1ffffec, 25),  # 196
+    (0x3ffffe2, 26), (0x3ffffe3, 26), (0x3ffffe4, 26), (0x7ffffde, 27),  # 200
+    (0x7ffffdf, 27), (0x3ffffe5, 26), (0xfffff1, 24), (0x1ffffed, 25),  # 204
+    (0x7fff2, 19), (0x1fffe3, 21), (0x3ffffe6, 26), (0x7ffffe0, 27),  # 208
+    (0x7ffffe1, 27), (0x3ffffe7, 26), (0x7ffffe2, 27), (0xfffff2, 24),  # 212
+    (0x1fffe4, 21), (0x1fffe5, 21), (0x3ffffe8, 26), (0x3ffffe9, 26),  # 216
+    (0xffffffd, 28), (0x7ffffe3, 27), (0x7ffffe4, 27), (0x7ffffe5, 27),  # 220
+    (0xfffec, 20), (0xfffff3, 24), (0xfffed, 20), (0x1fffe6, 21),  # 224
+    (0x3fffe9, 22), (0x1fffe7, 21), (0x1fffe8, 21), (0x7ffff3, 23),  # 228
+    (0x3fffea, 22), (0x3fffeb, 22), (0x1ffffee, 25), (0x1ffffef, 25),  # 232
+    (0xfffff4, 24), (0xfffff5, 24), (0x3ffffea, 26), (0x7ffff4, 23),  # 236
+    (0x3ffffeb, 26), (0x7ffffe6, 27), (0x3ffffec, 26), (0x3ffffed, 26),  # 240
+    (0x7ffffe7, 27), (0x7ffffe8, 27), (0x7ffffe9, 27), (0x7ffffea, 27),  # 244
+    (0x7ffffeb, 27), (0xffffffe, 28), (0x7ffffec, 27), (0x7ffffed, 27),  # 248
+    (0x7ffffee, 27), (0x7ffffef, 27), (0x7fffff0, 27), (0x3ffffee, 26),  # 252
+    (0x3fffffff, 30),  # 256
+)
+_EOS = 256
+
+#: Octet → its code as a string of ``'0'``/``'1'`` for :func:`huffman_encode`.
+_HUFFMAN_BITS: list[str] = [format(code, f'0{length}b')
+                            for code, length in HUFFMAN_CODE[:_EOS]]
+
+
+def _build_decode_table() -> tuple[list[tuple[int, bytes]], frozenset[int]]:
+    """Build the byte-wide Huffman decoding state machine.
+
+    A state is an internal node of the code tree — the bits consumed
+    since the last complete symbol.  ``table[state << 8 | octet]`` is
+    ``(next_state << 8, decoded octets)``; an octet can complete at most
+    two symbols because the shortest code is five bits.  Decoding EOS
+    moves to a sink state (index ``len(nodes)``) that every octet maps
+    back to, so the loop needs no error branch and the caller checks the
+    final state once.
+
+    The byte-wide rows are composed from a nibble-wide table: walking the
+    tree bit by bit for all 65 536 entries costs several times more at
+    import than two nibble steps each.
+    """
+    nodes = [[0, 0]]                       # child: >0 node, <=0 ~symbol
+    for symbol, (code, length) in enumerate(HUFFMAN_CODE):
+        node = 0
+        for shift in range(length - 1, 0, -1):
+            bit = (code >> shift) & 1
+            if not nodes[node][bit]:
+                nodes[node][bit] = len(nodes)
+                nodes.append([0, 0])
+            node = nodes[node][bit]
+        nodes[node][code & 1] = ~symbol
+    fail = len(nodes)
+
+    nibble: list[tuple[int, int]] = []     # (next state, symbol or -1)
+    for state in range(fail):
+        for value in range(16):
+            node, emitted = state, -1
+            for shift in (3, 2, 1, 0):
+                child = nodes[node][(value >> shift) & 1]
+                if child > 0:
+                    node = child
+                elif ~child == _EOS:
+                    node, emitted = fail, -1
+                    break
+                else:
+                    node, emitted = 0, ~child
+            nibble.append((node, emitted))
+    nibble.extend([(fail, -1)] * 16)
+
+    single = [bytes((octet,)) for octet in range(256)]
+    low_rows = [[(node << 8, single[emitted] if emitted >= 0 else b'')
+                 for node, emitted in nibble[state << 4:(state + 1) << 4]]
+                for state in range(fail + 1)]
+    table: list[tuple[int, bytes]] = []
+    for state in range(fail + 1):
+        for node, emitted in nibble[state << 4:(state + 1) << 4]:
+            if emitted < 0:
+                table.extend(low_rows[node])
+            else:
+                first = single[emitted]
+                table.extend([(nxt, first + out) for nxt, out in low_rows[node]])
+
+    # §5.2 — padding is the most significant bits of EOS (all ones), and
+    # longer than seven bits is an error: accept only the all-ones path
+    # of depth 0-7.
+    accepting, node = {0}, 0
+    for _ in range(7):
+        node = nodes[node][1]
+        accepting.add(node << 8)
+    return table, frozenset(accepting)
+
+
+_HUFFMAN_TABLE, _HUFFMAN_ACCEPT = _build_decode_table()
+
+
+def huffman_decode(data: bytes) -> bytes:
+    """Decode a Huffman-coded string literal (RFC 7541 §5.2)."""
+    table = _HUFFMAN_TABLE
+    state = 0
+    out = bytearray()
+    for octet in data:
+        state, decoded = table[state | octet]
+        out += decoded
+    if state not in _HUFFMAN_ACCEPT:
+        raise HPACKDecodingError('Invalid Huffman string: EOS or bad padding')
+    return bytes(out)
+
+
+def huffman_encode(data: bytes) -> bytes:
+    """Huffman-code *data* (RFC 7541 §5.2), padded with the EOS prefix."""
+    if not data:
+        return b''
+    bits = ''.join([_HUFFMAN_BITS[octet] for octet in data])
+    pad = -len(bits) % 8
+    return int(bits + '1' * pad, 2).to_bytes((len(bits) + pad) >> 3, 'big')
+
+
+# ---------------------------------------------------------------------------
+# Dynamic tables
+# ---------------------------------------------------------------------------
+
+def _entry_size(name: bytes, value: bytes) -> int:
+    """RFC 7541 §4.1 — an entry's size counts 32 octets of overhead."""
+    return 32 + len(name) + len(value)
+
+
+class _DynamicTable:
+    """The §2.3.2 dynamic table: newest entry first, evicted from the end.
+
+    ``resized`` records that ``maxsize`` changed since the encoder last
+    signalled it; the decoder ignores it.
+    """
+
+    def __init__(self) -> None:
+        self.entries: deque[tuple[bytes, bytes]] = deque()
+        self.size = 0
+        self.maxsize = DEFAULT_TABLE_SIZE
+        self.resized = False
+
+    def add(self, name: bytes, value: bytes) -> None:
+        """§4.4 — an entry larger than the table empties it."""
+        size = _entry_size(name, value)
+        if size > self.maxsize:
+            while self.entries:
+                self._evict()
+            return
+        self.entries.appendleft((name, value))
+        self._added(name, value)
+        self.size += size
+        self._shrink()
+
+    def resize(self, maxsize: int) -> None:
+        self.resized = maxsize != self.maxsize
+        self.maxsize = maxsize
+        self._shrink()
+
+    def get(self, index: int) -> tuple[bytes, bytes]:
+        """Entry at the combined-table *index* (§2.3.3)."""
+        offset = index - _STATIC_LEN - 1
+        if index <= 0 or offset >= len(self.entries):
+            raise InvalidTableIndexError(f'Invalid table index {index}')
+        if offset < 0:
+            return STATIC_TABLE[index - 1]
+        return self.entries[offset]
+
+    def _shrink(self) -> None:
+        while self.size > self.maxsize:
+            self._evict()
+
+    def _evict(self) -> None:
+        name, value = self.entries.pop()
+        self.size -= _entry_size(name, value)
+        self._evicted(name, value)
+
+    def _added(self, name: bytes, value: bytes) -> None:
+        """Hook: an entry was inserted."""
+
+    def _evicted(self, name: bytes, value: bytes) -> None:
+        """Hook: the oldest entry was dropped."""
+
+
+class _EncoderTable(_DynamicTable):
+    """Dynamic table with O(1) search.
+
+    Each insertion gets a sequence number; ``_pairs`` and ``_names`` map to
+    the newest one carrying that pair or name, and an entry's index is its
+    distance from the newest sequence number.  Evicting the oldest entry
+    only unmaps it when no newer duplicate has taken its place.
+
+    ``generation`` counts insertions, evictions and size changes — every
+    change that can move an index or decide whether a field is inserted —
+    so an encoding made at one generation is still right at that
+    generation.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.generation = 0
+        self._inserted = 0
+        self._evicted_seq = 0
+        self._pairs: dict[tuple[bytes, bytes], int] = {}
+        self._names: dict[bytes, int] = {}
+
+    def search(self, name: bytes, value: bytes) -> tuple[int, bool]:
+        """Return ``(index, exact)`` for the newest dynamic entry matching
+        ``(name, value)``, else the newest matching *name*; ``(0, False)``
+        when neither is in the table."""
+        seq = self._pairs.get((name, value))
+        if seq is not None:
+            return _STATIC_LEN + 1 + self._inserted - seq, True
+        seq = self._names.get(name)
+        if seq is not None:
+            return _STATIC_LEN + 1 + self._inserted - seq, False
+        return 0, False
+
+    def resize(self, maxsize: int) -> None:
+        if maxsize != self.maxsize:
+            # Whether an entry fits depends on the size: a field that was
+            # too large to insert before may be inserted now.
+            self.generation += 1
+        super().resize(maxsize)
+
+    def _added(self, name: bytes, value: bytes) -> None:
+        self.generation += 1
+        self._inserted += 1
+        self._pairs[(name, value)] = self._names[name] = self._inserted
+
+    def _evicted(self, name: bytes, value: bytes) -> None:
+        self.generation += 1
+        self._evicted_seq += 1
+        seq = self._evicted_seq
+        if self._pairs.get((name, value)) == seq:
+            del self._pairs[(name, value)]
+        if self._names.get(name) == seq:
+            del self._names[name]
+
+
+# ---------------------------------------------------------------------------
+# Decoder
+# ---------------------------------------------------------------------------
+
+#: Shared across connections: block bytes → (headers, §4.1 list size).
+#: Only blocks that touch no dynamic-table state are stored.
+_BLOCK_CACHE: OrderedDict[bytes, tuple[tuple[tuple[bytes, bytes], ...], int]] = OrderedDict()
+
+
+def _varint(data: bytes, pos: int, value: int) -> tuple[int, int]:
+    """Continue a §5.1 integer whose prefix was all ones; *pos* is the
+    first continuation octet.  Returns ``(value, next position)``."""
+    shift = 0
+    for _ in range(_MAX_CONTINUATION):
+        try:
+            octet = data[pos]
+        except IndexError:
+            raise HPACKDecodingError('Truncated HPACK integer') from None
+        pos += 1
+        value += (octet & 127) << shift
+        if octet < 128:
+            return value, pos
+        shift += 7
+    raise HPACKDecodingError('HPACK integer representation is too long')
+
+
+def _string(data: bytes, pos: int) -> tuple[bytes, int]:
+    """Read a §5.2 string literal at *pos*.  Returns ``(octets, next
+    position)``."""
+    try:
+        first = data[pos]
+    except IndexError:
+        raise HPACKDecodingError('Truncated header block') from None
+    length = first & 127
+    if length == 127:
+        length, pos = _varint(data, pos + 1, length)
+    else:
+        pos += 1
+    end = pos + length
+    if end > len(data):
+        raise HPACKDecodingError('Truncated header block')
+    if first & 128:
+        return huffman_decode(data[pos:end]), end
+    return data[pos:end], end
+
+
+class Decoder:
+    """Decode header blocks for one connection's receive direction.
+
+    *max_header_list_size* caps the decoded size of one block in §4.1
+    units; exceeding it raises :class:`OversizedHeaderListError`, after
+    which the connection must be closed.
+    """
+
+    def __init__(self, max_header_list_size: int = DEFAULT_MAX_HEADER_LIST_SIZE) -> None:
+        self._table = _DynamicTable()
+        self.max_header_list_size = max_header_list_size
+        #: The largest table size the peer's encoder may select (§6.3) —
+        #: our SETTINGS_HEADER_TABLE_SIZE.
+        self.max_allowed_table_size = DEFAULT_TABLE_SIZE
+
+    @property
+    def header_table_size(self) -> int:
+        return self._table.maxsize
+
+    @header_table_size.setter
+    def header_table_size(self, value: int) -> None:
+        self._table.resize(int(value))
+
+    def decode(self, data: bytes, raw: bool = False) -> list[tuple]:
+        """Decode one complete header block into ``(name, value)`` pairs,
+        as ``bytes`` when *raw* is true and UTF-8 ``str`` otherwise.
+
+        Raises :class:`HPACKDecodingError` (or a subclass) on any
+        malformed block.
+        """
+        if type(data) is not bytes:
+            data = bytes(data)
+        cached = _BLOCK_CACHE.get(data)
+        if cached is None:
+            headers = self._decode(data)
+        else:
+            _BLOCK_CACHE.move_to_end(data)
+            headers, size = cached
+            if size > self.max_header_list_size:
+                raise OversizedHeaderListError(
+                    f'A header list larger than {self.max_header_list_size} '
+                    'has been received')
+        if self._table.maxsize > self.max_allowed_table_size:
+            raise InvalidTableSizeError(
+                'Encoder did not shrink table size to within the max')
+        if raw:
+            return headers if cached is None else list(headers)
+        try:
+            return [(n.decode('utf-8'), v.decode('utf-8')) for n, v in headers]
+        except UnicodeDecodeError as exc:
+            raise HPACKDecodingError('Unable to decode headers as UTF-8') from exc
+
+    def _decode(self, data: bytes) -> list[tuple[bytes, bytes]]:
+        table = self._table
+        static = STATIC_TABLE
+        limit = self.max_header_list_size
+        headers: list[tuple[bytes, bytes]] = []
+        size = 0
+        stateless = True           # no dynamic reads, inserts or resizes
+        pos, end = 0, len(data)
+        while pos < end:
+            first = data[pos]
+            if first & 0x80:                            # §6.1 indexed
+                index = first & 0x7f
+                if index == 0x7f:
+                    index, pos = _varint(data, pos + 1, index)
+                else:
+                    pos += 1
+                if 0 < index <= _STATIC_LEN:
+                    header = static[index - 1]
+                else:
+                    header = table.get(index)
+                    stateless = False
+            elif first & 0x20 and not first & 0x40:     # §6.3 size update
+                if headers:
+                    raise HPACKDecodingError(
+                        'Table size update not at the start of the block')
+                new_size = first & 0x1f
+                if new_size == 0x1f:
+                    new_size, pos = _varint(data, pos + 1, new_size)
+                else:
+                    pos += 1
+                if new_size > self.max_allowed_table_size:
+                    raise InvalidTableSizeError(
+                        'Encoder exceeded max allowable table size')
+                table.resize(new_size)
+                stateless = False
+                continue
+            else:                                       # §6.2 literals
+                mask = 0x3f if first & 0x40 else 0x0f
+                index = first & mask
+                if index == mask:
+                    index, pos = _varint(data, pos + 1, index)
+                else:
+                    pos += 1
+                if index == 0:
+                    name, pos = _string(data, pos)
+                elif index <= _STATIC_LEN:
+                    name = static[index - 1][0]
+                else:
+                    name = table.get(index)[0]
+                    stateless = False
+                value, pos = _string(data, pos)
+                header = (name, value)
+                if first & 0x40:                        # §6.2.1 indexing
+                    table.add(name, value)
+                    stateless = False
+            headers.append(header)
+            size += 32 + len(header[0]) + len(header[1])
+            if size > limit:
+                raise OversizedHeaderListError(
+                    f'A header list larger than {limit} has been received')
+        if stateless and end <= BLOCK_CACHE_MAX_BLOCK:
+            _BLOCK_CACHE[data] = (tuple(headers), size)
+            if len(_BLOCK_CACHE) > BLOCK_CACHE_SIZE:
+                _BLOCK_CACHE.popitem(last=False)
+        return headers
+
+
+# ---------------------------------------------------------------------------
+# Encoder
+# ---------------------------------------------------------------------------
+
+def _to_bytes(value) -> bytes:
+    """Coerce a header name or value the way ``hpack`` does: ``bytes`` as
+    is, anything else through ``str`` and UTF-8."""
+    if type(value) is bytes:
+        return value
+    if type(value) is not str:
+        value = str(value)
+    return value.encode('utf-8')
+
+
+def _pseudo_first(headers: dict) -> Iterable[tuple]:
+    """A ``dict`` of headers with the pseudo-headers moved to the front
+    (RFC 9113 §8.3); otherwise in insertion order."""
+    keys = sorted(headers, key=lambda k: not _to_bytes(k).startswith(b':'))
+    return [(k, headers[k]) for k in keys]
+
+
+class Encoder:
+    """Encode header lists for one connection's send direction.
+
+    Every field not marked sensitive is added to the dynamic table (§6.2.1);
+    a sensitive field — a 3-tuple ``(name, value, True)`` — is sent
+    never-indexed (§6.2.3).
+
+    With *static_only* the dynamic table is never used: a field without an
+    exact static match is sent as a literal without indexing (§6.2.2) —
+    never indexed if sensitive — naming a static entry where one exists.
+    Blocks are larger than with indexing, but a field's encoding no longer
+    depends on what was sent before, so each is cached
+    (:data:`FIELD_CACHE_SIZE` per connection) and reused.
+
+    In either mode a ``list`` or ``tuple`` of headers encoded without
+    changing the dynamic table is remembered (:data:`ENCODE_MEMO_SIZE`
+    per connection) and replayed for an equal list until the table next
+    changes — the steady state of a connection serving the same response
+    headers over and over.
+    """
+
+    def __init__(self, *, static_only: bool = False) -> None:
+        self.static_only = static_only
+        self._table = _EncoderTable()
+        self._size_changes: list[int] = []
+        self._memo: dict[tuple, bytes] = {}
+        self._memo_generation = 0
+        self._fields: dict[tuple, bytes] = {}
+
+    @property
+    def header_table_size(self) -> int:
+        return self._table.maxsize
+
+    @header_table_size.setter
+    def header_table_size(self, value: int) -> None:
+        self._table.resize(int(value))
+        if self._table.resized:
+            self._size_changes.append(int(value))
+
+    def encode(self, headers, huffman: bool = True) -> bytes:
+        """Encode *headers* — an iterable of 2- or 3-tuples, or a ``dict``
+        — into one header block, Huffman-coding literals when *huffman*.
+
+        Pseudo-headers must already lead the iterable; only a ``dict`` is
+        reordered.
+        """
+        table = self._table
+        prefix = b''
+        if table.resized:
+            # §4.2 — size updates lead the next block; they change no
+            # entry, so they sit outside the memo.
+            prefix = b''.join([_prefixed(size, 5, 0x20)
+                               for size in self._size_changes])
+            self._size_changes = []
+            table.resized = False
+        key = None
+        if isinstance(headers, dict):
+            headers = _pseudo_first(headers)
+        elif type(headers) is list or type(headers) is tuple:
+            memo = self._memo
+            if self._memo_generation != table.generation:
+                memo.clear()
+                self._memo_generation = table.generation
+            try:
+                key = (huffman, *map(tuple, headers))
+                block = memo.get(key)
+            except TypeError:               # an unhashable name or value
+                key = block = None
+            if block is not None:
+                return prefix + block
+        if self.static_only:
+            block = self._encode_static(headers, huffman)
+        else:
+            block = self._encode_indexed(headers, huffman)
+        # Only an encoding that left the table as it found it replays to
+        # the same bytes; one that inserted would now find its own entries.
+        if key is not None and table.generation == self._memo_generation:
+            if len(memo) >= ENCODE_MEMO_SIZE:
+                del memo[next(iter(memo))]
+            memo[key] = block
+        return prefix + block
+
+    def _encode_indexed(self, headers, huffman: bool) -> bytes:
+        table = self._table
+        literal = huffman_encode if huffman else None
+        block: list[bytes] = []
+        append = block.append
+        for header in headers:
+            sensitive = len(header) > 2 and bool(header[2])
+            name = _to_bytes(header[0])
+            value = _to_bytes(header[1])
+            exact = _STATIC_EXACT.get((name, value))
+            if exact is not None:
+                append(exact)
+                continue
+            index, matched = table.search(name, value)
+            if matched:
+                append(_prefixed(index, 7, 0x80))
+                continue
+            # A static name outranks a dynamic one, as in ``hpack``.
+            prefixes = _STATIC_NAME.get(name)
+            if prefixes is not None:
+                append(prefixes[sensitive])
+            elif index:
+                append(_prefixed(index, 4, 0x10) if sensitive
+                       else _prefixed(index, 6, 0x40))
+            else:
+                append(b'\x10' if sensitive else b'\x40')
+                append(_literal(name, literal))
+            append(_literal(value, literal))
+            if not sensitive:
+                table.add(name, value)
+        return b''.join(block)
+
+    def _encode_static(self, headers, huffman: bool) -> bytes:
+        cache = self._fields
+        block: list[bytes] = []
+        append = block.append
+        for header in headers:
+            key = (huffman, *header)
+            try:
+                field = cache.get(key)
+            except TypeError:
+                key = field = None
+            if field is None:
+                field = _static_field(header, huffman)
+                if key is not None:
+                    if len(cache) >= FIELD_CACHE_SIZE:
+                        del cache[next(iter(cache))]
+                    cache[key] = field
+            append(field)
+        return b''.join(block)
+
+
+def _static_field(header, huffman: bool) -> bytes:
+    """One field encoded without touching the dynamic table."""
+    sensitive = len(header) > 2 and bool(header[2])
+    name = _to_bytes(header[0])
+    value = _to_bytes(header[1])
+    exact = _STATIC_EXACT.get((name, value))
+    if exact is not None:
+        return exact
+    literal = huffman_encode if huffman else None
+    prefixes = _STATIC_NAME.get(name)
+    if prefixes is not None:
+        head = prefixes[1 if sensitive else 2]
+    else:
+        head = (b'\x10' if sensitive else b'\x00') + _literal(name, literal)
+    return head + _literal(value, literal)
+
+
+def _literal(octets: bytes, huffman) -> bytes:
+    """A §5.2 string literal, Huffman-coded when *huffman* is given."""
+    if huffman is None:
+        return _prefixed(len(octets), 7, 0x00) + octets
+    coded = huffman(octets)
+    return _prefixed(len(coded), 7, 0x80) + coded
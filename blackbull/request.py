@@ -50,12 +50,22 @@ async def read_body(receive: ASGIReceiveCallable) -> bytes:
     returned as if whole.
     """
     chunks: list[bytes] = []
+    next_chunks = getattr(receive, 'next_chunks', None)
     next_chunk = getattr(receive, 'next_chunk', None)
-    if next_chunk is not None:
+    if next_chunks is not None:
         # Native channel (BlackBull's own recipients): the chunk *is* the
-        # bytes, so nothing is built here to be taken apart again.  The
-        # ``http.request`` dict below exists for an external ASGI host, which
-        # hands us a plain callable with no native arm.
+        # bytes, so nothing is built here to be taken apart again, and each
+        # await drains every chunk already queued.  The ``http.request`` dict
+        # below exists for an external ASGI host, which hands us a plain
+        # callable with no native arm.
+        try:
+            while (batch := await next_chunks()) is not None:
+                chunks += batch
+        except ClientDisconnected:
+            # The recipient does not accumulate; the partial is ours.
+            raise ClientDisconnected(b''.join(chunks)) from None
+    elif next_chunk is not None:
+        # A one-chunk-per-call native receive (no bulk arm).
         try:
             while (chunk := await next_chunk()) is not None:
                 chunks.append(chunk)
@@ -98,10 +108,17 @@ async def stream_body(receive: ASGIReceiveCallable) -> AsyncIterator[bytes]:
     are the caller's to keep), so a truncated upload is never silently treated
     as complete.
     """
+    next_chunks = getattr(receive, 'next_chunks', None)
+    if next_chunks is not None:
+        # Native channel — see :func:`read_body`.  ``None`` ends the body;
+        # the disconnect propagates as it is raised.  A batch never holds an
+        # empty chunk.
+        while (batch := await next_chunks()) is not None:
+            for chunk in batch:
+                yield chunk
+        return
     next_chunk = getattr(receive, 'next_chunk', None)
     if next_chunk is not None:
-        # Native channel — see :func:`read_body`.  ``None`` ends the body;
-        # the disconnect propagates as it is raised.
         while (chunk := await next_chunk()) is not None:
             if chunk:
                 yield chunk
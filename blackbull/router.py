@@ -29,6 +29,7 @@ import uuid as _uuid
 import warnings
 from .di import Depends, _resolve_depends
 from .connection import stashed_connection
+from .forms import FormData, FormError, UploadFile
 from .utils import Scheme, do_nothing, is_client_error, is_server_error
 
 # RouteGroup is defined in app.py to avoid a circular import;
@@ -763,6 +764,7 @@ class _ParamKind(Enum):
     DATACLASS = 'dataclass'
     DEPENDS = 'depends'
     QUERY = 'query'
+    FORM = 'form'
     WS = 'ws'
 
 
@@ -773,12 +775,14 @@ def _handler_param_plan(fn, path_param_names: set) -> tuple:
     Returns ``(params, annotations, categories)`` where *categories* maps
     parameter name → ``(kind, payload)`` with kind one of ``'path'``,
     ``'conn'``, ``'body'``, ``'request'``, ``'dataclass'``, ``'depends'``
-    (payload: the :class:`~blackbull.di.Depends` instance), or ``'query'``
-    (payload: :class:`_QuerySpec`).  Precedence: path params first, then the
-    rejected name ``scope``, then the reserved names ``body``/``conn``
-    (``connection`` alias), then a ``Depends`` default, then
-    ``Connection`` recognition, then a dataclass body annotation; anything left
-    is a query param — the fallback category.
+    (payload: the :class:`~blackbull.di.Depends` instance), ``'form'``
+    (payload: ``None`` for the whole :class:`~blackbull.forms.FormData`, or
+    whether the :class:`~blackbull.forms.UploadFile` of that name is
+    required), or ``'query'`` (payload: :class:`_QuerySpec`).  Precedence:
+    path params first, then the rejected name ``scope``, then the reserved
+    names ``body``/``conn`` (``connection`` alias), then a ``Depends`` default,
+    then ``Connection`` recognition, then a form annotation, then a dataclass
+    body annotation; anything left is a query param — the fallback category.
 
     Raises ``TypeError`` (fail fast, at registration) for a parameter named
     ``scope``, a ``Depends`` default on a reserved/path name, a second
@@ -848,6 +852,13 @@ def _handler_param_plan(fn, path_param_names: set) -> tuple:
             # (``Request`` is a deprecated alias of ``Connection``, so both
             # annotations are the same object here), or the bare name ``request``.
             categories[name] = (_ParamKind.REQUEST, None)
+        elif ann is FormData:
+            categories[name] = (_ParamKind.FORM, None)
+        elif _unwrap_optional(ann) is UploadFile:
+            # ``file: UploadFile`` is the file field of that name; ``| None``
+            # or a default makes it optional.
+            categories[name] = (_ParamKind.FORM,
+                                ann is UploadFile and default is inspect.Parameter.empty)
         elif _is_body_dataclass_annotation(ann):
             categories[name] = (_ParamKind.DATACLASS, None)
         else:
@@ -873,14 +884,18 @@ def _handler_param_plan(fn, path_param_names: set) -> tuple:
     # name ``body`` or a dataclass-typed parameter (or both, if they're the
     # same parameter).  Trying to consume the body twice would hang the
     # second ``read_body`` call indefinitely.  A ``Request`` param does not
-    # count: it drains lazily through the same cache the wrappers use.
-    body_param_count = sum(
-        1 for kind, _ in categories.values() if kind in (_ParamKind.BODY, _ParamKind.DATACLASS))
+    # count: it drains lazily through the same cache the wrappers use.  Form
+    # params count once between them: they all share one parsed form, but
+    # the form streams the body and leaves nothing for ``body`` to buffer.
+    kinds = [kind for kind, _ in categories.values()]
+    body_param_count = (sum(1 for kind in kinds
+                            if kind in (_ParamKind.BODY, _ParamKind.DATACLASS))
+                        + (_ParamKind.FORM in kinds))
     if body_param_count > 1:
         raise TypeError(
             f"Simplified handler {fn.__name__!r}: more than one parameter would "
-            f"consume the request body.  Pick one of 'body' or a dataclass-typed "
-            f"parameter, not both."
+            f"consume the request body.  Pick one of 'body', a dataclass-typed "
+            f"parameter, or form parameters (FormData / UploadFile)."
         )
 
     return params, annotations, categories
@@ -1209,86 +1224,114 @@ async def _ws_reject(ws, detail: str) -> None:
 
 def _make_extended_wrapper(fn, annotations: dict, plan: tuple, depends_plan: tuple,
                            converters: dict | None):
-    """Build the per-request closure for handlers that use query params and/or Depends.
+    """Build the per-request closure for handlers that use query params, form
+    params and/or Depends.
 
     Registration-time only (called once per route from ``_adapt_handler``), so
     this factory adds zero per-request calls; the closure it returns runs per
     request and is intentionally NOT extracted further (hot-path policy).
     """
     has_query = any(kind is _ParamKind.QUERY for _, kind, _ in plan)
+    has_form = any(kind is _ParamKind.FORM for _, kind, _ in plan)
     fn_name = fn.__name__
     is_async = inspect.iscoroutinefunction(fn)
 
     @wraps(fn)
     async def _extended_wrapper(conn, receive, send):
         conn = _conn_of(conn, receive)
-        kwargs: dict = {}
-        if has_query:
-            raw_qs = conn.query_string or b''
-            query_values = (
-                dict(parse_qsl(raw_qs.decode('latin-1'), keep_blank_values=True))
-                if raw_qs else {})
-        for name, kind, payload in plan:
-            match kind:
-                case _ParamKind.QUERY:
-                    raw = query_values.get(name, _QUERY_MISSING)
-                    if raw is _QUERY_MISSING:
-                        if payload.required:
-                            raise HTTPException(
-                                HTTPStatus.BAD_REQUEST,
-                                f'missing required query parameter {name!r} '
-                                f'for handler {fn_name!r}')
-                        kwargs[name] = payload.default
-                    else:
+        try:
+            kwargs: dict = {}
+            if has_query:
+                raw_qs = conn.query_string or b''
+                query_values = (
+                    dict(parse_qsl(raw_qs.decode('latin-1'), keep_blank_values=True))
+                    if raw_qs else {})
+            for name, kind, payload in plan:
+                match kind:
+                    case _ParamKind.QUERY:
+                        raw = query_values.get(name, _QUERY_MISSING)
+                        if raw is _QUERY_MISSING:
+                            if payload.required:
+                                raise HTTPException(
+                                    HTTPStatus.BAD_REQUEST,
+                                    f'missing required query parameter {name!r} '
+                                    f'for handler {fn_name!r}')
+                            kwargs[name] = payload.default
+                        else:
+                            try:
+                                kwargs[name] = payload.coercer(raw)
+                            except (ValueError, TypeError) as exc:
+                                raise HTTPException(
+                                    HTTPStatus.BAD_REQUEST,
+                                    f'query parameter {name!r}: cannot coerce {raw!r} '
+                                    f'to {payload.type.__name__}',
+                                ) from exc
+                    case _ParamKind.CONN | _ParamKind.REQUEST:
+                        kwargs[name] = conn
+                    case _ParamKind.BODY:
+                        raw = await conn.body()
+                        ann = annotations.get(name, inspect.Parameter.empty)
+                        if _is_body_dataclass_annotation(ann):
+                            kwargs[name] = _decode_json_body(ann, raw, fn_name)
+                        else:
+                            kwargs[name] = raw
+                    case _ParamKind.DATACLASS:
+                        raw = await conn.body()
+                        kwargs[name] = _decode_json_body(annotations[name], raw, fn_name)
+                    case _ParamKind.FORM:
                         try:
-                            kwargs[name] = payload.coercer(raw)
-                        except (ValueError, TypeError) as exc:
+                            form = await conn.form()
+                        except FormError as exc:
+                            raise HTTPException(exc.status, str(exc)) from exc
+                        if payload is None:
+                            kwargs[name] = form
+                            continue
+                        upload = form.get(name)
+                        if upload is None:
+                            if payload:
+                                raise HTTPException(
+                                    HTTPStatus.BAD_REQUEST,
+                                    f'missing required form file {name!r} '
+                                    f'for handler {fn_name!r}')
+                        elif not isinstance(upload, UploadFile):
                             raise HTTPException(
                                 HTTPStatus.BAD_REQUEST,
-                                f'query parameter {name!r}: cannot coerce {raw!r} '
-                                f'to {payload.type.__name__}',
-                            ) from exc
-                case _ParamKind.CONN | _ParamKind.REQUEST:
-                    kwargs[name] = conn
-                case _ParamKind.BODY:
-                    raw = await conn.body()
-                    ann = annotations.get(name, inspect.Parameter.empty)
-                    if _is_body_dataclass_annotation(ann):
-                        kwargs[name] = _decode_json_body(ann, raw, fn_name)
-                    else:
-                        kwargs[name] = raw
-                case _ParamKind.DATACLASS:
-                    raw = await conn.body()
-                    kwargs[name] = _decode_json_body(annotations[name], raw, fn_name)
-                case _ParamKind.PATH:
-                    raw = conn.path_params.get(name, '')
-                    ann = annotations.get(name, inspect.Parameter.empty)
-                    if (ann is not inspect.Parameter.empty and isinstance(ann, type)
-                            and not isinstance(raw, ann)):
-                        try:
-                            kwargs[name] = ann(raw)
-                        except (ValueError, TypeError) as exc:
-                            raise TypeError(
-                                f"Path param {name!r}: cannot coerce {raw!r} to {ann.__name__}"
-                            ) from exc
-                    else:
-                        kwargs[name] = raw
-                case _:  # unreachable: plan excludes DEPENDS; only the 6 kinds above occur
-                    raise AssertionError(f'unexpected param kind {kind!r} for {name!r}')
-
-        if not depends_plan:
-            result = (await fn(**kwargs)) if is_async else fn(**kwargs)
-            await _finish_result(result, conn, receive, send, converters, fn_name)
-            return
-
-        async with AsyncExitStack() as stack:
-            cache: dict = {}
-            for name, dep in depends_plan:
-                kwargs[name] = await _resolve_depends(dep, stack, cache)
-            result = (await fn(**kwargs)) if is_async else fn(**kwargs)
-            # Send inside the stack's scope so provider teardown runs after
-            # the client has the response (LIFO on the stack).
-            await _finish_result(result, conn, receive, send, converters, fn_name)
+                                f'form field {name!r} is not a file upload')
+                        kwargs[name] = upload
+                    case _ParamKind.PATH:
+                        raw = conn.path_params.get(name, '')
+                        ann = annotations.get(name, inspect.Parameter.empty)
+                        if (ann is not inspect.Parameter.empty and isinstance(ann, type)
+                                and not isinstance(raw, ann)):
+                            try:
+                                kwargs[name] = ann(raw)
+                            except (ValueError, TypeError) as exc:
+                                raise TypeError(
+                                    f"Path param {name!r}: cannot coerce {raw!r} to {ann.__name__}"
+                                ) from exc
+                        else:
+                            kwargs[name] = raw
+                    case _:  # unreachable: plan excludes DEPENDS; only the 7 kinds above occur
+                        raise AssertionError(f'unexpected param kind {kind!r} for {name!r}')
+
+            if not depends_plan:
+                result = (await fn(**kwargs)) if is_async else fn(**kwargs)
+                await _finish_result(result, conn, receive, send, converters, fn_name)
+                return
+
+            async with AsyncExitStack() as stack:
+                cache: dict = {}
+                for name, dep in depends_plan:
+                    kwargs[name] = await _resolve_depends(dep, stack, cache)
+                result = (await fn(**kwargs)) if is_async else fn(**kwargs)
+                # Send inside the stack's scope so provider teardown runs after
+                # the client has the response (LIFO on the stack).
+                await _finish_result(result, conn, receive, send, converters, fn_name)
+        finally:
+            # Form params spool uploads to temporary files; delete them once
+            # the response is out rather than whenever the GC gets to them.
+            if has_form and conn._form is not None:
+                await conn._form.close()
 
     return _extended_wrapper
 
@@ -1314,6 +1357,11 @@ def _adapt_handler(fn, path: str, converters: dict | None = None):
       annotation → a per-request ``Request(scope, receive)`` context object.
       Its ``body()`` cache is the drain point for 'body' / dataclass params
       too, so the body is read at most once per request.
+    - Annotation is ``FormData`` → the parsed form body
+      (:meth:`~blackbull.connection.Connection.form`); annotation is
+      ``UploadFile`` (optionally ``| None``) → the uploaded file of the same
+      field name.  A malformed form is a 400 (415 if the body is not a form),
+      and spooled uploads are deleted after the response is sent.
     - Default value is ``Depends(provider)`` → the provider's value, with
       ``AsyncExitStack``-backed teardown after the response is sent.
     - Anything else → a **query param**: resolved from scope['query_string'],
@@ -1404,15 +1452,16 @@ def _adapt_handler(fn, path: str, converters: dict | None = None):
         )
 
     has_query = any(kind is _ParamKind.QUERY for kind, _ in categories.values())
+    has_form = any(kind is _ParamKind.FORM for kind, _ in categories.values())
     depends_plan = tuple(
         (n, payload) for n, (kind, payload) in categories.items() if kind is _ParamKind.DEPENDS)
 
-    if not has_query and not depends_plan:
-        # Zero-overhead pin: neither new parameter category is in play, so
-        # this handler gets the plain wrapper.
+    if not has_query and not has_form and not depends_plan:
+        # Zero-overhead pin: none of the extended parameter categories is in
+        # play, so this handler gets the plain wrapper.
         return _wrapper
 
-    # Extended wrapper — query params and/or Depends.  The plan below was
+    # Extended wrapper — query params, form params and/or Depends.  The plan below was
     # fully computed at registration; the per-request work is only what the
     # declared parameters require.
     plan = tuple((n, kind, payload) for n, (kind, payload) in categories.items()
@@ -1481,9 +1530,13 @@ def _to_tuple(value: Any) -> tuple:
 # QUERY-specific logic lives entirely inside the guard it builds, never in the
 # dispatcher.  A future feature (e.g. a rate-limit guard, other declared
 # response headers) reuses the same two hooks with no dispatcher change.
+#
+# ``_bb_route`` is not a hook but travels with them: the template the handler
+# was registered under, which the dispatcher hands to the request metrics as
+# the ``route`` label (a raw path would give every URL its own series).
 # ---------------------------------------------------------------------------
 
-_ROUTE_HOOK_ATTRS = ('_bb_response_headers', '_bb_request_guard')
+_ROUTE_HOOK_ATTRS = ('_bb_response_headers', '_bb_request_guard', '_bb_route')
 
 
 def _copy_route_hooks(dst: Callable, src: Callable) -> None:
@@ -1499,6 +1552,24 @@ def _copy_route_hooks(dst: Callable, src: Callable) -> None:
             setattr(dst, attr, value)
 
 
+def _tag_route(fn: Callable, path: 'str | re.Pattern') -> None:
+    """Record on *fn* the template it serves, for the metrics ``route`` label.
+
+    A handler registered under two templates cannot name either, so it is
+    labelled by its qualified name instead.  A callable that refuses new
+    attributes (a bound method) stays untagged and the dispatcher falls back
+    to its name.
+    """
+    template = path.pattern if isinstance(path, re.Pattern) else path
+    current = getattr(fn, '_bb_route', None)
+    if current is not None and current != template:
+        template = getattr(fn, '__qualname__', current)
+    try:
+        fn._bb_route = template
+    except AttributeError:
+        pass
+
+
 def _accept_query_hooks(media_types: Iterable[str]):
     """Build the ``(response_headers, request_guard)`` hooks for the RFC 10008
     ``accept_query`` route option.
@@ -1594,12 +1665,183 @@ class _LookupCache:
         return len(self._store)
 
 
+# Raw-pattern routes that share one compiled alternation must not reach each
+# other's groups: numbered backreferences and conditionals would, and verbose
+# mode changes how the wrapper itself parses.  Such a pattern runs on its own.
+_GROUP_REFERENCE = re.compile(r'\\[1-9]|\(\?\(')
+_GROUP_NAME = re.compile(r'(?<!\\)((?:\\\\)*)\(\?P([<=])(\w+)')
+_SCOPED_FLAGS = ((re.IGNORECASE, 'i'), (re.MULTILINE, 'm'),
+                 (re.DOTALL, 's'), (re.ASCII, 'a'))
+_LITERAL_STOP = frozenset('.^$*+?{}[]\\|()')
+
+
+def _literal_prefix(pattern: re.Pattern) -> str:
+    """The longest ``/``-terminated literal prefix every match of *pattern*
+    must start with, or ``''`` when there is none worth bucketing on.
+
+    Conservative by construction: a case-insensitive or verbose pattern, or
+    one with an alternation anywhere, has no prefix.
+    """
+    src = pattern.pattern
+    if (not isinstance(src, str) or '|' in src
+            or pattern.flags & (re.IGNORECASE | re.VERBOSE)):
+        return ''
+    if src.startswith('^'):
+        i = 1
+    elif src.startswith('\\A'):
+        i = 2
+    else:
+        i = 0
+    out: list[str] = []
+    while i < len(src):
+        c = src[i]
+        if c == '\\':
+            nxt = src[i + 1:i + 2]
+            if not nxt or nxt.isalnum():
+                break
+            out.append(nxt)
+            i += 2
+        elif c in _LITERAL_STOP:
+            break
+        else:
+            out.append(c)
+            i += 1
+        if src[i:i + 1] in ('*', '+', '?', '{'):
+            # The last literal is quantified, so it may not be there.
+            out.pop()
+            break
+    prefix = ''.join(out)
+    return prefix[:prefix.rfind('/') + 1]
+
+
+def _alternative(pattern: re.Pattern, index: int) -> str | None:
+    """*pattern*'s source wrapped to sit inside a combined alternation, its
+    named groups renamed so they cannot clash, or ``None`` when it cannot
+    share a regex safely."""
+    src = pattern.pattern
+    if (not isinstance(src, str) or pattern.flags & re.VERBOSE
+            or _GROUP_REFERENCE.search(src)):
+        return None
+    src = _GROUP_NAME.sub(lambda m: f'{m[1]}(?P{m[2]}_r{index}_{m[3]}', src)
+    flags = ''.join(c for flag, c in _SCOPED_FLAGS if pattern.flags & flag)
+    wrapped = f'(?{flags}:{src})' if flags else f'(?:{src})'
+    try:
+        check = re.compile(wrapped)
+    except re.error:
+        # An inline global flag — ``(?i)`` — is only legal at the very start.
+        return None
+    if (check.groups != pattern.groups
+            or len(check.groupindex) != len(pattern.groupindex)):
+        return None
+    return wrapped
+
+
+class _RegexRun:
+    """Raw-pattern routes matched in registration order, a run at a time.
+
+    Consecutive patterns that can share a regex are compiled into one
+    alternation, each followed by an empty sentinel group: the engine tries
+    the alternatives in order, so the first that matches is the first route
+    that would have matched, and ``m.lastindex`` — the sentinel, the last
+    group to close — names it.  A pattern that cannot be combined runs on its
+    own between the alternations.
+    """
+    __slots__ = ('_segments',)
+
+    def __init__(self, patterns: list[tuple[int, re.Pattern]]) -> None:
+        #: ``(regex, sentinels)``: *sentinels* maps ``lastindex`` to a route
+        #: index, or is that route index itself for a standalone pattern.
+        self._segments: list[tuple[re.Pattern, dict[int, int] | int]] = []
+        parts: list[str] = []
+        sentinels: dict[int, int] = {}
+        groups = 0
+        for index, pattern in patterns:
+            alt = _alternative(pattern, index)
+            if alt is None:
+                self._close(parts, sentinels)
+                parts, sentinels, groups = [], {}, 0
+                self._segments.append((pattern, index))
+                continue
+            groups += pattern.groups + 1
+            parts.append(alt + '()')
+            sentinels[groups] = index
+        self._close(parts, sentinels)
+
+    def _close(self, parts: list[str], sentinels: dict[int, int]) -> None:
+        if parts:
+            self._segments.append((re.compile('|'.join(parts)), sentinels))
+
+    def first(self, path: str) -> int:
+        """Index of the first route whose pattern matches *path*, or -1."""
+        for regex, sentinels in self._segments:
+            m = regex.match(path)
+            if m is not None:
+                if type(sentinels) is int:
+                    return sentinels
+                return sentinels[m.lastindex]
+        return -1
+
+
+class _RegexRoutes:
+    """Lookup structure over the raw ``re.Pattern`` routes.
+
+    Each route is bucketed by the ``/``-terminated literal prefix of its
+    pattern (``/legacy/v1/`` for ``^/legacy/v1/item(\\d+)$``): a path can
+    only match routes whose prefix it starts with, and slicing the path at
+    each distinct prefix length picks those buckets out with a few dict
+    lookups.  Routes
+    without a usable prefix are candidates for every path.  The candidates
+    for one set of buckets are matched by a :class:`_RegexRun`, built on
+    first use and kept, so a lookup is a handful of dict probes and one or
+    two ``match`` calls however many routes are registered.
+
+    ``first`` answers only "which route matches first"; the router's linear
+    scan takes over from that index, so method and scheme handling — and
+    which routes contribute to a 405's ``Allow`` — are exactly what they
+    were.  Rebuilt by the router whenever a raw pattern is registered.
+    """
+    __slots__ = ('entries', '_buckets', '_lengths', '_loose', '_runs')
+
+    def __init__(self, routes: dict) -> None:
+        #: ``((pattern, methods, scheme), handler)`` in registration order.
+        self.entries: list = list(routes.items())
+        self._buckets: dict[str, list[int]] = {}
+        self._loose: list[int] = []
+        for index, ((pattern, _ms, _ss), _fn) in enumerate(self.entries):
+            prefix = _literal_prefix(pattern)
+            if prefix:
+                self._buckets.setdefault(prefix, []).append(index)
+            else:
+                self._loose.append(index)
+        #: The distinct prefix lengths, shortest first: a path is probed at
+        #: these cuts only, not at every ``/`` it contains.
+        self._lengths: tuple[int, ...] = tuple(sorted({len(k) for k in self._buckets}))
+        self._runs: dict[tuple[str, ...], _RegexRun] = {}
+
+    def first(self, path: str) -> int:
+        """Index into :attr:`entries` of the first route whose pattern
+        matches *path*, or -1 when none does."""
+        keys: tuple[str, ...] = ()
+        buckets = self._buckets
+        for n in self._lengths:
+            if (key := path[:n]) in buckets:
+                keys += (key,)
+        run = self._runs.get(keys)
+        if run is None:
+            indices = sorted(self._loose
+                             + [n for key in keys for n in buckets[key]])
+            run = self._runs[keys] = _RegexRun(
+                [(n, self.entries[n][0][0]) for n in indices])
+        return run.first(path)
+
+
 # http://taichino.com/programming/1538
 class Router:
     """
     String paths live in the routing trie (sole store, including
     ``{param}`` segments); raw ``re.Pattern`` routes live in
-    ``self._raw_regex`` and are scanned only on a trie miss.
+    ``self._raw_regex`` and are consulted only on a trie miss, through a
+    :class:`_RegexRoutes` built from it on first use.
     """
     _param_pattern = re.compile(r'\{([a-zA-Z_]\w*?)(?::([a-zA-Z_]\w*?))?\}', flags=re.ASCII)
 
@@ -1614,6 +1856,9 @@ class Router:
         self._trie = _RouteTrie()
         self._string_paths: set[str] = set()  # registered string paths (for __contains__/__repr__)
         self._raw_regex: dict = {}  # raw re.Pattern routes (not compiled from string paths)
+        # Matcher over ``_raw_regex``; ``None`` until the next lookup after a
+        # raw pattern is registered.
+        self._raw_matcher: _RegexRoutes | None = None
         # Per-worker lookup cache: maps (path, method, scheme) → resolved
         # handler; cleared whenever a route is registered.  The whole caching
         # strategy — bound, eviction, LRU order — lives in ``_LookupCache`` so
@@ -1656,7 +1901,8 @@ class Router:
               placeholders become parameter segments with converter functions.
 
         If key[0] is a re.Pattern:
-            - Store it in self._raw_regex (scanned on trie miss).
+            - Store it in self._raw_regex (matched on trie miss) and drop the
+              combined matcher so the next lookup rebuilds it.
 
         When scheme is omitted it is stored as _ANY_SCHEME,
         which matches any scheme at lookup time.
@@ -1719,6 +1965,7 @@ class Router:
 
         elif isinstance(path, re.Pattern):
             self._raw_regex[(path, tuple(methods), scheme_key)] = value
+            self._raw_matcher = None
 
         else:
             logger.error(f"Unexpected type for path: {key!r}")
@@ -1733,7 +1980,7 @@ class Router:
         key: (path: str, method: str | HTTPMethod, scheme: Scheme)
 
         Uses the routing trie for O(path-depth) lookup of string-path routes,
-        then falls back to a linear scan of raw re.Pattern routes.
+        then falls back to the raw re.Pattern routes.
 
         Results are cached (up to ``cache_max`` entries) so repeated requests
         to the same (path, method, scheme) skip the trie traversal entirely
@@ -1793,8 +2040,17 @@ class Router:
                 raise MethodNotApplicable(trie_allowed)
             raise PathNotRegistered(key_path)
 
+        # The combined matcher finds the first raw pattern that matches at
+        # all — one or two ``match`` calls, not one per route — and a path no
+        # pattern matches is a 404 right there.  From that route on, the scan
+        # is the linear one: a pattern that matches with the wrong method or
+        # scheme must still add its methods to ``Allow`` and let a later
+        # route try.
+        matcher = self._raw_matcher or self._build_raw_matcher()
+        start = matcher.first(key_path)
+        candidates = matcher.entries[start:] if start >= 0 else ()
         allowed_methods: set = set(trie_allowed)
-        for (pattern, ms, ss), fn in self._raw_regex.items():
+        for (pattern, ms, ss), fn in candidates:
             m = pattern.match(key_path)
             if not m:
                 continue
@@ -1835,13 +2091,14 @@ class Router:
             return True
 
         # Check whether any raw re.Pattern route matches
-        for (pattern, *_) in self._raw_regex:
-            m = pattern.match(path)
-            if m:
-                logger.debug("%r matches %r? %r", pattern, path, m)
-                return True
+        if not self._raw_regex:
+            return False
+        matcher = self._raw_matcher or self._build_raw_matcher()
+        return matcher.first(path) >= 0
 
-        return False
+    def _build_raw_matcher(self) -> '_RegexRoutes':
+        self._raw_matcher = _RegexRoutes(self._raw_regex)
+        return self._raw_matcher
 
     def __repr__(self) -> str:
         return (
@@ -1902,6 +2159,7 @@ class Router:
 
             if hooks is not None:
                 fn._bb_response_headers, fn._bb_request_guard = hooks
+            _tag_route(fn, path)
 
             logger.debug((path, methods, scheme))
             self[(path, methods, scheme)] = fn
@@ -1949,6 +2207,7 @@ class Router:
         if accept_query is not None:
             _chain_wrapper._bb_response_headers, _chain_wrapper._bb_request_guard = \
                 _accept_query_hooks(accept_query)
+        _tag_route(_chain_wrapper, path)
 
         self[(path, methods, scheme)] = _chain_wrapper
         self._record_route(path, original_handler or fns[-1], name,
@@ -0,0 +1,169 @@
+"""Adaptive load shedding — refuse early what the worker cannot serve in time.
+
+Enabled by ``BB_SHED_TARGET_MS`` (the queueing-delay target; ``0``, the
+default, leaves it off).  :class:`~.server.ASGIServer` builds one
+:class:`AdmissionController` per process and the HTTP/1.1 and HTTP/2 actors
+ask it about every request after the head is parsed and before anything of
+the app runs, middleware included.
+
+**The signal is queueing delay.**  With shedding on, the connection's
+protocol stamps the arrival of every read (``ConnectionProtocol.arrived_at``);
+the controller is asked at dispatch, and the difference is how long the
+request sat in this process before anyone started on it: a woken actor
+waits in the ready queue behind every other callback of the iteration.  The
+controller adds the loop's current lag, measured by a timer every half
+target while requests keep coming, for the time the bytes spent in the
+kernel before the loop polled the socket.  Together they are loop lag as the
+request saw it, so a loop running more work than it can finish shows up here
+first.  Requests in flight are not counted — a stream or a long poll is old
+without anything being queued, and an age signal would take it for overload.
+
+HTTP/2 leans on the lag term alone.  The stamp belongs to the connection,
+not to a frame, and every read refreshes it, so a HEADERS frame decoded
+behind later reads looks fresh.  That costs little: the HTTP/2 actor decodes
+frames without waiting on any handler, so a stream's queue is the loop's
+ready queue, and the probe measures that.
+
+**The control law is CoDel's** (Nichols & Jacobson), in the form RPC servers
+use it: a delay under the target shows the queue drained at least once, and
+the request is admitted.  Only when the delay has stayed at or above the
+target for a whole ``BB_SHED_INTERVAL_MS`` is the worker overloaded; from
+then on a request that waited the target or longer is refused, and the
+first one under it ends the overload.  A burst that drains within the
+interval is queued, never refused; a standing queue is cut back to the
+target, which bounds the latency of what is admitted.
+
+A refusal is cheap by design — no access-log record, no middleware, no
+handler: HTTP/1.1 answers ``503`` with ``Retry-After`` (and keeps the
+connection unless the request carries a body), HTTP/2 resets the stream with
+``REFUSED_STREAM``, which tells the client the request was not processed and
+is safe to retry (RFC 9113 §8.7).  ``blackbull_requests_shed_total`` in
+``app.metrics`` counts refusals by protocol, and each overload episode logs
+one cap-hit record (``cap='shed_target'``) on ``blackbull.caps``.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+from .cap_log import log_cap_hit
+
+__all__ = ('AdmissionController',)
+
+
+class AdmissionController:
+    """CoDel admission over per-request queueing delay.
+
+    One per worker process, shared by every connection.  Loop-thread only:
+    no lock, because :meth:`admit` never awaits.
+    """
+
+    __slots__ = ('target', 'interval', 'retry_after', '_above_since',
+                 '_overloaded', '_shed', '_lag', '_probe_loop', '_probe_due',
+                 '_asked')
+
+    def __init__(self, target: float, interval: float, retry_after: int = 1,
+                 registry=None) -> None:
+        self.target = target
+        self.interval = interval
+        #: ``Retry-After`` header value for a shed HTTP/1.1 request.
+        self.retry_after = str(retry_after).encode('ascii')
+        #: When the delay last went over the target without coming back
+        #: under it; ``None`` while the queue keeps draining.
+        self._above_since: float | None = None
+        self._overloaded = False
+        #: How late the lag probe last fired — how long the loop went
+        #: without polling its sockets.
+        self._lag = 0.0
+        self._probe_loop = None
+        self._probe_due = 0.0
+        #: A stamped request was admitted or refused since the last probe.
+        self._asked = False
+        self._shed = None
+        if registry is not None:
+            self._shed = registry.counter(
+                'blackbull_requests_shed_total',
+                'Requests refused by the load shedder (BB_SHED_TARGET_MS).',
+                labels=('protocol',))
+
+    @classmethod
+    def from_settings(cls, settings, registry=None) -> 'AdmissionController | None':
+        """The controller ``BB_SHED_*`` asks for, or ``None`` when it is off."""
+        if settings.shed_target_ms <= 0:
+            return None
+        return cls(settings.shed_target_ms / 1000,
+                   settings.shed_interval_ms / 1000,
+                   settings.shed_retry_after, registry)
+
+    @property
+    def overloaded(self) -> bool:
+        """The delay has stayed above the target for a whole interval."""
+        return self._overloaded
+
+    def admit(self, arrived_at: float, protocol: str) -> bool:
+        """Whether a request whose bytes arrived at *arrived_at* may run.
+
+        *arrived_at* is a :func:`time.monotonic` stamp; ``0.0`` means the
+        reader kept none (a test double, a stream reader) and is admitted.
+        """
+        if not arrived_at:
+            return True
+        self._asked = True
+        loop = self._probe_loop
+        if loop is None or loop.is_closed():
+            self._start_probe()
+        now = time.monotonic()
+        delay = now - arrived_at + self._lag
+        if delay < self.target:
+            self._above_since = None
+            self._overloaded = False
+            return True
+        if self._above_since is None:
+            self._above_since = now
+            return True
+        if not self._overloaded:
+            if now - self._above_since < self.interval:
+                return True
+            self._overloaded = True
+            log_cap_hit('shed_target',
+                        requested=round(delay * 1000, 3),
+                        limit=round(self.target * 1000, 3),
+                        protocol=protocol)
+        if self._shed is not None:
+            self._shed.labels(protocol).inc()
+        return False
+
+    # ---- lag probe -------------------------------------------------------
+    #
+    # The arrival stamp starts when the loop reads the socket, not when the
+    # bytes landed: bytes that came in while the loop was busy waited in the
+    # kernel until the next poll, out of the stamp's sight.  A timer every
+    # half target measures how late the loop gets round to it, and that
+    # lateness is added to every delay as the kernel-side wait.  Without it
+    # the first requests read after a long iteration look fresh and end
+    # every overload episode as soon as it starts.  Started on the first
+    # stamped request, on whatever loop is running it, and stopped by the
+    # first probe that fires on time with no request asked about since the
+    # last: an idle worker arms no timer.  The next request starts it again.
+    # The server's loop-lag monitor (BB_LOOP_LAG_MS) is not reused: it rides
+    # the deadline scanner's tick, too coarse for a target of a few ms.
+
+    def _start_probe(self) -> None:
+        self._probe_loop = asyncio.get_running_loop()
+        self._lag = 0.0
+        self._schedule_probe()
+
+    def _schedule_probe(self) -> None:
+        period = self.target / 2
+        self._probe_due = self._probe_loop.time() + period
+        self._probe_loop.call_at(self._probe_due, self._probe)
+
+    def _probe(self) -> None:
+        lag = self._probe_loop.time() - self._probe_due
+        if not self._asked and lag < self.target:
+            self._probe_loop = None
+            self._lag = 0.0
+            return
+        self._asked = False
+        self._lag = max(0.0, lag)
+        self._schedule_probe()
@@ -0,0 +1,393 @@
+"""Cross-worker publish/subscribe for the pre-fork server.
+
+Under :class:`~blackbull.server.multiworker.MultiWorkerServer` each worker
+holds only its own connections, so a message published in one worker has to
+be carried to the others before their WebSocket or SSE subscribers can see
+it.  This module is that carrier, with no external broker::
+
+    from blackbull.server import bus
+
+    unsubscribe = bus.subscribe('prices', on_price)   # on_price(channel, payload)
+    bus.publish('prices', b'...')                     # every worker's on_price
+
+:func:`publish` delivers to this process's subscribers immediately and, in a
+multi-worker server, to every other worker's on their next loop turn.  In a
+single-process server it is local delivery and nothing else, so code written
+against it does not care how it is deployed.  Subscribers are plain callables
+run on the event loop; they must not block.
+
+Transport
+---------
+The master builds a :class:`WorkerBus` before forking: one ``AF_UNIX``
+``SOCK_DGRAM`` socket pair per worker.  Every worker inherits every pair.
+Worker *k* reads pair *k*'s receive end and writes to the send end of each
+other pair, so there is no relay hop through the master, which has no event
+loop to run one on.  Datagrams keep several writers from interleaving on one
+socket, and a connected pair is bounded by its send buffer rather than by
+``net.unix.max_dgram_qlen``.
+
+Publishes are coalesced per loop turn.  Records queue in the publishing
+worker and are flushed by one ``call_soon`` callback, packed into datagrams
+of up to :data:`_BATCH_BYTES`.  A burst of small messages therefore costs
+each peer one ``send`` rather than one per message.
+
+A publish may name the workers it is for (``workers=``); the others never
+see it.  A connected socket can be handed to another worker with
+:func:`send_socket` — the descriptor travels as ``SCM_RIGHTS`` on the same
+pair, in order with the records before it — and is received by the
+callback registered with :func:`accept_sockets`.
+
+Delivery is best-effort, like a full WebSocket queue under
+:class:`~blackbull.websocket.Broadcast`'s ``'drop'`` policy.  A worker whose
+receive buffer is full (stalled, or dead and awaiting respawn) loses the
+batch.  :attr:`WorkerBus.dropped` counts lost batches.  A respawned worker
+discards whatever was queued for its predecessor.
+"""
+import asyncio
+import logging
+import os
+import socket
+import struct
+from collections.abc import Callable, Iterable, Iterator
+
+logger = logging.getLogger(__name__)
+
+__all__ = ['WorkerBus', 'accept_sockets', 'attached', 'publish', 'send_socket',
+           'subscribe', 'MAX_PAYLOAD']
+
+#: Largest payload one :func:`publish` may carry.  A record travels in one
+#: datagram, and the kernel caps a datagram at the socket's send buffer.
+MAX_PAYLOAD = 64 * 1024
+
+# Record: channel length, payload length, payload kind; then the two bodies.
+_HEADER = struct.Struct('>HIB')
+_TEXT = 0
+_BYTES = 1
+
+# Records are packed into one datagram until it would pass this size.  A
+# single record larger than this travels alone.
+_BATCH_BYTES = 32 * 1024
+_MAX_DATAGRAM = _HEADER.size + 0xFFFF + MAX_PAYLOAD
+# Requested for both ends of every pair.  The kernel clamps the request to
+# ``net.core.wmem_max`` / ``rmem_max``.  The usual default clamp still fits
+# a :data:`_MAX_DATAGRAM`.
+_SOCKET_BUFFER = 4 * 1024 * 1024
+
+Subscriber = Callable[[str, str | bytes], None]
+SocketReceiver = Callable[[str, bytes, socket.socket], None]
+
+_subscribers: dict[str, list[Subscriber]] = {}
+_socket_receivers: dict[str, SocketReceiver] = {}
+# The bus this worker publishes through; None outside a multi-worker server.
+_attached: 'WorkerBus | None' = None
+
+
+def subscribe(channel: str, callback: Subscriber) -> Callable[[], None]:
+    """Call ``callback(channel, payload)`` for every message on *channel*.
+
+    Returns a function that removes the subscription.  Calling it twice is
+    harmless.
+    """
+    _subscribers.setdefault(channel, []).append(callback)
+
+    def unsubscribe() -> None:
+        callbacks = _subscribers.get(channel)
+        if callbacks is None:
+            return
+        try:
+            callbacks.remove(callback)
+        except ValueError:
+            return
+        if not callbacks:
+            del _subscribers[channel]
+
+    return unsubscribe
+
+
+def publish(channel: str, payload: str | bytes, *, local: bool = True,
+            workers: Iterable[int] | None = None) -> None:
+    """Send *payload* to every subscriber of *channel*, in every worker.
+
+    Subscribers receive the payload's own type, ``str`` or ``bytes``.
+    Subscribers in this process are called before this returns, unless
+    *local* is false.  Other workers get the message on their next loop turn;
+    with *workers*, only the workers with those ids do.
+
+    Raises ``ValueError`` for a payload over :data:`MAX_PAYLOAD` bytes, in
+    every deployment, so a message that would not cross workers fails the
+    same way in development.
+    """
+    if isinstance(payload, str):
+        kind, body = _TEXT, payload.encode('utf-8')
+    else:
+        kind, body = _BYTES, bytes(payload)
+    if len(body) > MAX_PAYLOAD:
+        raise ValueError(
+            f'bus payload is {len(body)} bytes; the limit is {MAX_PAYLOAD}')
+    if local:
+        _deliver(channel, payload)
+    if _attached is not None:
+        _attached._enqueue(channel.encode('utf-8'), kind, body,
+                           None if workers is None else tuple(workers))
+
+
+def accept_sockets(channel: str, callback: SocketReceiver) -> Callable[[], None]:
+    """Call ``callback(channel, payload, sock)`` for each socket handed over on
+    *channel* by :func:`send_socket` in another worker.
+
+    One receiver per channel; a socket nobody receives is closed.  Returns a
+    function that removes the receiver.
+    """
+    if channel in _socket_receivers:
+        raise ValueError(f'channel {channel!r} already has a socket receiver')
+    _socket_receivers[channel] = callback
+
+    def remove() -> None:
+        if _socket_receivers.get(channel) is callback:
+            del _socket_receivers[channel]
+
+    return remove
+
+
+def send_socket(worker: int, channel: str, payload: bytes,
+                sock: socket.socket) -> None:
+    """Hand a duplicate of *sock* to worker *worker*, with *payload*.
+
+    Records published earlier in this loop turn are sent first, so the
+    receiver sees them before the socket.  *sock* itself stays open here;
+    the caller closes it.  Raises ``RuntimeError`` outside a multi-worker
+    server, and ``OSError`` when the peer cannot take the datagram.
+    """
+    if _attached is None:
+        raise RuntimeError('no worker bus is attached in this process')
+    if len(payload) > MAX_PAYLOAD:
+        raise ValueError(
+            f'bus payload is {len(payload)} bytes; the limit is {MAX_PAYLOAD}')
+    _attached._send_socket(worker, channel.encode('utf-8'), bytes(payload), sock)
+
+
+def attached() -> 'WorkerBus | None':
+    """The bus this worker is attached to, or ``None`` outside one."""
+    return _attached
+
+
+def _deliver(channel: str, payload: str | bytes) -> None:
+    callbacks = _subscribers.get(channel)
+    if not callbacks:
+        return
+    # A snapshot: a callback may unsubscribe itself.
+    for callback in tuple(callbacks):
+        try:
+            callback(channel, payload)
+        except Exception:
+            logger.exception('bus subscriber %r failed on channel %r',
+                             callback, channel)
+
+
+class WorkerBus:
+    """The inter-worker transport: one datagram socket pair per worker.
+
+    Built by the master before forking, so every worker inherits every pair.
+    Each worker calls :meth:`attach` from inside its event loop.  From then
+    on, :func:`publish` in that worker reaches the others.
+    """
+
+    def __init__(self, workers: int) -> None:
+        if workers < 1:
+            raise ValueError(f'workers must be >= 1, got {workers}')
+        self._pairs: list[tuple[socket.socket, socket.socket]] = []
+        for _ in range(workers):
+            recv, send = socket.socketpair(socket.AF_UNIX, socket.SOCK_DGRAM)
+            recv.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, _SOCKET_BUFFER)
+            send.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, _SOCKET_BUFFER)
+            self._pairs.append((recv, send))
+        self._worker_id: int | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._peers: dict[int, socket.socket] = {}
+        # Records for the next flush, each with the worker ids it is for
+        # (None: every peer).  ``_targeted`` says whether any has ids.
+        self._pending: list[tuple[bytes, tuple[int, ...] | None]] = []
+        self._targeted = False
+        self._flush_scheduled = False
+        #: Batches a peer could not accept because its receive buffer was full.
+        self.dropped = 0
+
+    def __repr__(self) -> str:
+        return (f'<WorkerBus workers={len(self._pairs)} '
+                f'worker={self._worker_id}>')
+
+    @property
+    def workers(self) -> int:
+        return len(self._pairs)
+
+    @property
+    def worker_id(self) -> int | None:
+        """This process's worker id, or ``None`` before :meth:`attach`."""
+        return self._worker_id
+
+    def attach(self, worker_id: int) -> None:
+        """Make this process worker *worker_id* on the bus.
+
+        Must run on the worker's event loop.  Datagrams left over from a
+        previous holder of the slot are discarded, since they were meant for
+        connections that no longer exist.
+        """
+        global _attached
+        loop = asyncio.get_running_loop()
+        recv = self._pairs[worker_id][0]
+        recv.setblocking(False)
+        while True:
+            try:
+                _, fds, _, _ = socket.recv_fds(recv, _MAX_DATAGRAM, 1)
+            except (BlockingIOError, InterruptedError):
+                break
+            for fd in fds:
+                os.close(fd)
+        self._peers = {i: send for i, (_, send) in enumerate(self._pairs)
+                       if i != worker_id}
+        for send in self._peers.values():
+            send.setblocking(False)
+        self._worker_id = worker_id
+        self._loop = loop
+        loop.add_reader(recv.fileno(), self._on_readable, recv)
+        _attached = self
+
+    def detach(self) -> None:
+        """Stop sending and receiving; the inverse of :meth:`attach`."""
+        global _attached
+        if self._loop is not None and self._worker_id is not None:
+            self._loop.remove_reader(self._pairs[self._worker_id][0].fileno())
+        self._loop = None
+        self._worker_id = None
+        self._pending.clear()
+        self._targeted = False
+        if _attached is self:
+            _attached = None
+
+    def close(self) -> None:
+        """Close every socket.  The master calls this once its workers are gone."""
+        self.detach()
+        for recv, send in self._pairs:
+            recv.close()
+            send.close()
+
+    # ---- sending ---------------------------------------------------------
+
+    def _enqueue(self, channel: bytes, kind: int, body: bytes,
+                 workers: tuple[int, ...] | None = None) -> None:
+        if not self._peers:
+            return
+        if workers is not None:
+            workers = tuple(w for w in workers if w in self._peers)
+            if not workers:
+                return
+            self._targeted = True
+        record = _HEADER.pack(len(channel), len(body), kind) + channel + body
+        self._pending.append((record, workers))
+        if not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._loop.call_soon(self._flush)
+
+    def _flush(self) -> None:
+        self._flush_scheduled = False
+        pending, self._pending = self._pending, []
+        if not self._targeted:
+            # Every record is for every peer: batch once, send the same
+            # datagrams to each.
+            for datagram in self._batches([record for record, _ in pending]):
+                for peer in self._peers.values():
+                    self._send(peer, datagram)
+            return
+        self._targeted = False
+        for worker, peer in self._peers.items():
+            records = [record for record, workers in pending
+                       if workers is None or worker in workers]
+            for datagram in self._batches(records):
+                self._send(peer, datagram)
+
+    @staticmethod
+    def _batches(records: list[bytes]) -> Iterator[bytes]:
+        batch: list[bytes] = []
+        size = 0
+        for record in records:
+            if batch and size + len(record) > _BATCH_BYTES:
+                yield b''.join(batch)
+                batch, size = [], 0
+            batch.append(record)
+            size += len(record)
+        if batch:
+            yield b''.join(batch)
+
+    def _send(self, peer: socket.socket, datagram: bytes) -> None:
+        try:
+            peer.send(datagram)
+        except (BlockingIOError, InterruptedError):
+            self.dropped += 1
+            if self.dropped == 1 or self.dropped % 1000 == 0:
+                logger.warning(
+                    'bus: a worker is not reading — %d batch(es) dropped '
+                    'so far', self.dropped)
+        except OSError as exc:
+            self.dropped += 1
+            logger.debug('bus: send failed (%r)', exc)
+
+    def _send_socket(self, worker: int, channel: bytes, body: bytes,
+                     sock: socket.socket) -> None:
+        peer = self._peers.get(worker)
+        if peer is None:
+            raise ValueError(f'worker {worker} is not a peer of this worker')
+        if self._pending:
+            self._flush()
+        record = _HEADER.pack(len(channel), len(body), _BYTES) + channel + body
+        socket.send_fds(peer, [record], [sock.fileno()])
+
+    # ---- receiving -------------------------------------------------------
+
+    def _on_readable(self, recv: socket.socket) -> None:
+        while True:
+            try:
+                datagram, fds, _flags, _addr = socket.recv_fds(
+                    recv, _MAX_DATAGRAM, 1)
+            except (BlockingIOError, InterruptedError):
+                return
+            if fds:
+                self._dispatch_socket(datagram, fds[0])
+            else:
+                self._dispatch(datagram)
+
+    @staticmethod
+    def _dispatch_socket(datagram: bytes, fd: int) -> None:
+        # A handed-over socket travels alone: one record, one descriptor.
+        sock = socket.socket(fileno=fd)
+        channel_len, body_len, _kind = _HEADER.unpack_from(datagram)
+        pos = _HEADER.size
+        channel = datagram[pos:pos + channel_len].decode('utf-8')
+        body = datagram[pos + channel_len:pos + channel_len + body_len]
+        receiver = _socket_receivers.get(channel)
+        if receiver is None:
+            logger.warning('bus: no receiver for a socket on channel %r; '
+                           'closing it', channel)
+            sock.close()
+            return
+        try:
+            receiver(channel, body, sock)
+        except Exception:
+            logger.exception('bus socket receiver %r failed on channel %r',
+                             receiver, channel)
+            sock.close()
+
+    @staticmethod
+    def _dispatch(datagram: bytes) -> None:
+        view = memoryview(datagram)
+        pos = 0
+        end = len(datagram)
+        header = _HEADER.size
+        while pos + header <= end:
+            channel_len, body_len, kind = _HEADER.unpack_from(view, pos)
+            pos += header
+            channel = str(view[pos:pos + channel_len], 'utf-8')
+            pos += channel_len
+            body = bytes(view[pos:pos + body_len])
+            pos += body_len
+            if channel in _subscribers:
+                _deliver(channel, body.decode('utf-8') if kind == _TEXT else body)
@@ -5,6 +5,7 @@ from collections.abc import Awaitable, Callable
 
 from ..actor import Actor, Message
 from ..event_aggregator import EventAggregator
+from .admission import AdmissionController
 from .cap_log import _LazyCapHitCounter
 from .deadline import ConnectionDeadline
 from .protocol_registry import (ConnectionView, ProtocolBinding,
@@ -43,6 +44,7 @@ class ConnectionActor(Actor):
         registry: ProtocolRegistry | None = None,
         bound_binding: ProtocolBinding | None = None,
         connection_id: str = '',
+        admission: AdmissionController | None = None,
     ) -> None:
         super().__init__()
         self._reader = reader
@@ -55,6 +57,9 @@ class ConnectionActor(Actor):
         self._alpn = alpn
         self._stream_queue_depth = stream_queue_depth
         self._ws_queue_depth = ws_queue_depth
+        # BB_SHED_TARGET_MS — handed to the HTTP actor, which asks it before
+        # every dispatch; ``None`` when shedding is off.
+        self._admission = admission
         # A registry is always available: tests construct ConnectionActor with
         # positional (reader, writer, app, aggregator) and no registry, so fall
         # back to a default holding only the built-in http1/http2 bindings.
@@ -122,6 +127,7 @@ class ConnectionActor(Actor):
             alpn=self._alpn, deadline=dl, connection_id=self._connection_id,
             stream_queue_depth=self._stream_queue_depth,
             ws_queue_depth=self._ws_queue_depth,
+            admission=self._admission,
         )
 
     def _select(self, prefix: bytes, at_eof: bool,
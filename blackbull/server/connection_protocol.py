@@ -244,6 +244,27 @@ class BufferReader(AbstractReader):
         # can fill the request in one recv is the point, and re-deriving a
         # smaller offer each time round would shrink the window exactly when
         # the peer is delivering slowly.
+        if self._buf.available < n:
+            await self._await_resident(n)
+        out = self._buf.take(n)
+        self._consumed()
+        return out
+
+    async def readexactly_in_place(self, n: int, fn) -> bytes:
+        """:meth:`readexactly`, with *fn* run over the bytes first.
+
+        *fn* rewrites them inside the receive buffer (see
+        :meth:`ReadBuffer.rewrite`), so a transform such as the WebSocket
+        unmask costs no copy of its own: the one copy out is :meth:`take`'s.
+        """
+        if self._buf.available < n:
+            await self._await_resident(n)
+        self._buf.rewrite(n, fn)
+        out = self._buf.take(n)
+        self._consumed()
+        return out
+
+    async def _await_resident(self, n: int) -> None:
         while self._buf.available < n:
             if self._proto.peer_closed:
                 partial = self._buf.take(self._buf.available)
@@ -253,9 +274,6 @@ class BufferReader(AbstractReader):
                 await self.wait_for_data()
             finally:
                 self.read_offer = 0
-        out = self._buf.take(n)
-        self._consumed()
-        return out
 
     async def readuntil(self, sep: bytes = b'\n') -> bytes:
         while True:
@@ -307,12 +325,22 @@ class BufferReader(AbstractReader):
             self._consumed()
         return discarded
 
+    @property
+    def arrived_at(self) -> float:
+        """When the protocol last received bytes; see ``ConnectionProtocol``."""
+        return self._proto.arrived_at
+
     def has_buffered(self) -> bool:
         return self._buf.available > 0
 
     def buffered_len(self) -> int:
         return self._buf.available
 
+    def head_resident(self, limit: int) -> bool:
+        # The scan is resumable, so what it clears here is not scanned again
+        # by the ``read_head`` that follows.
+        return bool(self._buf.available) and self._buf.find_head_end(limit) > 0
+
     def peek(self, n: int | None = None) -> bytes:
         avail = self._buf.available
         want = avail if n is None else min(n, avail)
@@ -391,6 +419,12 @@ class ConnectionProtocol(asyncio.BufferedProtocol):
     whether a crossing pauses the peer is the Reader's call.
     """
 
+    #: :func:`time.monotonic` of the latest arrival; ``0.0`` when unstamped.
+    #: Only the load shedder reads it (:mod:`.admission`), and only the
+    #: subclass the server builds when shedding is on writes it, so the
+    #: arrival path of a server without shedding carries no clock read.
+    arrived_at = 0.0
+
     def __init__(self) -> None:
         self._rb = ReadBuffer()
         self.reader = BufferReader(self._rb, self)
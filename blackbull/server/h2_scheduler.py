@@ -0,0 +1,179 @@
+"""RFC 9218 egress scheduling for HTTP/2 DATA frames.
+
+Every stream's handler runs as its own task and writes its own DATA frames,
+so without a referee the order on the wire is whichever task the loop happened
+to resume — and a large response streamed at low urgency holds the transport
+for as long as its writes keep succeeding, while the render-blocking
+stylesheet behind it waits.
+
+:class:`PriorityScheduler` is that referee, one per connection.  A sender asks
+for the *floor* before each DATA frame and gives it back after; when the floor
+is contended it goes to the most urgent waiter:
+
+* lower ``urgency`` first (RFC 9218 §4.1: 0 is most urgent, 7 least);
+* inside one urgency, non-incremental streams are served one at a time in
+  stream-id order (§10 — a partial stylesheet is worth nothing);
+* incremental streams of that urgency take turns, one frame each, in the
+  order they asked.
+
+Flow control is honoured by never holding the floor while waiting for
+credit: a stream with no window steps aside, so a stalled stream cannot block
+one the peer is still willing to receive.
+
+The uncontended case — one stream writing, which is most connections most of
+the time — takes and returns the floor without awaiting anything.
+"""
+from __future__ import annotations
+
+import asyncio
+
+#: RFC 9218 §4.1 / §4.2 defaults for a stream that sent no ``priority``.
+DEFAULT_URGENCY = 3
+DEFAULT_INCREMENTAL = False
+
+_URGENCY_LEVELS = 8
+
+
+class PriorityScheduler:
+    """Grant DATA-frame turns across the streams of one HTTP/2 connection.
+
+    Callers follow one protocol::
+
+        waiter = scheduler.acquire(stream_id)
+        if waiter is not None:
+            await waiter            # handed the floor by a release/yield
+        ...write one frame...
+        waiter = scheduler.yield_turn(stream_id)   # between frames
+        ...
+        scheduler.release(stream_id)
+
+    A waiter that is cancelled must be passed to :meth:`abandon`, which
+    either dequeues it or — when the floor had already been handed over —
+    passes the floor on, so a reset stream cannot wedge the connection.
+    """
+
+    __slots__ = ('_holder', '_buckets', '_priority')
+
+    def __init__(self) -> None:
+        self._holder: int | None = None
+        # One ordered dict per urgency level: stream_id -> future.  Dict
+        # order is arrival order, which is what makes incremental streams
+        # round-robin — a stream that yields re-enters at the back.
+        self._buckets: list[dict[int, asyncio.Future]] = [
+            {} for _ in range(_URGENCY_LEVELS)]
+        self._priority: dict[int, tuple[int, bool]] = {}
+
+    # -- priority signals ---------------------------------------------------
+
+    def set_priority(self, stream_id: int, priority: dict) -> None:
+        """Record *stream_id*'s RFC 9218 parameters (request or PRIORITY_UPDATE).
+
+        Takes the parsed dict the rest of the server already carries
+        (``{'urgency': int, 'incremental': bool}``), already range-checked
+        by ``parse_priority_field``; the clamp below only keeps a hand-built
+        dict from indexing outside the buckets.
+        """
+        urgency = priority.get('urgency', DEFAULT_URGENCY)
+        if not isinstance(urgency, int):
+            urgency = DEFAULT_URGENCY
+        urgency = min(max(urgency, 0), _URGENCY_LEVELS - 1)
+        old_urgency = self._params(stream_id)[0]
+        self._priority[stream_id] = (
+            urgency, bool(priority.get('incremental', DEFAULT_INCREMENTAL)))
+        # A PRIORITY_UPDATE can land while the stream is queued; move it so
+        # the new urgency applies to the turn it is already waiting for.
+        if old_urgency != urgency:
+            waiter = self._buckets[old_urgency].pop(stream_id, None)
+            if waiter is not None:
+                self._buckets[urgency][stream_id] = waiter
+
+    def forget(self, stream_id: int) -> None:
+        """Drop a finished stream's state.  Safe for unknown ids."""
+        self._priority.pop(stream_id, None)
+        for bucket in self._buckets:
+            waiter = bucket.pop(stream_id, None)
+            if waiter is not None and not waiter.done():
+                waiter.cancel()
+        if self._holder == stream_id:
+            self.release(stream_id)
+
+    def _params(self, stream_id: int) -> tuple[int, bool]:
+        return self._priority.get(
+            stream_id, (DEFAULT_URGENCY, DEFAULT_INCREMENTAL))
+
+    # -- the floor ----------------------------------------------------------
+
+    def acquire(self, stream_id: int) -> asyncio.Future | None:
+        """Take the floor, or return a future that resolves when handed it."""
+        if self._holder is None:
+            self._holder = stream_id
+            return None
+        return self._enqueue(stream_id)
+
+    def release(self, stream_id: int) -> None:
+        """Give the floor back; hand it to the best waiter, if any."""
+        if self._holder != stream_id:
+            return
+        self._holder = None
+        self._hand_off()
+
+    def yield_turn(self, stream_id: int) -> asyncio.Future | None:
+        """Between frames: keep the floor unless a waiter outranks the holder.
+
+        Returns ``None`` to keep writing, or a future to await before the
+        next frame.  An incremental holder yields to any waiter at its own
+        urgency (round-robin); a non-incremental one only to a more urgent
+        stream or a lower-numbered non-incremental one.
+        """
+        urgency, incremental = self._params(stream_id)
+        for level in range(urgency + 1):
+            bucket = self._buckets[level]
+            if not bucket:
+                continue
+            if level < urgency or incremental:
+                break
+            if any(not self._params(sid)[1] and sid < stream_id
+                   for sid in bucket):
+                break
+            return None
+        else:
+            return None
+        waiter = self._enqueue(stream_id)
+        self._holder = None
+        self._hand_off()
+        return waiter
+
+    def abandon(self, stream_id: int, waiter: asyncio.Future) -> None:
+        """Clean up after a waiter whose task stopped waiting (cancelled)."""
+        if waiter.done() and not waiter.cancelled() \
+                and self._holder == stream_id:
+            self.release(stream_id)
+            return
+        bucket = self._buckets[self._params(stream_id)[0]]
+        if bucket.get(stream_id) is waiter:
+            del bucket[stream_id]
+
+    def _enqueue(self, stream_id: int) -> asyncio.Future:
+        waiter = asyncio.get_running_loop().create_future()
+        self._buckets[self._params(stream_id)[0]][stream_id] = waiter
+        return waiter
+
+    def _hand_off(self) -> None:
+        for bucket in self._buckets:
+            while bucket:
+                # Non-incremental first, lowest stream id; otherwise the
+                # longest-waiting incremental stream.
+                chosen = min(
+                    (sid for sid in bucket if not self._params(sid)[1]),
+                    default=None)
+                if chosen is None:
+                    chosen = next(iter(bucket))
+                waiter = bucket.pop(chosen)
+                # A cancelled task's future is cancelled the moment the
+                # task is, before it runs ``abandon`` — skip it rather than
+                # hand the floor to a stream that will never write.
+                if waiter.cancelled():
+                    continue
+                self._holder = chosen
+                waiter.set_result(None)
+                return
@@ -10,6 +10,7 @@ from binascii import Error as BinasciiError
 from collections.abc import Awaitable, Callable
 from hashlib import sha1
 from http import HTTPStatus
+from time import monotonic as _monotonic
 from urllib.parse import unquote
 
 from ..actor import Actor, Message
@@ -24,14 +25,14 @@ from .recipient import (CONNECTION_MUST_CLOSE, CONNECTION_NEEDS_DRAIN,
                         ReadLimitExceeded, RecipientFactory, _HEAD_END,
                         _WS_READ_INLINE)
 from .sender import AbstractWriter, SenderFactory
-from .access_log import (AccessLogRecord as _AccessLogRecord,
-                         _make_disconnect_detecting_receive,
+from .access_log import (_make_disconnect_detecting_receive,
+                         close_record as _close_record,
                          close_ws_record as _close_ws_record,
                          disconnect_events_observed as _disconnect_events_observed,
-                         emit_access_log as _emit_access_log,
-                         request_record_needed as _request_record_needed,
+                         open_record as _open_record,
                          start_record as _start_record,
                          PHASE_TRACE as _PHASE_TRACE)
+from .admission import AdmissionController
 from .cap_log import log_cap_hit
 
 logger = logging.getLogger(__name__)
@@ -670,6 +671,7 @@ class HTTP1Actor(Actor):
         ws_queue_depth: int = _WS_READ_INLINE,
         deadline: ConnectionDeadline | None = None,
         connection_id: str = '',
+        admission: AdmissionController | None = None,
     ) -> None:
         super().__init__()
         # *request* is bytes that already arrived on this connection, so they
@@ -705,6 +707,8 @@ class HTTP1Actor(Actor):
         # created on entry to ``run()`` so the production hot path and
         # the test path share the same code.
         self._deadline = deadline
+        # BB_SHED_TARGET_MS — asked before every dispatch; ``None`` when off.
+        self._admission = admission
 
     async def run(self) -> None:
         """Keep-alive loop — process requests until connection closes."""
@@ -723,6 +727,7 @@ class HTTP1Actor(Actor):
         # configuration, so re-reading the attribute once per request bought
         # nothing.
         max_body_size = cfg.max_body_size
+        pipeline_batch = cfg.pipeline_batch
         send = SenderFactory.http1(self._writer)
         # Capture loop_start at the very top
         # of each iteration so we can quantify the between-request gap
@@ -736,6 +741,8 @@ class HTTP1Actor(Actor):
         # False for the first request on the connection, True for every one
         # after it — set by the keep-alive tail at the bottom of the loop.
         keep_alive = False
+        # Responses held in the sender's current batch (BB_PIPELINE_BATCH).
+        batched = 0
         try:
             while True:
                 if _PHASE_TRACE:
@@ -883,7 +890,10 @@ class HTTP1Actor(Actor):
                     # threads the typed Connection — the WS-only extras
                     # (subprotocols, the deferred 101 responder, deflate params)
                     # live on it (``conn.subprotocols`` / ``conn._ws``), so there
-                    # is no scope dict here.
+                    # is no scope dict here.  Whatever the
+                    # pipeline held answers earlier requests, so it goes out
+                    # ahead of the 101.
+                    await send.release()
                     await self._handle_upgrade(conn)
                     return
 
@@ -920,6 +930,46 @@ class HTTP1Actor(Actor):
                         HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
                     return
 
+                # BB_SHED_TARGET_MS — a request that queued past the target
+                # while the worker is overloaded is refused here, before the
+                # access-log record, middleware or handler cost anything.
+                # Bodiless, the connection stays open: there is nothing to
+                # drain, and a reconnect is more work than the 503 saves.
+                # Whatever the pipeline held answers earlier requests, so it
+                # goes out ahead of the 503.
+                admission = self._admission
+                if admission is not None and not admission.admit(
+                        getattr(self._reader, 'arrived_at', 0.0), 'HTTP/1.1'):
+                    await send.release()
+                    if (self._declared_body_len
+                            or b'transfer-encoding' in conn.headers
+                            or not self._should_keep_alive(conn)):
+                        await self._send_overloaded(
+                            send, admission.retry_after, close=True)
+                        return
+                    await self._send_overloaded(
+                        send, admission.retry_after, close=False,
+                        head=conn.method == 'HEAD')
+                    self._request = b''
+                    keep_alive = True
+                    continue
+
+                # BB_PIPELINE_BATCH — when the next pipelined head is already
+                # buffered, hold this response in the sender and let the keep-
+                # alive tail flush the batch in one write.  Only bodiless
+                # requests join a batch: reading a body may wait on the peer,
+                # and a peer that waits for our earlier responses before it
+                # sends the body would stall against the held ones.  RFC 9112
+                # §9.3.2 leaves pipelining to idempotent methods anyway, which
+                # in practice means GET and HEAD.
+                if pipeline_batch:
+                    if (self._declared_body_len
+                            or b'transfer-encoding' in conn.headers):
+                        await send.release()
+                    elif (not send.holding and self._reader.head_resident(
+                            cfg.header_max_total)):
+                        send.hold()
+
                 # BB_REQUEST_TIMEOUT parity with the
                 # HTTP/2 path.  ``HTTP2Actor._spawn_stream_task`` wraps each
                 # stream coroutine with ``asyncio.wait_for``; the HTTP/1.1
@@ -990,6 +1040,19 @@ class HTTP1Actor(Actor):
                 if not self._should_keep_alive(conn):
                     break
 
+                # The batch ends when the buffer has no further complete head
+                # or the depth cap is reached; either way it goes out now,
+                # before the loop can wait on the peer.
+                if send.holding:
+                    batched += 1
+                    if (batched >= pipeline_batch
+                            or not self._reader.head_resident(
+                                cfg.header_max_total)):
+                        await send.release()
+                        batched = 0
+                else:
+                    batched = 0
+
                 self._request = b''
                 # Every later request re-enters the loop and reads its head the
                 # same way the first one did.  Only two things differ, and both
@@ -1008,6 +1071,12 @@ class HTTP1Actor(Actor):
             # sender directly and let the connection close; anything still
             # in flight is dropped rather than raising on a dead pipe.
             send.mark_client_gone()
+        finally:
+            # Every exit — a close, an error answer, a timeout's 408 — leaves
+            # its own response behind the ones already held, so one release
+            # here sends them all in order.
+            if send.holding:
+                await send.release()
 
     # ------------------------------------------------------------------
     # Private helpers
@@ -1020,12 +1089,35 @@ class HTTP1Actor(Actor):
         Every framing/timeout guard in ``run()`` answers the same way: a
         short body, the status line, and ``connection: close`` +
         ``content-type: text/plain`` headers.
+
+        The sender is reset first: on a keep-alive connection it still
+        carries the previous request's "response complete" guard, which
+        would drop this answer and close the connection without a status.
         """
+        send.reset_per_request_state()
         await send(
             body, status,
             [(b'connection', b'close'), (b'content-type', b'text/plain')],
         )
 
+    @staticmethod
+    async def _send_overloaded(send, retry_after: bytes, *, close: bool,
+                               head: bool = False) -> None:
+        """Answer a shed request: ``503`` with ``Retry-After`` (RFC 9110 §10.2.3).
+
+        The same plain-text shape as :meth:`_send_error_and_close`, closing
+        only when asked to.  A kept connection answering ``HEAD`` must not
+        carry the body, or the peer reads it as the next response.
+        """
+        send.reset_per_request_state()
+        send._head_mode = head
+        headers = [(b'retry-after', retry_after),
+                   (b'content-type', b'text/plain')]
+        if close:
+            headers.append((b'connection', b'close'))
+        await send(b'503 Service Unavailable', HTTPStatus.SERVICE_UNAVAILABLE,
+                   headers)
+
     def _parse(self, data: bytes) -> Connection:
         """Parse raw HTTP/1.1 request bytes into a native :class:`Connection`.
 
@@ -1522,17 +1614,11 @@ class HTTP1Actor(Actor):
         # baseline hot path — no logging, no listeners — it stays ``None``,
         # skipping a per-request allocation and the ``conn.state`` dict it
         # forces (the Connection graph's per-request objects are what the
-        # cyclic GC scans under concurrency).  ``_request_record_needed``
-        # takes ``None`` and answers correctly for it.
-        if _request_record_needed(self._aggregator):
-            log_record = _AccessLogRecord.from_conn(conn)
-            if _PHASE_TRACE:
-                log_record.phases['loop_start'] = (
-                    loop_start_perf, loop_start_cpu)
-            log_record.mark('parsed')
-            conn.state['access_log'] = log_record
-        else:
-            log_record = None
+        # cyclic GC scans under concurrency).  The request metrics do not
+        # need it: they are fed below from the sender.  The loop-entry stamps are only packed when phase tracing will read them.
+        log_record = _open_record(
+            conn, self._aggregator,
+            (loop_start_perf, loop_start_cpu) if _PHASE_TRACE else None)
 
         # Reset per-request sender state before anything writes through it.
         # The HTTP1Sender instance is shared across keep-alive requests on
@@ -1551,10 +1637,12 @@ class HTTP1Actor(Actor):
         # written before it, the interim response is dropped from request two
         # onward and the peer stalls until its own Expect timeout.  Before the
         # sender capture below attaches the record, so the interim status
-        # never lands in the one the real response owns.
+        # never lands in the one the real response owns; the status the
+        # sender kept for the request metrics is cleared for the same reason.
         if (conn.http_version != '1.0'
                 and conn.headers.get(b'expect').lower() == b'100-continue'):
             await send(b'', HTTPStatus.CONTINUE)
+            send._status = '-'
 
         # Inline access-log capture into the sender itself — avoids the
         # per-event coroutine dispatch through a wrapper (7% of CPU in the
@@ -1600,6 +1688,15 @@ class HTTP1Actor(Actor):
             )
         else:
             request_actor.bind(conn, inner_receive, send)
+        # The request metrics are fed straight from what this dispatch
+        # already holds — the route the router tagged on ``conn``, the
+        # status and byte count the sender kept — so collection builds no
+        # record.  ``None`` with ``BB_METRICS=0``.
+        metrics = (self._aggregator.request_metrics
+                   if self._aggregator is not None else None)
+        if metrics is not None:
+            metrics.started()
+            started_at = _monotonic()
         try:
             await request_actor.run()
         except asyncio.CancelledError:
@@ -1610,9 +1707,10 @@ class HTTP1Actor(Actor):
         except Exception:
             return False, inner_receive
         finally:
-            if log_record is not None:
-                log_record.mark('dispatch_done')
-                _emit_access_log(log_record)
+            if metrics is not None:
+                metrics.finished(conn._route, send._status, conn.http_version,
+                                 _monotonic() - started_at, send._sent)
+            _close_record(log_record)
         return True, inner_receive
 
     async def _read_headers(self, max_total: int) -> None:
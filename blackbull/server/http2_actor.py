@@ -9,6 +9,7 @@ import inspect
 import logging
 from collections.abc import Awaitable, Callable
 from http import HTTPStatus
+from time import monotonic as _monotonic
 from typing import Protocol, runtime_checkable
 
 from ..actor import Actor, Message
@@ -23,7 +24,9 @@ from ..protocol.stream import Stream, StreamState
 from ..connection import Connection
 from ..headers import Headers
 from .parser import parse_headers
+from .admission import AdmissionController
 from .cap_log import log_cap_hit
+from .h2_scheduler import PriorityScheduler
 from .rate_window import RateWindow
 from .recipient import (AbstractReader, IncompleteReadError,
                         HTTP2Recipient, RecipientFactory,
@@ -211,6 +214,14 @@ class StreamActor(Actor):
         self._force_asgi = force_asgi
 
     async def run(self) -> None:
+        # The request metrics, fed from the stream's own sender and the
+        # route the router tagged on ``conn`` — no record needed.  ``None``
+        # with ``BB_METRICS=0``.
+        metrics = (self._aggregator.request_metrics
+                   if self._aggregator is not None else None)
+        if metrics is not None:
+            metrics.started()
+            started_at = _monotonic()
         try:
             await RequestActor(
                 self._conn, self._receive, self._send,
@@ -233,6 +244,10 @@ class StreamActor(Actor):
             # log_record is None on the baseline hot path when nothing consumes
             # it (no access log, no request_completed listener) — the gate lives
             # at the dispatch call sites (_request_record_needed).
+            if metrics is not None:
+                send = self._send
+                metrics.finished(self._conn._route, send._status, '2',
+                                 _monotonic() - started_at, send._sent)
             _close_record(self._log_record)
 
     async def _handle(self, msg: Message) -> None:  # never reached
@@ -299,6 +314,7 @@ class HTTP2Actor(Actor):
         ssl: bool = False,
         stream_queue_depth: int = _HTTP2_STREAM_QUEUE_DEPTH,
         connection_id: str = '',
+        admission: AdmissionController | None = None,
     ) -> None:
         super().__init__()
         self._reader = reader
@@ -315,18 +331,21 @@ class HTTP2Actor(Actor):
         # constructed directly (tests), in which case that path falls back
         # to generating a fresh id.
         self._connection_id = connection_id
+        # BB_SHED_TARGET_MS — asked before every stream dispatch; ``None``
+        # when shedding is off.
+        self._admission = admission
 
         self.app = app
         self.reader = reader
 
         # HTTP/2 connection state
-        self.root_stream = Stream(0, None, 1)
-        self.factory = FrameFactory()
-        self._control_sender = SenderFactory.http2(writer, self.factory, 0)
-        self._senders: dict = {}
         # Read from env at construction so tests can override before run().
         from ..env import get_settings as _get_settings  # noqa: PLC0415
         _cfg = _get_settings()
+        self.root_stream = Stream(0, None, 1)
+        self.factory = FrameFactory(hpack_static_only=_cfg.h2_hpack_static_only)
+        self._control_sender = SenderFactory.http2(writer, self.factory, 0)
+        self._senders: dict = {}
         self.max_concurrent_streams: int = _cfg.h2_max_concurrent_streams
         self._request_timeout: float = _cfg.request_timeout
         self._frame_yield_every: int = _cfg.frame_yield_every
@@ -392,6 +411,11 @@ class HTTP2Actor(Actor):
         # created by ``make_sender`` references this one object, so N concurrent
         # streams debit a single stream-0 budget instead of N private copies.
         self._conn_window = ConnectionWindow(DEFAULT_INITIAL_WINDOW_SIZE)
+        # RFC 9218 egress scheduler: every stream sender asks it for a turn
+        # before each DATA frame, so contended output goes to the most
+        # urgent stream rather than to whichever task the loop resumed.
+        # Fed from ``_apply_priority_and_extensions`` and PRIORITY_UPDATE.
+        self.scheduler = PriorityScheduler()
         # The per-stream inbound window we advertise in SETTINGS (run() sends
         # SETTINGS_INITIAL_WINDOW_SIZE from the same settings object).  Doubles
         # as each stream recipient's byte budget under consume-based inbound
@@ -518,6 +542,7 @@ class HTTP2Actor(Actor):
                 # stream opened.  The connection window is shared, not copied.
                 initial_window=self._peer_initial_window_size,
                 flow_control_timeout=self._write_timeout,
+                scheduler=self.scheduler,
             )
             self._senders[stream_id] = sender
         return self._senders[stream_id]
@@ -718,6 +743,7 @@ class HTTP2Actor(Actor):
                 self._ws_stream_count = max(0, self._ws_stream_count - 1)
             self._stream_tasks.pop(stream_id, None)
             self._senders.pop(stream_id, None)
+            self.scheduler.forget(stream_id)
             released = self._recipients.pop(stream_id, None)
             if released is not None:
                 # Consume-based crediting: a handler that never drained its
@@ -1341,10 +1367,30 @@ class HTTP2Actor(Actor):
         the dict by reference from then on.
         """
         priority = _resolve_priority(stream, conn)
+        self.scheduler.set_priority(stream.stream_id, priority)
         conn.extensions = _build_h2_extensions(
             stream.stream_id, priority,
             self._peer_initial_window_size, self._conn_window.size)
 
+    async def _shed(self, stream: 'Stream') -> bool:
+        """Refuse *stream* when the load shedder says so (BB_SHED_TARGET_MS).
+
+        ``REFUSED_STREAM`` rather than a ``503``: it tells the client that
+        nothing of the request was processed, so it may retry it as-is, on
+        this connection or another (RFC 9113 §8.7).  Asked after the header
+        block is decoded, which HPACK state needs anyway, and before anything
+        of the app runs.  The reader's arrival stamp is the connection's
+        latest read, not this frame's, so the verdict rests on the loop-lag
+        term (see :mod:`.admission`).  The caller checks that shedding is on,
+        inline: a coroutine call per stream to learn it is off is not free.
+        """
+        if self._admission.admit(
+                getattr(self._reader, 'arrived_at', 0.0), 'HTTP/2'):
+            return False
+        await self.send_frame(
+            self.factory.rst_stream(stream.stream_id, ErrorCodes.REFUSED_STREAM))
+        return True
+
     async def _on_headers_frame(
         self,
         frame,
@@ -1413,6 +1459,9 @@ class HTTP2Actor(Actor):
             await self._handle_h2_websocket(stream, tg, log_record)
             return True
 
+        if self._admission is not None and await self._shed(stream):
+            return True
+
         # Native HTTP dispatch: the actor's state stays the Connection itself.
         # The BB_FORCE_ASGI_SCOPE compat lane (§4.3) still hands the app a pure
         # ASGI scope, derived once in ``_spawn_stream_task``.
@@ -1537,6 +1586,9 @@ class HTTP2Actor(Actor):
                 self.factory.rst_stream(stream.stream_id, ErrorCodes.REFUSED_STREAM))
             return True
 
+        if self._admission is not None and await self._shed(stream):
+            return True
+
         stream.conn = conn
         # Guard inline rather than through a predicate: a stream is a request,
         # and a method call to answer "no" cost 21 executed instructions per
@@ -0,0 +1,180 @@
+"""Event-loop lag monitor with slow-callback attribution.
+
+Enabled by ``BB_LOOP_LAG_MS`` (the stall threshold, in milliseconds; ``0``,
+the default, leaves it off).  :class:`ASGIServer.run` starts one per worker.
+
+Lag is sampled on the deadline scanner's tick (:mod:`.deadline`): the
+monitor rides the scanner's registry like any deadline, and on every tick
+it reads how late the tick fired.  That lateness is how long the loop was
+kept from its timers.  Each sample goes into
+``blackbull_event_loop_lag_seconds`` in the app's ``app.metrics``.  No timer
+or task is added to the loop: the monitor keeps the scanner that already
+exists from going quiet, and nothing more.
+
+A late tick only says *that* the loop stalled.  By the time it runs, the
+code that blocked has returned.  A watchdog thread therefore checks, every
+half threshold, whether the next tick is overdue by more than the
+threshold.  If it is, the thread takes the loop thread's current frame
+(``sys._current_frames``) and the running task at that moment, which is
+the code holding the loop.  When the late tick finally runs, the monitor
+turns that capture into one ``WARNING`` record on the ``blackbull.lag``
+logger.  The record gives the lag, the task and its coroutine, the
+connection id and route of the request being served, and the stack.
+``blackbull_event_loop_stalls_total`` counts these records.
+
+Only a stall that covers a tick is seen.  At the default 300 ms tick
+(``BB_DEADLINE_TICK_MS``), a 100 ms stall is caught about one time in
+three.  A handler that blocks again and again is caught soon enough, and
+lowering the tick raises the odds.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from . import deadline as _deadline
+
+logger = logging.getLogger('blackbull.lag')
+
+#: Innermost frames kept in a stall record's stack.
+STACK_LIMIT = 32
+
+
+class LoopLagMonitor:
+    """Samples loop lag on the scanner tick and attributes stalls.
+
+    Registered in the scanner's registry with a deadline that is always
+    due, so the scanner calls :meth:`_fire_from_scanner` on every tick and
+    never quiesces while the monitor runs.
+    """
+
+    __slots__ = ('_threshold', '_histogram', '_stalls', '_loop',
+                 '_loop_thread', '_deadline_at', '_registered', '_next_due',
+                 '_captured', '_stop', '_thread')
+
+    def __init__(self, threshold: float, registry=None) -> None:
+        self._threshold = threshold
+        self._histogram = self._stalls = None
+        if registry is not None:
+            self._histogram = registry.histogram(
+                'blackbull_event_loop_lag_seconds',
+                'How late the deadline scanner tick fired.')
+            self._stalls = registry.counter(
+                'blackbull_event_loop_stalls_total',
+                'Ticks that fired later than BB_LOOP_LAG_MS.')
+        self._loop = None
+        self._loop_thread = None
+        self._deadline_at = 0.0
+        self._registered = False
+        self._next_due = float('inf')
+        self._captured = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> None:
+        """Start sampling on the running loop.  Call from the loop thread."""
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._next_due = time.monotonic() + _deadline._TICK_S
+        _deadline._ensure_scanner_running(self._loop)
+        _deadline._Scanner._REGISTRY.add(self)
+        self._registered = True
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch,
+                                        name='bb-loop-lag', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop sampling and join the watchdog thread.  Idempotent."""
+        if self._registered:
+            _deadline._Scanner._REGISTRY.discard(self)
+            self._registered = False
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._captured = None
+
+    # ---- loop thread ----------------------------------------------------
+
+    def _fire_from_scanner(self) -> None:
+        """Invoked by the scanner on every tick."""
+        now = time.monotonic()
+        lag = max(0.0, now - self._next_due)
+        # The scanner re-arms right after this walk, one tick from now.
+        self._next_due = now + _deadline._TICK_S
+        if self._histogram is not None:
+            self._histogram.observe(lag)
+        captured, self._captured = self._captured, None
+        if lag >= self._threshold:
+            if self._stalls is not None:
+                self._stalls.inc()
+            self._report(lag, captured)
+
+    def _report(self, lag: float, captured) -> None:
+        if not logger.isEnabledFor(logging.WARNING):
+            return
+        stack, frame, task = captured if captured is not None else (None,) * 3
+        connection_id, route, path = _request_of(frame)
+        coro = task.get_coro() if task is not None else None
+        where = stack[0] if stack else None
+        logger.warning(
+            'event loop stalled for %.1f ms%s', lag * 1000,
+            f' in {where.name} ({where.filename}:{where.lineno})' if where else '',
+            extra={
+                'lag_ms': round(lag * 1000, 3),
+                'task': task.get_name() if task is not None else None,
+                'coroutine': getattr(coro, '__qualname__', None),
+                'connection_id': connection_id,
+                'route': route,
+                'path': path,
+                # Outermost first, like a traceback.
+                'stack': ([f'{f.filename}:{f.lineno} in {f.name}'
+                           for f in reversed(stack)] if stack else None),
+            })
+
+    # ---- watchdog thread ------------------------------------------------
+
+    def _watch(self) -> None:
+        poll = max(0.001, self._threshold / 2)
+        while not self._stop.wait(poll):
+            if self._captured is not None:
+                continue                    # one capture per stall
+            if time.monotonic() - self._next_due < self._threshold:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            try:
+                task = asyncio.current_task(self._loop)
+            except RuntimeError:
+                task = None
+            # Line numbers are read now, while the frames are where the loop
+            # is stuck; by the time the tick runs they have moved on.
+            stack = traceback.StackSummary.extract(
+                traceback.walk_stack(frame), limit=STACK_LIMIT,
+                lookup_lines=False)
+            self._captured = (stack, frame, task)
+
+
+def _request_of(frame) -> tuple[str | None, str | None, str | None]:
+    """``(connection id, route, path)`` of the request a stack is serving.
+
+    Runs on the loop thread, never the watchdog's: reading ``f_locals`` of
+    a frame another thread is executing is not safe.  The innermost frame
+    holding a ``conn`` with a ``connection_id`` wins.
+    """
+    while frame is not None:
+        conn = frame.f_locals.get('conn')
+        if conn is not None and hasattr(conn, 'connection_id'):
+            state = getattr(conn, 'state', None)
+            record = state.get('access_log') if state is not None else None
+            return (conn.connection_id or None,
+                    getattr(record, 'route', None),
+                    getattr(conn, 'path', None))
+        frame = frame.f_back
+    return None, None, None
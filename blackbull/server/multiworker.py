@@ -16,6 +16,13 @@ new code.  See :mod:`blackbull.server.reload`.
 The worker entry point is :func:`blackbull.server.worker.run_worker`.
 Each worker runs its own asyncio event loop and its own ASGI lifespan cycle.
 
+With more than one worker the master also builds a
+:class:`~blackbull.server.bus.WorkerBus` before forking, so
+:func:`blackbull.server.bus.publish` in any worker reaches every worker, and
+a :class:`~blackbull.metrics.MetricsArena`, so ``app.metrics`` rendered in any
+worker (or by :meth:`MultiWorkerServer.render_metrics` in the master) covers
+every worker.
+
 Usage::
 
     from blackbull.server.multiworker import MultiWorkerServer
@@ -29,6 +36,8 @@ import os
 import signal
 import time
 
+from ..metrics import MetricsArena, MetricsRegistry
+from .bus import WorkerBus
 from .recipient import _WS_READ_INLINE
 from .worker import run_worker
 from ..protocol.rsock import create_dual_stack_sockets, REUSEPORT_SUPPORTED
@@ -75,8 +84,8 @@ class MultiWorkerServer:
         self._num_workers = workers
         # Stateful non-ASGI protocol listeners (eg MQTT), bound once by the
         # master.  HTTP scales across every worker, but a stateful broker must
-        # have a single owner, so these go to worker 0 only — see
-        # ``_spawn_worker``.  The master keeps them open for the worker's
+        # have a single owner, so these go to worker 0 only unless the
+        # binding coordinates across workers itself — see ``_spawn_worker``.  The master keeps them open for the worker's
         # lifetime so a respawned worker 0 re-inherits them.
         self._protocol_sockets = list(protocol_sockets or [])
         self._max_connections = max_connections
@@ -102,6 +111,9 @@ class MultiWorkerServer:
         # pickling.  'spawn' would require the app and sockets to be picklable
         # and would re-import all modules from scratch.
         self._mp_ctx = multiprocessing.get_context('fork')
+        # Built here, before any fork, so every worker — respawns included —
+        # inherits the same socket pairs.  One worker has nobody to talk to.
+        self._bus = WorkerBus(workers) if workers > 1 else None
 
         # Per-worker sockets via SO_REUSEPORT: each worker gets its own kernel
         # accept queue so the kernel distributes connections evenly without
@@ -111,6 +123,15 @@ class MultiWorkerServer:
         # the listening sockets so they survive worker recycling and exec.
         from ..env import get_settings as _get_settings  # noqa: PLC0415
         cfg = _get_settings()
+        # Same reasoning as the bus: a scrape lands on one worker, so each
+        # worker writes its metrics into its own slot of one shared mapping
+        # and any of them can render the sum.  Only BlackBull apps have a
+        # registry to attach.
+        self._metrics_arena = (
+            MetricsArena(workers, cfg.metrics_shm_bytes)
+            if workers > 1 and isinstance(getattr(app, 'metrics', None),
+                                          MetricsRegistry)
+            else None)
         if workers > 1 and REUSEPORT_SUPPORTED and cfg.socket_reuseport and not reload:
             port = raw_sockets[0].getsockname()[1]
             # Close the master sockets BEFORE creating worker sockets.
@@ -130,6 +151,40 @@ class MultiWorkerServer:
             # all workers share the master's pre-bound sockets so the
             # master can hand them off across reload.
             self._worker_sockets = [raw_sockets] * workers
+        self._worker_protocol_sockets = self._split_protocol_sockets(
+            workers, cfg, reuseport=(workers > 1 and REUSEPORT_SUPPORTED
+                                     and cfg.socket_reuseport and not reload))
+
+    def _split_protocol_sockets(self, workers: int, cfg, *, reuseport: bool):
+        """Which protocol listeners each worker serves.
+
+        Single-owner bindings go to worker 0.  A binding registered with
+        ``all_workers=True`` is served by every worker — from a per-worker
+        SO_REUSEPORT set when HTTP uses one, else from the master's socket,
+        shared.  Returns one list (or ``None``: HTTP only) per worker.
+        """
+        per_worker: list[list] = [[] for _ in range(workers)]
+        for socks, binding in self._protocol_sockets:
+            if not getattr(binding, 'all_workers', False) or workers == 1:
+                per_worker[0].append((socks, binding))
+                continue
+            if reuseport:
+                port = socks[0].getsockname()[1]
+                for s in socks:
+                    s.close()
+                sets = [create_dual_stack_sockets(
+                            port, backlog=cfg.socket_backlog, reuseport=True,
+                            sndbuf=cfg.socket_sndbuf, rcvbuf=cfg.socket_rcvbuf,
+                            user_timeout_ms=cfg.tcp_user_timeout_ms,
+                            keepalive=False)
+                        for _ in range(workers)]
+                logger.info('SO_REUSEPORT: %r listens in all %d workers on '
+                            'port %d', binding.name, workers, port)
+            else:
+                sets = [socks] * workers
+            for worker_id, worker_socks in enumerate(sets):
+                per_worker[worker_id].append((worker_socks, binding))
+        return [owned or None for owned in per_worker]
 
     # ------------------------------------------------------------------
     # Public API
@@ -173,6 +228,20 @@ class MultiWorkerServer:
             if self._watcher is not None:
                 self._watcher.stop()
             self._shutdown_all()
+            if self._bus is not None:
+                self._bus.close()
+            if self._metrics_arena is not None:
+                self._metrics_arena.close()
+
+    def render_metrics(self) -> str:
+        """Every worker's ``app.metrics``, summed, as Prometheus text.
+
+        Empty with one worker or a non-BlackBull app, where there is no
+        arena to read.
+        """
+        if self._metrics_arena is None:
+            return ''
+        return self._metrics_arena.render()
 
     # ------------------------------------------------------------------
     # Internal helpers
@@ -180,16 +249,17 @@ class MultiWorkerServer:
 
     def _spawn_worker(self, worker_id: int):
         # Only worker 0 owns the stateful protocol listeners (MQTT, …); the
-        # rest serve HTTP only.  Worker 0 inherits the master's still-open
+        # rest serve HTTP only, plus any binding registered with
+        # ``all_workers=True``.  Workers inherit the master's still-open
         # protocol fds via fork, so a respawn after a crash re-adopts them
-        # and the broker resumes on the same port.
-        protocol_sockets = self._protocol_sockets if worker_id == 0 else None
+        # and the protocol resumes on the same port.
+        protocol_sockets = self._worker_protocol_sockets[worker_id]
         p = self._mp_ctx.Process(
             target=run_worker,
             args=(self._app, self._worker_sockets[worker_id], self._ssl_context,
                   worker_id, self._max_connections,
                   self._stream_queue_depth, self._ws_queue_depth,
-                  protocol_sockets),
+                  protocol_sockets, self._bus, self._metrics_arena),
             daemon=False,  # workers must be reaped explicitly on shutdown
             name=f'bb-worker-{worker_id}',
         )
@@ -59,9 +59,11 @@ def _build_h2_connection(method: str, path: str, raw_path: bytes,
     c._body = None
     c._body_read = False
     c._cookies = None
+    c._form = None
     c._receive = None
     c._disconnected = False
     c._ws = None
+    c._route = None
     return c
 
 
@@ -217,12 +217,20 @@ class OutboundCompressor:
     that matters here is ``server_no_context_takeover`` (we are the server),
     deciding whether to reset the deflater between messages.
     """
-    __slots__ = ('_wbits', '_reset_per_message', '_deflater')
+    __slots__ = ('_wbits', '_reset_per_message', '_deflater', '_dirty')
 
     def __init__(self, wbits: int, reset_per_message: bool):
         self._wbits = -wbits
         self._reset_per_message = reset_per_message
         self._deflater = zlib.compressobj(wbits=self._wbits, level=zlib.Z_DEFAULT_COMPRESSION)
+        # True once the deflater's window holds a message — only possible
+        # with context takeover; a per-message reset never leaves one behind.
+        self._dirty = False
+
+    @property
+    def wbits(self) -> int:
+        """The negotiated ``server_max_window_bits``."""
+        return -self._wbits
 
     def compress(self, payload: bytes) -> bytes:
         """Compress one whole message; strip the trailing 0x00 0x00 0xff 0xff per RFC 7692 §7.2.1."""
@@ -231,4 +239,32 @@ class OutboundCompressor:
             out = out[:-4]
         if self._reset_per_message:
             self._deflater = zlib.compressobj(wbits=self._wbits, level=zlib.Z_DEFAULT_COMPRESSION)
+        else:
+            self._dirty = True
+        return out
+
+    def compress_detached(self, payload: bytes) -> bytes:
+        """Compress one message with a fresh deflater, leaving ours untouched.
+
+        The output references nothing before its own first byte, so it is the
+        same bytes for every connection that negotiated this window size —
+        which is what lets a broadcast compress once for all of them.
+        """
+        deflater = zlib.compressobj(wbits=self._wbits, level=zlib.Z_DEFAULT_COMPRESSION)
+        out = deflater.compress(payload) + deflater.flush(zlib.Z_SYNC_FLUSH)
+        if out.endswith(_DEFLATE_TAIL):
+            out = out[:-4]
         return out
+
+    def drop_context(self) -> None:
+        """Forget the sliding window after a message we did not compress went out.
+
+        With context takeover the peer's inflater window now holds a message
+        — one from :meth:`compress_detached` — that our deflater never saw,
+        so a back-reference from our next message would land on the wrong
+        bytes.  A fresh deflater makes no back-references into the old window
+        at all.  Free when nothing has been compressed since the last reset.
+        """
+        if self._dirty:
+            self._deflater = zlib.compressobj(wbits=self._wbits, level=zlib.Z_DEFAULT_COMPRESSION)
+            self._dirty = False
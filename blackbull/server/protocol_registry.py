@@ -35,6 +35,7 @@ from dataclasses import dataclass
 from typing import Any
 
 from ..event_aggregator import EventAggregator
+from .admission import AdmissionController
 from .deadline import ConnectionDeadline
 from .recipient import AbstractReader, _HTTP2_STREAM_QUEUE_DEPTH, _WS_READ_INLINE
 from .sender import AbstractWriter
@@ -94,6 +95,7 @@ class ConnectionView:
     connection_id: str
     stream_queue_depth: int = _HTTP2_STREAM_QUEUE_DEPTH
     ws_queue_depth: int = _WS_READ_INLINE
+    admission: AdmissionController | None = None
 
 
 # ---------------------------------------------------------------------------
@@ -221,6 +223,7 @@ class Http2Binding(ProtocolBinding):
             peername=conn.peername, sockname=conn.sockname, ssl=conn.ssl,
             stream_queue_depth=conn.stream_queue_depth,
             connection_id=conn.connection_id,
+            admission=conn.admission,
         )
         await actor.run()
 
@@ -249,6 +252,7 @@ class Http1Binding(ProtocolBinding):
             ws_queue_depth=conn.ws_queue_depth,
             deadline=conn.deadline,
             connection_id=conn.connection_id,
+            admission=conn.admission,
         )
         await actor.run()
 
@@ -277,6 +281,7 @@ class RawBinding(ProtocolBinding):
         detector: ProtocolDetector | None = None,
         port: int | None = None,
         tls: bool = False,
+        all_workers: bool = False,
     ) -> None:
         self.name = name
         self.handler = handler
@@ -285,6 +290,10 @@ class RawBinding(ProtocolBinding):
         # Serve this binding's port through the server's TLS
         # machinery (mqtts:// and friends).  Cleartext remains the default.
         self.tls = tls
+        # Accept this binding's connections in every worker of a
+        # multi-worker server, not only worker 0.  The handler then owns
+        # any cross-worker coordination (see blackbull.server.bus).
+        self.all_workers = all_workers
 
     @property
     def detect_prefix_len(self) -> int:
@@ -347,6 +356,7 @@ class ProtocolRegistry:
         detector: ProtocolDetector | None = None,
         port: int | None = None,
         tls: bool = False,
+        all_workers: bool = False,
     ) -> RawBinding:
         """Register a non-ASGI protocol handler.  Raises on duplicate name.
 
@@ -355,11 +365,13 @@ class ProtocolRegistry:
         match the same first bytes, dispatch picks the **first registered**
         one — ``raw_bindings`` preserves insertion order.  ``tls=True`` serves
         the binding's own port through the server's TLS machinery.
+        ``all_workers=True`` serves the port from every worker of a
+        multi-worker server rather than worker 0 alone.
         """
         if name in self._ports or name in {b.name for b in self._cleartext}:
             raise ValueError(f'Protocol {name!r} already registered')
         binding = RawBinding(name, handler, detector=detector, port=port,
-                             tls=tls)
+                             tls=tls, all_workers=all_workers)
         self._ports[name] = binding
         self._detection_order = (tuple(self._ports.values())
                                  + tuple(self._cleartext))
@@ -329,6 +329,17 @@ class AbstractReader(ABC):
         """Bytes currently buffered, unconsumed.  Default 0."""
         return 0
 
+    def head_resident(self, limit: int) -> bool:
+        """True when a complete message head is already buffered.
+
+        The HTTP/1.1 actor asks this between pipelined requests to decide
+        whether the next :meth:`read_head` will return without waiting.
+        *limit* is the head budget :meth:`read_head` would be called with; a
+        head over it does not count.  Default ``False`` — a reader that cannot
+        tell only loses the batching, never correctness.
+        """
+        return False
+
     def peek(self, n: int) -> bytes:
         """Up to *n* buffered bytes without consuming them.
 
@@ -1232,6 +1243,17 @@ class HTTP1Recipient(BaseRecipient):
             self._done = True
             raise ClientDisconnected() from None
 
+    async def next_chunks(self) -> list[bytes] | None:
+        """:meth:`next_chunk` in the bulk shape of
+        :meth:`HTTP2Recipient.next_chunks`.
+
+        A batch of one: a Content-Length read already returns everything the
+        transport holds (up to ``BB_BODY_CHUNK_MAX``), and a chunked body's
+        framing has to be parsed chunk by chunk anyway.
+        """
+        chunk = await self.next_chunk()
+        return None if chunk is None else [chunk]
+
     async def __call__(self) -> dict:
         """The ASGI receive channel: the same body, encoded as event dicts.
 
@@ -1313,6 +1335,9 @@ class HTTP2Recipient(BaseRecipient):
         # ``receive()`` past END_STREAM still blocks for the disconnect event
         # exactly as it did before, rather than being handed a synthetic one.
         self._done: bool = False
+        # A disconnect ``next_chunks`` drained behind body chunks: the chunks
+        # go out first, and the next read on either channel reports it.
+        self._disconnect_pending: bool = False
         if max_body is None or min_rate is None or min_rate_grace is None:
             # Fallback for a directly-instantiated recipient (tests, and any
             # caller that is not the actor).  One recipient is built *per
@@ -1570,6 +1595,10 @@ class HTTP2Recipient(BaseRecipient):
             self._initial_consumed = True
             self._done = True
             return {'type': ASGIEvent.HTTP_REQUEST, 'body': b'', 'more_body': False}
+        if self._disconnect_pending:
+            self._disconnect_pending = False
+            self._done = True
+            return {'type': ASGIEvent.HTTP_DISCONNECT}
         item = await self._take()
         if item is _H2_DISCONNECT:
             self._done = True
@@ -1592,6 +1621,16 @@ class HTTP2Recipient(BaseRecipient):
         pops through.
         """
         item, credit = await self._ensure_queue().get()
+        await self._replay_credit(credit)
+        return item
+
+    async def _replay_credit(self, credit: int) -> None:
+        """Hand *credit* consumed octets back to the peer in one callback.
+
+        ``next_chunks`` sums the credit of every frame it drains and replays
+        it here once, so a batch costs one WINDOW_UPDATE pair rather than one
+        per frame.
+        """
         if credit and self._credit_cb is not None:
             # Decrement before the (interruptible) send so a racing
             # take_uncredited() can never double-credit; worst case a
@@ -1616,7 +1655,6 @@ class HTTP2Recipient(BaseRecipient):
                 # disconnect event is the authoritative teardown signal.
                 logger.debug('consume-time WINDOW_UPDATE replay failed',
                              exc_info=True)
-        return item
 
     async def next_chunk(self) -> bytes | None:
         """The next body chunk, or ``None`` once the stream has ended.
@@ -1629,6 +1667,9 @@ class HTTP2Recipient(BaseRecipient):
             self._initial_consumed = True
             self._done = True
             return None
+        if self._disconnect_pending:
+            self._done = True
+            raise ClientDisconnected()
         if self._done:
             return None
         item = await self._take()
@@ -1640,6 +1681,51 @@ class HTTP2Recipient(BaseRecipient):
             self._done = True
         return payload
 
+    async def next_chunks(self) -> list[bytes] | None:
+        """Every body chunk queued right now, or ``None`` once the stream ended.
+
+        The bulk form of :meth:`next_chunk`: one await for the first DATA
+        frame, then whatever else the actor has already enqueued is taken
+        without suspending again.  The consume-time credit of the whole batch
+        is replayed in one callback, so a handler that falls behind by *n*
+        frames catches up with one WINDOW_UPDATE pair instead of *n*.
+
+        The list is never empty — empty DATA frames are dropped, and a batch
+        that drained nothing but those waits for more.  A disconnect found
+        behind chunks is held back: the chunks are returned, and the next
+        call raises :class:`ClientDisconnected`.
+        """
+        if self._end_of_stream_on_headers and not self._initial_consumed:
+            self._initial_consumed = True
+            self._done = True
+            return None
+        if self._disconnect_pending:
+            self._done = True
+            raise ClientDisconnected()
+        queue = self._ensure_queue()
+        chunks: list[bytes] = []
+        while not chunks and not self._done:
+            item, credit = await queue.get()
+            while True:
+                if item is _H2_DISCONNECT:
+                    self._disconnect_pending = True
+                    break
+                payload, end_stream = item
+                if payload:
+                    chunks.append(payload)
+                if end_stream:
+                    self._done = True
+                    break
+                if queue.empty():
+                    break
+                item, more = queue.get_nowait()
+                credit += more
+            await self._replay_credit(credit)
+            if self._disconnect_pending and not chunks:
+                self._done = True
+                raise ClientDisconnected()
+        return chunks or None
+
 
 class WebSocketRecipient(BaseRecipient):
     """Reads WebSocket frames and emits ASGI ``websocket.*`` events.
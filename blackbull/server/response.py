@@ -211,7 +211,7 @@ class SettingsResponder(Responder):
                 sender.apply_settings(max_frame_size=mfs)
         # NOTE: per RFC 7540 §6.5.2, peer's SETTINGS_HEADER_TABLE_SIZE
         # constrains OUR encoder's table, not OUR decoder's. Updating the
-        # decoder here would (and did) trip hpack's InvalidTableSizeError
+        # decoder here would (and did) trip the decoder's InvalidTableSizeError
         # because the peer's encoder never asked us to resize.
         await handler.send_frame(handler.factory.settings(ack=True))
 
@@ -246,7 +246,7 @@ class PriorityResponder(Responder):
 
 
 class PriorityUpdateResponder(Responder):
-    """RFC 9218 §7.1 — receive PRIORITY_UPDATE, log the hint, do not schedule."""
+    """RFC 9218 §7.1 — receive PRIORITY_UPDATE and re-rank the stream."""
     FRAME_TYPE = FrameTypes.PRIORITY_UPDATE
 
     async def respond(self, handler) -> None:
@@ -275,6 +275,11 @@ class PriorityUpdateResponder(Responder):
             stream = handler.find_stream(self.frame.prioritized_stream_id)
         if stream is not None:
             stream.priority_hint = hint
+            # Re-rank the stream's remaining DATA frames on the egress
+            # scheduler; before dispatch this is superseded by the hint
+            # itself, which ``_resolve_priority`` prefers.
+            handler.scheduler.set_priority(
+                self.frame.prioritized_stream_id, hint)
             # Reflect a late PRIORITY_UPDATE onto an already-dispatched request.
             # ``stream.conn`` is the native Connection on every lane, and its
             # ``extensions`` dict is shared by reference with the ASGI scope the
@@ -1,11 +1,11 @@
 import asyncio
 import os
+import socket
 import time
 from abc import ABC, abstractmethod
 from http import HTTPStatus
 from inspect import iscoroutinefunction
 from email.utils import formatdate
-from itertools import chain
 from typing import NoReturn
 
 from ..protocol import hpack_fastpath
@@ -15,6 +15,7 @@ from ..protocol.frame_types import (FrameTypes, HeaderFrameFlags, DataFrameFlags
 from .cap_log import log_cap_hit
 from .constants import WSCloseCode
 from .deadline import WriteDeadline
+from .h2_scheduler import PriorityScheduler
 from .ws_codec import WSOpcode, encode_frame, encode_frame_header
 import logging
 from ..asgi import (
@@ -180,8 +181,7 @@ def build_response_headers(encoder, stream_id: int, status,
     if fast is not None:
         payload = fast + encoder.encode(fields)
     else:
-        payload = encoder.encode(
-            chain(((PseudoHeaders.STATUS, str(status)),), fields))
+        payload = encoder.encode(((PseudoHeaders.STATUS, str(status)), *fields))
 
     flags = HeaderFrameFlags.END_HEADERS.value
     if end_stream:
@@ -251,6 +251,20 @@ class AbstractWriter(ABC):
         raise NotImplementedError(
             'sendfile is not supported by this writer')
 
+    def detach_socket(self) -> socket.socket:
+        """Stop reading and return a duplicate of the connection's socket.
+
+        For handing a live connection to another process (see
+        :func:`blackbull.server.bus.send_socket`).  The caller must already
+        have consumed every buffered byte, so the ``close()`` that follows
+        drops this end without FIN or RST; whatever the peer sends next
+        waits in the kernel for the new owner.  Default implementation
+        raises ``NotImplementedError``, as does a TLS connection, whose
+        session state cannot leave this process.
+        """
+        raise NotImplementedError(
+            'detach_socket is not supported by this writer')
+
 
 class AsyncioWriter(AbstractWriter):
     """Adapts an asyncio-compatible stream to ``AbstractWriter``.
@@ -433,6 +447,15 @@ class AsyncioWriter(AbstractWriter):
             sent += n
         return sent
 
+    def detach_socket(self) -> socket.socket:
+        if self._sw.get_extra_info('ssl_object') is not None:
+            raise NotImplementedError('a TLS connection cannot be detached')
+        sock = self._sw.get_extra_info('socket')
+        if sock is None:
+            raise NotImplementedError('the transport exposes no socket')
+        self._sw.transport.pause_reading()
+        return socket.socket(fileno=os.dup(sock.fileno()))
+
 
 # ---------------------------------------------------------------------------
 # Sender hierarchy
@@ -581,7 +604,7 @@ class HTTP1Sender(BaseSender):
     __slots__ = (
         '_buffered_status', '_buffered_headers', '_chunked',
         '_expect_trailers', '_head_mode', '_log_record', '_started',
-        '_completed',
+        '_completed', '_held', '_status', '_sent',
     )
 
     def __init__(self, writer: AbstractWriter):
@@ -612,6 +635,15 @@ class HTTP1Sender(BaseSender):
         # the per-event coroutine dispatch through ``_make_capturing_send``
         # (~7% of HTTP/1.1 CPU in the profile).  When None, no capture.
         self._log_record = None
+        # The response's status and body byte count, kept whether or not a
+        # record is open: the actor feeds request metrics from these.
+        self._status: int | str = '-'
+        self._sent: int = 0
+        # Writes held back by :meth:`hold` for one batched flush; ``None``
+        # while writes go straight to the transport.  Connection state, not
+        # request state: a batch spans several pipelined requests, so
+        # ``reset_per_request_state`` leaves it alone.
+        self._held: list | None = None
 
     async def __call__(self, body: _SenderBody,
                        status: HTTPStatus = HTTPStatus.OK,
@@ -645,6 +677,8 @@ class HTTP1Sender(BaseSender):
         match body:
             case bytes():
                 h = headers if isinstance(headers, Headers) else Headers(headers)
+                self._status = int(status)
+                self._sent += len(body)
                 if self._log_record is not None:
                     self._log_record.status = int(status)
                     self._log_record.response_bytes += len(body)
@@ -670,6 +704,7 @@ class HTTP1Sender(BaseSender):
                     # terminal body before the trailers event withholds the
                     # terminal chunk (lossless full-form compat).
                     self._expect_trailers = body.expects_trailers
+                    self._status = body.status
                     if self._log_record is not None:
                         self._log_record.status = body.status
                         self._log_record.mark('start_arm_in')
@@ -706,6 +741,7 @@ class HTTP1Sender(BaseSender):
                 self._buffered_status = HTTPStatus(body.get('status', HTTPStatus.OK))
                 self._buffered_headers = Headers(list(body.get('headers', [])))
                 self._expect_trailers = bool(body.get('trailers', False))
+                self._status = body.get('status', '-')
                 if self._log_record is not None:
                     self._log_record.status = body.get('status', '-')
                     # Capture response headers
@@ -744,8 +780,10 @@ class HTTP1Sender(BaseSender):
 
     async def _handle_body_content(self, content: bytes, more_body: bool) -> None:
         """Write one body chunk — shared by the dict and native paths."""
-        if self._log_record is not None and content:
-            self._log_record.response_bytes += len(content)
+        if content:
+            self._sent += len(content)
+            if self._log_record is not None:
+                self._log_record.response_bytes += len(content)
         # Bracket the actual transport
         # write for the last body event so we can see whether the
         # 30-60 ms woff2 tail lives in middleware/handler work
@@ -789,6 +827,48 @@ class HTTP1Sender(BaseSender):
         await self._write(b'\r\n')
         self._completed = True
 
+    @property
+    def holding(self) -> bool:
+        """True while writes are being held for a batched flush."""
+        return self._held is not None
+
+    def hold(self) -> None:
+        """Hold every following write until :meth:`release`.
+
+        The HTTP/1.1 actor calls this when further pipelined requests are
+        already buffered, so their responses leave in one transport write
+        instead of one each.  Response order is the write order, so holding
+        never reorders anything.  Holding while already holding is a no-op.
+        """
+        if self._held is None:
+            self._held = []
+
+    async def release(self) -> None:
+        """Write everything held since :meth:`hold`, and stop holding.
+
+        One :meth:`BaseSender._write_many`, so the join-vs-vectored gate
+        decides how the batch goes out.  A no-op when nothing is held.
+        """
+        held, self._held = self._held, None
+        if held:
+            await BaseSender._write_many(self, held)
+
+    async def _write(self, data: bytes):
+        if self._held is None:
+            await self._guarded_write(self._writer.write, data)
+            return
+        self._held.append(data)
+        if self._chunked:
+            # A streamed response may never finish, and the responses held
+            # ahead of it must not wait for it to.
+            await self.release()
+
+    async def _write_many(self, parts) -> None:
+        if self._held is None:
+            await BaseSender._write_many(self, parts)
+            return
+        self._held.extend(parts)
+
     def reset_per_request_state(self) -> None:
         # HTTP1Sender is shared across keep-alive requests;
         # forgetting a reset silently breaks the next request's framing
@@ -802,6 +882,8 @@ class HTTP1Sender(BaseSender):
         self._completed = False
         self._head_mode = False
         self._log_record = None
+        self._status = '-'
+        self._sent = 0
 
     def _ensure_framing_headers(self, status: HTTPStatus, headers: Headers,
                                 body_len: int, more_body: bool) -> None:
@@ -908,6 +990,7 @@ class HTTP1Sender(BaseSender):
         self._buffered_status = None
         self._buffered_headers = None
 
+        self._sent += size
         if self._log_record is not None:
             self._log_record.response_bytes += size
 
@@ -916,6 +999,8 @@ class HTTP1Sender(BaseSender):
             return
 
         await self._write(head)
+        # ``sendfile`` bypasses the held writes, so they go out first.
+        await self.release()
 
         with open(path, 'rb') as f:
             try:
@@ -999,14 +1084,16 @@ class HTTP2Sender(BaseSender):
         'max_frame_size', '_window_open', '_end_stream_sent',
         '_flow_control_timeout',
         '_buffered_status', '_buffered_headers', '_expect_trailers',
-        '_buffered_body', '_auto_flush_task', '_log_record',
+        '_buffered_body', '_auto_flush_task', '_log_record', '_scheduler',
+        '_status', '_sent',
     )
 
     def __init__(self, writer: AbstractWriter, factory, stream_id: int,
                  push_callback=None,
                  conn_window: 'ConnectionWindow | None' = None,
                  initial_window: int | None = None,
-                 flow_control_timeout: float | None = None):
+                 flow_control_timeout: float | None = None,
+                 scheduler: 'PriorityScheduler | None' = None):
         super().__init__(writer)
         self._factory = factory
         self._stream_id = stream_id
@@ -1061,6 +1148,15 @@ class HTTP2Sender(BaseSender):
         # no per-event coroutine-dispatch wrapper (the H2 native seam would
         # otherwise never match the dict-shaped capturing wrapper).
         self._log_record = None
+        # Status and DATA byte count, kept with or without a record: the
+        # stream actor feeds request metrics from these.
+        self._status: int | str = '-'
+        self._sent: int = 0
+        # The connection's RFC 9218 egress scheduler (see
+        # ``h2_scheduler``).  Shared by every stream sender on the
+        # connection, like ``_conn_window``; ``None`` (the experimental
+        # client, direct instantiation in tests) writes DATA unrefereed.
+        self._scheduler = scheduler
 
     @property
     def connection_window_size(self) -> int:
@@ -1084,6 +1180,8 @@ class HTTP2Sender(BaseSender):
         self._expect_trailers = False
         self._buffered_body = None
         self._log_record = None
+        self._status = '-'
+        self._sent = 0
         # Drop the slot reference; a still-pending task from the prior request
         # is harmless — its identity guard (buffered body ``is`` its snapshot)
         # no-ops now that the buffer is cleared.
@@ -1215,6 +1313,10 @@ class HTTP2Sender(BaseSender):
         ``min(connection_window_size, stream_window_size, max_frame_size)`` bytes
         (RFC 7540 §6.9 and §4.2), waiting for WINDOW_UPDATE between chunks when
         flow-control credit is exhausted.  END_STREAM is set only on the last frame.
+
+        With a scheduler, each frame is written on the stream's turn: the
+        floor is taken before the first frame, offered up between frames to
+        any more urgent stream, and released while waiting for credit.
         """
         total = len(body)
 
@@ -1225,60 +1327,93 @@ class HTTP2Sender(BaseSender):
             await super()._write(b'\x00\x00\x00\x00' + flags.to_bytes(1, 'big') + sid_bytes)
             return
 
+        scheduler = self._scheduler
+        holding = False
         offset = 0
-        while offset < total:
-            while (self._conn_window.size <= 0 or
-                   self.stream_window_size <= 0):
-                if self._window_open is None:
-                    self._window_open = asyncio.Event()
-                self._window_open.clear()
-                # Re-check after clear(): a WINDOW_UPDATE delivered by the
-                # frame loop between the loop condition above and this
-                # clear() would have ``set()`` the event, and the clear()
-                # would then discard that wake-up.  Without this guard we
-                # would ``await`` an event no further WINDOW_UPDATE will set
-                # → permanent block (lost-wakeup race, RFC 9113 §6.9).
-                if (self._conn_window.size > 0 and
-                        self.stream_window_size > 0):
-                    break
-                # A peer that requests a large response and never opens its
-                # window parks this task forever (CVE-2019-9511's shape).
-                # ``BB_WRITE_TIMEOUT`` already bounds a stalled socket drain;
-                # this is the same question one layer up — how long may the
-                # peer take to accept what it asked for — so it is the same
-                # knob at a second enforcement point, not a new one.
-                if self._flow_control_timeout <= 0:
-                    await self._window_open.wait()
+        try:
+            while offset < total:
+                if (self._conn_window.size <= 0 or
+                        self.stream_window_size <= 0):
+                    # Never wait for credit while holding the floor: a
+                    # stream the peer has stopped reading must not block
+                    # the streams it is still reading (RFC 9218 §10).
+                    if holding:
+                        scheduler.release(self._stream_id)
+                        holding = False
+                    await self._wait_for_window()
+                if scheduler is not None:
+                    waiter = (scheduler.yield_turn(self._stream_id) if holding
+                              else scheduler.acquire(self._stream_id))
+                    holding = True
+                    if waiter is not None:
+                        try:
+                            await waiter
+                        except BaseException:
+                            scheduler.abandon(self._stream_id, waiter)
+                            holding = False
+                            raise
+
+                chunk_size = min(
+                    self._conn_window.size,
+                    self.stream_window_size,
+                    self.max_frame_size,
+                    total - offset,
+                )
+                if chunk_size <= 0:
+                    # Another stream spent the shared connection window
+                    # while this one waited for its turn.
                     continue
-                try:
-                    async with asyncio.timeout(self._flow_control_timeout):
-                        await self._window_open.wait()
-                except (asyncio.TimeoutError, TimeoutError) as exc:
-                    log_cap_hit('write_timeout',
-                                requested=self._flow_control_timeout,
-                                limit=self._flow_control_timeout,
-                                protocol='http2')
-                    raise FlowControlStalled(
-                        f'stream {self._stream_id}: peer sent no WINDOW_UPDATE '
-                        f'in {self._flow_control_timeout}s'
-                    ) from exc
-
-            chunk_size = min(
-                self._conn_window.size,
-                self.stream_window_size,
-                self.max_frame_size,
-                total - offset,
-            )
 
-            is_last = (offset + chunk_size >= total)
-            flags = DataFrameFlags.END_STREAM if (is_last and end_stream) else 0
-            chunk = body[offset:offset + chunk_size]
-            await super()._write(
-                chunk_size.to_bytes(3, 'big') + b'\x00' + flags.to_bytes(1, 'big') + sid_bytes + chunk
-            )
-            self._conn_window.size -= chunk_size
-            self.stream_window_size -= chunk_size
-            offset += chunk_size
+                is_last = (offset + chunk_size >= total)
+                flags = DataFrameFlags.END_STREAM if (is_last and end_stream) else 0
+                chunk = body[offset:offset + chunk_size]
+                await super()._write(
+                    chunk_size.to_bytes(3, 'big') + b'\x00' + flags.to_bytes(1, 'big') + sid_bytes + chunk
+                )
+                self._conn_window.size -= chunk_size
+                self.stream_window_size -= chunk_size
+                offset += chunk_size
+        finally:
+            if holding:
+                scheduler.release(self._stream_id)
+
+    async def _wait_for_window(self) -> None:
+        """Park until both flow-control windows have credit (RFC 9113 §6.9)."""
+        while (self._conn_window.size <= 0 or
+               self.stream_window_size <= 0):
+            if self._window_open is None:
+                self._window_open = asyncio.Event()
+            self._window_open.clear()
+            # Re-check after clear(): a WINDOW_UPDATE delivered by the
+            # frame loop between the loop condition above and this
+            # clear() would have ``set()`` the event, and the clear()
+            # would then discard that wake-up.  Without this guard we
+            # would ``await`` an event no further WINDOW_UPDATE will set
+            # → permanent block (lost-wakeup race, RFC 9113 §6.9).
+            if (self._conn_window.size > 0 and
+                    self.stream_window_size > 0):
+                break
+            # A peer that requests a large response and never opens its
+            # window parks this task forever (CVE-2019-9511's shape).
+            # ``BB_WRITE_TIMEOUT`` already bounds a stalled socket drain;
+            # this is the same question one layer up — how long may the
+            # peer take to accept what it asked for — so it is the same
+            # knob at a second enforcement point, not a new one.
+            if self._flow_control_timeout <= 0:
+                await self._window_open.wait()
+                continue
+            try:
+                async with asyncio.timeout(self._flow_control_timeout):
+                    await self._window_open.wait()
+            except (asyncio.TimeoutError, TimeoutError) as exc:
+                log_cap_hit('write_timeout',
+                            requested=self._flow_control_timeout,
+                            limit=self._flow_control_timeout,
+                            protocol='http2')
+                raise FlowControlStalled(
+                    f'stream {self._stream_id}: peer sent no WINDOW_UPDATE '
+                    f'in {self._flow_control_timeout}s'
+                ) from exc
 
     def window_update(self, increment: int) -> None:
         self.stream_window_size += increment
@@ -1315,8 +1450,10 @@ class HTTP2Sender(BaseSender):
         """
         # Inline access-log capture (mirrors the H1 body helper): count every
         # chunk's bytes; bracket the terminal chunk's write for phase trace.
-        if self._log_record is not None and payload:
-            self._log_record.response_bytes += len(payload)
+        if payload:
+            self._sent += len(payload)
+            if self._log_record is not None:
+                self._log_record.response_bytes += len(payload)
         if self._log_record is not None and end_stream:
             self._log_record.mark('body_arm_in')
         if self._buffered_status is not None:
@@ -1443,6 +1580,8 @@ class HTTP2Sender(BaseSender):
                     self._stream_id)
                 return
             # Inline access-log capture (mirrors the H1 bytes path).
+            self._status = int(status)
+            self._sent += len(body)
             if self._log_record is not None:
                 self._log_record.status = int(status)
                 self._log_record.response_bytes += len(body)
@@ -1499,6 +1638,7 @@ class HTTP2Sender(BaseSender):
                 self._expect_trailers = body.expects_trailers
                 # Inline access-log capture (Sprint 93 M1 — mirrors the H1
                 # native arm; no per-event capturing wrapper on this lane).
+                self._status = body.status
                 if self._log_record is not None:
                     self._log_record.status = body.status
                     self._log_record.mark('start_arm_in')
@@ -1538,6 +1678,7 @@ class HTTP2Sender(BaseSender):
                 self._expect_trailers = bool(body.get('trailers', False))
                 # Inline access-log capture (Sprint 93 M1 — mirrors the H1
                 # dict start arm).
+                self._status = body.get('status', '-')
                 if self._log_record is not None:
                     self._log_record.status = body.get('status', '-')
                     self._log_record.mark('start_arm_in')
@@ -1612,6 +1753,44 @@ class WebSocketSender(BaseSender):
             raw = self._compressor.compress(raw)
         return encode_frame_header(len(raw), opcode, rsv1=rsv1), raw
 
+    def _shared_frame(self, body: NativeWSMessage) -> tuple[bytes, bytes]:
+        """Frame a message that many connections are sent, once per shape.
+
+        ``body.frames`` is shared by every connection the message goes to.
+        It holds the encoded payload under ``'raw'`` and one framed
+        ``(header, payload)`` per deflate window size, with ``0`` for
+        uncompressed.  The first connection of each shape builds its entry
+        and the rest reuse it.
+
+        The compressed entry comes from a fresh deflater, so it does not
+        depend on this connection's compression history.  That is also why
+        the compressor must then drop its own context (see
+        :meth:`OutboundCompressor.drop_context`).  Nothing between here and
+        the writer's ``write`` call suspends, so the deflater sees messages
+        in the order the writer does.
+        """
+        frames = body.frames
+        comp = self._compressor
+        key = comp.wbits if comp is not None else 0
+        parts = frames.get(key)
+        if parts is None:
+            raw = frames.get('raw')
+            if raw is None:
+                raw = frames['raw'] = (body.text.encode('utf-8')
+                                       if body.text is not None
+                                       else body.data or b'')
+            opcode = WSOpcode.TEXT if body.text is not None else WSOpcode.BINARY
+            if comp is None:
+                parts = (encode_frame_header(len(raw), opcode), raw)
+            else:
+                payload = comp.compress_detached(raw)
+                parts = (encode_frame_header(len(payload), opcode, rsv1=True),
+                         payload)
+            frames[key] = parts
+        if comp is not None:
+            comp.drop_context()
+        return parts
+
     async def _send_close(self, code: int) -> None:
         await self._write(encode_frame(code.to_bytes(2, 'big'),
                                        opcode=WSOpcode.CLOSE))
@@ -1653,7 +1832,9 @@ class WebSocketSender(BaseSender):
         if isinstance(body, NativeWSMessage):
             match body.kind:
                 case NativeWSMessage.SEND:
-                    if body.text is not None:
+                    if body.frames is not None:
+                        await self._write_many(self._shared_frame(body))
+                    elif body.text is not None:
                         await self._write_many(self._frame_payload(
                             body.text.encode('utf-8'), WSOpcode.TEXT))
                     else:
@@ -1709,12 +1890,14 @@ class SenderFactory:
               push_callback=None,
               conn_window: 'ConnectionWindow | None' = None,
               initial_window: int | None = None,
-              flow_control_timeout: float | None = None) -> HTTP2Sender:
+              flow_control_timeout: float | None = None,
+              scheduler: 'PriorityScheduler | None' = None) -> HTTP2Sender:
         return HTTP2Sender(SenderFactory._ensure_writer(stream_writer),
                            factory, stream_id, push_callback,
                            conn_window=conn_window,
                            initial_window=initial_window,
-                           flow_control_timeout=flow_control_timeout)
+                           flow_control_timeout=flow_control_timeout,
+                           scheduler=scheduler)
 
     @staticmethod
     def websocket(stream_writer, *, compressor=None) -> WebSocketSender:
@@ -229,9 +229,19 @@ class Server:
         # work on the hot connection-burst path.
         from ..event_aggregator import EventAggregator as _EA  # noqa: PLC0415
         self._cached_dispatcher = getattr(self.app, '_dispatcher', None)
-        self._cached_aggregator = (_EA(self._cached_dispatcher)
-                                    if self._cached_dispatcher is not None
-                                    else None)
+        self._cached_aggregator = (
+            _EA(self._cached_dispatcher,
+                getattr(self.app, '_request_metrics', None))
+            if self._cached_dispatcher is not None else None)
+        # BB_SHED_TARGET_MS — one admission controller per process, asked by
+        # every HTTP actor before dispatch; ``None`` when shedding is off.
+        from ..env import get_settings as _get_settings  # noqa: PLC0415
+        from ..metrics import MetricsRegistry  # noqa: PLC0415
+        from .admission import AdmissionController  # noqa: PLC0415
+        registry = getattr(app, 'metrics', None)
+        self._admission = AdmissionController.from_settings(
+            _get_settings(),
+            registry if isinstance(registry, MetricsRegistry) else None)
 
         # Create TLS context
         if ssl_context and (certfile or keyfile):
@@ -370,7 +380,18 @@ class Server:
                     logger.exception(
                         'connection task failed', exc_info=exc)
 
-        return _ServedConnection
+        if server._admission is None:
+            return _ServedConnection
+
+        class _StampedConnection(_ServedConnection):
+            # The load shedder measures queueing delay from the latest
+            # arrival.  A subclass rather than a flag in ``buffer_updated``,
+            # so the arrival path of a server without shedding is untouched.
+            def buffer_updated(self, nbytes):
+                self.arrived_at = time.monotonic()
+                super().buffer_updated(nbytes)
+
+        return _StampedConnection
 
     async def client_connected_cb(self, reader, writer):
         """Accept callback for the shared HTTP listener."""
@@ -515,6 +536,7 @@ class Server:
                 alpn=alpn,
                 stream_queue_depth=self._stream_queue_depth,
                 ws_queue_depth=self._ws_queue_depth,
+                admission=self._admission,
                 registry=self._protocol_registry,
                 bound_binding=bound_binding,
                 connection_id=new_connection_id(),
@@ -718,6 +740,7 @@ class Server:
             servers = servers + raw_servers + raw_tls_servers
             async with LifespanManager(self.app):
                 logger.info(f'Server(s) created: {servers}')
+                lag_monitor = self._start_lag_monitor()
                 try:
                     async with asyncio.TaskGroup() as tg:
                         for srv in servers:
@@ -732,8 +755,31 @@ class Server:
                 except* Exception as eg:
                     logger.error('Server error: %s', eg)
 
+                finally:
+                    if lag_monitor is not None:
+                        lag_monitor.stop()
+
         logger.info('Server has been stopped.')
 
+    def _start_lag_monitor(self):
+        """Start the loop-lag monitor when ``BB_LOOP_LAG_MS`` is set.
+
+        Its histogram and stall counter go into ``app.metrics`` when the app
+        has one; a foreign ASGI app still gets the ``blackbull.lag`` records.
+        """
+        from ..env import get_settings as _get_settings  # noqa: PLC0415
+        threshold_ms = _get_settings().loop_lag_ms
+        if threshold_ms <= 0:
+            return None
+        from ..metrics import MetricsRegistry  # noqa: PLC0415
+        from .lag import LoopLagMonitor  # noqa: PLC0415
+        registry = getattr(self.app, 'metrics', None)
+        monitor = LoopLagMonitor(
+            threshold_ms / 1000,
+            registry if isinstance(registry, MetricsRegistry) else None)
+        monitor.start()
+        return monitor
+
     def wait_for_port(self, timeout: float = 10.0, poll_interval: float = 0.1):
         if self.port is None:
             raise RuntimeError("Server port is not set")
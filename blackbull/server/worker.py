@@ -24,7 +24,9 @@ def run_worker(app, raw_sockets, ssl_context, worker_id: int,
                max_connections: int,
                stream_queue_depth: int = 64,
                ws_queue_depth: int = _WS_READ_INLINE,
-               protocol_sockets=None) -> None:
+               protocol_sockets=None,
+               bus=None,
+               metrics_arena=None) -> None:
     """Entry point executed in each worker process.
 
     Parameters
@@ -44,7 +46,15 @@ def run_worker(app, raw_sockets, ssl_context, worker_id: int,
         broker), as ``[(socks, binding), …]``.  The master hands these to a
         single worker only (HTTP scales across all workers, but a stateful
         broker must have one owner), so this is non-empty for that worker and
-        ``None`` for the rest.
+        ``None`` for the rest — except bindings registered with
+        ``all_workers=True``, which every worker receives.
+    bus:
+        The master's :class:`~blackbull.server.bus.WorkerBus`, attached as
+        *worker_id* once the loop is running, or ``None`` with one worker.
+    metrics_arena:
+        The master's :class:`~blackbull.metrics.MetricsArena`; ``app.metrics``
+        is attached to slot *worker_id* before serving.  ``None`` with one
+        worker or an app without a registry.
     """
     # Workers should not respond to Ctrl+C directly — the master handles the
     # signal and sends SIGTERM to every worker for a coordinated shutdown.
@@ -109,6 +119,11 @@ def run_worker(app, raw_sockets, ssl_context, worker_id: int,
         if offload_mask is not None:
             asyncio.get_running_loop().set_default_executor(
                 make_offload_executor(offload_mask))
+        # Before serving, so a lifespan startup hook can already publish.
+        if bus is not None:
+            bus.attach(worker_id)
+        if metrics_arena is not None:
+            app.metrics.attach(metrics_arena, worker_id)
         await server.run()
 
     logger.info('Worker %d starting (PID %d)', worker_id, os.getpid())
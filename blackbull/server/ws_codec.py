@@ -5,6 +5,7 @@ callers (WebSocketSender, WebSocketRecipient, WebSocketSession) import the
 module-level functions directly.
 """
 import os
+import sys
 from enum import IntEnum
 from typing import NamedTuple
 
@@ -106,8 +107,101 @@ def encode_frame(payload: bytes, opcode: WSOpcode | int = WSOpcode.TEXT,
     else:
         header += bytes([mask_bit | 127]) + length.to_bytes(8, 'big')
     mask_key = os.urandom(4)
-    masked_payload = bytes(b ^ mask_key[i % 4] for i, b in enumerate(payload))
-    return header + mask_key + masked_payload
+    return header + mask_key + unmask(payload, mask_key)
+
+
+# Unmasking strategy by payload size.  Measured on CPython 3.11, µs per call
+# (bench/ws_unmask.py):
+#
+# | n | bignum XOR | ``cast('Q')`` word loop | stride-4 translate | NumPy |
+# |---|---|---|---|---|
+# | 125 B | 0.6 | 2.3 | 1.1 | 1.7 |
+# | 1 KiB | 2.4 | 11 | 1.9 | 1.6 |
+# | 16 KiB | 29 | 180 | 14 | 2.1 |
+# | 256 KiB | 640 | 2900 | 208 | 11 |
+# | 4 MiB | 9.4k | 49k | 3.5k | 380 |
+#
+# The bignum XOR widens the payload and the repeated mask into two integers
+# and converts back — three payload-sized temporaries, but the least
+# per-call setup, so it stays for small frames
+# (chat messages, control frames).  A Python-level loop over 8-byte words
+# pays the interpreter per word and loses everywhere.  What wins without
+# NumPy is doing the XOR as four table lookups: byte *i* of every 4-byte
+# group is XOR-ed with the same key byte, so each of the four stride-4
+# slices is one ``bytes.translate`` through a 256-byte table, in place.
+_TRANSLATE_MIN = 512
+# NumPy XORs 32-bit words in C; it is imported on the first payload this
+# large rather than at module import, so an app that never receives one
+# never pays for the import.
+_NUMPY_MIN = 4096
+
+_XOR_TABLES: list[bytes | None] = [None] * 256
+_np = None          # the numpy module, False once found missing, None untried
+
+
+def _xor_table(k: int) -> bytes:
+    table = _XOR_TABLES[k]
+    if table is None:
+        table = _XOR_TABLES[k] = bytes(b ^ k for b in range(256))
+    return table
+
+
+def _numpy():
+    global _np
+    if _np is None:
+        try:
+            import numpy  # noqa: PLC0415
+        except ImportError:
+            _np = False
+        else:
+            _np = numpy
+    return _np
+
+
+def unmask_into(buf: bytearray, start: int, end: int, mask: bytes) -> None:
+    """XOR ``buf[start:end]`` with the 4-byte *mask*, in place (RFC 6455 §5.3).
+
+    The span is addressed by offsets rather than taken as a ``memoryview``
+    so a reader can unmask straight in its receive buffer: strided
+    assignment through a view is an order of magnitude slower than the same
+    assignment on the ``bytearray``.  Masking is its own inverse, so this
+    also masks.
+    """
+    n = end - start
+    if n >= _NUMPY_MIN and (np := _numpy()):
+        words = n >> 2
+        if words:
+            arr = np.frombuffer(buf, dtype=np.uint32, count=words, offset=start)
+            arr ^= np.uint32(int.from_bytes(mask, sys.byteorder))
+            del arr                      # drop the export before the caller resizes
+        for i in range(start + (words << 2), end):
+            buf[i] ^= mask[(i - start) & 3]
+        return
+    for i in range(4):
+        s = start + i
+        buf[s:end:4] = buf[s:end:4].translate(_xor_table(mask[i]))
+
+
+def unmask(data: bytes, mask: bytes) -> bytes:
+    """Return *data* XOR-ed with the 4-byte *mask* (RFC 6455 §5.3)."""
+    length = len(data)
+    if length >= _TRANSLATE_MIN:
+        buf = bytearray(data)
+        unmask_into(buf, 0, length, mask)
+        return bytes(buf)
+    if length == 0:
+        return b''
+    # XOR via int arithmetic — does the work at C speed via CPython's
+    # bignum routines.  Equivalent to ``bytes(b ^ mask[i % 4] ...)`` but
+    # ~20× faster on real payload sizes; with Autobahn 12/13 fragmenting
+    # large compressed messages into hundreds of small frames, the slow
+    # comprehension dominated the read loop.
+    extended_mask = mask * ((length + 3) // 4)
+    if len(extended_mask) > length:
+        extended_mask = extended_mask[:length]
+    return (int.from_bytes(data, 'big')
+            ^ int.from_bytes(extended_mask, 'big')
+            ).to_bytes(length, 'big')
 
 
 async def read_frame_header(reader) -> WSFrameHeader:
@@ -172,8 +266,9 @@ async def read_payload(
 ) -> bytes:
     """Read the payload of a WebSocket frame from *reader*.
 
-    If *masked* is True, also read the 4-byte mask and unmask the payload.
-    Raises ``asyncio.IncompleteReadError`` on EOF.
+    If *masked* is True, also read the 4-byte mask and unmask the payload
+    (see :func:`unmask`); a reader with ``readexactly_in_place`` gets the
+    payload unmasked in its own buffer.  Raises ``asyncio.IncompleteReadError`` on EOF.
 
     When *max_length* is set and the declared payload size — resolved
     from the 16-bit or 64-bit extended-length field per RFC 6455
@@ -194,20 +289,14 @@ async def read_payload(
         return await reader.readexactly(length)
 
     mask = await reader.readexactly(4)
-    raw = await reader.readexactly(length)
-    if length == 0:
-        return raw
-    # XOR via int arithmetic — does the work at C speed via CPython's
-    # bignum routines.  Equivalent to ``bytes(b ^ mask[i % 4] ...)`` but
-    # ~20× faster on real payload sizes; with Autobahn 12/13 fragmenting
-    # large compressed messages into hundreds of small frames, the slow
-    # comprehension dominated the read loop.
-    extended_mask = mask * ((length + 3) // 4)
-    if len(extended_mask) > length:
-        extended_mask = extended_mask[:length]
-    return (int.from_bytes(raw, 'big')
-            ^ int.from_bytes(extended_mask, 'big')
-            ).to_bytes(length, 'big')
+    if length >= _TRANSLATE_MIN:
+        # Readers that own their receive buffer unmask it where it lies, so
+        # the payload is copied once — out of the buffer, already unmasked.
+        in_place = getattr(reader, 'readexactly_in_place', None)
+        if in_place is not None:
+            return await in_place(
+                length, lambda buf, start, end: unmask_into(buf, start, end, mask))
+    return unmask(await reader.readexactly(length), mask)
 
 
 async def read_frame(reader) -> tuple[int, bytes]:
@@ -26,8 +26,11 @@ Naming follows the native-surface rule: this is a *native* surface, so it is
 unprefixed and lives outside ``asgi.py``.  The ``ASGIEvent`` dicts it builds
 are the boundary representation, and stay there.
 """
+import asyncio
 import json
 import logging
+import sys
+from collections import deque
 from collections.abc import AsyncIterator, Awaitable, Callable
 from typing import Any
 
@@ -38,7 +41,7 @@ from .native import NativeWSMessage
 
 logger = logging.getLogger(__name__)
 
-__all__ = ['WebSocket', 'WebSocketDisconnect',
+__all__ = ['WebSocket', 'WebSocketDisconnect', 'Broadcast',
            'connect_consumed', 'mark_connect_consumed',
            'handshake_accepted', 'mark_handshake_accepted',
            'handshake_closed', 'mark_handshake_closed']
@@ -54,6 +57,14 @@ _NORMAL_CLOSURE = 1000
 #: what the *application* observes in that case.
 _NO_STATUS = 1005
 
+#: RFC 6455 §7.4.1 / IANA registry: "Try Again Later" — what a subscriber
+#: evicted by :class:`Broadcast`'s ``on_overflow='close'`` policy is sent.
+_TRY_AGAIN_LATER = 1013
+
+#: ``eager_start`` landed in 3.12; the supported floor is 3.11.  See the
+#: constant of the same name in ``blackbull.server.server``.
+_EAGER_TASKS = sys.version_info >= (3, 12)
+
 # ---------------------------------------------------------------------------
 # Handshake state, shared across the layers that can drive it
 # ---------------------------------------------------------------------------
@@ -556,3 +567,295 @@ class WebSocket:
             except WebSocketDisconnect:
                 return
             yield message
+
+
+# ---------------------------------------------------------------------------
+# Broadcast
+# ---------------------------------------------------------------------------
+
+class _Subscriber:
+    """One connection's membership of a :class:`Broadcast`, and its backlog."""
+
+    __slots__ = ('ws', 'channels', 'queue', 'task')
+
+    def __init__(self, ws: WebSocket) -> None:
+        self.ws = ws
+        self.channels: set[str] = set()
+        self.queue: deque[NativeWSMessage] = deque()
+        # The flush task while one is running; None when the queue is empty.
+        self.task: asyncio.Task | None = None
+
+
+class _Subscription:
+    """What :meth:`Broadcast.subscribe` returns: ``with`` it to unsubscribe on exit."""
+
+    __slots__ = ('_hub', '_ws', '_channels')
+
+    def __init__(self, hub: 'Broadcast', ws: WebSocket,
+                 channels: tuple[str, ...]) -> None:
+        self._hub = hub
+        self._ws = ws
+        self._channels = channels
+
+    def __enter__(self) -> '_Subscription':
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self._hub.unsubscribe(self._ws, *self._channels)
+
+
+class Broadcast:
+    """Named channels of WebSocket connections, with encode-once fan-out::
+
+        hub = Broadcast()
+
+        @app.route(path='/chat', scheme=Scheme.websocket)
+        async def chat(ws: WebSocket):
+            await ws.accept()
+            with hub.subscribe(ws, 'lobby'):
+                async for message in ws:
+                    hub.publish_text('lobby', message)
+
+    Sending to N connections in a loop of ``send_text`` encodes the message
+    N times, frames it N times, and — under permessage-deflate — compresses
+    it N times.  A publish instead hands every subscriber the *same* message,
+    and the server's sender frames it once per shape: once uncompressed, and
+    once per deflate window size in use.  The compressed form comes from a
+    fresh deflater, so it does not depend on any one connection's history
+    and is valid for all of them.  Connections behind middleware that
+    rewrites the send channel still get the message, encoded per connection.
+
+    Publishing never waits for a subscriber.  Each connection has a queue of
+    at most *queue_depth* messages, drained by its own task; one whose peer
+    reads too slowly to keep up meets *on_overflow*:
+
+    - ``'drop'`` — the oldest queued message is discarded to make room, and
+      :attr:`dropped` counts it.  The connection stays subscribed.
+    - ``'close'`` — the connection is unsubscribed and closed with 1013
+      (Try Again Later).
+
+    A connection that has closed, or whose peer has gone, is unsubscribed the
+    next time a message is published to it.  Use the ``with`` form (or
+    :meth:`unsubscribe`) to leave as soon as the handler does.
+
+    An unnamed hub is one process's: with ``workers > 1`` each worker has
+    its own.  Give it a *name* and it spans workers.  A publish in any worker
+    reaches the subscribers in all of them, carried between workers by
+    :mod:`blackbull.server.bus`.  Each worker still encodes once for its own
+    subscribers.  A named hub's messages are limited to the bus's
+    ``MAX_PAYLOAD`` (64 KiB), and its publish methods count only this
+    worker's subscribers.
+    """
+
+    def __init__(self, name: str | None = None, *, queue_depth: int = 64,
+                 on_overflow: str = 'drop') -> None:
+        if queue_depth < 1:
+            raise ValueError(f'queue_depth must be at least 1, got {queue_depth}')
+        if on_overflow not in ('drop', 'close'):
+            raise ValueError(
+                f"on_overflow must be 'drop' or 'close', got {on_overflow!r}")
+        self._queue_depth = queue_depth
+        self._on_overflow = on_overflow
+        self._channels: dict[str, set[_Subscriber]] = {}
+        self._subscribers: dict[WebSocket, _Subscriber] = {}
+        # Close tasks for evicted subscribers, held so they are not collected
+        # mid-flight.
+        self._closing: set[asyncio.Task] = set()
+        #: Messages discarded under ``on_overflow='drop'``, across all channels.
+        self.dropped = 0
+        self._bus = None
+        if name is not None:
+            # Deferred: the bus is part of the server stack, which importing
+            # this module must not load.  A named hub is one that is served
+            # by it anyway.
+            from .server import bus as _bus  # noqa: PLC0415
+            self._bus = _bus
+        self._prefix = f'{name}:'
+        # Bus subscriptions, one per channel with a member in this process —
+        # so a worker is only woken for channels it has someone to send to.
+        self._bus_unsubscribe: dict[str, Callable[[], None]] = {}
+
+    def __repr__(self) -> str:
+        return (f'<Broadcast channels={len(self._channels)} '
+                f'subscribers={len(self._subscribers)}>')
+
+    # ---- membership ------------------------------------------------------
+
+    def subscribe(self, ws: WebSocket, *channels: str) -> _Subscription:
+        """Add *ws* to each of *channels*.
+
+        The connection must be accepted.  The return value unsubscribes from
+        the same channels when used as a context manager, and can be ignored
+        otherwise.
+        """
+        if not channels:
+            raise TypeError('Broadcast.subscribe() needs at least one channel')
+        if not ws.accepted:
+            raise RuntimeError(
+                'WebSocket is not accepted yet — await ws.accept() before '
+                'subscribing it to a Broadcast.')
+        sub = self._subscribers.get(ws)
+        if sub is None:
+            sub = self._subscribers[ws] = _Subscriber(ws)
+        for channel in channels:
+            sub.channels.add(channel)
+            members = self._channels.get(channel)
+            if members is None:
+                members = self._channels[channel] = set()
+                if self._bus is not None:
+                    self._bus_unsubscribe[channel] = self._bus.subscribe(
+                        self._prefix + channel, self._from_bus)
+            members.add(sub)
+        return _Subscription(self, ws, channels)
+
+    def unsubscribe(self, ws: WebSocket, *channels: str) -> None:
+        """Remove *ws* from *channels*, or from every channel when none are named.
+
+        Messages already queued for it are still sent unless this leaves it
+        in no channel at all.  Unknown connections and channels are ignored.
+        """
+        sub = self._subscribers.get(ws)
+        if sub is None:
+            return
+        if channels:
+            for channel in channels:
+                self._leave(sub, channel)
+        if not channels or not sub.channels:
+            self._discard(sub)
+
+    def subscriber_count(self, channel: str) -> int:
+        """How many connections are subscribed to *channel*."""
+        return len(self._channels.get(channel, ()))
+
+    def _leave(self, sub: _Subscriber, channel: str) -> None:
+        sub.channels.discard(channel)
+        members = self._channels.get(channel)
+        if members is not None:
+            members.discard(sub)
+            if not members:
+                del self._channels[channel]
+                unsubscribe = self._bus_unsubscribe.pop(channel, None)
+                if unsubscribe is not None:
+                    unsubscribe()
+
+    def _discard(self, sub: _Subscriber) -> None:
+        for channel in tuple(sub.channels):
+            self._leave(sub, channel)
+        self._subscribers.pop(sub.ws, None)
+        sub.queue.clear()
+        task, sub.task = sub.task, None
+        # A flush task discards its own subscriber when a send fails; it is
+        # about to return, and cancelling it would only fail its last await.
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+
+    # ---- publishing ------------------------------------------------------
+
+    def publish_text(self, channel: str, text: str) -> int:
+        """Send *text* to every subscriber of *channel*; returns how many.
+
+        Returns once the message is queued for each of them — it does not
+        wait for any to be written.
+        """
+        if self._bus is not None:
+            self._bus.publish(self._prefix + channel, text, local=False)
+        return self._publish(channel, NativeWSMessage.text_message(text))
+
+    def publish_bytes(self, channel: str, data: bytes) -> int:
+        """Send *data* as a binary message to every subscriber of *channel*."""
+        data = bytes(data)
+        if self._bus is not None:
+            self._bus.publish(self._prefix + channel, data, local=False)
+        return self._publish(channel, NativeWSMessage.binary_message(data))
+
+    def publish_json(self, channel: str, data: Any, *,
+                     binary: bool = False) -> int:
+        """JSON-serialise *data* once and publish it, as text unless *binary*."""
+        payload = json.dumps(data)
+        if binary:
+            return self.publish_bytes(channel, payload.encode())
+        return self.publish_text(channel, payload)
+
+    def _from_bus(self, bus_channel: str, payload: str | bytes) -> None:
+        """A message another worker published to this hub."""
+        channel = bus_channel[len(self._prefix):]
+        if isinstance(payload, str):
+            self._publish(channel, NativeWSMessage.text_message(payload))
+        else:
+            self._publish(channel, NativeWSMessage.binary_message(payload))
+
+    def _publish(self, channel: str, message: NativeWSMessage) -> int:
+        members = self._channels.get(channel)
+        if not members:
+            return 0
+        message.frames = {}
+        queued = 0
+        # A snapshot: a flush that runs eagerly below can discard its
+        # subscriber, which changes the set.
+        for sub in tuple(members):
+            ws = sub.ws
+            if ws._closed or ws._disconnected:
+                self._discard(sub)
+                continue
+            queue = sub.queue
+            if len(queue) >= self._queue_depth:
+                if self._on_overflow == 'close':
+                    self._evict(sub)
+                    continue
+                queue.popleft()
+                self.dropped += 1
+            queue.append(message)
+            queued += 1
+            if sub.task is None:
+                task = self._start(self._flush(sub))
+                # An eager start can finish the whole flush before returning.
+                if not task.done():
+                    sub.task = task
+        return queued
+
+    @staticmethod
+    def _start(coro) -> asyncio.Task:
+        # Eager, so a subscriber whose transport is not applying back-pressure
+        # is written to right here, in the publish call, rather than one loop
+        # iteration later — for a hub of thousands that is thousands of task
+        # steps saved per message.
+        if _EAGER_TASKS:
+            return asyncio.Task(coro, loop=asyncio.get_running_loop(),
+                                eager_start=True)
+        return asyncio.create_task(coro)
+
+    async def _flush(self, sub: _Subscriber) -> None:
+        ws = sub.ws
+        queue = sub.queue
+        try:
+            while queue:
+                if ws._closed or ws._disconnected:
+                    self._discard(sub)
+                    return
+                await ws._send(queue.popleft())
+        except Exception as exc:
+            # A send that fails is a connection that is gone (or a middleware
+            # that refuses it); either way it cannot take more messages.
+            logger.debug('Broadcast: dropping subscriber %r after send '
+                         'failed: %r', ws, exc)
+            self._discard(sub)
+        finally:
+            if sub.task is asyncio.current_task():
+                sub.task = None
+
+    def _evict(self, sub: _Subscriber) -> None:
+        ws = sub.ws
+        logger.info('Broadcast: closing %r — %d messages queued, peer is not '
+                    'reading', ws, len(sub.queue))
+        self._discard(sub)
+        task = self._start(self._close(ws))
+        if not task.done():
+            self._closing.add(task)
+            task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    async def _close(ws: WebSocket) -> None:
+        try:
+            await ws.close(_TRY_AGAIN_LATER, 'subscriber too slow')
+        except Exception as exc:
+            logger.debug('Broadcast: close of evicted %r failed: %r', ws, exc)
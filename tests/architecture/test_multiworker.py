@@ -105,6 +105,45 @@ def test_crashed_worker_is_respawned(plain_app, bound_sockets):
         mws._shutdown_all()
 
 
+def test_mqtt_store_is_opened_by_one_worker_only(tmp_path, monkeypatch):
+    """Outside cluster mode only the MQTT listener's owner recovers and writes
+    the broker store; two writers on one log would corrupt it."""
+    from blackbull.mqtt import MQTTExtension
+    from blackbull.mqtt.store import BrokerStore
+
+    loads = tmp_path / 'loads'
+    original = BrokerStore.load
+
+    def load(self):
+        with open(loads, 'a') as f:
+            f.write(f'{os.getpid()} {self.directory}\n')
+        return original(self)
+
+    monkeypatch.setattr(BrokerStore, 'load', load)   # inherited by the fork
+    app = BlackBull()
+    app.add_extension(MQTTExtension(port=0, store_dir=str(tmp_path / 'store')))
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen()
+    mws = MultiWorkerServer(app, [sock], None, workers=2)
+    mws._spawn_all()
+    try:
+        deadline = time.monotonic() + 5
+        while not loads.exists():
+            assert time.monotonic() < deadline, 'no worker opened the store'
+            time.sleep(0.05)
+        time.sleep(0.5)             # give the other worker time to (not) load
+        lines = loads.read_text().splitlines()
+        assert len(lines) == 1, lines
+        assert int(lines[0].split()[0]) == mws._processes[0].pid
+        assert sorted(p.name for p in (tmp_path / 'store').iterdir())
+    finally:
+        mws._shutdown_all()
+        sock.close()
+
+
 # ---------------------------------------------------------------------------
 # T3 — end-to-end HTTP smoke test
 # ---------------------------------------------------------------------------
@@ -137,6 +176,41 @@ def test_workers_serve_http_requests(plain_app):
         sock.close()
 
 
+def test_metrics_scrape_covers_every_worker(plain_app):
+    """A scrape lands on one worker but must count every worker's requests."""
+    plain_app.enable_metrics()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen()
+    port = sock.getsockname()[1]
+
+    mws = MultiWorkerServer(plain_app, [sock], None, workers=2)
+    mws._spawn_all()
+    time.sleep(0.5)
+
+    series = ('blackbull_http_request_duration_seconds_count'
+              '{route="/ping",status="200",protocol="HTTP/1.1"}')
+    try:
+        for _ in range(20):
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/ping')
+            assert conn.getresponse().read() == b'pong'
+            conn.close()
+        deadline = time.monotonic() + 5
+        while f'{series} 20' not in mws.render_metrics():
+            assert time.monotonic() < deadline, mws.render_metrics()
+            time.sleep(0.05)
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+        conn.request('GET', '/metrics')
+        assert f'{series} 20' in conn.getresponse().read().decode()
+        conn.close()
+    finally:
+        mws._shutdown_all()
+        mws._metrics_arena.close()
+        sock.close()
+
+
 # ---------------------------------------------------------------------------
 # T4 — BlackBull.run() single-worker uses asyncio.run (regression guard)
 # ---------------------------------------------------------------------------
@@ -297,6 +371,34 @@ def test_spawn_worker_routes_protocol_sockets_to_worker0_only(plain_app, bound_s
     assert captured['bb-worker-2'][7] is None, 'worker 2 must be HTTP-only'
 
 
+def test_all_workers_binding_is_served_by_every_worker(plain_app, bound_sockets):
+    """A binding registered with ``all_workers=True`` (clustered MQTT) goes
+    to every worker; a single-owner binding beside it stays on worker 0."""
+    from blackbull.server.protocol_registry import RawBinding
+    from blackbull.protocol.rsock import create_dual_stack_sockets
+    sockets, _ = bound_sockets
+    owned = RawBinding('owned', None, port=0)
+    shared = RawBinding('shared', None, port=0, all_workers=True)
+    owned_socks = create_dual_stack_sockets(0)
+    shared_socks = create_dual_stack_sockets(0)
+    port = shared_socks[0].getsockname()[1]
+    mws = MultiWorkerServer(plain_app, sockets, None, workers=3,
+                            protocol_sockets=[(owned_socks, owned),
+                                              (shared_socks, shared)])
+    try:
+        per_worker = mws._worker_protocol_sockets
+        assert [b.name for _, b in per_worker[0]] == ['owned', 'shared']
+        for worker in (1, 2):
+            (socks, binding), = per_worker[worker]
+            assert binding is shared
+            assert socks[0].getsockname()[1] == port
+    finally:
+        for owned_list in mws._worker_protocol_sockets:
+            for socks, _ in owned_list or ():
+                for s in socks:
+                    s.close()
+
+
 def test_multiworker_http_scales_while_raw_stays_on_worker0(http_and_raw_app):
     """End-to-end success criterion: with workers=2 and a port-bound protocol,
     HTTP is served (by any worker) AND the raw protocol round-trips (worker 0)."""
@@ -104,6 +104,42 @@ def _param_names(fn) -> list[str]:
     return [p.arg for p in (*a.posonlyargs, *a.args, *a.kwonlyargs)]
 
 
+# The annotations under which the router injects a form value, not the
+# connection, into a handler's first parameter.
+_FORM_ANNOTATIONS = ('FormData', 'UploadFile')
+
+
+def _form_annotation(ann) -> bool:
+    """True if *ann* is ``FormData``, ``UploadFile`` or ``UploadFile | None``."""
+    if isinstance(ann, ast.Constant) and isinstance(ann.value, str):
+        try:
+            ann = ast.parse(ann.value, mode='eval').body    # a string annotation
+        except SyntaxError:
+            return False
+    if isinstance(ann, ast.BinOp) and isinstance(ann.op, ast.BitOr):
+        left, right = ann.left, ann.right
+        if isinstance(left, ast.Constant) and left.value is None:
+            left, right = right, left
+        if not (isinstance(right, ast.Constant) and right.value is None):
+            return False
+        ann = left
+        name = ann.id if isinstance(ann, ast.Name) else getattr(ann, 'attr', None)
+        return name == 'UploadFile'
+    name = ann.id if isinstance(ann, ast.Name) else getattr(ann, 'attr', None)
+    return name in _FORM_ANNOTATIONS
+
+
+def _annotated_as_something_else(fn) -> bool:
+    """True if the first parameter is annotated as a form value the router
+    injects instead of the connection.  Simplified handlers inject by
+    annotation, so ``form: FormData`` first is a form — a real mapping — not
+    the connection.  Any other annotation (``scope: dict``, ``Mapping``) is
+    still checked: it does not change what the server passes."""
+    a = fn.args
+    first = (*a.posonlyargs, *a.args, *a.kwonlyargs)[0]
+    return first.annotation is not None and _form_annotation(first.annotation)
+
+
 def _mapping_uses(fn, param: str) -> bool:
     """True if *param* is subscripted or has a mapping method called on it."""
     for node in ast.walk(fn):
@@ -132,7 +168,8 @@ def _scan() -> list[str]:
             if label in _ASGI_LANE_ALLOWLIST:
                 continue
             params = _param_names(fn)
-            if params and _mapping_uses(fn, params[0]):
+            if (params and not _annotated_as_something_else(fn)
+                    and _mapping_uses(fn, params[0])):
                 offenders.append(label)
     return offenders
 
@@ -206,3 +243,20 @@ def test_scan_does_not_flag_legitimate_shapes(source, why):
     handlers = list(_handler_defs(tree))
     for fn in handlers:
         assert not _mapping_uses(fn, _param_names(fn)[0]), why
+
+
+@pytest.mark.parametrize('annotation, exempt', [
+    ('FormData', True),
+    ('UploadFile', True),
+    ('UploadFile | None', True),
+    ("'UploadFile | None'", True),
+    ('dict', False),
+    ('dict[str, Any]', False),
+    ('Mapping', False),
+    ('Connection', False),
+])
+def test_only_form_annotations_are_exempt(annotation, exempt):
+    """The router injects a form value under these annotations only; a
+    ``scope: dict`` first parameter still receives the connection."""
+    fn = ast.parse(f'async def h(first: {annotation}):\n    return first["k"]').body[0]
+    assert _annotated_as_something_else(fn) is exempt
@@ -87,6 +87,9 @@ _REQUEST_DICT_ALLOWED: dict[str, str] = {
     'blackbull/app.py::BlackBull.warm_request._receive':
         'boundary — a synthetic ASGI receive built for warm-up requests; it '
         'is a plain callable with no native arm, by construction',
+    'blackbull/middleware/cache.py::Cache._refresh.receive':
+        'boundary — a synthetic ASGI receive for a background re-render, '
+        'whose request has already been answered; like warm_request',
     'blackbull/testing/native.py::request.receive':
         'boundary — Tier-1 drives the app through the ASGI receive contract',
 }
@@ -686,3 +686,273 @@ class TestReplayIsolation:
 
         assert a[0] == b[0]
         assert a[2] == b[2]
+
+
+# ---------------------------------------------------------------------------
+# Server-side invalidation
+# ---------------------------------------------------------------------------
+
+@pytest.mark.asyncio
+class TestInvalidation:
+    """``invalidate(path_prefix=)`` and ``purge_tag`` drop exactly the entries
+    they name, and leave the backend's indexes agreeing with its buckets."""
+
+    @staticmethod
+    async def _fill(mw, *specs):
+        """Store one response per ``(path, surrogate_key)`` spec."""
+        for path, keys in specs:
+            extra = [(b'surrogate-key', keys)] if keys else []
+            cn, _ = _make_handler(body=path.encode(), extra_headers=extra)
+            await _run(mw, _scope(path=path), cn)
+
+    @staticmethod
+    async def _is_cached(mw, path) -> bool:
+        cn, counter = _make_handler()
+        await _run(mw, _scope(path=path), cn)
+        return counter['n'] == 0
+
+    async def test_prefix_covers_path_and_descendants_only(self):
+        mw = Cache()
+        await self._fill(mw, ('/api/users', None), ('/api/users/7', None),
+                         ('/api/users-old', None), ('/api/posts', None))
+        assert mw.invalidate(path_prefix='/api/users/') == 2
+        assert not await self._is_cached(mw, '/api/users')
+        assert not await self._is_cached(mw, '/api/users/7')
+        assert await self._is_cached(mw, '/api/users-old')
+        assert await self._is_cached(mw, '/api/posts')
+
+    async def test_prefix_covers_every_query_and_method(self):
+        mw = Cache()
+        cn, _ = _make_handler()
+        await _run(mw, _scope(path='/feed', query=b'page=2'), cn)
+        await _run(mw, _scope(method='HEAD', path='/feed'), cn)
+        assert mw.invalidate(path_prefix='/feed') == 2
+        assert len(mw._store) == 0
+
+    async def test_root_prefix_clears_everything(self):
+        mw = Cache()
+        await self._fill(mw, ('/', None), ('/a', None), ('/a/b/c', None))
+        assert mw.invalidate() == 3
+        assert len(mw._store) == 0
+        assert mw._store._paths.children == {}
+
+    async def test_purge_tag(self):
+        mw = Cache()
+        await self._fill(mw, ('/p/1', b'product-1 catalog'),
+                         ('/p/2', b'product-2 catalog'), ('/home', b'home'))
+        assert mw.purge_tag('product-1') == 1
+        assert not await self._is_cached(mw, '/p/1')
+        assert await self._is_cached(mw, '/p/2')
+        assert mw.purge_tag('catalog') == 1        # /p/1 already gone
+        assert not await self._is_cached(mw, '/p/2')
+        assert await self._is_cached(mw, '/home')
+        assert mw.purge_tag('catalog') == 0
+
+    async def test_purge_tag_drops_only_the_tagged_variant(self):
+        mw = Cache()
+
+        async def handler(scope, receive, send):
+            enc = dict(scope.headers).get(b'accept-encoding', b'')
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': [(b'vary', b'Accept-Encoding'),
+                                    (b'surrogate-key', b'enc-' + enc)]})
+            await send({'type': 'http.response.body', 'body': enc})
+
+        for enc in (b'br', b'gzip'):
+            await _run(mw, _scope(path='/v', headers=[(b'accept-encoding', enc)]),
+                       handler)
+        assert mw.purge_tag('enc-br') == 1
+        bucket = mw._store[('GET', '/v', b'')]
+        assert list(bucket.entries) == [((b'accept-encoding', b'gzip'),)]
+
+    async def test_eviction_unindexes(self):
+        mw = Cache(max_entries=2)
+        await self._fill(mw, ('/a', b't'), ('/b', b't'), ('/c', b't'))
+        assert mw.purge_tag('t') == 2             # /a was LRU-evicted
+        assert mw._store._tags == {}
+        assert mw._store._paths.children == {}
+
+    async def test_restore_after_purge_reindexes(self):
+        mw = Cache()
+        await self._fill(mw, ('/a', b'old'))
+        await self._fill(mw, ('/a', b'new'))       # hit: nothing re-stored
+        mw.invalidate('/a')
+        await self._fill(mw, ('/a', b'new'))
+        assert mw.purge_tag('old') == 0
+        assert mw.purge_tag('new') == 1
+
+
+
+def test_surrogate_key_parsing():
+    from blackbull.middleware.cache import _surrogate_keys
+    assert _surrogate_keys([(b'Surrogate-Key', b'a  b\tc'),
+                            (b'surrogate-key', b'b d')]) == ('a', 'b', 'c', 'd')
+    assert _surrogate_keys([(b'etag', b'x')]) == ()
+
+
+# ---------------------------------------------------------------------------
+# Coalescing and RFC 5861 stale serving
+# ---------------------------------------------------------------------------
+
+def _gated_handler(status: int = 200, extra_headers=()):
+    """A handler that blocks on ``gate`` so concurrent requests overlap."""
+    gate = asyncio.Event()
+    counter = {'n': 0}
+
+    async def call_next(scope, receive, send):
+        counter['n'] += 1
+        await gate.wait()
+        await send({'type': 'http.response.start', 'status': status,
+                    'headers': [(b'content-type', b'text/plain'),
+                                *extra_headers]})
+        await send({'type': 'http.response.body',
+                    'body': b'render-%d' % counter['n']})
+
+    return call_next, counter, gate
+
+
+@pytest.mark.asyncio
+class TestCoalescing:
+    async def test_concurrent_misses_render_once(self):
+        mw = Cache()
+        cn, counter, gate = _gated_handler()
+        tasks = [asyncio.create_task(_run(mw, _scope(), cn)) for _ in range(5)]
+        await asyncio.sleep(0)
+        gate.set()
+        results = await asyncio.gather(*tasks)
+        assert counter['n'] == 1
+        assert {_split_response(r)[2] for r in results} == {b'render-1'}
+        assert mw._fills == {}
+
+    async def test_uncacheable_response_releases_waiters_to_render(self):
+        mw = Cache()
+        cn, counter, gate = _gated_handler(
+            extra_headers=[(b'cache-control', b'no-store')])
+        tasks = [asyncio.create_task(_run(mw, _scope(), cn)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(*tasks)
+        assert counter['n'] == 3
+
+    async def test_leader_failure_releases_waiters(self):
+        mw = Cache()
+        calls = {'n': 0}
+
+        async def flaky(scope, receive, send):
+            calls['n'] += 1
+            await asyncio.sleep(0)
+            if calls['n'] == 1:
+                raise RuntimeError('db down')
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': []})
+            await send({'type': 'http.response.body', 'body': b'ok'})
+
+        results = await asyncio.gather(
+            *(_run(mw, _scope(), flaky) for _ in range(3)),
+            return_exceptions=True)
+        assert isinstance(results[0], RuntimeError)
+        # The waiters woke together and each rendered; none waits on another.
+        assert all(_split_response(r)[2] == b'ok' for r in results[1:])
+        assert calls['n'] == 3 and mw._fills == {}
+
+    async def test_coalesce_off_renders_each(self):
+        mw = Cache(coalesce=False)
+        cn, counter, gate = _gated_handler()
+        tasks = [asyncio.create_task(_run(mw, _scope(), cn)) for _ in range(3)]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(*tasks)
+        assert counter['n'] == 3
+
+    async def test_streamed_response_is_sent_once_and_not_stored(self):
+        mw = Cache()
+
+        async def stream(scope, receive, send):
+            await send({'type': 'http.response.start', 'status': 200,
+                        'headers': []})
+            for chunk, more in ((b'a', True), (b'b', True), (b'c', False)):
+                await send({'type': 'http.response.body', 'body': chunk,
+                            'more_body': more})
+
+        assert _split_response(await _run(mw, _scope(), stream))[2] == b'abc'
+        assert len(mw._store) == 0
+
+
+@pytest.mark.asyncio
+class TestStaleServing:
+    async def _prime(self, mw, cn):
+        with patch('blackbull.middleware.cache.time.monotonic', return_value=1_000.0):
+            return await _run(mw, _scope(), cn)
+
+    async def test_stale_while_revalidate_serves_stale_and_refreshes(self):
+        mw = Cache(max_age=60)
+        cn, counter = _make_handler(
+            extra_headers=[(b'cache-control', b'max-age=60, stale-while-revalidate=30')])
+        await self._prime(mw, cn)
+        with patch('blackbull.middleware.cache.time.monotonic', return_value=1_070.0):
+            events = await _run(mw, _scope(), cn)
+            assert _split_response(events)[2] == b'hello'
+            assert len(mw._refreshes) == 1
+            await asyncio.gather(*mw._refreshes)
+        assert counter['n'] == 2
+        entry = mw._store.get(('GET', '/', b''), {})
+        assert entry.expires_at == 1_130.0
+
+    async def test_one_refresh_per_key(self):
+        mw = Cache(max_age=60, stale_while_revalidate=30)
+        cn, counter, gate = _gated_handler()
+        gate.set()
+        await self._prime(mw, cn)
+        gate.clear()
+        with patch('blackbull.middleware.cache.time.monotonic', return_value=1_070.0):
+            for _ in range(5):
+                await _run(mw, _scope(), cn)
+            await asyncio.sleep(0)
+            assert len(mw._refreshes) == 1
+            gate.set()
+            await asyncio.gather(*mw._refreshes)
+        assert counter['n'] == 2
+
+    async def test_past_the_window_is_a_miss(self):
+        mw = Cache(max_age=60, stale_while_revalidate=30)
+        cn, counter = _make_handler()
+        await self._prime(mw, cn)
+        with patch('blackbull.middleware.cache.time.monotonic', return_value=1_091.0):
+            await _run(mw, _scope(), cn)
+        assert counter['n'] == 2 and not mw._refreshes
+
+    async def test_stale_if_error_on_5xx(self):
+        mw = Cache(max_age=60, stale_if_error=300)
+        cn, _ = _make_handler(body=b'good')
+        await self._prime(mw, cn)
+        broken, _ = _make_handler(status=503, body=b'down')
+        with patch('blackbull.middleware.cache.time.monotonic', return_value=1_100.0):
+            status, _, body = _split_response(await _run(mw, _scope(), broken))
+        assert (status, body) == (200, b'good')
+
+    async def test_stale_if_error_on_exception(self):
+        mw = Cache(max_age=60)
+        cn, _ = _make_handler(
+            body=b'good', extra_headers=[(b'cache-control', b'stale-if-error=300')])
+        await self._prime(mw, cn)
+
+        async def raising(scope, receive, send):
+            raise RuntimeError('db down')
+
+        with patch('blackbull.middleware.cache.time.monotonic', return_value=1_100.0):
+            assert _split_response(await _run(mw, _scope(), raising))[2] == b'good'
+        with patch('blackbull.middleware.cache.time.monotonic', return_value=1_400.0):
+            with pytest.raises(RuntimeError):
+                await _run(mw, _scope(), raising)
+
+    async def test_invalid_windows_raise(self):
+        with pytest.raises(ValueError):
+            Cache(stale_while_revalidate=-1)
+
+
+def test_stale_window_parsing():
+    from blackbull.middleware.cache import _stale_windows
+    assert _stale_windows([(b'Cache-Control',
+                            b'max-age=5, stale-while-revalidate=30, stale-if-error=600')]
+                          ) == (30, 600)
+    assert _stale_windows([(b'cache-control', b'stale-if-error=x')]) == (None, None)
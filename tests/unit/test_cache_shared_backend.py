@@ -0,0 +1,202 @@
+"""SharedMemoryBackend — the cross-worker store behind ``Cache``.
+
+The backend must keep the bucket semantics of the in-memory default (Vary
+fields live with their variants, a Vary change drops stale variants), survive
+a fork with both sides seeing one store, and stay inside its byte budget by
+evicting with CLOCK — a referenced chunk outlives an unreferenced one.
+"""
+import multiprocessing
+import time
+
+import pytest
+
+from blackbull.middleware import Cache, SharedMemoryBackend
+from blackbull.middleware.cache_backend import _Entry, _digest
+
+_PAGE = 4096
+
+
+def _entry(body=b'x', ttl=60.0, etag=b'W/"e"', tags=(),
+           stored_at=0.0) -> _Entry:
+    return _Entry(200, [(b'content-type', b'text/plain')], body, etag,
+                  time.monotonic() + ttl, tags, stored_at)
+
+
+def _key(path: str) -> tuple:
+    return ('GET', path, b'')
+
+
+class TestBuckets:
+    def test_round_trip(self):
+        be = SharedMemoryBackend(64 * _PAGE, page_size=_PAGE)
+        be.put(_key('/a'), (), {}, _entry(b'hello'))
+        got = be.get(_key('/a'), {})
+        assert got.body == b'hello' and got.status == 200
+        assert got.header == [(b'content-type', b'text/plain')]
+        assert be.get(_key('/b'), {}) is None
+
+    def test_variants_share_a_bucket(self):
+        be = SharedMemoryBackend(64 * _PAGE, page_size=_PAGE)
+        vary = (b'accept-encoding',)
+        be.put(_key('/v'), vary, {b'accept-encoding': b'br'}, _entry(b'BR'))
+        be.put(_key('/v'), vary, {b'accept-encoding': b'gzip'}, _entry(b'GZ'))
+        assert be.get(_key('/v'), {b'accept-encoding': b'br'}).body == b'BR'
+        assert be.get(_key('/v'), {b'accept-encoding': b'gzip'}).body == b'GZ'
+        assert be.get(_key('/v'), {}) is None
+        assert len(be) == 1
+
+    def test_vary_change_drops_stale_variants(self):
+        be = SharedMemoryBackend(64 * _PAGE, page_size=_PAGE)
+        be.put(_key('/x'), (b'accept-encoding',),
+               {b'accept-encoding': b'br'}, _entry(b'old'))
+        be.put(_key('/x'), (b'accept-language',),
+               {b'accept-language': b'en'}, _entry(b'new'))
+        assert be.get(_key('/x'), {b'accept-encoding': b'br'}) is None
+        assert be.get(_key('/x'), {b'accept-language': b'en'}).body == b'new'
+
+    def test_stale_sibling_kept_within_its_window(self):
+        be = SharedMemoryBackend(64 * _PAGE, page_size=_PAGE)
+        vary = (b'accept-encoding',)
+        stale = _entry(b'BR', ttl=-5)
+        stale.stale_while_revalidate = 30
+        be.put(_key('/s'), vary, {b'accept-encoding': b'br'}, stale)
+        be.put(_key('/s'), vary, {b'accept-encoding': b'gzip'}, _entry(b'GZ'))
+        got = be.get(_key('/s'), {b'accept-encoding': b'br'})
+        assert got.body == b'BR' and got.stale_while_revalidate == 30
+
+    def test_oversize_bucket_not_stored(self):
+        be = SharedMemoryBackend(8 * _PAGE, page_size=_PAGE)
+        be.put(_key('/big'), (), {}, _entry(b'x' * _PAGE))
+        assert be.get(_key('/big'), {}) is None
+        assert be.stats()['oversize'] == 1
+
+    def test_constructor_validates(self):
+        with pytest.raises(ValueError):
+            SharedMemoryBackend(1024, page_size=_PAGE)
+        with pytest.raises(ValueError):
+            SharedMemoryBackend(8 * _PAGE, page_size=256)
+
+
+class TestEviction:
+    def test_stays_within_byte_budget(self):
+        be = SharedMemoryBackend(4 * _PAGE, page_size=_PAGE)
+        for i in range(200):
+            be.put(_key(f'/{i}'), (), {}, _entry(b'y' * 600))
+        stats = be.stats()
+        assert stats['bytes_used'] <= stats['capacity_bytes']
+        assert stats['evictions'] > 0
+        assert be.get(_key('/199'), {}) is not None
+
+    def test_clock_keeps_referenced_entry(self):
+        be = SharedMemoryBackend(_PAGE, page_size=_PAGE)   # one page
+        for i in range(4):
+            be.put(_key(f'/{i}'), (), {}, _entry(b'z' * 600))
+        assert be.get(_key('/0'), {}) is not None          # sets /0's ref bit
+        for i in range(4, 7):
+            be.put(_key(f'/{i}'), (), {}, _entry(b'z' * 600))
+        assert be.get(_key('/0'), {}) is not None
+        assert be.get(_key('/1'), {}) is None
+
+    def test_size_class_without_pages_steals_one(self):
+        be = SharedMemoryBackend(2 * _PAGE, page_size=_PAGE)
+        for i in range(16):                                # fill both pages
+            be.put(_key(f'/s{i}'), (), {}, _entry(b's' * 100))
+        be.put(_key('/large'), (), {}, _entry(b'L' * 3000))
+        assert be.get(_key('/large'), {}).body == b'L' * 3000
+
+    def test_entry_cap(self):
+        be = SharedMemoryBackend(16 * _PAGE, max_entries=3, page_size=_PAGE)
+        for i in range(10):
+            be.put(_key(f'/{i}'), (), {}, _entry())
+        assert len(be) == 3
+        assert be.get(_key('/9'), {}) is not None
+
+
+def test_forked_worker_shares_the_store():
+    be = SharedMemoryBackend(16 * _PAGE, page_size=_PAGE)
+    be.put(_key('/from-parent'), (), {}, _entry(b'parent'))
+    ctx = multiprocessing.get_context('fork')
+    seen = ctx.Value('i', 0)
+
+    def _child():
+        seen.value = int(be.get(_key('/from-parent'), {}) is not None)
+        be.put(_key('/from-child'), (), {}, _entry(b'child'))
+
+    proc = ctx.Process(target=_child)
+    proc.start()
+    proc.join(10)
+    assert proc.exitcode == 0
+    assert seen.value == 1
+    assert be.get(_key('/from-child'), {}).body == b'child'
+    assert be.stats()['stores'] == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_middleware_over_shared_backend():
+    from blackbull.connection import Connection
+    be = SharedMemoryBackend(16 * _PAGE, page_size=_PAGE)
+    mw = Cache(backend=be)
+    calls = []
+
+    async def call_next(conn, receive, send):
+        calls.append(1)
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b'rendered'})
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(event):
+        pass
+
+    for _ in range(3):
+        conn = Connection.from_scope({'type': 'http', 'method': 'GET',
+                                      'path': '/feed', 'query_string': b'',
+                                      'headers': []})
+        await mw(conn, receive, send, call_next)
+    assert len(calls) == 1
+    assert be.stats()['hits'] == 2
+
+
+class TestInvalidation:
+    """Shared purges are recorded, not applied: entries stored before a
+    matching purge read as misses, entries stored after it are unaffected."""
+
+    def test_prefix(self):
+        be = SharedMemoryBackend(16 * _PAGE, page_size=_PAGE)
+        for path in ('/api/users', '/api/users/7', '/api/users-old'):
+            be.put(_key(path), (), {}, _entry(stored_at=time.monotonic()))
+        assert be.invalidate('/api/users') is None
+        assert be.get(_key('/api/users'), {}) is None
+        assert be.get(_key('/api/users/7'), {}) is None
+        assert be.get(_key('/api/users-old'), {}) is not None
+        be.put(_key('/api/users/7'), (), {}, _entry(stored_at=time.monotonic()))
+        assert be.get(_key('/api/users/7'), {}) is not None
+
+    def test_tag(self):
+        be = SharedMemoryBackend(16 * _PAGE, page_size=_PAGE)
+        be.put(_key('/p/1'), (), {}, _entry(tags=('product-1',)))
+        be.put(_key('/p/2'), (), {}, _entry(tags=('product-2',)))
+        be.purge_tag('product-1')
+        assert be.get(_key('/p/1'), {}) is None
+        assert be.get(_key('/p/2'), {}) is not None
+
+    def test_purge_seen_by_forked_worker(self):
+        be = SharedMemoryBackend(16 * _PAGE, page_size=_PAGE)
+        be.put(_key('/x'), (), {}, _entry(tags=('t',)))
+        ctx = multiprocessing.get_context('fork')
+        proc = ctx.Process(target=be.purge_tag, args=('t',))
+        proc.start()
+        proc.join(10)
+        assert be.get(_key('/x'), {}) is None
+
+    def test_restore_drops_purged_variants(self):
+        be = SharedMemoryBackend(16 * _PAGE, page_size=_PAGE)
+        vary = (b'accept-encoding',)
+        be.put(_key('/v'), vary, {b'accept-encoding': b'br'},
+               _entry(b'BR', tags=('br',)))
+        be.purge_tag('br')
+        be.put(_key('/v'), vary, {b'accept-encoding': b'gzip'}, _entry(b'GZ'))
+        assert be._load(_digest(_key('/v')), _key('/v')).entries.keys() == {
+            ((b'accept-encoding', b'gzip'),)}
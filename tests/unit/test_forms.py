@@ -0,0 +1,255 @@
+"""Form bodies — ``blackbull.forms`` and the ``FormData`` / ``UploadFile``
+handler parameters.
+
+The parser is fed the same bodies split at every offset: where a delimiter
+or a header block straddles two chunks must never change what comes out.
+"""
+import pytest
+
+from blackbull import BlackBull, Connection, FormData, Headers, UploadFile
+from blackbull.forms import (
+    FormError, MultipartEvent, MultipartParser, iter_multipart, parse_urlencoded,
+    read_form,
+)
+from blackbull.testing import TestClient
+
+BOUNDARY = b'----bb7MA4YWxkTrZu0gW'
+CONTENT_TYPE = b'multipart/form-data; boundary=' + BOUNDARY
+
+
+def _multipart(*parts, preamble=b'', epilogue=b'') -> bytes:
+    out = [preamble]
+    for headers, body in parts:
+        out.append(b'--' + BOUNDARY + b'\r\n' + headers + b'\r\n\r\n' + body + b'\r\n')
+    out.append(b'--' + BOUNDARY + b'--\r\n' + epilogue)
+    return b''.join(out)
+
+
+BODY = _multipart(
+    (b'Content-Disposition: form-data; name="title"', b'hello'),
+    (b'Content-Disposition: form-data; name="doc"; filename="a.txt"\r\n'
+     b'Content-Type: text/plain', b'line one\r\n--not-a-boundary\r\nline two'),
+    (b'Content-Disposition: form-data; name="empty"', b''),
+    preamble=b'ignored preamble\r\n', epilogue=b'ignored epilogue')
+
+
+def _parse(body: bytes, size: int) -> list:
+    parser = MultipartParser(BOUNDARY)
+    parts = []
+    for i in range(0, len(body), size):
+        for event, value in parser.feed(body[i:i + size]):
+            if event is MultipartEvent.HEADERS:
+                parts.append([dict(value), b''])
+            elif event is MultipartEvent.DATA:
+                parts[-1][1] += value
+    parser.close()
+    return parts
+
+
+def _receive(body: bytes, size: int = 7):
+    events = [{'type': 'http.request', 'body': body[i:i + size],
+               'more_body': i + size < len(body)}
+              for i in range(0, len(body), size)] or [{'type': 'http.request'}]
+
+    async def receive():
+        return events.pop(0)
+    return receive
+
+
+def test_parts_do_not_depend_on_chunking():
+    whole = _parse(BODY, len(BODY))
+    assert [body for _, body in whole] == [
+        b'hello', b'line one\r\n--not-a-boundary\r\nline two', b'']
+    assert whole[1][0][b'content-type'] == b'text/plain'
+    for size in range(1, 64):
+        assert _parse(BODY, size) == whole
+
+
+@pytest.mark.parametrize('body, match', [
+    (BODY[:-40], 'closing boundary'),
+    (b'--' + BOUNDARY + b'\r\nno colon here\r\n\r\nx\r\n--' + BOUNDARY + b'--',
+     'part header'),
+    (b'--' + BOUNDARY + b'junk\r\n\r\n\r\n--' + BOUNDARY + b'--', 'delimiter'),
+    (b'--' + BOUNDARY + b'\r\nX-Long: ' + b'a' * 20000, 'too large'),
+])
+def test_malformed_bodies_are_rejected(body, match):
+    with pytest.raises(FormError, match=match) as info:
+        _parse(body, 512)
+    assert info.value.status == 400
+
+
+def test_part_count_is_capped():
+    parser = MultipartParser(BOUNDARY, max_parts=2)
+    with pytest.raises(FormError, match='too many'):
+        parser.feed(BODY)
+
+
+def test_transport_padding_after_a_delimiter_is_allowed():
+    body = BODY.replace(BOUNDARY + b'\r\n', BOUNDARY + b' \t\r\n')
+    assert _parse(body, 5) == _parse(BODY, 5)
+
+
+@pytest.mark.asyncio
+async def test_read_form_spools_large_files_to_disk():
+    payload = bytes(range(256)) * 400                      # 100 KiB
+    body = _multipart(
+        (b'Content-Disposition: form-data; name="title"', b'caf\xc3\xa9'),
+        (b'Content-Disposition: form-data; name="up"; filename="big.bin"', payload),
+        (b'Content-Disposition: form-data; name="up"; filename="small.bin"', b'tiny'))
+    async with await read_form(_receive(body, 4096), CONTENT_TYPE,
+                               spool_size=1024) as form:
+        assert form['title'] == 'café'
+        big, small = form.getlist('up')
+        assert (big.filename, big.content_type, big.size) == (
+            'big.bin', 'application/octet-stream', len(payload))
+        assert not big.in_memory and small.in_memory
+        assert await big.read() == payload
+        assert await small.read() == b'tiny'
+    assert big.file.closed and small.file.closed
+
+
+@pytest.mark.asyncio
+async def test_oversized_text_field_is_refused():
+    body = _multipart((b'Content-Disposition: form-data; name="t"', b'x' * 100))
+    with pytest.raises(FormError, match="'t' is too large"):
+        await read_form(_receive(body), CONTENT_TYPE, max_field_size=99)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('content_type, status', [
+    (b'application/json', 415), (b'', 415), (b'multipart/form-data', 400)])
+async def test_non_forms_are_refused(content_type, status):
+    with pytest.raises(FormError) as info:
+        await read_form(_receive(b'{}'), content_type)
+    assert info.value.status == status
+
+
+@pytest.mark.asyncio
+async def test_iter_multipart_skips_parts_left_unread():
+    seen = []
+    async for part in iter_multipart(_receive(BODY, 3), CONTENT_TYPE.decode()):
+        seen.append((part.name, part.filename))
+        if part.name == 'doc':
+            assert await part.read() == b'line one\r\n--not-a-boundary\r\nline two'
+    assert seen == [('title', None), ('doc', 'a.txt'), ('empty', None)]
+
+
+@pytest.mark.asyncio
+async def test_quoted_boundary_and_rfc8187_filename():
+    body = _multipart((b'Content-Disposition: form-data; name="f"; filename="x"; '
+                       b"filename*=UTF-8''r%C3%A9sum%C3%A9.pdf", b'%PDF'))
+    form = await read_form(
+        _receive(body), b'multipart/form-data; boundary="' + BOUNDARY + b'"')
+    assert form['f'].filename == 'résumé.pdf'
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('body, limits, match', [
+    (b'a=' + b'x' * 200 + b'&b=1', {'max_field_size': 100}, 'too large'),
+    (b'a=1&' + b'b=' + b'x' * 200, {'max_field_size': 100}, 'too large'),
+    (b'a=1&' * 100, {'max_parts': 10}, 'too many'),
+])
+async def test_urlencoded_limits_apply_while_reading(body, limits, match):
+    inner = _receive(body * 10, size=16)
+    reads = 0
+
+    async def receive():
+        nonlocal reads
+        reads += 1
+        return await inner()
+
+    with pytest.raises(FormError, match=match):
+        await read_form(receive, b'application/x-www-form-urlencoded', **limits)
+    assert reads < len(body) // 16 + 2      # refused before the rest arrived
+
+
+@pytest.mark.asyncio
+async def test_urlencoded_field_at_the_limit_is_read():
+    body = b'a=' + b'x' * 98 + b'&b=' + b'y' * 97
+    form = await read_form(_receive(body, 5), b'application/x-www-form-urlencoded',
+                           max_field_size=100)
+    assert (len(form['a']), len(form['b'])) == (98, 97)
+
+
+def test_parse_urlencoded():
+    form = parse_urlencoded(b'a=1&b=&a=two+words&c=%C3%A9&d')
+    assert form.getlist('a') == ['1', 'two words']
+    assert (form['b'], form['c'], form['d']) == ('', 'é', '')
+    assert list(form) == ['a', 'b', 'c', 'd']
+    with pytest.raises(FormError, match='too many'):
+        parse_urlencoded(b'a=1&b=2&c=3', max_fields=2)
+
+
+@pytest.mark.asyncio
+async def test_connection_form_is_cached_and_reuses_a_read_body():
+    conn = Connection(method='POST', path='/', raw_path=b'/',
+                      headers=Headers([(b'content-type', CONTENT_TYPE)]))
+    conn._receive = _receive(BODY)
+    assert await conn.body() == BODY
+    form = await conn.form()
+    assert form is await conn.form()
+    assert form['title'] == 'hello' and form['doc'].filename == 'a.txt'
+
+
+@pytest.mark.asyncio
+async def test_connection_form_after_stream_raises():
+    conn = Connection(method='POST', path='/', raw_path=b'/',
+                      headers=Headers([(b'content-type', CONTENT_TYPE)]))
+    conn._receive = _receive(BODY)
+    async for _ in conn.stream():
+        pass
+    with pytest.raises(RuntimeError, match='stream'):
+        await conn.form()
+
+
+class TestHandlerParameters:
+    @staticmethod
+    def _app():
+        app = BlackBull()
+        uploads = []
+
+        @app.route(path='/form', methods=['POST'])
+        async def whole(form: FormData):
+            return {'title': form.get('title'), 'fields': sorted(form)}
+
+        @app.route(path='/upload', methods=['POST'])
+        async def upload(doc: UploadFile, note: UploadFile | None = None):
+            uploads.append(doc)
+            return {'name': doc.filename, 'data': (await doc.read()).decode(),
+                    'note': note}
+
+        return app, uploads
+
+    def test_form_data_from_multipart_and_urlencoded(self):
+        app, _ = self._app()
+        with TestClient(app) as client:
+            r = client.post('/form', data={'title': 'hi'},
+                            files={'doc': ('a.txt', b'abc')})
+            assert r.json() == {'title': 'hi', 'fields': ['doc', 'title']}
+            r = client.post('/form', data={'title': 'plain'})
+            assert r.json() == {'title': 'plain', 'fields': ['title']}
+
+    def test_upload_file_is_injected_and_closed_after_the_response(self):
+        app, uploads = self._app()
+        with TestClient(app) as client:
+            r = client.post('/upload', files={'doc': ('a.txt', b'abc')})
+        assert r.json() == {'name': 'a.txt', 'data': 'abc', 'note': None}
+        assert uploads[0].file.closed
+
+    @pytest.mark.parametrize('kwargs', [
+        {'data': {'doc': 'not a file'}},
+        {'files': {'other': ('a.txt', b'abc')}},
+        {'content': b'--x\r\n', 'headers': {
+            'content-type': 'multipart/form-data; boundary=x'}},
+    ])
+    def test_bad_forms_are_answered_400(self, kwargs):
+        app, _ = self._app()
+        with TestClient(app) as client:
+            assert client.post('/upload', **kwargs).status_code == 400
+
+    def test_form_and_body_params_conflict_at_registration(self):
+        app = BlackBull()
+        with pytest.raises(TypeError, match='more than one parameter'):
+            @app.route(path='/x', methods=['POST'])
+            async def both(form: FormData, body: bytes):
+                pass
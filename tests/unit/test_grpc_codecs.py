@@ -0,0 +1,145 @@
+"""Object-typed gRPC methods — ``request_deserializer`` / ``response_serializer``.
+
+JSON stands in for protobuf: the registry only needs two callables, and the
+serving path must apply them on every RPC shape without the handler touching
+bytes.
+"""
+import json
+import threading
+
+import pytest
+
+from blackbull.grpc import GrpcServiceRegistry, GrpcStatus, decode_messages, encode_message
+from blackbull.grpc import asgi as grpc_asgi
+from blackbull.grpc.asgi import serve_grpc
+from blackbull.native import NativeResponse
+
+CODECS = {'request_deserializer': json.loads,
+          'response_serializer': lambda obj: json.dumps(obj).encode()}
+
+
+def _scope(path):
+    return {'type': 'http', 'path': path,
+            'headers': [(b'content-type', b'application/grpc')]}
+
+
+def _receive(*messages):
+    body = b''.join(encode_message(m) for m in messages)
+    sent = False
+
+    async def receive():
+        nonlocal sent
+        if sent:
+            return {'type': 'http.disconnect'}
+        sent = True
+        return {'type': 'http.request', 'body': body, 'more_body': False}
+    return receive
+
+
+async def _call(reg, path, *messages):
+    events = []
+
+    async def send(event):
+        events.extend(event.to_asgi() if isinstance(event, NativeResponse)
+                      else [event])
+
+    await serve_grpc(reg, _scope(path), _receive(*messages), send)
+    bodies = b''.join(e.get('body', b'') for e in events
+                      if e['type'] == 'http.response.body')
+    trailers = dict(h for e in events
+                    if e['type'] in ('http.response.start',
+                                     'http.response.trailers')
+                    for h in e['headers'])
+    return [json.loads(m) for _, m in decode_messages(bodies)], trailers
+
+
+@pytest.mark.asyncio
+async def test_unary_handler_exchanges_objects():
+    reg = GrpcServiceRegistry()
+
+    @reg.method('/calc.Calc/Add', **CODECS)
+    async def add(request, context):
+        return {'sum': request['a'] + request['b']}
+
+    assert reg.lookup_method('/calc.Calc/Add').request_deserializer is json.loads
+    replies, trailers = await _call(reg, '/calc.Calc/Add', b'{"a": 2, "b": 3}')
+    assert replies == [{'sum': 5}]
+    assert trailers[b'grpc-status'] == b'0'
+
+
+@pytest.mark.asyncio
+async def test_streaming_shapes_apply_the_codecs_per_message():
+    reg = GrpcServiceRegistry()
+
+    @reg.method('/calc.Calc/Running', **CODECS)
+    async def running(request_iter, context):
+        total = 0
+        async for item in request_iter:
+            total += item['n']
+            yield {'total': total}
+
+    replies, trailers = await _call(reg, '/calc.Calc/Running',
+                                    b'{"n": 1}', b'{"n": 2}', b'{"n": 3}')
+    assert replies == [{'total': 1}, {'total': 3}, {'total': 6}]
+    assert trailers[b'grpc-status'] == b'0'
+
+
+@pytest.mark.asyncio
+async def test_undecodable_request_is_internal():
+    reg = GrpcServiceRegistry()
+    called = []
+
+    @reg.method('/calc.Calc/Add', **CODECS)
+    async def add(request, context):
+        called.append(request)
+
+    _, trailers = await _call(reg, '/calc.Calc/Add', b'not json')
+    assert trailers[b'grpc-status'] == str(int(GrpcStatus.INTERNAL)).encode()
+    assert b'deserialize' in trailers[b'grpc-message']
+    assert called == []
+
+
+@pytest.mark.asyncio
+async def test_unserializable_response_is_internal():
+    reg = GrpcServiceRegistry()
+
+    @reg.method('/calc.Calc/Add', **CODECS)
+    async def add(request, context):
+        return object()
+
+    _, trailers = await _call(reg, '/calc.Calc/Add', b'{}')
+    assert trailers[b'grpc-status'] == str(int(GrpcStatus.INTERNAL)).encode()
+    assert b'serialize' in trailers[b'grpc-message']
+
+
+@pytest.mark.parametrize('threshold, offloaded', [(4, True), (0, False),
+                                                  (1 << 20, False)])
+@pytest.mark.asyncio
+async def test_large_requests_are_decoded_off_the_loop(
+        monkeypatch, threshold, offloaded):
+    monkeypatch.setattr(grpc_asgi, '_CODEC_OFFLOAD_BYTES', threshold)
+    threads = []
+
+    def decode(data):
+        threads.append(threading.get_ident())
+        return json.loads(data)
+
+    reg = GrpcServiceRegistry()
+
+    @reg.method('/calc.Calc/Echo', request_deserializer=decode)
+    async def echo(request, context):
+        return json.dumps(request).encode()
+
+    replies, _ = await _call(reg, '/calc.Calc/Echo', b'{"big": true}')
+    assert replies == [{'big': True}]
+    assert (threads[0] != threading.get_ident()) is offloaded
+
+
+def test_codecs_must_be_callable():
+    reg = GrpcServiceRegistry()
+
+    async def h(request, context):
+        return b''
+
+    with pytest.raises(TypeError, match='response_serializer'):
+        reg.add_method('/pkg.Svc/M', h, response_serializer=b'nope')
@@ -0,0 +1,125 @@
+"""MessageReassembler — incremental gRPC Length-Prefixed-Message de-framing.
+
+The property that matters is split-independence: however the peer cuts the
+byte stream into DATA chunks, the reassembler yields the same messages
+``decode_messages`` finds in the joined stream.  The unit tests pin the copy
+behaviour (a view when a message sits in one chunk, one join when it
+straddles) and the limit checks, which fire on the prefix alone.
+"""
+import pytest
+from hypothesis import given, strategies as st
+
+from blackbull.grpc import (
+    GrpcError, GrpcStatus, MessageReassembler, decode_messages, encode_message,
+)
+from blackbull.grpc.asgi import _read_unary_request
+from blackbull.grpc.codec import MAX_MESSAGE_LENGTH, GrpcDecodeError, MessageTooLarge
+
+
+def _drain(r: MessageReassembler) -> list[tuple[bool, bytes]]:
+    out = []
+    while (m := r.next_message()) is not None:
+        out.append((m[0], bytes(m[1])))
+    return out
+
+
+class TestReassembler:
+    def test_message_inside_one_chunk_is_a_view(self):
+        r = MessageReassembler()
+        r.feed(encode_message(b'abc') + encode_message(b'de'))
+        flag, payload = r.next_message()
+        assert isinstance(payload, memoryview) and payload == b'abc'
+        assert r.next_message()[1] == b'de'
+        assert r.buffered == 0
+
+    def test_straddling_message_is_joined_once(self):
+        framed = encode_message(b'hello world')
+        r = MessageReassembler()
+        r.feed(framed[:3])            # prefix split too
+        assert r.next_message() is None
+        r.feed(framed[3:9])
+        assert r.next_message() is None
+        r.feed(framed[9:])
+        flag, payload = r.next_message()
+        assert isinstance(payload, bytes) and payload == b'hello world'
+
+    def test_empty_message(self):
+        r = MessageReassembler()
+        r.feed(encode_message(b''))
+        assert r.next_message() == (False, b'')
+        assert r.buffered == 0
+
+    def test_limit_checked_before_body_arrives(self):
+        r = MessageReassembler(max_length=10, max_compressed_length=100)
+        r.feed(b'\x00' + (11).to_bytes(4, 'big'))
+        with pytest.raises(MessageTooLarge) as info:
+            r.next_message()
+        assert (info.value.length, info.value.limit) == (11, 10)
+
+    def test_compressed_limit_is_separate(self):
+        r = MessageReassembler(max_length=10, max_compressed_length=100)
+        r.feed(b'\x01' + (50).to_bytes(4, 'big'))
+        assert r.next_message() is None   # within the compressed bound
+
+    def test_bytearray_chunk_is_not_pinned(self):
+        chunk = bytearray(encode_message(b'abc'))
+        r = MessageReassembler()
+        r.feed(chunk)
+        chunk.clear()                     # producer reuses its buffer
+        assert bytes(r.next_message()[1]) == b'abc'
+
+    def test_drain_returns_messages_ahead_of_an_oversized_one(self):
+        r = MessageReassembler(max_length=10)
+        r.feed(encode_message(b'ok') + b'\x00' + (11).to_bytes(4, 'big'))
+        assert r.drain(copy=True) == [(False, b'ok')]
+        with pytest.raises(MessageTooLarge):
+            r.drain()
+
+    def test_finish_reports_partial_message(self):
+        r = MessageReassembler()
+        r.feed(b'\x00' + (10).to_bytes(4, 'big') + b'abc')
+        assert r.next_message() is None
+        with pytest.raises(GrpcDecodeError, match='need 10 bytes, have 3'):
+            r.finish()
+
+    def test_finish_reports_an_oversized_prefix_as_too_large(self):
+        r = MessageReassembler(max_length=10)
+        r.feed(encode_message(b'ok') + b'\x00' + (11).to_bytes(4, 'big') + b'abc')
+        assert r.drain(copy=True) == [(False, b'ok')]
+        with pytest.raises(MessageTooLarge):
+            r.finish()
+
+
+OVERSIZED_BODY = (encode_message(b'ok') + b'\x00'
+                  + (MAX_MESSAGE_LENGTH + 1).to_bytes(4, 'big'))
+
+
+def test_decode_messages_reports_an_oversized_prefix_as_too_large():
+    with pytest.raises(MessageTooLarge):
+        decode_messages(OVERSIZED_BODY)
+
+
+@pytest.mark.asyncio
+async def test_unary_oversized_prefix_is_resource_exhausted():
+    async def receive():
+        return {'type': 'http.request', 'body': OVERSIZED_BODY, 'more_body': False}
+
+    with pytest.raises(GrpcError) as info:
+        await _read_unary_request(receive, b'identity')
+    assert info.value.status == GrpcStatus.RESOURCE_EXHAUSTED
+
+
+_messages = st.lists(st.binary(max_size=40), max_size=8)
+
+
+@given(messages=_messages, cuts=st.lists(st.integers(0, 400), max_size=10))
+def test_any_chunking_yields_the_same_messages(messages, cuts):
+    stream = b''.join(encode_message(m) for m in messages)
+    bounds = sorted({c for c in cuts if c < len(stream)} | {0, len(stream)})
+    r = MessageReassembler()
+    got = []
+    for lo, hi in zip(bounds, bounds[1:]):
+        r.feed(stream[lo:hi])
+        got.extend(_drain(r) if lo % 2 else r.drain(copy=True))
+    r.finish()
+    assert got == decode_messages(stream) == [(False, m) for m in messages]
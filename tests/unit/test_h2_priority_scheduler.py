@@ -0,0 +1,182 @@
+"""RFC 9218 egress scheduling — ``PriorityScheduler`` and its use by ``HTTP2Sender``.
+
+The scheduler decides who writes the next DATA frame when several streams
+want to.  The unit tests pin the ranking (urgency buckets, non-incremental in
+stream-id order, incremental round-robin) and the two ways a turn can be lost
+without wedging the connection — cancellation and ``forget``.  The sender
+tests drive real ``HTTP2Sender`` objects over a writer that yields on every
+write, which is the contention the scheduler exists for.
+"""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from blackbull.server.h2_scheduler import PriorityScheduler
+from blackbull.server.sender import (AbstractWriter, ConnectionWindow,
+                                     HTTP2Sender)
+
+pytestmark = pytest.mark.asyncio
+
+
+def _sched(**priorities) -> PriorityScheduler:
+    """``_sched(s1=(u, i), ...)`` — a scheduler with those stream priorities."""
+    s = PriorityScheduler()
+    for name, (urgency, incremental) in priorities.items():
+        s.set_priority(int(name[1:]), {'urgency': urgency,
+                                       'incremental': incremental})
+    return s
+
+
+class TestRanking:
+    async def test_uncontended_acquire_does_not_wait(self):
+        s = PriorityScheduler()
+        assert s.acquire(1) is None
+        s.release(1)
+        assert s.acquire(3) is None
+
+    async def test_more_urgent_waiter_is_served_first(self):
+        s = _sched(s1=(3, False), s3=(7, False), s5=(0, False))
+        assert s.acquire(1) is None
+        low, high = s.acquire(3), s.acquire(5)
+        s.release(1)
+        assert high.done() and not low.done()
+
+    async def test_non_incremental_served_in_stream_id_order(self):
+        s = _sched(s1=(3, False), s7=(3, False), s5=(3, False))
+        s.acquire(1)
+        seven, five = s.acquire(7), s.acquire(5)
+        s.release(1)
+        assert five.done() and not seven.done()
+
+    async def test_incremental_holder_yields_round_robin(self):
+        s = _sched(s1=(3, True), s3=(3, True))
+        s.acquire(1)
+        other = s.acquire(3)
+        mine = s.yield_turn(1)
+        assert other.done() and mine is not None and not mine.done()
+        assert s.yield_turn(3) is not None   # and back again
+        assert mine.done()
+
+    async def test_non_incremental_holder_keeps_floor_at_same_urgency(self):
+        s = _sched(s1=(3, False), s3=(3, True), s5=(3, False))
+        s.acquire(1)
+        s.acquire(3)
+        s.acquire(5)
+        assert s.yield_turn(1) is None
+
+    async def test_holder_yields_to_more_urgent(self):
+        s = _sched(s1=(5, False), s3=(1, False))
+        s.acquire(1)
+        high = s.acquire(3)
+        assert s.yield_turn(1) is not None
+        assert high.done()
+
+    async def test_priority_update_moves_queued_stream(self):
+        s = _sched(s1=(3, False), s3=(7, False), s5=(5, False))
+        s.acquire(1)
+        three, five = s.acquire(3), s.acquire(5)
+        s.set_priority(3, {'urgency': 0, 'incremental': False})
+        s.release(1)
+        assert three.done() and not five.done()
+
+
+class TestLostTurns:
+    async def test_cancelled_waiter_is_skipped(self):
+        s = PriorityScheduler()
+        s.acquire(1)
+        gone, live = s.acquire(3), s.acquire(5)
+        gone.cancel()
+        s.release(1)
+        assert live.done()
+
+    async def test_abandon_after_handoff_passes_floor_on(self):
+        s = PriorityScheduler()
+        s.acquire(1)
+        handed, next_ = s.acquire(3), s.acquire(5)
+        s.release(1)
+        assert handed.done()
+        s.abandon(3, handed)       # its task was cancelled before it ran
+        assert next_.done()
+
+    async def test_forget_holder_releases(self):
+        s = PriorityScheduler()
+        s.acquire(1)
+        waiter = s.acquire(3)
+        s.forget(1)
+        assert waiter.done()
+
+
+# ---------------------------------------------------------------------------
+# HTTP2Sender integration
+# ---------------------------------------------------------------------------
+
+class _YieldingWriter(AbstractWriter):
+    """Records the stream id of every DATA frame; yields on each write."""
+
+    def __init__(self) -> None:
+        self.stream_ids: list[int] = []
+
+    async def write(self, data: bytes) -> None:
+        self.stream_ids.append(int.from_bytes(data[5:9], 'big') & 0x7FFFFFFF)
+        await asyncio.sleep(0)
+
+    async def close(self) -> None:
+        pass
+
+
+def _sender(writer, stream_id, scheduler, window) -> HTTP2Sender:
+    s = HTTP2Sender(writer, None, stream_id, conn_window=window,
+                    initial_window=1 << 30, flow_control_timeout=0,
+                    scheduler=scheduler)
+    s.max_frame_size = 100
+    return s
+
+
+async def test_urgent_stream_overtakes_a_bulk_transfer():
+    sched = _sched(s1=(7, False), s3=(0, False))
+    window = ConnectionWindow(1 << 30)
+    writer = _YieldingWriter()
+    bulk = _sender(writer, 1, sched, window)
+    css = _sender(writer, 3, sched, window)
+
+    bulk_task = asyncio.ensure_future(bulk._write_data(b'b' * 2000, True))
+    await asyncio.sleep(0)     # bulk is mid-transfer
+    await css._write_data(b'c' * 500, True)
+    await bulk_task
+
+    last_css = len(writer.stream_ids) - writer.stream_ids[::-1].index(3)
+    # All five CSS frames go out before the bulk stream's remainder.
+    assert writer.stream_ids[:last_css].count(3) == 5
+    assert writer.stream_ids[:last_css].count(1) <= 2
+    assert writer.stream_ids.count(1) == 20
+
+
+async def test_incremental_streams_interleave():
+    sched = _sched(s1=(3, True), s3=(3, True))
+    window = ConnectionWindow(1 << 30)
+    writer = _YieldingWriter()
+    a = _sender(writer, 1, sched, window)
+    b = _sender(writer, 3, sched, window)
+    await asyncio.gather(a._write_data(b'a' * 400, True),
+                         b._write_data(b'b' * 400, True))
+    assert writer.stream_ids[1:7] in ([3, 1, 3, 1, 3, 1], [1, 3, 1, 3, 1, 3])
+
+
+async def test_stream_without_credit_does_not_hold_the_floor():
+    sched = _sched(s1=(0, False), s3=(7, False))
+    window = ConnectionWindow(1 << 30)
+    writer = _YieldingWriter()
+    stalled = _sender(writer, 1, sched, window)
+    stalled.stream_window_size = 0
+    flowing = _sender(writer, 3, sched, window)
+
+    stalled_task = asyncio.ensure_future(stalled._write_data(b's' * 100, True))
+    await asyncio.sleep(0)
+    await asyncio.wait_for(flowing._write_data(b'f' * 300, True), timeout=1.0)
+    assert writer.stream_ids == [3, 3, 3]
+
+    stalled.window_update(100)
+    await asyncio.wait_for(stalled_task, timeout=1.0)
+    assert writer.stream_ids[-1] == 1
@@ -0,0 +1,234 @@
+"""BlackBull's HPACK codec (``blackbull.protocol.hpack_codec``).
+
+The ``hpack`` package is the reference: for the same header lists the
+encoder must emit the same bytes and the decoder must return the same
+fields, so swapping codecs changes nothing on the wire.
+"""
+from unittest.mock import MagicMock
+
+import hpack
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from blackbull.protocol import hpack_codec
+from blackbull.protocol.hpack_codec import (
+    Decoder, Encoder, HPACKDecodingError, InvalidTableIndexError,
+    InvalidTableSizeError, OversizedHeaderListError, huffman_decode,
+    huffman_encode,
+)
+from blackbull.server.http2_actor import HTTP2Actor
+from blackbull.server.sender import AsyncioWriter
+
+
+@pytest.fixture(autouse=True)
+def _empty_block_cache():
+    hpack_codec._BLOCK_CACHE.clear()
+    yield
+    hpack_codec._BLOCK_CACHE.clear()
+
+
+# RFC 7541 Appendix C.4 — three requests on one connection, Huffman-coded.
+_C4 = [
+    ([(b':method', b'GET'), (b':scheme', b'http'), (b':path', b'/'),
+      (b':authority', b'www.example.com')],
+     '828684418cf1e3c2e5f23a6ba0ab90f4ff'),
+    ([(b':method', b'GET'), (b':scheme', b'http'), (b':path', b'/'),
+      (b':authority', b'www.example.com'), (b'cache-control', b'no-cache')],
+     '828684be5886a8eb10649cbf'),
+    ([(b':method', b'GET'), (b':scheme', b'https'), (b':path', b'/index.html'),
+      (b':authority', b'www.example.com'), (b'custom-key', b'custom-value')],
+     '828785bf408825a849e95ba97d7f8925a849e95bb8e8b4bf'),
+]
+
+
+def test_rfc7541_appendix_c4_requests():
+    encoder, decoder = Encoder(), Decoder()
+    for headers, wire in _C4:
+        block = encoder.encode(headers)
+        assert block.hex() == wire
+        assert decoder.decode(block, raw=True) == headers
+
+
+def test_decode_returns_str_unless_raw():
+    block = Encoder().encode([(':path', '/café')])
+    assert Decoder().decode(block) == [(':path', '/café')]
+
+
+def test_sensitive_field_is_never_indexed():
+    encoder = Encoder()
+    first = encoder.encode([(b'authorization', b'secret', True)])
+    assert first[0] & 0xf0 == 0x10                 # §6.2.3
+    assert encoder.encode([(b'authorization', b'secret', True)]) == first
+
+
+@pytest.mark.parametrize('data', [
+    b'', b'a', b'www.example.com', bytes(range(256)),
+])
+def test_huffman_round_trip(data):
+    assert huffman_decode(huffman_encode(data)) == data
+
+
+@pytest.mark.parametrize('coded', [
+    b'\xff',                     # eight bits of padding (§5.2: at most 7)
+    b'\xff\xff\xff\xff',         # EOS itself
+    b'\x00',                     # '0' then padding that is not all ones
+])
+def test_huffman_rejects_bad_padding_and_eos(coded):
+    with pytest.raises(HPACKDecodingError):
+        huffman_decode(coded)
+
+
+@pytest.mark.parametrize('block, error', [
+    (b'\x80', InvalidTableIndexError),            # index 0
+    (b'\xbe', InvalidTableIndexError),            # 62, empty dynamic table
+    (b'\x82\x3f\xe1\x1f', HPACKDecodingError),    # size update after a field
+    (b'\x3f\xe2\x1f', InvalidTableSizeError),     # 4097 > allowed 4096
+    (b'\x40\x05ab', HPACKDecodingError),          # truncated literal
+    (b'\xff\xff\xff\xff\xff\xff\xff', HPACKDecodingError),  # endless integer
+])
+def test_malformed_blocks_are_rejected(block, error):
+    with pytest.raises(error):
+        Decoder().decode(block)
+    with pytest.raises(hpack.HPACKDecodingError):  # the reference agrees
+        hpack.Decoder().decode(block)
+
+
+def test_header_list_size_is_capped():
+    block = Encoder().encode([(b'x-big', b'v' * 200, True)])
+    with pytest.raises(OversizedHeaderListError):
+        Decoder(max_header_list_size=100).decode(block)
+
+
+class TestBlockCache:
+    # Never-indexed literals and static references: no dynamic-table state.
+    STATIC_ONLY = Encoder().encode(
+        [(b':method', b'GET'), (b':path', b'/x', True), (b'x-id', b'7', True)])
+
+    def test_static_only_block_is_cached_across_connections(self):
+        first = Decoder().decode(self.STATIC_ONLY, raw=True)
+        assert self.STATIC_ONLY in hpack_codec._BLOCK_CACHE
+        again = Decoder().decode(self.STATIC_ONLY, raw=True)
+        assert again == first == [(b':method', b'GET'), (b':path', b'/x'),
+                                  (b'x-id', b'7')]
+        again.append(None)                         # callers get their own list
+        assert Decoder().decode(self.STATIC_ONLY, raw=True) == first
+
+    def test_blocks_that_touch_the_dynamic_table_are_not_cached(self):
+        encoder, decoder = Encoder(), Decoder()
+        inserting = encoder.encode([(b'x-id', b'7')])
+        referencing = encoder.encode([(b'x-id', b'7')])
+        decoder.decode(inserting)
+        decoder.decode(referencing)
+        assert not hpack_codec._BLOCK_CACHE
+
+    def test_cached_block_still_honours_the_list_size_cap(self):
+        Decoder().decode(self.STATIC_ONLY)
+        with pytest.raises(OversizedHeaderListError):
+            Decoder(max_header_list_size=50).decode(self.STATIC_ONLY)
+
+    def test_cache_is_bounded(self, monkeypatch):
+        monkeypatch.setattr(hpack_codec, 'BLOCK_CACHE_SIZE', 4)
+        encoder = Encoder()
+        for i in range(10):
+            Decoder().decode(encoder.encode([(b'x-n', b'%d' % i, True)]))
+        assert len(hpack_codec._BLOCK_CACHE) == 4
+
+
+_name = st.sampled_from([b':method', b':path', b':status', b'content-type',
+                         b'cookie', b'x-a', b'x-b', b'accept-encoding'])
+_value = st.sampled_from([b'', b'GET', b'/', b'200', b'gzip, deflate',
+                          b'text/plain', b'\xc3\xa9\x00\xff']) | st.binary(max_size=40)
+_field = st.tuples(_name, _value) | st.tuples(_name, _value, st.booleans())
+_step = st.tuples(st.none() | st.sampled_from([0, 64, 256, 4096]),
+                  st.lists(_field, max_size=8), st.booleans())
+
+
+@settings(max_examples=200, deadline=None)
+@given(steps=st.lists(_step, min_size=1, max_size=12))
+def test_matches_the_reference_codec(steps):
+    ours, theirs = (Encoder(), Decoder()), (hpack.Encoder(), hpack.Decoder())
+    for table_size, headers, huffman in steps:
+        if table_size is not None:
+            ours[0].header_table_size = theirs[0].header_table_size = table_size
+        block = ours[0].encode(headers, huffman=huffman)
+        assert block == theirs[0].encode(headers, huffman=huffman)
+        expected = [(bytes(n), bytes(v)) for n, v in theirs[1].decode(block, raw=True)]
+        assert ours[1].decode(block, raw=True) == expected
+        assert expected == [(n, v) for n, v, *_ in headers]
+
+
+class TestEncodeMemo:
+    RESPONSE = [(b'content-type', b'text/plain'), (b'server', b'blackbull')]
+
+    def test_unchanged_table_replays_the_remembered_block(self, monkeypatch):
+        encoder = Encoder()
+        encoder.encode(self.RESPONSE)                  # inserts both fields
+        second = encoder.encode(self.RESPONSE)         # all indexed, no change
+        monkeypatch.setattr(encoder, '_encode_indexed', None)
+        assert encoder.encode(list(self.RESPONSE)) == second
+
+    def test_table_change_discards_remembered_blocks(self):
+        encoder, reference = Encoder(), hpack.Encoder()
+        for headers in (self.RESPONSE, self.RESPONSE, [(b'x-new', b'1')],
+                        self.RESPONSE):
+            assert encoder.encode(headers) == reference.encode(headers)
+
+    def test_eviction_discards_remembered_blocks(self):
+        encoder, reference = Encoder(), hpack.Encoder()
+        encoder.header_table_size = reference.header_table_size = 100
+        for headers in (self.RESPONSE[:1], self.RESPONSE[:1],
+                        [(b'x-big', b'v' * 40)], self.RESPONSE[:1]):
+            assert encoder.encode(headers) == reference.encode(headers)
+
+    def test_growing_the_table_discards_remembered_blocks(self):
+        # At size 0 nothing is inserted, so the block is remembered; once the
+        # table can hold the fields the same list must index them again.
+        encoder, reference = Encoder(), hpack.Encoder()
+        for size in (0, 4096):
+            encoder.header_table_size = reference.header_table_size = size
+            for _ in range(2):
+                assert (encoder.encode(self.RESPONSE)
+                        == reference.encode(self.RESPONSE))
+
+    def test_size_update_is_emitted_ahead_of_a_replayed_block(self):
+        encoder = Encoder()
+        encoder.encode(self.RESPONSE)
+        replay = encoder.encode(self.RESPONSE)
+        encoder.header_table_size = 8192
+        assert encoder.encode(self.RESPONSE) == b'\x3f\xe1\x3f' + replay
+
+
+class TestStaticOnly:
+    HEADERS = [(b':status', b'200'), (b'content-type', b'text/plain'),
+               (b'x-trace', b'abc'), (b'authorization', b'secret', True)]
+
+    def test_fields_are_not_indexed_and_decode_anywhere(self):
+        encoder = Encoder(static_only=True)
+        first = encoder.encode(self.HEADERS)
+        assert encoder.encode(self.HEADERS) == first
+        assert encoder._table.size == 0
+        expected = [h[:2] for h in self.HEADERS]
+        assert hpack.Decoder().decode(first, raw=True) == expected
+        assert Decoder().decode(first, raw=True) == expected
+        assert first[1] == 0x0f and first[2] == 0x10    # §6.2.2 name index 31
+        assert b'\x10' in first                          # §6.2.3 for the secret
+
+    def test_field_encodings_are_cached_across_differing_lists(self, monkeypatch):
+        encoder = Encoder(static_only=True)
+        encoder.encode([(b'content-type', b'text/plain'), (b'date', b'1')])
+        calls = []
+        real = hpack_codec._static_field
+        monkeypatch.setattr(hpack_codec, '_static_field',
+                            lambda h, huffman: calls.append(h) or real(h, huffman))
+        block = encoder.encode([(b'content-type', b'text/plain'), (b'date', b'2')])
+        assert calls == [(b'date', b'2')]
+        assert Decoder().decode(block, raw=True) == [
+            (b'content-type', b'text/plain'), (b'date', b'2')]
+
+    @pytest.mark.parametrize('env, static_only', [('1', True), ('0', False)])
+    def test_http2_actor_reads_the_mode_from_the_environment(
+            self, monkeypatch, env, static_only):
+        monkeypatch.setenv('BB_H2_HPACK_STATIC_ONLY', env)
+        actor = HTTP2Actor(None, AsyncioWriter(MagicMock()), None,
+                           aggregator=None)
+        assert actor.factory.encoder.static_only is static_only
@@ -0,0 +1,255 @@
+"""``blackbull.server.admission`` — the CoDel admission controller, and the
+HTTP/1.1 and HTTP/2 refusals it drives (``BB_SHED_TARGET_MS``).
+"""
+import asyncio
+import time
+
+import pytest
+from hpack import Encoder
+
+from blackbull import BlackBull
+from blackbull.env import get_settings, reset_settings_cache
+from blackbull.metrics import MetricsRegistry
+from blackbull.protocol.frame_types import FrameTypes, HeaderFrameFlags
+from blackbull.server import admission as admission_mod
+from blackbull.server.admission import AdmissionController
+from blackbull.server.connection_protocol import ConnectionProtocol
+from blackbull.server.http1_actor import HTTP1Actor
+from blackbull.server.http2_actor import HTTP2Actor
+from blackbull.server.recipient import AbstractReader, IncompleteReadError
+from blackbull.server.sender import AbstractWriter
+from blackbull.server.server import ASGIServer
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(admission_mod, 'time', clock)
+    return clock
+
+
+class _Writer(AbstractWriter):
+    def __init__(self) -> None:
+        self.written = bytearray()
+
+    async def write(self, data: bytes) -> None:
+        self.written += data
+
+
+class _Reader(AbstractReader):
+    """Serves *data*; every byte of it "arrived" at *arrived_at*."""
+
+    def __init__(self, data: bytes, arrived_at: float) -> None:
+        self._buf = bytearray(data)
+        self.arrived_at = arrived_at
+
+    async def read(self, n: int = -1) -> bytes:
+        chunk = bytes(self._buf[:n]) if n >= 0 else bytes(self._buf)
+        del self._buf[:len(chunk)]
+        return chunk
+
+    async def readexactly(self, n: int) -> bytes:
+        if len(self._buf) < n:
+            raise IncompleteReadError(bytes(self._buf), n)
+        return await self.read(n)
+
+    async def readuntil(self, sep: bytes = b'\n') -> bytes:
+        i = self._buf.find(sep)
+        if i < 0:
+            raise IncompleteReadError(bytes(self._buf), len(self._buf) + 1)
+        return await self.read(i + len(sep))
+
+
+def _overloaded(clock: _Clock, registry=None) -> AdmissionController:
+    """A controller whose queue has stood above the 5 ms target for 150 ms."""
+    controller = AdmissionController(0.005, 0.1, retry_after=3,
+                                     registry=registry)
+    assert controller.admit(clock.now - 0.05, 'HTTP/1.1')
+    clock.now += 0.15
+    assert not controller.admit(clock.now - 0.05, 'HTTP/1.1')
+    return controller
+
+
+# ---------------------------------------------------------------------------
+# The control law
+# ---------------------------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_a_burst_shorter_than_the_interval_is_queued(clock):
+    controller = AdmissionController(0.005, 0.1)
+    for _ in range(10):
+        assert controller.admit(clock.now - 0.05, 'HTTP/1.1')
+        clock.now += 0.009
+    assert not controller.overloaded
+
+
+@pytest.mark.asyncio
+async def test_a_standing_queue_is_shed_down_to_the_target(clock):
+    controller = _overloaded(clock)
+    assert controller.overloaded
+    # Requests that waited past the target are refused; one under it is not,
+    # and it shows the queue drained, which ends the overload.
+    assert not controller.admit(clock.now - 0.006, 'HTTP/1.1')
+    assert controller.admit(clock.now - 0.001, 'HTTP/1.1')
+    assert not controller.overloaded
+    # A new episode needs a whole interval above the target again.
+    assert controller.admit(clock.now - 0.05, 'HTTP/1.1')
+
+
+@pytest.mark.asyncio
+async def test_a_lagging_loop_counts_as_queueing_delay():
+    # Bytes read right after a long iteration are freshly stamped, but they
+    # waited in the kernel for as long as the loop was busy.
+    controller = AdmissionController(0.005, 0.0)
+    assert controller.admit(time.monotonic(), 'HTTP/1.1')
+    time.sleep(0.02)
+    await asyncio.sleep(0.001)              # the probe fires, late
+    assert controller._lag >= 0.015
+    assert controller.admit(time.monotonic(), 'HTTP/1.1')
+    assert not controller.admit(time.monotonic(), 'HTTP/1.1')
+
+
+@pytest.mark.asyncio
+async def test_the_probe_stops_when_no_requests_come():
+    controller = AdmissionController(0.005, 0.1)
+    assert controller.admit(time.monotonic(), 'HTTP/1.1')
+    assert controller._probe_loop is not None
+    await asyncio.sleep(0.05)
+    assert controller._probe_loop is None
+    assert controller.admit(time.monotonic(), 'HTTP/1.1')
+    assert controller._probe_loop is asyncio.get_running_loop()
+
+
+@pytest.mark.asyncio
+async def test_an_unstamped_request_is_admitted(clock):
+    assert _overloaded(clock).admit(0.0, 'HTTP/1.1')
+
+
+@pytest.mark.asyncio
+async def test_refusals_are_counted_and_the_episode_logged_once(clock, caplog):
+    registry = MetricsRegistry()
+    with caplog.at_level('WARNING', logger='blackbull.caps'):
+        controller = _overloaded(clock, registry)
+        controller.admit(clock.now - 1, 'HTTP/2')
+    shed = registry['blackbull_requests_shed_total']
+    assert shed.labels('HTTP/1.1').value == 1
+    assert shed.labels('HTTP/2').value == 1
+    records = [r for r in caplog.records if getattr(r, 'cap', None) == 'shed_target']
+    assert len(records) == 1
+    assert records[0].limit == 5.0
+
+
+def test_bb_shed_settings(monkeypatch):
+    assert AdmissionController.from_settings(get_settings()) is None
+    monkeypatch.setenv('BB_SHED_TARGET_MS', '20')
+    monkeypatch.setenv('BB_SHED_RETRY_AFTER', '4')
+    reset_settings_cache()
+    try:
+        controller = AdmissionController.from_settings(get_settings())
+    finally:
+        monkeypatch.delenv('BB_SHED_TARGET_MS')
+        monkeypatch.delenv('BB_SHED_RETRY_AFTER')
+        reset_settings_cache()
+    assert controller.target == pytest.approx(0.02)
+    assert controller.interval == pytest.approx(0.1)
+    assert controller.retry_after == b'4'
+
+
+def test_server_stamps_arrivals_only_when_shedding(monkeypatch):
+    app = BlackBull()
+    plain = ASGIServer(app).connection_protocol_factory()()
+    assert type(plain).buffer_updated is ConnectionProtocol.buffer_updated
+
+    monkeypatch.setenv('BB_SHED_TARGET_MS', '10')
+    reset_settings_cache()
+    try:
+        server = ASGIServer(app)
+    finally:
+        monkeypatch.delenv('BB_SHED_TARGET_MS')
+        reset_settings_cache()
+    assert server._admission is not None
+    assert 'blackbull_requests_shed_total' in app.metrics
+    protocol = server.connection_protocol_factory()()
+    assert protocol.reader.arrived_at == 0.0
+    protocol.get_buffer(64)[:3] = b'GET'
+    protocol.buffer_updated(3)
+    assert protocol.reader.arrived_at > 0.0
+
+
+# ---------------------------------------------------------------------------
+# The refusals
+# ---------------------------------------------------------------------------
+
+async def _ok(conn, receive, send):
+    _ok.calls += 1
+    await send(b'ok')
+
+
+@pytest.mark.asyncio
+async def test_http1_sheds_with_503_and_keeps_the_connection(clock):
+    _ok.calls = 0
+    request = b'GET / HTTP/1.1\r\nHost: x\r\n\r\n'
+    writer = _Writer()
+    actor = HTTP1Actor(_Reader(request * 2, clock.now - 1), writer, _ok, None,
+                       admission=_overloaded(clock))
+    await actor.run()
+    assert _ok.calls == 0
+    assert writer.written.count(b'HTTP/1.1 503 Service Unavailable\r\n') == 2
+    assert b'retry-after: 3\r\n' in writer.written
+    assert b'connection: close' not in writer.written
+
+
+@pytest.mark.asyncio
+async def test_http1_shed_with_a_body_closes(clock):
+    _ok.calls = 0
+    request = (b'POST / HTTP/1.1\r\nHost: x\r\nContent-Length: 3\r\n\r\nabc'
+               b'GET / HTTP/1.1\r\nHost: x\r\n\r\n')
+    writer = _Writer()
+    actor = HTTP1Actor(_Reader(request, clock.now - 1), writer, _ok, None,
+                       admission=_overloaded(clock))
+    await actor.run()
+    assert writer.written.count(b'HTTP/1.1 503') == 1
+    assert b'connection: close\r\n' in writer.written
+
+
+@pytest.mark.asyncio
+async def test_http1_admits_a_fresh_request(clock):
+    _ok.calls = 0
+    admission = _overloaded(clock)
+    writer = _Writer()
+    actor = HTTP1Actor(_Reader(b'GET / HTTP/1.1\r\nHost: x\r\n\r\n', clock.now),
+                       writer, _ok, None, admission=admission)
+    await actor.run()
+    assert _ok.calls == 1
+    assert writer.written.startswith(b'HTTP/1.1 200')
+
+
+def _headers_frame(stream_id: int) -> bytes:
+    block = Encoder().encode([
+        (b':method', b'GET'), (b':path', b'/'), (b':scheme', b'https'),
+        (b':authority', b'x'),
+    ])
+    flags = HeaderFrameFlags.END_HEADERS | HeaderFrameFlags.END_STREAM
+    return (len(block).to_bytes(3, 'big') + FrameTypes.HEADERS
+            + bytes([flags]) + stream_id.to_bytes(4, 'big') + block)
+
+
+@pytest.mark.asyncio
+async def test_http2_refuses_the_stream(clock):
+    _ok.calls = 0
+    writer = _Writer()
+    actor = HTTP2Actor(_Reader(_headers_frame(1), clock.now - 1), writer, _ok,
+                       None, admission=_overloaded(clock))
+    await asyncio.wait_for(actor.run(), 5)
+    assert _ok.calls == 0
+    # RST_STREAM on stream 1 with REFUSED_STREAM (0x7).
+    assert (b'\x00\x00\x04\x03\x00\x00\x00\x00\x01\x00\x00\x00\x07'
+            in writer.written)
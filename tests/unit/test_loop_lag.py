@@ -0,0 +1,104 @@
+"""The loop-lag monitor (``blackbull.server.lag``).
+
+The scanner tick is shortened so a deliberate ``time.sleep`` on the loop is
+sure to cover one; what is pinned is that the late tick is measured and the
+stall is traced back to the code, route and connection that caused it.
+"""
+import asyncio
+import json
+import logging
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from blackbull import BlackBull
+from blackbull.env import reset_settings_cache
+from blackbull.logger import JsonFormatter
+from blackbull.metrics import MetricsRegistry
+from blackbull.server import deadline
+from blackbull.server.lag import LoopLagMonitor
+from blackbull.server.server import ASGIServer
+
+pytestmark = pytest.mark.asyncio
+
+
+@pytest.fixture(autouse=True)
+def fast_tick(monkeypatch):
+    monkeypatch.setattr(deadline, '_TICK_S', 0.02)
+
+
+async def _blocking_handler(conn):
+    time.sleep(0.2)                     # a handler that forgot to await
+
+
+async def _monitored(registry=None):
+    monitor = LoopLagMonitor(0.05, registry)
+    monitor.start()
+    return monitor
+
+
+async def test_a_stall_is_attributed_to_the_blocking_code(caplog):
+    registry = MetricsRegistry()
+    monitor = await _monitored(registry)
+    conn = SimpleNamespace(connection_id='c0ffee', path='/slow/7',
+                           state={'access_log': SimpleNamespace(route='/slow/{n}')})
+    try:
+        with caplog.at_level(logging.WARNING, logger='blackbull.lag'):
+            await asyncio.sleep(0.05)
+            await _blocking_handler(conn)
+            await asyncio.sleep(0.05)
+    finally:
+        monitor.stop()
+
+    [record] = [r for r in caplog.records if r.name == 'blackbull.lag']
+    assert record.lag_ms >= 100
+    assert record.connection_id == 'c0ffee'
+    assert record.route == '/slow/{n}'
+    assert record.path == '/slow/7'
+    assert record.coroutine.endswith('test_a_stall_is_attributed_to_the_blocking_code')
+    assert '_blocking_handler' in record.getMessage()
+    assert any(line.endswith('in _blocking_handler') for line in record.stack)
+    assert json.loads(JsonFormatter().format(record))['route'] == '/slow/{n}'
+    assert registry['blackbull_event_loop_stalls_total'].value == 1
+    lag = registry['blackbull_event_loop_lag_seconds']
+    assert lag.count >= 3
+    assert lag.quantile(1.0) >= 0.1
+
+
+async def test_an_idle_loop_reports_nothing(caplog):
+    registry = MetricsRegistry()
+    monitor = await _monitored(registry)
+    try:
+        with caplog.at_level(logging.WARNING, logger='blackbull.lag'):
+            await asyncio.sleep(0.15)
+    finally:
+        monitor.stop()
+    assert not [r for r in caplog.records if r.name == 'blackbull.lag']
+    assert registry['blackbull_event_loop_lag_seconds'].count >= 3
+    assert registry['blackbull_event_loop_stalls_total'].value == 0
+
+
+async def test_stop_leaves_the_scanner_and_thread_clean():
+    monitor = await _monitored()
+    monitor.stop()
+    monitor.stop()
+    assert monitor not in deadline._Scanner._REGISTRY
+    assert monitor._thread is None
+
+
+async def test_server_starts_the_monitor_only_when_configured(monkeypatch):
+    server = ASGIServer(BlackBull())
+    reset_settings_cache()
+    assert server._start_lag_monitor() is None
+    monkeypatch.setenv('BB_LOOP_LAG_MS', '50')
+    reset_settings_cache()
+    try:
+        monitor = server._start_lag_monitor()
+    finally:
+        monkeypatch.delenv('BB_LOOP_LAG_MS')
+        reset_settings_cache()
+    try:
+        assert 'blackbull_event_loop_lag_seconds' in server.app.metrics
+    finally:
+        monitor.stop()
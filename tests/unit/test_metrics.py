@@ -0,0 +1,293 @@
+"""``blackbull.metrics`` — the registry, the log-linear histogram, and the
+request series the protocol actors feed at dispatch entry and exit.
+"""
+import logging
+import math
+import random
+
+import pytest
+from hpack import Encoder
+
+from blackbull import BlackBull
+from blackbull.env import reset_settings_cache
+from blackbull.event_aggregator import EventAggregator
+from blackbull.metrics import (
+    BUCKETS, MAX_EXPONENT, SUB_BUCKET_BITS, MetricsRegistry, RequestMetrics,
+    bucket_index, bucket_upper,
+)
+from blackbull.protocol.frame_types import FrameTypes, HeaderFrameFlags
+from blackbull.server.http1_actor import HTTP1Actor
+from blackbull.server.http2_actor import HTTP2Actor
+from blackbull.server.recipient import AbstractReader, IncompleteReadError
+from blackbull.server.sender import AbstractWriter
+from blackbull.testing.native import get
+
+
+class _FakeWriter(AbstractWriter):
+    def __init__(self) -> None:
+        self.written = bytearray()
+
+    async def write(self, data: bytes) -> None:
+        self.written += data
+
+
+class _FakeReader(AbstractReader):
+    def __init__(self, data: bytes = b'') -> None:
+        self._buf = bytearray(data)
+
+    async def read(self, n: int = -1) -> bytes:
+        chunk = bytes(self._buf[:n]) if n >= 0 else bytes(self._buf)
+        del self._buf[:len(chunk)]
+        return chunk
+
+    async def readexactly(self, n: int) -> bytes:
+        if len(self._buf) < n:
+            raise IncompleteReadError(bytes(self._buf), n)
+        return await self.read(n)
+
+    async def readuntil(self, sep: bytes = b'\n') -> bytes:
+        i = self._buf.find(sep)
+        if i < 0:
+            raise IncompleteReadError(bytes(self._buf), len(self._buf) + 1)
+        return await self.read(i + len(sep))
+
+
+def _raw(path: str) -> bytes:
+    return f'GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n'.encode()
+
+
+async def _serve(app: BlackBull, *paths: str, metrics: bool = True) -> None:
+    """Serve *paths* pipelined on one HTTP/1.1 connection."""
+    aggregator = EventAggregator(app._dispatcher,
+                                 app._request_metrics if metrics else None)
+    actor = HTTP1Actor(_FakeReader(b''.join(_raw(p) for p in paths[1:])),
+                       _FakeWriter(), app, aggregator, request=_raw(paths[0]),
+                       peername=('127.0.0.1', 54321),
+                       sockname=('0.0.0.0', 8000))
+    await actor.run()
+
+
+def _app() -> BlackBull:
+    app = BlackBull()
+
+    @app.route(path='/items/{id:int}')
+    async def item(conn, receive, send):
+        await send(b'ok')
+    return app
+
+
+# ---------------------------------------------------------------------------
+# Buckets
+# ---------------------------------------------------------------------------
+
+def test_every_value_lands_in_a_bucket_that_bounds_it():
+    rng = random.Random(7)
+    values = list(range(64)) + [rng.randrange(1 << MAX_EXPONENT)
+                                for _ in range(5000)]
+    for units in values:
+        index = bucket_index(units)
+        assert 0 <= index < BUCKETS
+        assert units < bucket_upper(index)
+        assert index == 0 or bucket_upper(index - 1) <= units
+        # The bucket bound overstates a value by at most 1 / 2**SUB_BUCKET_BITS.
+        assert bucket_upper(index) - units <= max(1, units >> SUB_BUCKET_BITS)
+
+
+def test_bucket_overflow_and_negatives():
+    assert bucket_index(1 << MAX_EXPONENT) == BUCKETS
+    assert bucket_index(1 << 40) == BUCKETS
+    assert bucket_index(-5) == 0
+
+
+# ---------------------------------------------------------------------------
+# Families and the registry
+# ---------------------------------------------------------------------------
+
+def test_histogram_quantiles_are_within_the_bucket_error():
+    h = MetricsRegistry().histogram('latency_seconds')
+    samples = [i / 10_000 for i in range(1, 1001)]      # 0.1 ms … 100 ms
+    for value in samples:
+        h.observe(value)
+    assert h.count == 1000
+    assert h.sum == pytest.approx(sum(samples), rel=1e-3)
+    for q in (0.5, 0.9, 0.99, 1.0):
+        exact = samples[math.ceil(q * len(samples)) - 1]
+        assert exact <= h.quantile(q) <= exact * (1 + 2 ** -SUB_BUCKET_BITS)
+    h.observe(10_000.0)                                  # past MAX_EXPONENT
+    assert h.quantile(1.0) == math.inf
+    with pytest.raises(ValueError):
+        h.quantile(1.5)
+
+
+def test_empty_histogram_quantile_is_zero():
+    assert MetricsRegistry().histogram('h').quantile(0.99) == 0.0
+
+
+def test_counter_and_gauge():
+    registry = MetricsRegistry()
+    c = registry.counter('jobs_total', 'Jobs run.')
+    c.inc()
+    c.inc(2)
+    assert c.value == 3
+    with pytest.raises(ValueError, match='only goes up'):
+        c.inc(-1)
+    g = registry.gauge('queue_depth')
+    g.set(5)
+    g.dec(2)
+    g.inc()
+    assert g.value == 4
+
+
+def test_declaring_twice_returns_the_same_family():
+    registry = MetricsRegistry()
+    first = registry.counter('hits_total', labels=('route',))
+    assert registry.counter('hits_total', labels=('route',)) is first
+    assert registry['hits_total'] is first and 'hits_total' in registry
+    with pytest.raises(ValueError, match='already declared'):
+        registry.gauge('hits_total', labels=('route',))
+    with pytest.raises(ValueError, match='already declared'):
+        registry.counter('hits_total', labels=('path',))
+    registry.histogram('h')
+    with pytest.raises(ValueError, match='scale'):
+        registry.histogram('h', scale=1e3)
+
+
+@pytest.mark.parametrize('name, labels', [
+    ('0bad', ()), ('has-dash', ()), ('ok', ('le',)), ('ok', ('__reserved',)),
+    ('ok', ('bad label',)),
+])
+def test_invalid_names_are_rejected(name, labels):
+    with pytest.raises(ValueError, match='invalid'):
+        MetricsRegistry().counter(name, labels=labels)
+
+
+def test_labelled_family_needs_labels():
+    c = MetricsRegistry().counter('hits_total', labels=('route',))
+    with pytest.raises(ValueError, match='labels'):
+        c.inc()
+    with pytest.raises(ValueError, match='label value'):
+        c.labels('a', 'b')
+    c.labels('/a').inc()
+    assert c.labels('/a').value == 1
+
+
+def test_render_is_prometheus_text():
+    registry = MetricsRegistry()
+    registry.counter('hits_total', 'Hits.', labels=('route',)).labels(
+        'say "hi"\\\n').inc(2)
+    h = registry.histogram('wait_seconds', 'Wait.')
+    h.observe(0.000_020)
+    h.observe(3.0)
+    text = registry.render()
+    assert '# TYPE hits_total counter' in text
+    assert r'hits_total{route="say \"hi\"\\\n"} 2' in text
+    assert '# TYPE wait_seconds histogram' in text
+    assert 'wait_seconds_bucket{le="3.2e-05"} 1' in text
+    assert 'wait_seconds_bucket{le="2.097152"} 1' in text
+    assert 'wait_seconds_bucket{le="4.194304"} 2' in text
+    assert 'wait_seconds_bucket{le="+Inf"} 2' in text
+    assert 'wait_seconds_count 2' in text
+    assert text.endswith('\n')
+    buckets = [line for line in text.splitlines()
+               if line.startswith('wait_seconds_bucket')]
+    assert len(buckets) == MAX_EXPONENT - SUB_BUCKET_BITS + 1
+
+
+# ---------------------------------------------------------------------------
+# Request series, fed by the server
+# ---------------------------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_requests_are_labelled_by_route_template():
+    app = _app()
+    await _serve(app, '/items/1', '/items/2', '/nowhere')
+    metrics = app._request_metrics
+    ok = metrics.duration.labels('/items/{id:int}', '200', 'HTTP/1.1')
+    missing = metrics.duration.labels('<unmatched>', '404', 'HTTP/1.1')
+    assert ok.count == 2
+    assert missing.count == 1
+    assert metrics.response_bytes.labels(
+        '/items/{id:int}', '200', 'HTTP/1.1').value == 4
+    assert metrics.in_flight.value == 0
+    assert '/items/1' not in app.metrics.render()
+
+
+@pytest.mark.asyncio
+async def test_request_metrics_build_no_access_log_record():
+    """With the access log silenced, collection must not open a record."""
+    app = BlackBull()
+    states = []
+
+    @app.route(path='/items/{id:int}')
+    async def item(conn, receive, send):
+        states.append(conn.state)
+        await send(b'ok')
+
+    logger = logging.getLogger('blackbull.access')
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        await _serve(app, '/items/1')
+    finally:
+        logger.setLevel(level)
+    assert states == [{}]
+    assert app._request_metrics.duration.labels(
+        '/items/{id:int}', '200', 'HTTP/1.1').count == 1
+
+
+@pytest.mark.asyncio
+async def test_http2_requests_are_recorded():
+    app = _app()
+    block = Encoder().encode([
+        (b':method', b'GET'), (b':path', b'/items/5'), (b':scheme', b'https'),
+        (b':authority', b'example.com'),
+    ])
+    flags = HeaderFrameFlags.END_HEADERS | HeaderFrameFlags.END_STREAM
+    frame = (len(block).to_bytes(3, 'big') + FrameTypes.HEADERS
+             + bytes([flags]) + (1).to_bytes(4, 'big') + block)
+    aggregator = EventAggregator(app._dispatcher, app._request_metrics)
+    await HTTP2Actor(_FakeReader(frame), _FakeWriter(), app, aggregator).run()
+    metrics = app._request_metrics
+    assert metrics.duration.labels('/items/{id:int}', '200', 'HTTP/2').count == 1
+    assert metrics.response_bytes.labels(
+        '/items/{id:int}', '200', 'HTTP/2').value == 2
+    assert metrics.in_flight.value == 0
+
+
+@pytest.mark.asyncio
+async def test_no_request_metrics_no_series():
+    app = _app()
+    await _serve(app, '/items/1', metrics=False)
+    assert app._request_metrics.duration._cells == {}
+
+
+def test_bb_metrics_off(monkeypatch):
+    monkeypatch.setenv('BB_METRICS', '0')
+    reset_settings_cache()
+    try:
+        app = BlackBull()
+    finally:
+        monkeypatch.delenv('BB_METRICS')
+        reset_settings_cache()
+    assert app._request_metrics is None
+    assert 'blackbull_http_requests_in_flight' not in app.metrics
+
+
+@pytest.mark.asyncio
+async def test_enable_metrics_serves_the_registry():
+    app = _app()
+    app.metrics.counter('jobs_total', 'Jobs run.').inc()
+    app.enable_metrics()
+    await _serve(app, '/items/3')
+    response = await get(app, '/metrics')
+    assert response.status == 200
+    assert response.headers.get(b'content-type').startswith(b'text/plain')
+    assert 'jobs_total 1' in response.text()
+    assert ('blackbull_http_request_duration_seconds_count'
+            '{route="/items/{id:int}",status="200",protocol="HTTP/1.1"} 1'
+            in response.text())
+
+
+def test_request_metrics_share_the_registry():
+    registry = MetricsRegistry()
+    assert RequestMetrics(registry).duration is RequestMetrics(registry).duration
@@ -0,0 +1,106 @@
+"""The shared-memory metrics arena (``blackbull.metrics.MetricsArena``).
+
+Each worker is a real forked child, as in ``test_worker_bus.py``: what is
+under test is what a fork inherits, which here is the shared mapping and
+nothing else.
+"""
+import logging
+import multiprocessing
+
+import pytest
+
+from blackbull.metrics import MetricsArena, MetricsRegistry
+
+_FORK = multiprocessing.get_context('fork')
+
+
+def _registry() -> MetricsRegistry:
+    registry = MetricsRegistry()
+    registry.counter('jobs_total', 'Jobs run.', labels=('queue',))
+    registry.histogram('wait_seconds', 'Wait.')
+    registry.gauge('busy', 'Jobs running.')
+    return registry
+
+
+def _run_worker(arena, worker_id, jobs, wait, busy):
+    registry = _registry()
+    registry.attach(arena, worker_id)
+    registry['jobs_total'].labels('mail').inc(jobs)
+    registry['wait_seconds'].observe(wait)
+    registry['busy'].set(busy)
+
+
+def _in_child(*args):
+    child = _FORK.Process(target=_run_worker, args=args)
+    child.start()
+    child.join(10)
+    assert child.exitcode == 0
+
+
+@pytest.fixture
+def arena():
+    arena = MetricsArena(3, 64 * 1024)
+    yield arena
+    arena.close()
+
+
+def test_render_sums_every_worker(arena):
+    _in_child(arena, 1, 3, 0.5, 2)
+    _in_child(arena, 2, 4, 0.001, 1)
+    registry = _registry()
+    registry.attach(arena, 0)
+    registry['jobs_total'].labels('mail').inc()
+    registry['jobs_total'].labels('sms').inc()
+
+    merged = arena.merged()
+    assert merged['jobs_total'].labels('mail').value == 8
+    assert merged['jobs_total'].labels('sms').value == 1
+    assert merged['wait_seconds'].count == 2
+    assert merged['wait_seconds'].sum == pytest.approx(0.501)
+    assert merged['wait_seconds'].quantile(1.0) >= 0.5
+    assert merged['busy'].value == 3
+    assert registry.render() == arena.render()
+    assert 'jobs_total{queue="mail"} 8' in registry.render()
+
+
+def test_a_respawned_worker_carries_counters_and_resets_gauges(arena):
+    _in_child(arena, 1, 3, 0.5, 2)
+    _in_child(arena, 1, 1, 0.5, 5)          # the same slot, a new process
+    merged = arena.merged()
+    assert merged['jobs_total'].labels('mail').value == 4
+    assert merged['wait_seconds'].count == 2
+    assert merged['busy'].value == 5
+
+
+def test_values_recorded_before_attach_carry_over(arena):
+    registry = _registry()
+    registry['jobs_total'].labels('mail').inc(2)
+    registry.attach(arena, 0)
+    assert registry['jobs_total'].labels('mail').value == 2
+    assert arena.merged()['jobs_total'].labels('mail').value == 2
+
+
+def test_families_declared_after_attach_are_shared(arena):
+    registry = MetricsRegistry()
+    registry.attach(arena, 0)
+    registry.counter('late_total').inc(7)
+    assert arena.merged()['late_total'].value == 7
+
+
+def test_a_full_slot_keeps_new_series_local(caplog):
+    arena = MetricsArena(1, 1)               # rounded up to one page
+    registry = MetricsRegistry()
+    registry.attach(arena, 0)
+    h = registry.histogram('h_seconds', labels=('route',))
+    with caplog.at_level(logging.WARNING, logger='blackbull.metrics'):
+        for i in range(4):
+            h.labels(f'/{i}').observe(0.1)
+    assert [r for r in caplog.records if 'is full' in r.message]
+    assert h.labels('/3').count == 1         # still recorded, locally
+    assert arena.merged()['h_seconds'].labels('/0').count == 1
+    arena.close()
+
+
+def test_worker_id_must_name_a_slot(arena):
+    with pytest.raises(ValueError, match='worker_id'):
+        MetricsRegistry().attach(arena, 3)
@@ -0,0 +1,300 @@
+"""Clustered MQTT brokers (``blackbull.mqtt.cluster``).
+
+The brokers are driven in one process, as in the other broker tests.  The
+bus between them is replaced by :class:`_Mesh`, which hands each record to
+the addressed links' ``_on_record`` at once — what is under test is the
+routing, not the transport (``test_worker_bus.py`` pins that).
+"""
+import asyncio
+import socket
+
+import pytest
+
+from blackbull.actor import Actor
+from blackbull.mqtt import MQTTExtension
+from blackbull.mqtt.broker import (
+    Attach, BrokerActor, ClientPublish, ClientSubscribe, ClientUnsubscribe,
+    Detach, Send,
+)
+from blackbull.mqtt.cluster import ClusterLink, owner_of
+from blackbull.mqtt.messages import (
+    MQTTConnect, MQTTPublish, MQTTSubscribe, MQTTUnsubscribe, encode_packet,
+)
+from blackbull.mqtt.topic_index import SubscriptionIndex
+from blackbull.server import bus
+from blackbull.server.recipient import AsyncioReader
+from blackbull.server.sender import AsyncioWriter
+
+
+class RecordingConn(Actor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.outbox = []
+
+    async def send(self, msg) -> None:
+        self.outbox.append(msg)
+
+    def payloads(self) -> list:
+        return [m.packet.payload for m in self.outbox
+                if isinstance(m, Send) and isinstance(m.packet, MQTTPublish)]
+
+
+class _WorkerBus:
+    def __init__(self, worker_id, workers):
+        self.worker_id, self.workers = worker_id, workers
+
+
+class _Mesh:
+    """N brokers whose links deliver to each other synchronously."""
+
+    def __init__(self, monkeypatch, workers=2):
+        self.links = []
+        monkeypatch.setattr(bus, 'publish', self._publish)
+        monkeypatch.setattr(bus, 'subscribe', lambda *a: lambda: None)
+        monkeypatch.setattr(bus, 'accept_sockets', lambda *a: lambda: None)
+        for worker in range(workers):
+            link = ClusterLink(BrokerActor(max_retained=0),
+                               _WorkerBus(worker, workers), _unused)
+            self.links.append(link)
+        for link in self.links:
+            link.attach()
+
+    @property
+    def brokers(self):
+        return [link._broker for link in self.links]
+
+    def _publish(self, channel, payload, *, local=True, workers=None):
+        origin = payload[1]         # every record names its sender
+        for link in self.links:
+            if link.worker_id != origin and \
+                    (workers is None or link.worker_id in workers):
+                link._on_record(channel, payload)
+
+    async def run(self, worker, msg):
+        """Handle *msg* on *worker*, then every inbox until all are idle."""
+        await self.brokers[worker]._handle(msg)
+        busy = True
+        while busy:
+            busy = False
+            for link in self.links:
+                broker = link._broker
+                while not broker._inbox.empty():
+                    busy = True
+                    await broker._handle(broker._inbox.get_nowait())
+
+
+async def _unused(*_):
+    raise AssertionError('no connection is served in these tests')
+
+
+async def _attach(mesh, worker, client_id):
+    conn = RecordingConn()
+    await mesh.run(worker, Attach(connect=MQTTConnect(
+        client_id=client_id, clean_start=True, keep_alive=60), sender=conn))
+    return conn
+
+
+async def _subscribe(mesh, worker, conn, topic_filter):
+    await mesh.run(worker, ClientSubscribe(subscribe=MQTTSubscribe(
+        packet_id=1, subscriptions=[(topic_filter, 0)]), sender=conn))
+
+
+async def _publish(mesh, worker, conn, topic, payload, retain=False):
+    await mesh.run(worker, ClientPublish(publish=MQTTPublish(
+        topic=topic, payload=payload, retain=retain), sender=conn))
+
+
+def test_owner_is_a_stable_function_of_the_client_id():
+    owners = {owner_of(f'device-{i}', 4) for i in range(200)}
+    assert owners == {0, 1, 2, 3}
+    assert owner_of('device-7', 4) == owner_of('device-7', 4)
+
+
+def test_index_reports_first_and_last_subscriber_of_a_filter():
+    events = []
+    index = SubscriptionIndex()
+    index.on_change = lambda added, f: events.append((added, f))
+    index.add('a', 's/+', 0, {})
+    index.add('b', 's/+', 1, {})
+    index.add('a', '$share/g/s/+', 0, {})
+    index.remove('a', 's/+')
+    index.remove('b', 's/+')
+    index.remove('a', '$share/g/s/+')
+    assert events == [(True, 's/+'), (True, '$share/g/s/+'),
+                      (False, 's/+'), (False, '$share/g/s/+')]
+
+
+@pytest.mark.asyncio
+class TestRouting:
+    async def test_publish_reaches_a_subscriber_on_another_worker(self, monkeypatch):
+        mesh = _Mesh(monkeypatch)
+        sub = await _attach(mesh, 1, 'sub')
+        await _subscribe(mesh, 1, sub, 'sensors/#')
+        pub = await _attach(mesh, 0, 'pub')
+        await _publish(mesh, 0, pub, 'sensors/t', b'21.5')
+        await _publish(mesh, 0, pub, 'other/t', b'x')
+        assert sub.payloads() == [b'21.5']
+        assert mesh.links[0].forwarded == 1     # 'other/t' matched nowhere
+
+    async def test_unsubscribe_stops_forwarding(self, monkeypatch):
+        mesh = _Mesh(monkeypatch)
+        sub = await _attach(mesh, 1, 'sub')
+        await _subscribe(mesh, 1, sub, 'a')
+        await mesh.run(1, ClientUnsubscribe(unsubscribe=MQTTUnsubscribe(
+            packet_id=2, topics=['a']), sender=sub))
+        pub = await _attach(mesh, 0, 'pub')
+        await _publish(mesh, 0, pub, 'a', b'x')
+        assert mesh.links[0].forwarded == 0
+        assert len(mesh.links[0]._peers[1]) == 0
+
+    async def test_share_group_gets_one_copy_across_workers(self, monkeypatch):
+        mesh = _Mesh(monkeypatch, workers=3)
+        members = [await _attach(mesh, w, f'm{w}') for w in (0, 1)]
+        for w, member in zip((0, 1), members):
+            await _subscribe(mesh, w, member, '$share/g/jobs/+')
+        pub = await _attach(mesh, 2, 'pub')
+        for i in range(6):
+            await _publish(mesh, 2, pub, 'jobs/x', b'%d' % i)
+        got = [m.payloads() for m in members]
+        assert sorted(got[0] + got[1]) == [b'%d' % i for i in range(6)]
+        assert len(got[0]) == len(got[1]) == 3
+
+    async def test_share_group_skips_a_worker_whose_members_are_offline(
+            self, monkeypatch):
+        mesh = _Mesh(monkeypatch, workers=3)
+        live = await _attach(mesh, 0, 'live')
+        await _subscribe(mesh, 0, live, '$share/g/jobs/+')
+        away = RecordingConn()
+        await mesh.run(1, Attach(connect=MQTTConnect(
+            client_id='away', clean_start=True, keep_alive=60,
+            properties={'session_expiry_interval': 3600}), sender=away))
+        await _subscribe(mesh, 1, away, '$share/g/jobs/+')
+        assert mesh.links[2]._peers[1].has_share('g', 'jobs/+')
+        await mesh.run(1, Detach(sender=away))
+        # The session and its subscription outlive the connection, but the
+        # group is no longer summarised from worker 1.
+        assert mesh.brokers[1]._subscriptions.has_share('g', 'jobs/+')
+        assert not mesh.links[2]._peers[1].has_share('g', 'jobs/+')
+        pub = await _attach(mesh, 2, 'pub')
+        for i in range(4):
+            await _publish(mesh, 2, pub, 'jobs/x', b'%d' % i)
+        assert live.payloads() == [b'%d' % i for i in range(4)]
+        # Reconnecting puts worker 1 back in the rotation.
+        back = RecordingConn()
+        await mesh.run(1, Attach(connect=MQTTConnect(
+            client_id='away', clean_start=False, keep_alive=60), sender=back))
+        assert mesh.links[2]._peers[1].has_share('g', 'jobs/+')
+
+    async def test_retained_message_is_replayed_on_every_worker(self, monkeypatch):
+        mesh = _Mesh(monkeypatch)
+        pub = await _attach(mesh, 0, 'pub')
+        await _publish(mesh, 0, pub, 'cfg/a', b'on', retain=True)
+        sub = await _attach(mesh, 1, 'sub')
+        await _subscribe(mesh, 1, sub, 'cfg/#')
+        assert sub.payloads() == [b'on']
+        await _publish(mesh, 0, pub, 'cfg/a', b'', retain=True)
+        assert 'cfg/a' not in mesh.brokers[1]._retained
+
+    async def test_restarted_worker_is_sent_summaries_and_retained(self, monkeypatch):
+        mesh = _Mesh(monkeypatch)
+        sub = await _attach(mesh, 0, 'sub')
+        await _subscribe(mesh, 0, sub, 'x/#')
+        pub = await _attach(mesh, 0, 'pub')
+        await _publish(mesh, 0, pub, 'cfg', b'v', retain=True)
+        # Worker 1 comes back with an empty broker and says HELLO.
+        fresh = ClusterLink(BrokerActor(max_retained=0), _WorkerBus(1, 2), _unused)
+        mesh.links[1] = fresh
+        fresh.attach()
+        await mesh.run(1, Attach(connect=MQTTConnect(
+            client_id='p2', clean_start=True, keep_alive=60), sender=RecordingConn()))
+        assert [n.topic_filter for n in fresh._peers[0].match('x/y')] == ['x/#']
+        assert 'cfg' in fresh._broker._retained
+
+
+class _HandoffWriter:
+    def __init__(self, sock):
+        self.sock = sock
+
+    def detach_socket(self):
+        return self.sock.dup()
+
+
+class _BytesReader:
+    def __init__(self, data):
+        self.data = data
+
+    async def read(self, n):
+        chunk, self.data = self.data[:n], self.data[n:]
+        return chunk
+
+    def buffered_len(self):
+        return len(self.data)
+
+
+@pytest.mark.asyncio
+class TestHandoff:
+    def _link(self, worker_id, serve):
+        return ClusterLink(BrokerActor(), _WorkerBus(worker_id, 2), serve)
+
+    async def test_foreign_client_is_handed_to_its_owner(self, monkeypatch):
+        client_id = next(c for c in (f'c{i}' for i in range(100))
+                         if owner_of(c, 2) == 1)
+        connect = encode_packet(MQTTConnect(client_id=client_id,
+                                            clean_start=True, keep_alive=0))
+        sent = []
+        monkeypatch.setattr(bus, 'send_socket',
+                            lambda *args: sent.append(args))
+        a, b = socket.socketpair()
+        link = self._link(0, _unused)
+        await link.serve(_BytesReader(connect + b'\xc0\x00'),   # + PINGREQ
+                         _HandoffWriter(a), None)
+        (worker, channel, payload, _sock), = sent
+        assert (worker, payload) == (1, connect + b'\xc0\x00')
+        assert link.handed_off == 1
+        a.close()
+        b.close()
+
+    async def test_own_client_is_served_here_with_its_bytes(self):
+        client_id = next(c for c in (f'c{i}' for i in range(100))
+                         if owner_of(c, 2) == 0)
+        connect = encode_packet(MQTTConnect(client_id=client_id,
+                                            clean_start=True, keep_alive=0))
+        served = []
+
+        async def serve(reader, writer, ctx):
+            served.append(await reader.read(4096))
+
+        await self._link(0, serve).serve(_BytesReader(connect), None, None)
+        assert served == [connect]
+
+    async def test_detached_socket_outlives_the_writer(self):
+        a, b = socket.socketpair()
+        _reader, stream_writer = await asyncio.open_connection(sock=a)
+        writer = AsyncioWriter(stream_writer)
+        sock = writer.detach_socket()
+        await writer.close()
+        await asyncio.sleep(0)
+        b.sendall(b'still here')
+        assert sock.recv(10) == b'still here'
+        sock.close()
+        b.close()
+
+    async def test_adopted_connection_is_served_with_the_prefix(self):
+        a, b = socket.socketpair()
+        served = []
+
+        async def serve(reader, writer, ctx):
+            assert isinstance(reader._reader, AsyncioReader)
+            served.append(await reader.read(4096))
+            served.append(await reader.read(4096))
+
+        link = self._link(1, serve)
+        b.sendall(b'rest')
+        await link._adopt(b'prefix', a)
+        assert served == [b'prefix', b'rest']
+        b.close()
+
+
+def test_cluster_cannot_be_combined_with_tls():
+    with pytest.raises(ValueError, match='tls'):
+        MQTTExtension(cluster=True, tls=True)
@@ -0,0 +1,124 @@
+"""``EncodedPublish`` — one PUBLISH encoding shared across a fan-out.
+
+The encoding must be byte-identical to ``encode_packet`` for every flag
+combination, the broker must hand every recipient the same shared buffers,
+and the connection actor must write the segments it is given.
+"""
+from dataclasses import replace
+
+import pytest
+
+from blackbull.actor import Actor
+from blackbull.mqtt.broker import (
+    BrokerActor, Attach, ClientPublish, ClientSubscribe, Send,
+)
+from blackbull.mqtt.connection import MQTT5Actor
+from blackbull.mqtt.messages import (
+    EncodedPublish, MQTTConnect, MQTTPublish, MQTTSubscribe, encode_packet,
+)
+from blackbull.server.protocol_registry import ProtocolContext
+from blackbull.server.sender import AbstractWriter
+
+_PROPS = {'content_type': 'application/json', 'message_expiry_interval': 30}
+
+
+@pytest.mark.parametrize('qos', [0, 1, 2])
+@pytest.mark.parametrize('retain', [False, True])
+@pytest.mark.parametrize('dup', [False, True])
+@pytest.mark.parametrize('size', [0, 100, 200_000])
+def test_wire_matches_encode_packet(qos, retain, dup, size):
+    if qos == 0 and dup:
+        pytest.skip('DUP is only meaningful for QoS > 0 (§3.3.1.1)')
+    publish = MQTTPublish(topic='sensors/a/temp', payload=b'x' * size,
+                          properties=_PROPS)
+    packet_id = 513 if qos else None
+    expected = encode_packet(MQTTPublish(
+        topic=publish.topic, payload=publish.payload, qos=qos,
+        packet_id=packet_id, retain=retain, dup=dup, properties=_PROPS))
+    wire = EncodedPublish(publish).wire(qos, retain, packet_id, dup)
+    assert b''.join(wire) == expected
+
+
+def test_qos0_is_one_buffer_and_qos1_shares_the_tail():
+    encoded = EncodedPublish(MQTTPublish(topic='t', payload=b'p' * 4096))
+    assert encoded.wire(0, False)[0] is encoded.wire(0, False)[0]
+    assert encoded.qos0_packet(True) is encoded.qos0_packet(True)
+    a_head, a_tail = encoded.wire(1, False, 1)
+    b_head, b_tail = encoded.wire(1, False, 2)
+    assert a_tail is b_tail
+    assert isinstance(a_tail, memoryview)
+    assert a_head[-2:] == b'\x00\x01' and b_head[-2:] == b'\x00\x02'
+    assert len(a_head) < 16
+
+
+class _RecordingConn(Actor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.outbox = []
+
+    async def send(self, msg) -> None:
+        self.outbox.append(msg)
+
+    def publishes(self) -> list[Send]:
+        return [m for m in self.outbox
+                if isinstance(m, Send) and isinstance(m.packet, MQTTPublish)]
+
+
+async def _subscriber(broker, client_id, qos):
+    conn = _RecordingConn()
+    await broker._handle(Attach(connect=MQTTConnect(
+        client_id=client_id, clean_start=True, keep_alive=60), sender=conn))
+    await broker._handle(ClientSubscribe(subscribe=MQTTSubscribe(
+        packet_id=1, subscriptions=[('sensors/#', qos)]), sender=conn))
+    return conn
+
+
+@pytest.mark.asyncio
+async def test_broker_fan_out_shares_one_encoding():
+    broker = BrokerActor()
+    qos0 = [await _subscriber(broker, f'q0-{i}', 0) for i in range(3)]
+    qos1 = [await _subscriber(broker, f'q1-{i}', 1) for i in range(3)]
+    publisher = _RecordingConn()
+    await broker._handle(Attach(connect=MQTTConnect(
+        client_id='pub', clean_start=True, keep_alive=60), sender=publisher))
+    await broker._handle(ClientPublish(publish=MQTTPublish(
+        topic='sensors/a', payload=b'reading', qos=1, packet_id=9),
+        sender=publisher))
+
+    sends0 = [c.publishes()[0] for c in qos0]
+    assert all(s.wire[0] is sends0[0].wire[0] for s in sends0)
+    assert all(s.packet is sends0[0].packet for s in sends0)
+
+    sends1 = [c.publishes()[0] for c in qos1]
+    assert all(s.wire[1] is sends1[0].wire[1] for s in sends1)
+    for send in sends0 + sends1:
+        assert b''.join(send.wire) == encode_packet(send.packet)
+
+
+class _Writer(AbstractWriter):
+    def __init__(self) -> None:
+        self.writes = []
+        self.vectored = []
+
+    async def write(self, data) -> None:
+        self.writes.append(bytes(data))
+
+    async def writelines(self, parts) -> None:
+        self.vectored.append(list(parts))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('size, vectored', [(100, False), (64 * 1024, True)])
+async def test_connection_writes_large_shared_payloads_vectored(size, vectored):
+    writer = _Writer()
+    ctx = ProtocolContext(peername=('127.0.0.1', 0), sockname=('0.0.0.0', 1883),
+                          ssl=False, aggregator=None, connection_id='c',
+                          protocol='mqtt')
+    actor = MQTT5Actor(writer, BrokerActor(), ctx, max_packet_size=0)
+    publish = MQTTPublish(topic='t', payload=b'x' * size)
+    wire = EncodedPublish(publish).wire(1, False, 7)
+    await actor._handle(Send(packet=replace(publish, qos=1, packet_id=7), wire=wire))
+    if vectored:
+        assert writer.writes == [] and writer.vectored[0][1] is wire[1]
+    else:
+        assert writer.vectored == [] and writer.writes == [b''.join(wire)]
@@ -102,7 +102,7 @@ class TestTopicValidation:
         assert pubacks and pubacks[0].reason_code == ReasonCode.TOPIC_NAME_INVALID
         # Not routed to the subscriber, and not retained.
         assert not [p for p in sub.packets() if isinstance(p, MQTTPublish)]
-        assert broker._retained == {}
+        assert len(broker._retained) == 0
 
     async def test_publish_invalid_topic_qos0_disconnects(self):
         broker, pub = BrokerActor(), RecordingConn()
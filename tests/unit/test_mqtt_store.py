@@ -0,0 +1,191 @@
+"""``BrokerStore`` — durable retained messages, sessions and offline queues.
+
+The store is pinned on its own (what a reload recovers, after a clean close,
+a torn tail, and compaction) and through the broker: a persistent session
+that is offline when a message is published gets it after a restart.
+"""
+import asyncio
+import os
+
+import pytest
+
+from blackbull.actor import Actor
+from blackbull.mqtt.broker import (
+    Attach, BrokerActor, ClientPuback, ClientPublish, ClientSubscribe, Detach, Send,
+)
+from blackbull.mqtt.messages import MQTTConnect, MQTTPublish, MQTTSubscribe
+from blackbull.mqtt.store import BrokerStore
+
+pytestmark = pytest.mark.asyncio
+
+
+def _store(path, **kw) -> BrokerStore:
+    kw.setdefault('commit_interval', 0)
+    kw.setdefault('fsync', False)
+    return BrokerStore(path, **kw)
+
+
+def _reload(path, **kw):
+    store = _store(path, **kw)
+    return store, store.load()
+
+
+def _publish(topic, payload, qos=0, **kw):
+    return MQTTPublish(topic=topic, payload=payload, qos=qos,
+                       packet_id=1 if qos else None, **kw)
+
+
+async def test_reload_recovers_what_was_written(tmp_path):
+    store = _store(tmp_path)
+    assert store.load() == ({}, {})
+    store.put_retained(_publish('a/b', b'one', properties={'content_type': 'x'}))
+    store.put_retained(_publish('a/c', b'gone'))
+    store.delete_retained('a/c')
+    store.put_session('c1', 3600, [('a/#', 1, {'qos': 1, 'no_local': False})])
+    store.enqueue('c1', 1, _publish('a/b', b'q1', qos=1), 1, False)
+    store.enqueue('c1', 2, _publish('a/b', b'q2', qos=2), 2, True)
+    store.enqueue('c1', 3, _publish('a/b', b'q3', qos=1), 1, False)
+    store.dequeue('c1', 2)
+    store.close()
+
+    reopened, state = _reload(tmp_path)
+    try:
+        assert list(state.retained) == ['a/b']
+        retained = state.retained['a/b']
+        assert (retained.payload, retained.retain, retained.properties) == \
+            (b'one', True, {'content_type': 'x'})
+        session = state.sessions['c1']
+        assert session.expiry == 3600
+        assert session.subscriptions == [('a/#', 1, {'qos': 1, 'no_local': False})]
+        assert [(seq, p.payload, p.qos) for seq, p in session.queue] == \
+            [(1, b'q1', 1), (3, b'q3', 1)]
+    finally:
+        reopened.close()
+
+
+async def test_deleting_a_session_drops_its_queue(tmp_path):
+    store = _store(tmp_path)
+    store.load()
+    store.put_session('c1', 60, [])
+    store.enqueue('c1', 1, _publish('t', b'x', qos=1), 1, False)
+    store.delete_session('c1')
+    store.put_session('c1', 60, [])
+    store.close()
+    reopened, state = _reload(tmp_path)
+    reopened.close()
+    assert state.sessions['c1'].queue == []
+
+
+async def test_torn_tail_is_discarded_and_truncated(tmp_path):
+    store = _store(tmp_path)
+    store.load()
+    store.put_retained(_publish('t/1', b'kept'))
+    store.close()
+    (segment,) = [p for p in tmp_path.iterdir() if p.suffix == '.log' and p.stat().st_size]
+    intact = segment.stat().st_size
+    with open(segment, 'ab') as f:
+        f.write(b'\x12\x34\x56\x78\x00\x00\x01\x00partial')
+
+    reopened, state = _reload(tmp_path)
+    reopened.close()
+    assert list(state.retained) == ['t/1']
+    assert segment.stat().st_size == intact
+
+
+async def test_compaction_bounds_the_log_and_survives_reload(tmp_path):
+    store = _store(tmp_path, compact_min_bytes=4096, segment_bytes=2048)
+    store.load()
+    for i in range(2000):
+        store.put_retained(_publish(f'k/{i % 10}', b'v%d' % i))
+        await asyncio.sleep(0)
+    logical = store.bytes_written
+    store.close()
+    names = sorted(os.listdir(tmp_path))
+    assert any(n.startswith('snapshot-') for n in names)
+    # Overwriting ten keys: the directory holds the latest snapshot and the
+    # segments after it, not 2000 records.
+    assert sum((tmp_path / n).stat().st_size for n in names) < 8 * 4096
+    assert logical > 2000 * 10
+
+    reopened, state = _reload(tmp_path)
+    reopened.close()
+    assert {t: p.payload for t, p in state.retained.items()} == \
+        {f'k/{i}': b'v%d' % (1990 + i) for i in range(10)}
+
+
+# ---------------------------------------------------------------------------
+# Through the broker
+# ---------------------------------------------------------------------------
+
+class _Conn(Actor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.outbox = []
+
+    async def send(self, msg) -> None:
+        self.outbox.append(msg)
+
+    def publishes(self) -> list[MQTTPublish]:
+        return [m.packet for m in self.outbox
+                if isinstance(m, Send) and isinstance(m.packet, MQTTPublish)]
+
+
+async def _connect(broker, client_id, *, clean_start=True, expiry=0) -> _Conn:
+    conn = _Conn()
+    props = {'session_expiry_interval': expiry} if expiry else {}
+    await broker._handle(Attach(connect=MQTTConnect(
+        client_id=client_id, clean_start=clean_start, keep_alive=0,
+        properties=props), sender=conn))
+    return conn
+
+
+async def test_offline_session_gets_its_messages_without_a_store():
+    broker = BrokerActor()
+    sub = await _connect(broker, 'sub', expiry=3600)
+    await broker._handle(ClientSubscribe(subscribe=MQTTSubscribe(
+        packet_id=1, subscriptions=[('news/#', 1)]), sender=sub))
+    await broker._handle(Detach(graceful=True, sender=sub))
+    pub = await _connect(broker, 'pub')
+    for qos in (0, 1):
+        await broker._handle(ClientPublish(publish=_publish(
+            'news/a', b'qos%d' % qos, qos=qos), sender=pub))
+
+    back = await _connect(broker, 'sub', clean_start=False, expiry=3600)
+    # QoS 0 is not queued for an offline session; QoS 1 is.
+    assert [p.payload for p in back.publishes()] == [b'qos1']
+    broker.close()
+
+
+async def test_broker_state_survives_a_restart(tmp_path):
+    store = _store(tmp_path)
+    broker = BrokerActor(store=store)
+    broker.restore(store.load())
+    sub = await _connect(broker, 'sub', expiry=3600)
+    await broker._handle(ClientSubscribe(subscribe=MQTTSubscribe(
+        packet_id=1, subscriptions=[('news/#', 1)]), sender=sub))
+    await broker._handle(Detach(graceful=True, sender=sub))
+    pub = await _connect(broker, 'pub')
+    await broker._handle(ClientPublish(publish=_publish(
+        'news/a', b'while-away', qos=1), sender=pub))
+    await broker._handle(ClientPublish(publish=_publish(
+        'status', b'up', retain=True), sender=pub))
+    broker.close()
+    store.close()
+
+    # A new process: nothing but the directory carries over.
+    store = _store(tmp_path)
+    broker = BrokerActor(store=store)
+    broker.restore(store.load())
+    assert broker._retained['status'].payload == b'up'
+    back = await _connect(broker, 'sub', clean_start=False, expiry=3600)
+    (delivered,) = back.publishes()
+    assert delivered.payload == b'while-away'
+    # Acknowledged: the message leaves the store too.
+    await broker._handle(ClientPuback(packet_id=delivered.packet_id, sender=back))
+    broker.close()
+    store.close()
+
+    reopened, state = _reload(tmp_path)
+    reopened.close()
+    assert state.sessions['sub'].queue == []
+    assert state.sessions['sub'].subscriptions[0][0] == 'news/#'
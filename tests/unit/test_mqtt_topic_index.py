@@ -0,0 +1,272 @@
+"""SubscriptionIndex and RetainedIndex — the broker's topic-level tries.
+
+The oracle is :func:`topic_matches_filter`, the linear matcher the broker used
+before the index existed: for any set of filters and any topic, the index must
+return exactly the filters the oracle accepts.  The broker-level tests below
+pin the incremental upkeep — SUBSCRIBE, UNSUBSCRIBE, Clean Start, and session
+discard on detach all have to leave the index agreeing with the sessions.
+The retained index is checked against the same oracle from the other side
+(one filter, many topics), and the broker's retained replay is pinned to
+stream in batches inside the subscriber's Receive Maximum window.
+"""
+import pytest
+from hypothesis import given, strategies as st
+
+from blackbull.mqtt.broker import (
+    _REPLAY_BATCH, BrokerActor, Attach, ClientPuback, ClientSubscribe,
+    ClientUnsubscribe, ClientPublish, Detach, Send,
+)
+from blackbull.actor import Actor
+from blackbull.mqtt.messages import (
+    MQTTConnect, MQTTPublish, MQTTSubscribe, MQTTUnsubscribe,
+    topic_matches_filter,
+)
+from blackbull.mqtt.topic_index import RetainedIndex, SubscriptionIndex
+
+
+def _matched(index, topic):
+    return sorted((node.topic_filter, cid)
+                  for node in index.match(topic) for cid in node.plain)
+
+
+class TestMatch:
+    @pytest.mark.parametrize('topic_filter,topic,expected', [
+        ('a/b', 'a/b', True),
+        ('a/b', 'a/c', False),
+        ('a/+', 'a/b', True),
+        ('a/+', 'a/b/c', False),
+        ('a/#', 'a', True),          # '#' includes the parent level
+        ('a/#', 'a/b/c', True),
+        ('#', 'a/b', True),
+        ('+/+', '/x', True),         # zero-length levels are levels
+        ('#', '$SYS/x', False),      # §4.7.2
+        ('+/x', '$SYS/x', False),
+        ('$SYS/#', '$SYS/x', True),
+    ])
+    def test_single_filter(self, topic_filter, topic, expected):
+        index = SubscriptionIndex()
+        index.add('c', topic_filter, 0, {})
+        assert bool(index.match(topic)) is expected
+
+    def test_replace_keeps_one_entry(self):
+        index = SubscriptionIndex()
+        index.add('c', 'a/+', 0, {})
+        index.add('c', 'a/+', 1, {})
+        assert len(index) == 1
+        (node,) = index.match('a/b')
+        assert node.plain == {'c': (1, {})}
+
+    def test_remove_prunes_empty_nodes(self):
+        index = SubscriptionIndex()
+        index.add('c', 'a/b/c/d', 0, {})
+        assert index.remove('c', 'a/b/c/d') is True
+        assert index._root.children == {}
+        assert len(index) == 0
+
+    def test_remove_unknown_is_noop(self):
+        index = SubscriptionIndex()
+        index.add('c', 'a/b', 0, {})
+        assert index.remove('c', 'a/c') is False
+        assert index.remove('other', 'a/b') is False
+        assert len(index) == 1
+
+    def test_share_groups_keyed_by_name_and_filter(self):
+        index = SubscriptionIndex()
+        index.add('m1', '$share/g/s/+', 0, {})
+        index.add('m2', '$share/g/s/+', 1, {})
+        index.add('m3', '$share/h/s/+', 0, {})
+        (node,) = index.match('s/x')
+        assert node.topic_filter == 's/+'
+        assert list(node.shared['g']) == ['m1', 'm2']
+        assert index.has_share('h', 's/+')
+        index.remove('m3', '$share/h/s/+')
+        assert not index.has_share('h', 's/+')
+
+
+_level = st.sampled_from(['a', 'b', '', '$x'])
+_topic = st.lists(_level, min_size=1, max_size=4).map('/'.join)
+_filter = st.lists(st.sampled_from(['a', 'b', '', '+', '$x']),
+                   min_size=1, max_size=4).flatmap(
+    lambda levels: st.sampled_from(
+        ['/'.join(levels), '/'.join(levels + ['#']), '#']))
+
+
+@given(filters=st.lists(_filter, max_size=12, unique=True), topic=_topic)
+def test_agrees_with_linear_matcher(filters, topic):
+    index = SubscriptionIndex()
+    for i, topic_filter in enumerate(filters):
+        index.add(f'c{i}', topic_filter, 0, {})
+    expected = sorted((f, f'c{i}') for i, f in enumerate(filters)
+                      if topic_matches_filter(topic, f))
+    assert _matched(index, topic) == expected
+
+
+# An empty Topic Name is never retained: the broker rejects it (§4.7.3).
+@given(topics=st.lists(_topic.filter(bool), max_size=12, unique=True),
+       topic_filter=_filter)
+def test_retained_agrees_with_linear_matcher(topics, topic_filter):
+    index = RetainedIndex()
+    for topic in topics:
+        index.set(topic, topic)
+    assert sorted(index.match(topic_filter)) == \
+        sorted(t for t in topics if topic_matches_filter(t, topic_filter))
+
+
+def test_retained_pop_prunes_empty_nodes():
+    index = RetainedIndex()
+    index.set('a/b/c', 1)
+    index.set('a', 2)
+    assert index.pop('a/b/c') == 1
+    assert list(index._root.children) == ['a']
+    assert index._root.children['a'].children == {}
+    assert index.pop('a/b/c', 'gone') == 'gone'
+    assert (len(index), index.match('#')) == (1, [2])
+
+
+# ---------------------------------------------------------------------------
+# Broker upkeep
+# ---------------------------------------------------------------------------
+
+class RecordingConn(Actor):
+    def __init__(self) -> None:
+        super().__init__()
+        self.outbox = []
+
+    async def send(self, msg) -> None:
+        self.outbox.append(msg)
+
+    def publishes(self) -> list:
+        return [m.packet for m in self.outbox
+                if isinstance(m, Send) and isinstance(m.packet, MQTTPublish)]
+
+
+async def _attach(broker, conn, client_id, clean_start=True, expiry=0):
+    await broker._handle(Attach(connect=MQTTConnect(
+        client_id=client_id, clean_start=clean_start, keep_alive=60,
+        properties={'session_expiry_interval': expiry}), sender=conn))
+
+
+async def _subscribe(broker, conn, subs):
+    await broker._handle(ClientSubscribe(
+        subscribe=MQTTSubscribe(packet_id=1, subscriptions=subs), sender=conn))
+
+
+@pytest.mark.asyncio
+class TestBrokerUpkeep:
+    async def test_unsubscribe_removes_index_entry(self):
+        broker, conn = BrokerActor(), RecordingConn()
+        await _attach(broker, conn, 'c1')
+        await _subscribe(broker, conn, [('a/+', 0), ('b', 0)])
+        await broker._handle(ClientUnsubscribe(
+            unsubscribe=MQTTUnsubscribe(packet_id=2, topics=['a/+']),
+            sender=conn))
+        assert len(broker._subscriptions) == 1
+        assert broker._subscriptions.match('a/x') == []
+
+    async def test_detach_with_zero_expiry_discards_entries(self):
+        broker, conn = BrokerActor(), RecordingConn()
+        await _attach(broker, conn, 'c1')
+        await _subscribe(broker, conn, [('a/#', 0), ('$share/g/a', 0)])
+        await broker._handle(Detach(graceful=True, sender=conn))
+        assert len(broker._subscriptions) == 0
+        assert broker._subscriptions._root.children == {}
+
+    async def test_clean_start_drops_previous_session_entries(self):
+        broker, conn = BrokerActor(), RecordingConn()
+        await _attach(broker, conn, 'c1', expiry=3600)
+        await _subscribe(broker, conn, [('old', 0)])
+        await broker._handle(Detach(graceful=True, sender=conn))
+        again = RecordingConn()
+        await _attach(broker, again, 'c1', clean_start=True)
+        assert broker._subscriptions.match('old') == []
+
+    async def test_resumed_session_keeps_routing(self):
+        broker, conn = BrokerActor(), RecordingConn()
+        await _attach(broker, conn, 'c1', expiry=3600)
+        await _subscribe(broker, conn, [('t/+', 0)])
+        await broker._handle(Detach(graceful=True, sender=conn))
+        again, pub = RecordingConn(), RecordingConn()
+        await _attach(broker, again, 'c1', clean_start=False, expiry=3600)
+        await _attach(broker, pub, 'pub')
+        await broker._handle(ClientPublish(
+            publish=MQTTPublish(topic='t/1', payload=b'x', qos=0), sender=pub))
+        assert [p.payload for p in again.publishes()] == [b'x']
+
+    async def test_overlapping_filters_merge_to_one_copy(self):
+        broker, sub, pub = BrokerActor(), RecordingConn(), RecordingConn()
+        await _attach(broker, sub, 'sub')
+        await _subscribe(broker, sub, [('t/#', 0), ('t/+', 1), ('t/x', 0)])
+        await _attach(broker, pub, 'pub')
+        await broker._handle(ClientPublish(
+            publish=MQTTPublish(topic='t/x', payload=b'x', qos=1, packet_id=4),
+            sender=pub))
+        (delivered,) = sub.publishes()
+        assert delivered.qos == 1   # max granted QoS across the matches
+
+
+@pytest.mark.asyncio
+class TestRetainedReplay:
+    async def _retain(self, broker, count, qos=0):
+        pub = RecordingConn()
+        await _attach(broker, pub, 'pub')
+        for i in range(count):
+            await broker._handle(ClientPublish(publish=MQTTPublish(
+                topic=f'site/{i}/sensors/t', payload=b'%d' % i, qos=qos,
+                packet_id=1 if qos else None, retain=True), sender=pub))
+        return pub
+
+    async def _run_inbox(self, broker):
+        while not broker._inbox.empty():
+            await broker._handle(broker._inbox.get_nowait())
+
+    async def test_replay_streams_in_batches(self):
+        broker, sub = BrokerActor(max_retained=0), RecordingConn()
+        await self._retain(broker, _REPLAY_BATCH * 2 + 5)
+        await _attach(broker, sub, 'sub')
+        await _subscribe(broker, sub, [('site/+/sensors/#', 0)])
+        # One batch per turn; the rest is posted back to the inbox.
+        assert len(sub.publishes()) == _REPLAY_BATCH
+        await self._run_inbox(broker)
+        assert len(sub.publishes()) == _REPLAY_BATCH * 2 + 5
+        assert all(p.retain for p in sub.publishes())
+
+    async def test_replay_respects_receive_maximum(self):
+        broker, sub = BrokerActor(), RecordingConn()
+        await self._retain(broker, 10, qos=1)
+        await broker._handle(Attach(connect=MQTTConnect(
+            client_id='sub', clean_start=True, keep_alive=60,
+            properties={'receive_maximum': 3}), sender=sub))
+        await _subscribe(broker, sub, [('site/#', 1)])
+        sent = sub.publishes()
+        assert len(sent) == 3
+        # Nothing is queued behind the window: the replay waits for acks.
+        assert not broker._sessions['sub']['outbound_queue']
+        await broker._handle(ClientPuback(packet_id=sent[0].packet_id, sender=sub))
+        assert len(sub.publishes()) == 4
+
+    async def test_replaced_message_is_not_replayed_stale(self):
+        broker, sub = BrokerActor(), RecordingConn()
+        pub = await self._retain(broker, _REPLAY_BATCH + 1)
+        await _attach(broker, sub, 'sub')
+        await _subscribe(broker, sub, [('site/#', 0)])
+        replayed = {p.topic for p in sub.publishes()}
+        (pending,) = [f'site/{i}/sensors/t' for i in range(_REPLAY_BATCH + 1)
+                      if f'site/{i}/sensors/t' not in replayed]
+        await broker._handle(ClientPublish(publish=MQTTPublish(
+            topic=pending, payload=b'new', retain=True), sender=pub))
+        await self._run_inbox(broker)
+        # The live publish reached the subscriber; the old value never does.
+        assert [p.payload for p in sub.publishes() if p.topic == pending] == [b'new']
+
+    async def test_detach_mid_replay_drops_the_posted_mark(self):
+        broker, sub = BrokerActor(), RecordingConn()
+        await self._retain(broker, _REPLAY_BATCH + 1)
+        await _attach(broker, sub, 'sub')
+        await _subscribe(broker, sub, [('site/#', 0)])
+        assert broker._replay_posted == {sub}
+        await broker._handle(Detach(graceful=True, sender=sub))
+        # The mark goes with the connection, so nothing outlives it to be
+        # matched by a later connection's reused id.
+        assert broker._replay_posted == set()
+        await self._run_inbox(broker)
+        assert len(sub.publishes()) == _REPLAY_BATCH
@@ -303,6 +303,86 @@ class TestHTTP2NativeChannel:
         assert r.take_uncredited() == 0
 
 
+class TestHTTP2BulkDrain:
+    """``next_chunks`` — every queued chunk per await, credited in one go."""
+
+    @pytest.mark.asyncio
+    async def test_queued_frames_come_back_in_one_batch(self):
+        credited: list[int] = []
+
+        async def credit(n: int) -> None:
+            credited.append(n)
+
+        r = HTTP2Recipient(credit_callback=credit)
+        for i in range(5):
+            r.put_DATAFrame(_data(b'%d' % i * 10, end=False))
+        r.put_DATAFrame(_data(b'', end=False))
+        assert await r.next_chunks() == [b'%d' % i * 10 for i in range(5)]
+        assert credited == [50]
+        r.put_DATAFrame(_data(b'tail', end=True))
+        assert await r.next_chunks() == [b'tail']
+        assert await r.next_chunks() is None
+        assert await r.next_chunk() is None
+        assert r.take_uncredited() == 0
+
+    @pytest.mark.asyncio
+    async def test_empty_frames_alone_do_not_make_a_batch(self):
+        r = HTTP2Recipient()
+        r.put_DATAFrame(_data(b'', end=False))
+        task = asyncio.ensure_future(r.next_chunks())
+        await asyncio.sleep(0)
+        assert not task.done()
+        r.put_DATAFrame(_data(b'', end=True))
+        assert await asyncio.wait_for(task, timeout=1) is None
+
+    @pytest.mark.asyncio
+    async def test_end_of_stream_on_headers_ends_immediately(self):
+        r = HTTP2Recipient()
+        r.mark_end_of_stream_on_headers()
+        assert await r.next_chunks() is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize('then', ['next_chunks', 'next_chunk'])
+    async def test_disconnect_behind_chunks_is_reported_next(self, then):
+        r = HTTP2Recipient()
+        r.put_DATAFrame(_data(b'partial', end=False))
+        r.put_disconnect()
+        assert await r.next_chunks() == [b'partial']
+        with pytest.raises(ClientDisconnected):
+            await getattr(r, then)()
+
+    @pytest.mark.asyncio
+    async def test_disconnect_behind_chunks_reaches_the_asgi_channel(self):
+        r = HTTP2Recipient()
+        r.put_DATAFrame(_data(b'partial', end=False))
+        r.put_disconnect()
+        assert await r.next_chunks() == [b'partial']
+        assert await asyncio.wait_for(r(), timeout=1) == {
+            'type': 'http.disconnect'}
+
+    @pytest.mark.asyncio
+    async def test_read_body_keeps_the_partial(self):
+        conn = _conn([])
+        r = HTTP2Recipient()
+        r.put_DATAFrame(_data(b'ab', end=False))
+        r.put_DATAFrame(_data(b'cd', end=False))
+        r.put_disconnect()
+        conn._receive = r
+        with pytest.raises(ClientDisconnected) as exc:
+            await conn.body()
+        assert exc.value.partial == b'abcd'
+
+    @pytest.mark.asyncio
+    async def test_http1_batches_are_single_chunks(self):
+        conn = _conn([(b'content-length', b'10')])
+        r = HTTP1Recipient(AsyncioReader(_Source(b'0123456789')), conn,
+                           chunk_max=4)
+        batches = []
+        while (batch := await r.next_chunks()) is not None:
+            batches.append(batch)
+        assert batches == [[b'0123'], [b'4567'], [b'89']]
+
+
 # ---------------------------------------------------------------------------
 # Connection.body() / stream() ride the native channel
 # ---------------------------------------------------------------------------
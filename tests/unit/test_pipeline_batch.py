@@ -0,0 +1,144 @@
+"""``BB_PIPELINE_BATCH`` — pipelined HTTP/1.1 responses leave in one write.
+
+When the next request head is already resident in the connection's
+``ReadBuffer``, the actor holds the current response in ``HTTP1Sender`` and
+flushes the whole batch once the buffer has no further head.  These tests feed
+the pipeline through a real ``ConnectionProtocol`` (fake transport) and count
+the writes that reach the writer; what the bytes say, and in which order, must
+not depend on the batching at all.
+"""
+import asyncio
+
+import pytest
+
+from blackbull.env import get_settings
+from blackbull.server.connection_protocol import ConnectionProtocol
+from blackbull.server.http1_actor import HTTP1Actor
+from blackbull.server.sender import AbstractWriter
+
+pytestmark = pytest.mark.asyncio
+
+
+class _FakeTransport:
+    def close(self):
+        pass
+
+    def pause_reading(self):
+        pass
+
+    def resume_reading(self):
+        pass
+
+    def get_extra_info(self, name, default=None):
+        return default
+
+    def is_closing(self):
+        return False
+
+
+class _RecordingWriter(AbstractWriter):
+    def __init__(self):
+        self.writes: list[bytes] = []
+
+    async def write(self, data: bytes) -> None:
+        self.writes.append(bytes(data))
+
+    async def writelines(self, parts) -> None:
+        self.writes.append(b''.join(parts))
+
+
+async def _path_app(conn, receive, send):
+    """Echo the path, draining any body first."""
+    body = b''
+    while True:
+        event = await receive()
+        body += event.get('body', b'')
+        if not event.get('more_body'):
+            break
+    if conn.path == '/stream':
+        await send({'type': 'http.response.start', 'status': 200,
+                    'headers': [(b'content-type', b'text/plain')]})
+        await send({'type': 'http.response.body', 'body': b'part',
+                    'more_body': True})
+        await send({'type': 'http.response.body', 'body': b'end'})
+        return
+    await send({'type': 'http.response.start', 'status': 200,
+                'headers': [(b'content-type', b'text/plain')]})
+    await send({'type': 'http.response.body',
+                'body': conn.path.encode() + body})
+
+
+def _get(path: str) -> bytes:
+    return f'GET {path} HTTP/1.1\r\nHost: x\r\n\r\n'.encode()
+
+
+async def _serve(monkeypatch, batch: int, pipeline: bytes):
+    monkeypatch.setenv('BB_PIPELINE_BATCH', str(batch))
+    proto = ConnectionProtocol()
+    proto.connection_made(_FakeTransport())
+    view = proto.get_buffer(len(pipeline))
+    view[:len(pipeline)] = pipeline
+    proto.buffer_updated(len(pipeline))
+    proto.eof_received()
+    writer = _RecordingWriter()
+    actor = HTTP1Actor(proto.reader, writer, _path_app, None)
+    await asyncio.wait_for(actor.run(), 5)
+    return writer.writes
+
+
+def _bodies(wire: bytes) -> list[bytes]:
+    """The last line of every response on *wire*, in order."""
+    return [r.rsplit(b'\r\n', 1)[-1]
+            for r in wire.split(b'HTTP/1.1 ')[1:]]
+
+
+async def test_setting_defaults_to_off(monkeypatch):
+    monkeypatch.delenv('BB_PIPELINE_BATCH', raising=False)
+    assert get_settings().pipeline_batch == 0
+
+
+@pytest.mark.parametrize('batch, writes', [(0, 8), (16, 1), (3, 3)])
+async def test_resident_requests_are_flushed_together(monkeypatch, batch, writes):
+    pipeline = b''.join(_get(f'/r{i}') for i in range(8))
+    got = await _serve(monkeypatch, batch, pipeline)
+    assert len(got) == writes
+    assert _bodies(b''.join(got)) == [b'/r%d' % i for i in range(8)]
+
+
+async def test_request_with_a_body_flushes_what_was_held(monkeypatch):
+    post = b'POST /p HTTP/1.1\r\nHost: x\r\nContent-Length: 4\r\n\r\ndata'
+    got = await _serve(monkeypatch, 16, _get('/a') + _get('/b') + post
+                       + _get('/c'))
+    # /a and /b together, before the POST is dispatched; the POST itself and
+    # /c (the last resident head) on their own.
+    assert _bodies(got[0]) == [b'/a', b'/b']
+    assert _bodies(b''.join(got)) == [b'/a', b'/b', b'/pdata', b'/c']
+    assert len(got) == 3
+
+
+@pytest.mark.parametrize('batch, writes', [(0, 3), (16, 1)])
+async def test_framing_error_answer_follows_the_held_responses(
+        monkeypatch, batch, writes):
+    # Unbatched too: the 400 must not be swallowed by the sender's guard
+    # against a second response to the request before it.
+    bad = b'GET /bad HTTP/1.1\r\nHost: x\r\nContent-Length: -1\r\n\r\n'
+    got = await _serve(monkeypatch, batch, _get('/a') + _get('/b') + bad
+                       + _get('/never'))
+    wire = b''.join(got)
+    assert len(got) == writes
+    assert _bodies(wire)[:2] == [b'/a', b'/b']
+    assert wire.count(b'HTTP/1.1 ') == 3
+    assert wire.split(b'HTTP/1.1 ')[3].startswith(b'400 ')
+    assert b'/never' not in wire
+
+
+async def test_streamed_response_releases_the_batch(monkeypatch):
+    got = await _serve(monkeypatch, 16, _get('/a') + _get('/stream')
+                       + _get('/b'))
+    # /a must not wait behind a stream that could run forever: it goes out
+    # with the stream's first chunk, and the stream continues unbatched.
+    assert got[0].startswith(b'HTTP/1.1 200 OK')
+    assert b'/a' in got[0] and b'part' in got[0]
+    wire = b''.join(got)
+    assert wire.index(b'/a') < wire.index(b'part') < wire.index(b'end') \
+        < wire.index(b'/b')
@@ -1,6 +1,7 @@
 """Unit tests for the unified protocol registry."""
 import pytest
 
+from blackbull import BlackBull
 from blackbull.server.protocol_registry import (
     Http1Binding, Http2Binding, ProtocolDetector, ProtocolRegistry, RawBinding,
     _HTTP2_PREFACE_FIRST_LINE,
@@ -116,6 +117,22 @@ def test_register_raw_binding():
     assert 'echo' in r.raw_bindings
 
 
+def test_raw_handler_decorator_forwards_all_workers():
+    app = BlackBull()
+
+    @app.raw_handler('shared', port=9000, all_workers=True)
+    async def shared(reader, writer, ctx):
+        pass
+
+    @app.raw_handler('owned', port=9001)
+    async def owned(reader, writer, ctx):
+        pass
+
+    bindings = app._protocol_registry.raw_bindings
+    assert bindings['shared'].all_workers is True
+    assert bindings['owned'].all_workers is False
+
+
 def test_register_duplicate_name_raises():
     r = ProtocolRegistry()
     r.register('echo', _noop, port=9000)
@@ -0,0 +1,129 @@
+"""Raw ``re.Pattern`` routes — the combined matcher must answer exactly what
+the one-pattern-at-a-time scan answered.
+
+Every path below is resolved twice: by the router, and by a reference loop
+that runs each registered pattern in turn.  Whatever a pattern does to its
+neighbours in a shared alternation — clashing group names, backreferences,
+inline flags — must not change which route wins, its path params, or the
+405 ``Allow`` set.
+"""
+import re
+from http import HTTPMethod
+
+import pytest
+
+from blackbull.router import (
+    MethodNotApplicable, PathNotRegistered, Router, _literal_prefix,
+)
+from blackbull.utils import Scheme
+
+PATTERNS = [
+    (r'^/legacy/v1/item(?P<id>\d+)$', 'GET'),
+    (r'^/legacy/v1/item(?P<id>\d+)/edit$', 'POST'),
+    (r'^/legacy/v1/item(?P<id>\d+)/edit$', 'PUT'),
+    (r'^/legacy/v2/(?P<id>\w+)/(?P=id)$', 'GET'),       # named backreference
+    (r'^/twice/(\w+)/\1$', 'GET'),                       # numbered backreference
+    (r'(?i)^/Shout/(?P<word>\w+)$', 'GET'),             # inline global flag
+    (re.compile(r'^/caseless/(?P<id>\d+)$', re.IGNORECASE), 'GET'),
+    (re.compile(r'''^/verbose/ (?P<id>\d+)  # trailing comment''', re.VERBOSE), 'GET'),
+    (r'^/either/a$|^/either/b$', 'GET'),
+    (r'^/optional/s?lash/(?P<id>\d+)$', 'GET'),
+    (r'/unanchored/(?P<rest>.*)', 'GET'),
+    (r'^/legacy/v1/item7$', 'DELETE'),                  # shadowed on GET
+    (r'^/legacy/', 'PATCH'),                             # catch-all, last
+]
+
+PATHS = [
+    '/legacy/v1/item7', '/legacy/v1/item7/edit', '/legacy/v2/ab/ab',
+    '/legacy/v2/ab/cd', '/twice/x/x', '/twice/x/y', '/shout/hi', '/SHOUT/hi',
+    '/CASELESS/9', '/verbose/12', '/either/a', '/either/b', '/either/c',
+    '/optional/lash/1', '/optional/slash/1', '/unanchored/a/b', '/legacy/zzz',
+    '/nothing', '', 'no-slash',
+]
+
+
+def _router() -> Router:
+    router = Router()
+    for i, (pattern, method) in enumerate(PATTERNS):
+        if isinstance(pattern, str):
+            pattern = re.compile(pattern)
+
+        async def fn(conn, receive, send, i=i):
+            pass
+        fn.index = i
+        router[(pattern, HTTPMethod(method))] = fn
+    return router
+
+
+def _reference(router: Router, path: str, method: HTTPMethod):
+    allowed = set()
+    for (pattern, methods, _scheme), fn in router._raw_regex.items():
+        m = pattern.match(path)
+        if m is None:
+            continue
+        allowed.update(methods)
+        if method in methods:
+            return fn.index, m.groupdict()
+    return None, allowed
+
+
+def _resolve(router: Router, path: str, method: HTTPMethod):
+    try:
+        handler = router._resolve((path, method, Scheme.http))
+    except MethodNotApplicable as exc:
+        return None, set(exc.allowed_methods)
+    except PathNotRegistered:
+        return None, set()
+    if hasattr(handler, 'index'):
+        return handler.index, {}
+    fn, params = handler.__defaults__           # the path-param injector
+    return fn.index, params
+
+
+@pytest.mark.parametrize('method', [HTTPMethod.GET, HTTPMethod.POST,
+                                    HTTPMethod.PUT, HTTPMethod.PATCH])
+@pytest.mark.parametrize('path', PATHS)
+def test_matches_the_linear_scan(path, method):
+    router = _router()
+    assert _resolve(router, path, method) == _reference(router, path, method)
+    assert (path in router) == any(p.match(path) for p, *_ in router._raw_regex)
+
+
+def test_registration_order_wins_across_buckets():
+    router = Router()
+
+    async def broad(conn, receive, send):
+        pass
+
+    async def narrow(conn, receive, send):
+        pass
+
+    router[(re.compile(r'^/a/'), HTTPMethod.GET)] = broad
+    router[(re.compile(r'^/a/b/c$'), HTTPMethod.GET)] = narrow
+    assert router._resolve(('/a/b/c', HTTPMethod.GET, Scheme.http)) is broad
+
+
+def test_a_new_pattern_rebuilds_the_matcher():
+    router = _router()
+    assert '/late/1' not in router
+
+    async def late(conn, receive, send):
+        pass
+
+    router[(re.compile(r'^/late/\d$'), HTTPMethod.GET)] = late
+    assert '/late/1' in router
+
+
+@pytest.mark.parametrize('pattern, prefix', [
+    (r'^/legacy/v1/item(\d+)$', '/legacy/v1/'),
+    (r'\A/api/v2/users', '/api/v2/'),
+    (r'^/a\.b/c', '/a.b/'),
+    (r'^/a/bc?/', '/a/'),
+    (r'^/a/b{2}/', '/a/'),
+    (r'^/a|^/b', ''),
+    (r'^legacy', ''),
+    (r'(?i)^/a/', ''),
+    (r'^/\d+/', '/'),
+])
+def test_literal_prefix(pattern, prefix):
+    assert _literal_prefix(re.compile(pattern)) == prefix
@@ -367,6 +367,13 @@ class TestBlackBullStaticRegistration:
         app.static('/assets', str(static_dir))
         assert app._global_middlewares == []
 
+    async def test_static_precompress_registers_a_warmup_hook(self, static_dir):
+        from blackbull import BlackBull
+        app = BlackBull()
+        app.static('/assets', str(static_dir), cache=True, precompress=True)
+        assert len(app._warmup_hooks) == 1
+        await app._warmup_hooks[0](app)
+
     async def test_prefix_file_served_end_to_end(self, static_dir):
         """/assets/hello.txt is served through the route registered by static()."""
         from blackbull import BlackBull
@@ -531,6 +538,141 @@ class TestPrecompressedVariant:
         assert len(app._cache) == 1
 
 
+# ---------------------------------------------------------------------------
+# In-memory precompressed variants (``precompress=True``)
+# ---------------------------------------------------------------------------
+
+@pytest.fixture
+def text_dir(tmp_path: pathlib.Path) -> pathlib.Path:
+    (tmp_path / 'app.js').write_bytes(b'console.log("hi");\n' * 500)
+    (tmp_path / 'logo.png').write_bytes(b'\x89PNG' + b'x' * 4000)
+    (tmp_path / 'tiny.css').write_bytes(b'a{}')
+    return tmp_path
+
+
+async def _until_cached(app, key, timeout: float = 5.0):
+    import asyncio
+    for _ in range(int(timeout / 0.01)):
+        if key in app._cache:
+            return app._cache[key]
+        await asyncio.sleep(0.01)
+    raise AssertionError(f'{key!r} never cached')
+
+
+@pytest.mark.asyncio
+class TestPrecompressInMemory:
+    async def test_first_request_identity_then_variant(self, text_dir):
+        brotli = pytest.importorskip('brotli')
+        from blackbull.middleware.static import StaticFiles
+        app = StaticFiles(directory=str(text_dir), cache=True, precompress=True)
+        scope = lambda: _scope(path='/app.js', headers={'accept-encoding': 'gzip, br'})
+        start, body = await _collect(app, scope())
+        hdrs = _headers_of(start)
+        assert b'content-encoding' not in hdrs
+        assert hdrs[b'vary'] == b'Accept-Encoding'
+        path = str(text_dir / 'app.js')
+        await _until_cached(app, (path, b'br'))
+
+        start, body = await _collect(app, scope())
+        hdrs = _headers_of(start)
+        assert hdrs[b'content-encoding'] == b'br'
+        assert brotli.decompress(body) == (text_dir / 'app.js').read_bytes()
+        assert int(hdrs[b'content-length']) == len(body)
+        assert hdrs[b'etag'].endswith(b'-br"')
+
+    async def test_variant_304_on_its_own_etag(self, text_dir):
+        from blackbull.middleware.static import StaticFiles
+        app = StaticFiles(directory=str(text_dir), cache=True, precompress=True)
+        headers = {'accept-encoding': 'gzip'}
+        await _collect(app, _scope(path='/app.js', headers=headers))
+        await _until_cached(app, (str(text_dir / 'app.js'), b'gzip'))
+        start, _ = await _collect(app, _scope(path='/app.js', headers=headers))
+        etag = _headers_of(start)[b'etag'].decode()
+        start, _ = await _collect(app, _scope(
+            path='/app.js', headers={**headers, 'if-none-match': etag}))
+        assert start['status'] == 304
+
+    async def test_stale_variant_not_served_after_edit(self, text_dir):
+        import os
+        from blackbull.middleware.static import StaticFiles
+        app = StaticFiles(directory=str(text_dir), cache=True, precompress=True)
+        app._STAT_TTL_S = 0
+        headers = {'accept-encoding': 'gzip'}
+        await _collect(app, _scope(path='/app.js', headers=headers))
+        await _until_cached(app, (str(text_dir / 'app.js'), b'gzip'))
+        target = text_dir / 'app.js'
+        target.write_bytes(b'let changed = true;\n' * 400)
+        st = target.stat()
+        os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        start, body = await _collect(app, _scope(path='/app.js', headers=headers))
+        assert b'content-encoding' not in _headers_of(start)
+        assert body == target.read_bytes()
+
+    async def test_ineligible_files_are_left_alone(self, text_dir):
+        from blackbull.middleware.static import StaticFiles
+        app = StaticFiles(directory=str(text_dir), cache=True, precompress=True)
+        for name in ('/logo.png', '/tiny.css'):
+            start, _ = await _collect(app, _scope(
+                path=name, headers={'accept-encoding': 'br'}))
+            assert b'vary' not in _headers_of(start)
+        assert not app._precompressing
+        start, _ = await _collect(app, _scope(
+            path='/app.js', headers={'accept-encoding': 'br', 'range': 'bytes=0-9'}))
+        assert start['status'] == 206 and not app._precompressing
+
+    async def test_precompress_all_and_budget(self, text_dir):
+        from blackbull.middleware.static import StaticFiles
+        app = StaticFiles(directory=str(text_dir), cache=True, precompress=True)
+        assert await app.precompress_all() == len(app._precompressors)
+        assert app._cache_bytes == sum(len(e[2]) for e in app._cache.values())
+        small = StaticFiles(directory=str(text_dir), cache=True, precompress=True,
+                            cache_max_bytes=12_000)
+        await small.precompress_all()
+        assert small._cache_bytes <= 12_000
+
+    async def test_precompress_all_stops_at_the_entry_cap(self, tmp_path):
+        from blackbull.middleware.static import StaticFiles
+        for i in range(5):
+            (tmp_path / f'{i}.js').write_bytes(b'console.log("hi");\n' * 500)
+        app = StaticFiles(directory=str(tmp_path), cache=True, precompress=True)
+        per_file = 1 + len(app._precompressors)
+        app._CACHE_MAX_ENTRIES = 2 * per_file + 1
+        # Two files fit whole; the third would evict the first's variants.
+        assert await app.precompress_all() == 2 * len(app._precompressors)
+        assert len(app._cache) == 2 * per_file
+
+    async def test_precompress_all_skips_files_with_every_sibling(self, text_dir):
+        from blackbull.middleware.static import StaticFiles
+        app = StaticFiles(directory=str(text_dir), cache=True, precompress=True)
+        for enc, suffix in app._ENCODING_SUFFIXES:
+            (text_dir / f'app.js{suffix}').write_bytes(b'x')
+        assert await app.precompress_all() == 0
+        assert not app._cache
+
+    async def test_precompress_all_keys_match_resolved_request_paths(self, tmp_path):
+        import os
+        from blackbull.middleware.static import StaticFiles
+        root = tmp_path / 'site'
+        root.mkdir()
+        (root / 'app.js').write_bytes(b'console.log("hi");\n' * 500)
+        (root / 'alias.js').symlink_to(root / 'app.js')
+        (tmp_path / 'secret.js').write_bytes(b'let secret = 1;\n' * 500)
+        (root / 'leak.js').symlink_to(tmp_path / 'secret.js')
+        app = StaticFiles(directory=str(root), cache=True, precompress=True)
+        # One file, once: the alias resolves to it, the leak out of the root.
+        assert await app.precompress_all() == len(app._precompressors)
+        real = os.path.realpath(root / 'app.js')
+        assert {k if isinstance(k, str) else k[0] for k in app._cache} == {real}
+        start, _ = await _collect(app, _scope(
+            path='/alias.js', headers={'accept-encoding': 'gzip'}))
+        assert _headers_of(start)[b'content-encoding'] == b'gzip'
+
+    async def test_requires_cache(self, text_dir):
+        from blackbull.middleware.static import StaticFiles
+        with pytest.raises(ValueError):
+            StaticFiles(directory=str(text_dir), precompress=True)
+
+
 # ---------------------------------------------------------------------------
 # ``http.response.pathsend`` extension wiring
 # ---------------------------------------------------------------------------
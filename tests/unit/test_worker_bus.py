@@ -0,0 +1,231 @@
+"""The cross-worker bus (``blackbull.server.bus``).
+
+Local delivery is pinned in-process.  Crossing workers is pinned with a real
+forked child attached as the other worker, because what is under test is
+exactly what a fork inherits: the socket pairs, and nothing else.
+"""
+import asyncio
+import multiprocessing
+import socket
+
+import pytest
+
+from blackbull import Broadcast, Connection, Headers, WebSocket
+from blackbull.server import bus
+from blackbull.server.bus import MAX_PAYLOAD, WorkerBus
+from blackbull.websocket import mark_handshake_accepted
+
+_FORK = multiprocessing.get_context('fork')
+
+
+@pytest.fixture
+def worker_bus():
+    wb = WorkerBus(2)
+    yield wb
+    wb.close()
+
+
+def test_local_publish_reaches_subscribers_with_the_payload_type():
+    got = []
+    unsubscribe = bus.subscribe('t', lambda ch, p: got.append((ch, p)))
+    try:
+        bus.publish('t', 'text')
+        bus.publish('t', b'bytes')
+        bus.publish('other', 'ignored')
+    finally:
+        unsubscribe()
+    bus.publish('t', 'after')
+    assert got == [('t', 'text'), ('t', b'bytes')]
+    unsubscribe()     # a second call is harmless
+
+
+def test_oversized_payload_is_refused_even_without_workers():
+    with pytest.raises(ValueError, match='limit'):
+        bus.publish('t', b'x' * (MAX_PAYLOAD + 1))
+
+
+def test_a_failing_subscriber_does_not_stop_the_rest():
+    got = []
+
+    def bad(_ch, _p):
+        raise RuntimeError('boom')
+
+    undo = [bus.subscribe('t', bad),
+            bus.subscribe('t', lambda ch, p: got.append(p))]
+    try:
+        bus.publish('t', 'x')
+    finally:
+        for u in undo:
+            u()
+    assert got == ['x']
+
+
+@pytest.mark.asyncio
+async def test_one_loop_turn_of_publishes_is_one_datagram(worker_bus):
+    worker_bus.attach(0)
+    try:
+        for i in range(200):
+            bus.publish('burst', f'm{i}', local=False)
+        await asyncio.sleep(0)
+    finally:
+        worker_bus.detach()
+    peer_recv = worker_bus._pairs[1][0]
+    peer_recv.setblocking(False)
+    datagram = peer_recv.recv(1 << 20)
+    with pytest.raises(BlockingIOError):
+        peer_recv.recv(1 << 20)
+
+    got = []
+    unsubscribe = bus.subscribe('burst', lambda ch, p: got.append(p))
+    try:
+        WorkerBus._dispatch(datagram)
+    finally:
+        unsubscribe()
+    assert got == [f'm{i}' for i in range(200)]
+
+
+@pytest.mark.asyncio
+async def test_targeted_publish_reaches_only_the_named_workers():
+    wb = WorkerBus(3)
+    wb.attach(0)
+    try:
+        bus.publish('t', 'all', local=False)
+        bus.publish('t', 'to-2', local=False, workers=[2])
+        bus.publish('t', 'to-nobody', local=False, workers=[0])   # only self
+        await asyncio.sleep(0)
+    finally:
+        wb.detach()
+    got = {}
+    for worker in (1, 2):
+        recv = wb._pairs[worker][0]
+        recv.setblocking(False)
+        seen = got[worker] = []
+        unsubscribe = bus.subscribe('t', lambda ch, p, seen=seen: seen.append(p))
+        try:
+            WorkerBus._dispatch(recv.recv(1 << 20))
+        finally:
+            unsubscribe()
+        with pytest.raises(BlockingIOError):
+            recv.recv(1 << 20)
+    wb.close()
+    assert got == {1: ['all'], 2: ['all', 'to-2']}
+
+
+@pytest.mark.asyncio
+async def test_send_socket_hands_a_live_connection_to_the_peer(worker_bus):
+    client, server = socket.socketpair()
+    worker_bus.attach(0)
+    try:
+        bus.publish('t', 'before', local=False)
+        bus.send_socket(1, 'handoff', b'prefix', server)
+    finally:
+        worker_bus.detach()
+    server.close()          # the peer's copy keeps the connection open
+    recv = worker_bus._pairs[1][0]
+    recv.setblocking(False)
+    got = []
+    undo = [bus.subscribe('t', lambda ch, p: got.append(p)),
+            bus.accept_sockets('handoff',
+                               lambda ch, p, sock: got.append((p, sock)))]
+    try:
+        worker_bus._on_readable(recv)
+    finally:
+        for u in undo:
+            u()
+    assert got[0] == 'before'       # published earlier, so delivered first
+    (payload, adopted), = got[1:]
+    assert payload == b'prefix'
+    client.sendall(b'ping')
+    assert adopted.recv(4) == b'ping'
+    adopted.close()
+    client.close()
+
+
+def test_send_socket_needs_an_attached_bus():
+    a, b = socket.socketpair()
+    try:
+        with pytest.raises(RuntimeError):
+            bus.send_socket(1, 'handoff', b'', a)
+    finally:
+        a.close()
+        b.close()
+
+
+def _child(wb: WorkerBus, ready, payloads) -> None:
+    async def main():
+        wb.attach(1)
+        ready.wait(5)
+        hub = Broadcast('chat')
+        for payload in payloads:
+            if payload == 'via-hub':
+                hub.publish_text('room', payload)
+            else:
+                bus.publish('news', payload)
+        await asyncio.sleep(0.05)
+    asyncio.run(main())
+
+
+def test_publish_in_one_worker_reaches_another(worker_bus):
+    ready = _FORK.Event()
+    child = _FORK.Process(target=_child,
+                          args=(worker_bus, ready, ['hello', b'\x00\x01', 'via-hub']))
+    child.start()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        news = []
+        done = loop.create_future()
+
+        def on_news(_ch, payload):
+            news.append(payload)
+            if len(news) == 2:
+                done.set_result(None)
+
+        conn = Connection(method='GET', path='/ws', raw_path=b'/ws',
+                          headers=Headers([]), type='websocket')
+        mark_handshake_accepted(conn)
+        sent = []
+        hub_done = loop.create_future()
+
+        async def send(message, *_):
+            sent.append(message.text)
+            hub_done.set_result(None)
+
+        async def receive():
+            raise AssertionError('not used')
+
+        hub = Broadcast('chat')
+        ws = WebSocket(conn, receive, send)
+        worker_bus.attach(0)
+        unsubscribe = bus.subscribe('news', on_news)
+        try:
+            with hub.subscribe(ws, 'room'):
+                ready.set()
+                await asyncio.wait_for(asyncio.gather(done, hub_done), 5)
+        finally:
+            unsubscribe()
+            worker_bus.detach()
+        return news, sent
+
+    try:
+        news, sent = asyncio.run(main())
+    finally:
+        child.join(5)
+    assert child.exitcode == 0
+    assert news == ['hello', b'\x00\x01']
+    assert sent == ['via-hub']
+
+
+def test_named_hub_only_listens_for_channels_it_has_members_for():
+    hub = Broadcast('lobby-test')
+    conn = Connection(method='GET', path='/ws', raw_path=b'/ws',
+                      headers=Headers([]), type='websocket')
+    mark_handshake_accepted(conn)
+
+    async def noop(*_):
+        pass
+
+    ws = WebSocket(conn, noop, noop)
+    with hub.subscribe(ws, 'a'):
+        assert 'lobby-test:a' in bus._subscribers
+    assert 'lobby-test:a' not in bus._subscribers
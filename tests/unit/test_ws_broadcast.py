@@ -0,0 +1,252 @@
+"""``Broadcast`` — one encode per message, however many subscribers.
+
+Two layers, as for the WebSocket object itself:
+
+- the sender, where "encode once" actually happens: a message carrying a
+  ``frames`` cache must put the same bytes on the wire as a plain send, must
+  hand every connection of one shape the *same* bytes objects, and — under
+  permessage-deflate with context takeover — must leave each connection's own
+  deflate stream decodable by its peer; and
+- the hub, driven against scripted send channels: fan-out, membership, and
+  what happens to a subscriber that cannot keep up.
+"""
+import asyncio
+import json
+import os
+import zlib
+
+import pytest
+
+from blackbull import Broadcast, Connection, Headers, WebSocket
+from blackbull.native import NativeWSMessage
+from blackbull.server.permessage_deflate import OutboundCompressor
+from blackbull.server.sender import AbstractWriter, WebSocketSender
+from blackbull.server.ws_codec import WSOpcode
+from blackbull.websocket import mark_handshake_accepted
+
+_TAIL = b'\x00\x00\xff\xff'
+
+
+class _Writer(AbstractWriter):
+    def __init__(self):
+        self.parts = []
+
+    async def write(self, data: bytes) -> None:
+        self.parts.append(data)
+
+    async def writelines(self, parts) -> None:
+        self.parts.extend(parts)
+
+    async def close(self) -> None:
+        pass
+
+
+def _shared(text):
+    message = NativeWSMessage.text_message(text)
+    message.frames = {}
+    return message
+
+
+def _split(parts):
+    """``(rsv1, opcode, payload)`` of the single frame in written *parts*."""
+    raw = b''.join(parts)
+    rsv1 = bool(raw[0] & 0x40)
+    opcode = raw[0] & 0x0F
+    length = raw[1] & 0x7F
+    offset = 2
+    if length == 126:
+        length, offset = int.from_bytes(raw[2:4], 'big'), 4
+    elif length == 127:
+        length, offset = int.from_bytes(raw[2:10], 'big'), 10
+    return rsv1, opcode, raw[offset:offset + length]
+
+
+# ---------------------------------------------------------------------------
+# Sender
+# ---------------------------------------------------------------------------
+
+@pytest.mark.asyncio
+async def test_shared_message_puts_plain_send_bytes_on_the_wire():
+    plain, shared = _Writer(), _Writer()
+    await WebSocketSender(plain)(NativeWSMessage.text_message('héllo' * 50))
+    await WebSocketSender(shared)(_shared('héllo' * 50))
+    assert b''.join(shared.parts) == b''.join(plain.parts)
+
+
+@pytest.mark.asyncio
+async def test_connections_of_one_shape_share_the_frame_objects():
+    # Above the vectored-write threshold, so the payload reaches the writer
+    # as its own part rather than joined to the header.
+    message = _shared('x' * 40_000)
+    writers = [_Writer() for _ in range(3)]
+    for writer in writers:
+        await WebSocketSender(writer)(message)
+    assert all(w.parts[1] is writers[0].parts[1] for w in writers)
+    assert set(message.frames) == {'raw', 0}
+
+
+@pytest.mark.asyncio
+async def test_deflate_windows_get_one_compressed_entry_each():
+    # Hex of random bytes only halves under deflate, so the compressed
+    # payload is still over the vectored-write threshold.
+    message = _shared(os.urandom(40_000).hex())
+    outs = []
+    for wbits in (15, 15, 10):
+        writer = _Writer()
+        sender = WebSocketSender(
+            writer, compressor=OutboundCompressor(wbits, reset_per_message=False))
+        await sender(message)
+        outs.append(writer.parts)
+    assert outs[0][1] is outs[1][1]
+    assert set(message.frames) == {'raw', 15, 10}
+    rsv1, opcode, payload = _split(outs[2])
+    assert rsv1 and opcode == WSOpcode.TEXT
+    assert (zlib.decompressobj(wbits=-10).decompress(payload + _TAIL)
+            == message.frames['raw'])
+
+
+@pytest.mark.asyncio
+async def test_context_takeover_stream_stays_decodable_around_a_shared_message():
+    # The peer keeps one inflater for the whole connection.  A shared message
+    # lands in its window without passing through this connection's deflater,
+    # so the deflater must not back-reference across it afterwards.
+    writer = _Writer()
+    sender = WebSocketSender(
+        writer, compressor=OutboundCompressor(15, reset_per_message=False))
+    peer = zlib.decompressobj(wbits=-15)
+    texts = ['the quick brown fox ' * 20, 'jumps over the lazy dog ' * 20,
+             'the quick brown fox ' * 20]
+    for i, text in enumerate(texts):
+        writer.parts.clear()
+        await sender(_shared(text) if i == 1 else NativeWSMessage.text_message(text))
+        rsv1, _, payload = _split(writer.parts)
+        assert rsv1
+        assert peer.decompress(payload + _TAIL) == text.encode()
+
+
+# ---------------------------------------------------------------------------
+# Hub
+# ---------------------------------------------------------------------------
+
+class _Peer:
+    """A send channel that records messages, and can be made to stall."""
+
+    def __init__(self):
+        self.sent = []
+        self.gate: asyncio.Event | None = None
+
+    async def send(self, message, *_args):
+        if self.gate is not None:
+            await self.gate.wait()
+        self.sent.append(message)
+
+    async def receive(self):
+        raise AssertionError('not used')
+
+
+def _conn() -> Connection:
+    return Connection(method='GET', path='/ws', raw_path=b'/ws',
+                      headers=Headers([]), type='websocket')
+
+
+def _accepted_ws() -> tuple[WebSocket, _Peer]:
+    conn = _conn()
+    mark_handshake_accepted(conn)
+    peer = _Peer()
+    return WebSocket(conn, peer.receive, peer.send), peer
+
+
+@pytest.mark.asyncio
+async def test_publish_hands_every_subscriber_the_same_message():
+    hub = Broadcast()
+    pairs = [_accepted_ws() for _ in range(5)]
+    for ws, _ in pairs:
+        hub.subscribe(ws, 'room')
+    assert hub.publish_json('room', {'n': 1}) == 5
+    await asyncio.sleep(0)
+    first = pairs[0][1].sent[0]
+    assert json.loads(first.text) == {'n': 1}
+    assert all(peer.sent == [first] for _, peer in pairs)
+    assert first.frames == {}
+
+
+@pytest.mark.asyncio
+async def test_membership_is_per_channel():
+    hub = Broadcast()
+    a, peer_a = _accepted_ws()
+    b, peer_b = _accepted_ws()
+    hub.subscribe(a, 'red', 'blue')
+    with hub.subscribe(b, 'blue'):
+        assert hub.subscriber_count('blue') == 2
+        hub.publish_text('red', 'r')
+        hub.publish_text('blue', 'b')
+        await asyncio.sleep(0)
+    assert hub.subscriber_count('blue') == 1
+    assert [m.text for m in peer_a.sent] == ['r', 'b']
+    assert [m.text for m in peer_b.sent] == ['b']
+    hub.unsubscribe(a)
+    assert hub.publish_text('red', 'gone') == 0
+
+
+@pytest.mark.asyncio
+async def test_subscribe_requires_an_accepted_connection():
+    peer = _Peer()
+    ws = WebSocket(_conn(), peer.receive, peer.send)
+    with pytest.raises(RuntimeError, match='accept'):
+        Broadcast().subscribe(ws, 'room')
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_drops_oldest_and_does_not_hold_up_the_rest():
+    hub = Broadcast(queue_depth=2)
+    slow, slow_peer = _accepted_ws()
+    fast, fast_peer = _accepted_ws()
+    slow_peer.gate = asyncio.Event()
+    hub.subscribe(slow, 'room')
+    hub.subscribe(fast, 'room')
+    for i in range(5):
+        hub.publish_text('room', str(i))
+        await asyncio.sleep(0)
+    assert [m.text for m in fast_peer.sent] == ['0', '1', '2', '3', '4']
+    # '0' is in flight, held at the gate; of the rest, the two newest survive.
+    assert hub.dropped == 2
+    slow_peer.gate.set()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    assert [m.text for m in slow_peer.sent] == ['0', '3', '4']
+
+
+@pytest.mark.asyncio
+async def test_close_policy_evicts_the_slow_subscriber():
+    hub = Broadcast(queue_depth=1, on_overflow='close')
+    ws, peer = _accepted_ws()
+    peer.gate = asyncio.Event()
+    hub.subscribe(ws, 'room')
+    for i in range(3):
+        hub.publish_text('room', str(i))
+        await asyncio.sleep(0)
+    assert hub.subscriber_count('room') == 0
+    peer.gate.set()
+    for _ in range(5):
+        await asyncio.sleep(0)
+    close = peer.sent[-1]
+    assert close.kind == NativeWSMessage.CLOSE and close.code == 1013
+    assert ws.close_code == 1013
+
+
+@pytest.mark.asyncio
+async def test_closed_connection_is_unsubscribed_on_next_publish():
+    hub = Broadcast()
+    ws, peer = _accepted_ws()
+    hub.subscribe(ws, 'room')
+    await ws.close()
+    assert hub.publish_text('room', 'late') == 0
+    assert hub.subscriber_count('room') == 0
+    assert [m.kind for m in peer.sent] == [NativeWSMessage.CLOSE]
+
+
+def test_constructor_validates_its_policy():
+    with pytest.raises(ValueError):
+        Broadcast(on_overflow='block')
+    with pytest.raises(ValueError):
+        Broadcast(queue_depth=0)
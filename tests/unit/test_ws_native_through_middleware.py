@@ -39,6 +39,11 @@ _FACTORIES = {
     # so the coverage check below is a real check rather than a tautology.
     'StaticFiles': None,
     'TrustedProxy': None,
+    # Storage for ``Cache``, not middleware: exported beside it, never
+    # installed with ``app.use``.
+    'CacheBackend': None,
+    'MemoryBackend': None,
+    'SharedMemoryBackend': None,
 }
 
 MIDDLEWARE = [(name, f) for name, f in _FACTORIES.items() if f is not None]
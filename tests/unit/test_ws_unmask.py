@@ -0,0 +1,89 @@
+"""WebSocket payload unmasking (RFC 6455 §5.3) — every path, one answer.
+
+``unmask`` picks between the bignum XOR, stride-4 ``translate`` and NumPy by
+size, and ``read_payload`` unmasks inside the H/1.1 reader's own buffer when
+it can.  Each of those must agree byte for byte with the per-byte definition,
+at odd lengths and odd offsets — a stride slice that starts on the wrong key
+byte is still a perfectly plausible-looking payload.
+"""
+import asyncio
+import os
+
+import pytest
+
+from blackbull.server import ws_codec
+from blackbull.server.connection_protocol import ConnectionProtocol
+from blackbull.server.ws_codec import read_payload, unmask, unmask_into
+
+_SIZES = [0, 1, 3, 4, 5, 125, 511, 512, 513, 4095, 4096, 4099, 65537]
+_MASK = b'\x12\x34\xab\xcd'
+
+
+def _reference(data: bytes, mask: bytes) -> bytes:
+    return bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+
+
+@pytest.fixture(params=['pure', 'numpy'])
+def backend(request, monkeypatch):
+    if request.param == 'pure':
+        monkeypatch.setattr(ws_codec, '_np', False)
+    else:
+        monkeypatch.setattr(ws_codec, '_np', pytest.importorskip('numpy'))
+    return request.param
+
+
+@pytest.mark.parametrize('n', _SIZES)
+def test_unmask_matches_reference(backend, n):
+    data = os.urandom(n)
+    assert unmask(data, _MASK) == _reference(data, _MASK)
+
+
+@pytest.mark.parametrize('start,end', [(3, 3 + 4101), (1, 1 + 600), (7, 7 + 9)])
+def test_unmask_into_touches_only_the_span(backend, start, end):
+    data = os.urandom(end + 5)
+    buf = bytearray(data)
+    unmask_into(buf, start, end, _MASK)
+    assert buf[:start] == data[:start] and buf[end:] == data[end:]
+    assert buf[start:end] == _reference(data[start:end], _MASK)
+
+
+def test_masking_is_its_own_inverse():
+    data = os.urandom(1000)
+    assert unmask(unmask(data, _MASK), _MASK) == data
+
+
+class _NullTransport:
+    def pause_reading(self): pass
+    def resume_reading(self): pass
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize('n', [600, 4099, 300_000])
+async def test_read_payload_unmasks_in_the_receive_buffer(n):
+    proto = ConnectionProtocol()
+    proto.connection_made(_NullTransport())
+    payload = os.urandom(n)
+    if n < 65536:
+        field, ext = 126, n.to_bytes(2, 'big')
+    else:
+        field, ext = 127, n.to_bytes(8, 'big')
+    # A leading byte puts the payload at an odd offset in the buffer.
+    wire = b'!' + ext + _MASK + _reference(payload, _MASK) + b'tail'
+
+    async def feed():
+        pos = 0
+        while pos < len(wire):
+            view = proto.get_buffer(len(wire) - pos)
+            k = min(len(view), len(wire) - pos, 65536)
+            view[:k] = wire[pos:pos + k]
+            proto.buffer_updated(k)
+            pos += k
+            await asyncio.sleep(0)
+
+    feeder = asyncio.create_task(feed())
+    reader = proto.reader
+    assert await reader.readexactly(1) == b'!'
+    got = await read_payload(reader, True, field)
+    await feeder
+    assert got == payload
+    assert await reader.readexactly(4) == b'tail'